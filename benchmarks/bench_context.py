@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark dell'assemblaggio del contesto per le richieste al provider
+
+Genera un repository di N moduli con nomi composti da un vocabolario e
+import tra moduli, costruisce indice e grafo e misura il tempo di
+ContextBuilder.build: la costruzione della mappa delle parole (una volta,
+come fa la TUI dopo l'indice), richieste tutte diverse, richieste ripetute
+servite dalla cache e una richiesta dopo la modifica di un file.
+Obiettivo: meno di 50 ms per richiesta anche su repository grandi.
+
+Uso: python benchmarks/bench_context.py [--files N] [--queries Q] [--budget T]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fylia.context import ContextBuilder
+from fylia.deps import DependencyGraph
+from fylia.index import SymbolIndex
+
+WORDS = ("cache file index symbol graph parser token buffer stream request response "
+         "config user session patch edit undo journal store table tree node walker "
+         "watcher history provider context budget module import render panel chat").split()
+
+
+def camel(words) -> str:
+    return "".join(w.capitalize() for w in words)
+
+
+def make_repo(root: Path, files: int, seed: int = 0) -> None:
+    """Moduli con classi e funzioni dai nomi composti e import verso altri moduli"""
+    rng = random.Random(seed)
+    per_pkg = 50
+    for i in range(files):
+        pkg = root / "app" / f"pkg{i // per_pkg}"
+        pkg.mkdir(parents=True, exist_ok=True)
+        (root / "app" / "__init__.py").touch()
+        (pkg / "__init__.py").touch()
+        lines = []
+        for j in rng.sample(range(files), min(3, files)):
+            lines.append(f"from app.pkg{j // per_pkg}.mod{j} import *")
+        for c in range(3):
+            words = rng.sample(WORDS, 2)
+            lines += ["", "", f"class {camel(words)}{i}_{c}:"]
+            for m in range(4):
+                method = "_".join(rng.sample(WORDS, 2))
+                lines += [f"    def {method}(self, x):", f"        return x + {m}", ""]
+        for f in range(3):
+            lines += ["", f"def {'_'.join(rng.sample(WORDS, 3))}_{i}(a, b):", "    return a * b"]
+        (pkg / f"mod{i}.py").write_text("\n".join(lines) + "\n")
+
+
+def percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=5000)
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--budget', type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    prompts = [f"perché {camel(rng.sample(WORDS, 2))} non aggiorna {' '.join(rng.sample(WORDS, 2))}?"
+               for _ in range(args.queries)]
+
+    tmpdir = Path(tempfile.mkdtemp(prefix="fylia-bench-"))
+    try:
+        make_repo(tmpdir, args.files)
+        start = time.perf_counter()
+        index = SymbolIndex(str(tmpdir), use_cache=False).update()
+        graph = DependencyGraph(str(tmpdir), use_cache=False, use_git=False).update()
+        setup_time = time.perf_counter() - start
+        builder = ContextBuilder(index, graph, budget=args.budget)
+        start = time.perf_counter()
+        builder.refresh()
+        refresh_time = time.perf_counter() - start
+
+        first = builder.build(prompts[0])
+        cold, warm, tokens = [], [], []
+        for prompt in prompts[1:]:
+            packed = builder.build(prompt)
+            cold.append(packed.elapsed)
+            tokens.append(packed.tokens)
+            warm.append(builder.build(prompt).elapsed)
+
+        # Un file cambiato: si aggiungono solo i suoi nomi alla mappa delle parole
+        changed = tmpdir / "app" / "pkg0" / "mod0.py"
+        changed.write_text(changed.read_text() + "\n\ndef nuova_funzione_cache():\n    pass\n")
+        index.update_files(["app/pkg0/mod0.py"])
+        after_change = builder.build(prompts[1]).elapsed
+
+        symbols = len(index.definition_names())
+        print(f"{args.files} moduli, {symbols} nomi distinti, {graph.stats()['edges']} import "
+              f"(indice e grafo in {setup_time:.1f} s)\n")
+        print(f"{'mappa delle parole':<34}{refresh_time * 1000:9.1f} ms")
+        print(f"{'prima richiesta':<34}{first.elapsed * 1000:9.1f} ms")
+        print(f"{'richieste nuove, mediana':<34}{percentile(cold, 0.5) * 1000:9.1f} ms")
+        print(f"{'richieste nuove, p95':<34}{percentile(cold, 0.95) * 1000:9.1f} ms")
+        print(f"{'richieste nuove, massimo':<34}{max(cold) * 1000:9.1f} ms")
+        print(f"{'richieste ripetute (cache)':<34}{percentile(warm, 0.5) * 1000:9.3f} ms")
+        print(f"{'dopo la modifica di un file':<34}{after_change * 1000:9.1f} ms")
+        print(f"\nContesto medio: {sum(tokens) / len(tokens):.0f} token stimati "
+              f"(budget {args.budget}), {len(first.files)} file nella prima richiesta")
+        print(f"Obiettivo 50 ms: {'raggiunto' if percentile(cold, 0.95) < 0.05 else 'NON raggiunto'} (p95)")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark del grafo delle dipendenze (fylia deps)
+
+Crea un progetto sintetico con N moduli che si importano a caso, poi misura
+la costruzione del grafo, l'aggiornamento dopo la modifica di un solo file
+(confrontato con la ricostruzione completa) e le interrogazioni: dipendenze
+inverse, chiusura transitiva e cicli.
+
+Uso: python benchmarks/bench_deps.py [--modules N] [--imports K]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fylia.deps import DependencyGraph
+
+
+def make_project(root: Path, modules: int, imports: int, per_pkg: int = 50, seed: int = 0) -> list:
+    """Crea `modules` moduli in pacchetti di app/, ognuno con `imports` import interni"""
+    rng = random.Random(seed)
+    names = [f"app.pkg{i // per_pkg}.mod{i}" for i in range(modules)]
+    (root / "app").mkdir()
+    (root / "app" / "__init__.py").write_text("")
+    for i, name in enumerate(names):
+        pkg_dir = root / "app" / f"pkg{i // per_pkg}"
+        if not pkg_dir.exists():
+            pkg_dir.mkdir()
+            (pkg_dir / "__init__.py").write_text("")
+        lines = ["import os", "from typing import List"]
+        for target in rng.sample(names, imports):
+            package, _, module = target.rpartition('.')
+            lines.append(f"from {package} import {module}")
+        (pkg_dir / f"mod{i}.py").write_text("\n".join(lines) + "\n\n\ndef f():\n    pass\n")
+    return [f"app/pkg{i // per_pkg}/mod{i}.py" for i in range(modules)]
+
+
+def timed(fn, repeat: int = 5):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--modules', type=int, default=5000)
+    parser.add_argument('--imports', type=int, default=5)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="fylia-bench-")
+    try:
+        root = Path(tmpdir)
+        paths = make_project(root, args.modules, args.imports)
+
+        build_time, graph = timed(lambda: DependencyGraph(tmpdir, use_git=False).update(), repeat=3)
+        stats = graph.stats()
+
+        # Modifica di un solo file: a ogni giro aggiunge o toglie un import
+        edited = root / paths[0]
+        source = edited.read_text()
+        extra = "from app.pkg0 import mod1\n"
+        toggle = [False]
+
+        def edit_and_update():
+            toggle[0] = not toggle[0]
+            edited.write_text(extra + source if toggle[0] else source)
+            return graph.update_files({paths[0]})
+        update_time, touched = timed(edit_and_update)
+
+        target = paths[len(paths) // 2]
+        reverse_time, users = timed(lambda: graph.dependents(target))
+
+        def closure():
+            graph._closures.clear()
+            return graph.dependencies(paths[0], transitive=True)
+        closure_time, reachable = timed(closure)
+        cached_time, _ = timed(lambda: graph.dependencies(paths[0], transitive=True))
+        cycles_time, cycles = timed(graph.cycles, repeat=3)
+
+        print(f"Progetto: {stats['files']} file, {stats['edges']} dipendenze interne "
+              f"(CSR: {stats['csr_bytes'] / 1024:.0f} KiB)\n")
+        print(f"{'costruzione completa (con cache)':<36}{build_time * 1000:9.1f} ms")
+        print(f"{'aggiornamento di un file':<36}{update_time * 1000:9.1f} ms  ({len(touched)} file toccati)")
+        print(f"{'dipendenze inverse':<36}{reverse_time * 1e6:9.1f} µs  ({len(users)} file)")
+        print(f"{'chiusura transitiva':<36}{closure_time * 1000:9.1f} ms  ({len(reachable)} file)")
+        print(f"{'chiusura transitiva (memorizzata)':<36}{cached_time * 1e6:9.1f} µs")
+        print(f"{'cicli (Tarjan)':<36}{cycles_time * 1000:9.1f} ms  "
+              f"({len(cycles)} cicli, il più grande con {len(cycles[0]) if cycles else 0} file)")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark del calcolo dei diff su file grandi
+
+Genera un sorgente sintetico (default 100.000 righe), ne crea una versione
+modificata in punti sparsi e confronta fylia.diff.unified_diff (histogram
+e Myers) con difflib.unified_diff. Verifica anche che i diff prodotti da
+fylia, riapplicati, ricostruiscano il file modificato.
+
+Uso: python benchmarks/bench_diff.py [--lines N] [--edits N]
+"""
+
+import argparse
+import difflib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fylia.diff import unified_diff
+from fylia.unidiff import apply_hunks, parse_patch
+
+
+def make_source(lines: int, seed: int = 0) -> list:
+    """Righe simili a codice, con molte righe ripetute (vuote, parentesi, return)"""
+    rng = random.Random(seed)
+    common = ["\n", "    return result\n", "}\n", "        pass\n", "    else:\n"]
+    out = []
+    for i in range(lines):
+        if rng.random() < 0.3:
+            out.append(rng.choice(common))
+        else:
+            out.append(f"    valore_{i} = calcola({rng.randint(0, 999)})\n")
+    return out
+
+
+def make_edits(lines: list, edits: int, seed: int = 1) -> list:
+    """Modifica, inserisce e rimuove righe in punti casuali"""
+    rng = random.Random(seed)
+    new = list(lines)
+    for _ in range(edits):
+        pos = rng.randrange(len(new))
+        choice = rng.random()
+        if choice < 0.4:
+            new[pos] = new[pos].upper()
+        elif choice < 0.7:
+            new.insert(pos, f"    # riga aggiunta {pos}\n")
+        else:
+            del new[pos]
+    return new
+
+
+def timed(func, repeat: int):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lines', type=int, default=100000)
+    parser.add_argument('--edits', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    old = make_source(args.lines)
+    new = make_edits(old, args.edits)
+    print(f"File: {len(old)} righe, {args.edits} modifiche\n")
+
+    results = {}
+    for algorithm in ('histogram', 'myers'):
+        elapsed, diff = timed(lambda: unified_diff(old, new, 'a/f', 'b/f', algorithm=algorithm), args.repeat)
+        results[algorithm] = diff
+        print(f"fylia {algorithm:<10} {elapsed * 1000:9.1f} ms  {len(diff):7d} righe di diff")
+
+    elapsed, diff = timed(lambda: list(difflib.unified_diff(old, new, 'a/f', 'b/f')), args.repeat)
+    print(f"difflib          {elapsed * 1000:9.1f} ms  {len(diff):7d} righe di diff")
+
+    expected = "".join(new).encode()
+    for algorithm, diff in results.items():
+        out = io.BytesIO()
+        patch = "\n".join(diff) + "\n"
+        apply_hunks(io.BytesIO("".join(old).encode()), out, parse_patch(patch)[0].hunks, fuzz=0, max_offset=0)
+        print(f"\nRiapplicazione {algorithm}: {'ok' if out.getvalue() == expected else 'ERRATA'}", end="")
+    print()
+
+
+if __name__ == '__main__':
+    main()
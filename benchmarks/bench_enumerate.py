@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark dell'elenco dei file in un repository git
+
+Crea un repository con N file Python tracciati e una cartella build/
+esclusa da .gitignore, poi confronta la visita completa (walk_project)
+con l'elenco basato su .git/index e .gitignore, senza cache e con la
+cache degli elenchi delle cartelle. git serve solo per creare il repository.
+
+Uso: python benchmarks/bench_enumerate.py [--py-files N] [--build-files N]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fylia.gitindex import GitEnumerator
+from fylia.walker import DEFAULT_IGNORE_DIRS, DEFAULT_IGNORE_FILES, walk_project
+from synthrepo import make_python_tree
+
+
+def make_git_repo(root: Path, py_files: int, build_files: int) -> None:
+    make_python_tree(root, py_files)
+    build = root / "build" / "lib"
+    build.mkdir(parents=True)
+    for i in range(build_files):
+        (build / f"artefatto{i}.py").write_text("x = 1\n")
+    (root / ".gitignore").write_text("build/\n*.pyc\n")
+    git = ['git', '-c', 'user.name=bench', '-c', 'user.email=bench@example.com']
+    subprocess.run(git + ['init', '-q'], cwd=root, check=True)
+    subprocess.run(git + ['add', '-A'], cwd=root, check=True)
+    subprocess.run(git + ['commit', '-q', '-m', 'bench'], cwd=root, check=True)
+    # mtime vecchi: nessuna cartella o index nella finestra "racy"
+    past = time.time() - 60
+    for directory, _, _ in os.walk(root):
+        os.utime(directory, (past, past))
+    os.utime(root / ".git" / "index", (past, past))
+
+
+def timed(fn, repeat: int = 3):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--py-files', type=int, default=20000)
+    parser.add_argument('--build-files', type=int, default=20000)
+    args = parser.parse_args()
+
+    if shutil.which('git') is None:
+        sys.exit("git non trovato: serve per creare il repository del benchmark")
+
+    tmpdir = tempfile.mkdtemp(prefix="fylia-bench-")
+    try:
+        root = Path(tmpdir) / "repo"
+        root.mkdir()
+        cache_dir = Path(tmpdir) / "cache"
+        make_git_repo(root, args.py_files, args.build_files)
+
+        def walk():
+            return [e.rel_path for e in walk_project(str(root), DEFAULT_IGNORE_DIRS, DEFAULT_IGNORE_FILES)]
+
+        def enumerate_git(cache):
+            enumerator = GitEnumerator.for_root(root, DEFAULT_IGNORE_DIRS, DEFAULT_IGNORE_FILES,
+                                                cache_dir if cache else None)
+            return [e.rel_path for e in enumerator.walk()], enumerator
+
+        walk_time, walked = timed(walk)
+        cold_time, (cold, _) = timed(lambda: enumerate_git(False))
+        enumerate_git(True)
+        warm_time, (warm, enumerator) = timed(lambda: enumerate_git(True))
+        assert warm == cold
+
+        print(f"Repository: {args.py_files} file tracciati, {args.build_files} in build/ (ignorata)\n")
+        print(f"{'walk_project (visita completa)':<34}{walk_time * 1000:9.1f} ms  {len(walked):7d} elementi")
+        print(f"{'git index + .gitignore':<34}{cold_time * 1000:9.1f} ms  {len(cold):7d} elementi")
+        print(f"{'git index + cache delle cartelle':<34}{warm_time * 1000:9.1f} ms  "
+              f"{len(warm):7d} elementi  ({enumerator.relisted} cartelle rielencate)")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Benchmark degli estrattori di simboli
+
+Per ogni estrattore registrato (più Python shallow) misura la velocità di
+estrazione in MB/s e file/s su sorgenti già in memoria, così la lettura dal
+disco resta fuori dalla misura. I sorgenti sono generati (un lotto di file
+per linguaggio) oppure, con --path, sono i file di un progetto reale
+raggruppati per estensione. Alla fine confronta Python con l'AST e shallow.
+
+Uso: python benchmarks/bench_extractors.py [--files N] [--repeat R] [--path DIR]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fylia.extractors import PYTHON_SHALLOW, extension_of, registered_extractors
+from fylia.walker import DEFAULT_IGNORE_DIRS, DEFAULT_IGNORE_FILES, walk_project
+from synthrepo import huge_source
+
+
+def javascript_source(n: int, rng: random.Random) -> str:
+    parts = [f"import {{ util{n} }} from './util{n}';\n"]
+    for i in range(rng.randint(3, 8)):
+        parts.append(f"""
+/** Classe generata {i} */
+export class Componente{n}_{i} extends Base {{
+  constructor(props) {{
+    super(props);
+    this.stato = {{ valore: {i}, nome: `comp ${{props.nome}}` }};
+  }}
+
+  render(): string {{
+    if (this.stato.valore > {i}) {{
+      return "<div>{{}}</div>";
+    }}
+    return util{n}(this.stato);
+  }}
+}}
+
+export function aiuto{n}_{i}(a, b) {{ return a + b; }}
+const freccia{n}_{i} = (x: number): number => x * {i};
+""")
+    return "".join(parts)
+
+
+def shell_source(n: int, rng: random.Random) -> str:
+    parts = ["#!/bin/sh\nset -e\n"]
+    for i in range(rng.randint(3, 8)):
+        parts.append(f'\npasso_{n}_{i}() {{\n  echo "passo {i}: $1"\n  [ -d build ] || mkdir build\n}}\n')
+    parts.append(f'\nfunction principale {{\n  passo_{n}_0 "$@"\n}}\nprincipale "$@"\n')
+    return "".join(parts)
+
+
+def toml_source(n: int, rng: random.Random) -> str:
+    parts = [f'name = "pacchetto{n}"\nversion = "1.{n}.0"\n']
+    for i in range(rng.randint(3, 8)):
+        parts.append(f'\n[tool.sezione{i}]\nchiave = "valore {i}"\nelenco = [1, 2, 3]\n')
+    parts.append('\n[[bin]]\nname = "a"\n\n[[bin]]\nname = "b"\n')
+    return "".join(parts)
+
+
+def yaml_source(n: int, rng: random.Random) -> str:
+    parts = [f"name: ci-{n}\non:\n  push:\n    branches: [main]\njobs:\n"]
+    for i in range(rng.randint(3, 8)):
+        parts.append(f"  job{i}:\n    runs-on: ubuntu-latest\n    steps:\n      - run: make test-{i}\n"
+                     f"      - name: passo {i}\n        with:\n          chiave: valore\n")
+    return "".join(parts)
+
+
+def markdown_source(n: int, rng: random.Random) -> str:
+    parts = [f"# Documento {n}\n\nIntroduzione con `codice` e [link](http://example.com).\n"]
+    for i in range(rng.randint(3, 8)):
+        parts.append(f"\n## Sezione {i}\n\nTesto della sezione {i}, su più righe\nper simulare un paragrafo.\n"
+                     f"\n```python\n# commento, non un titolo\nprint({i})\n```\n\n- punto uno\n- punto due\n")
+    return "".join(parts)
+
+
+def python_source(n: int, rng: random.Random) -> str:
+    return huge_source(rng.randint(3, 8), seed=n)
+
+
+# Linguaggio generato -> (estensione, generatore del sorgente)
+GENERATED = {
+    'python': ('.py', python_source),
+    'javascript': ('.ts', javascript_source),
+    'shell': ('.sh', shell_source),
+    'toml': ('.toml', toml_source),
+    'yaml': ('.yml', yaml_source),
+    'markdown': ('.md', markdown_source),
+}
+
+
+def generated_sources(files: int) -> dict:
+    """Estensione -> sorgenti generati (in byte)"""
+    rng = random.Random(0)
+    return {ext: [make(n, rng).encode() for n in range(files)] for ext, make in GENERATED.values()}
+
+
+def project_sources(path: str, extractors: dict) -> dict:
+    """Estensione -> contenuto dei file del progetto con un estrattore"""
+    sources = defaultdict(list)
+    for entry in walk_project(path, DEFAULT_IGNORE_DIRS, DEFAULT_IGNORE_FILES):
+        ext = extension_of(entry.name)
+        if not entry.is_dir and ext in extractors:
+            with open(entry.dirent.path, 'rb') as f:
+                sources[ext].append(f.read())
+    return dict(sources)
+
+
+def throughput(extract, sources: list, repeat: int) -> tuple:
+    """(secondi mediani per passata, MB/s, file/s) estraendo tutti i sorgenti"""
+    def one_pass():
+        start = time.perf_counter()
+        for data in sources:
+            extract(data, '<bench>')
+        return time.perf_counter() - start
+
+    one_pass()    # primo giro: compilazione delle espressioni regolari
+    elapsed = statistics.median(one_pass() for _ in range(repeat))
+    size = sum(len(data) for data in sources)
+    return elapsed, size / elapsed / 1e6, len(sources) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=500, help="file generati per linguaggio")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--path', help="misura sui file di questo progetto invece che su file generati")
+    args = parser.parse_args()
+
+    extractors = registered_extractors()
+    if args.path:
+        sources = project_sources(args.path, extractors)
+        print(f"File di {args.path}, {args.repeat} ripetizioni\n")
+    else:
+        sources = generated_sources(args.files)
+        print(f"{args.files} file generati per linguaggio, {args.repeat} ripetizioni\n")
+
+    # Estrattore -> sorgenti di tutte le sue estensioni
+    by_extractor = defaultdict(list)
+    for ext, data in sorted(sources.items()):
+        by_extractor[extractors[ext]].extend(data)
+    if '.py' in sources:
+        by_extractor[PYTHON_SHALLOW] = sources['.py']
+
+    print(f"{'estrattore':<16}{'file':>7}{'KB':>9}{'ms':>10}{'MB/s':>9}{'file/s':>10}")
+    timings = {}
+    for extractor, data in by_extractor.items():
+        elapsed, mb_per_s, files_per_s = throughput(extractor.extract, data, args.repeat)
+        timings[extractor.name] = elapsed
+        size_kb = sum(len(d) for d in data) / 1024
+        print(f"{extractor.name:<16}{len(data):>7}{size_kb:>9.0f}{elapsed * 1000:>10.1f}"
+              f"{mb_per_s:>9.1f}{files_per_s:>10.0f}")
+
+    if 'python' in timings and 'python-shallow' in timings:
+        print(f"\nPython shallow: {timings['python'] / timings['python-shallow']:.1f}x più veloce dell'AST")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark della cronologia della chat
+
+Scrive una sessione lunga (default 50.000 messaggi), poi misura il tempo
+di riapertura, la lettura di pagine vecchie e la memoria occupata dalla
+cronologia in confronto a una lista Python con tutti i messaggi.
+
+Uso: python benchmarks/bench_history.py [--messages N]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fylia.history import ChatHistory
+
+
+TEXT = "Ecco una funzione Python di esempio con type hints e docstring. " * 8
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=50000)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="fylia-bench-")
+    try:
+        path = Path(tmpdir) / "chat.jsonl"
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        history = ChatHistory(path)
+        for i in range(args.messages):
+            history.append('user' if i % 2 == 0 else 'assistant', f"{i} {TEXT}")
+        write_time = time.perf_counter() - start
+        history_mem = tracemalloc.get_traced_memory()[0]
+        history.close()
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        plain = [f"{'Tu' if i % 2 == 0 else 'FYLIA'}: {i} {TEXT}" for i in range(args.messages)]
+        list_mem = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del plain
+
+        start = time.perf_counter()
+        reopened = ChatHistory(path)
+        open_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for page_start in range(0, args.messages, args.messages // 20):
+            reopened.page(page_start, page_start + 50)
+        page_time = (time.perf_counter() - start) / 20
+        reopened.close()
+
+        size = path.stat().st_size + reopened.index_path.stat().st_size
+        print(f"{args.messages} messaggi, {size / 1e6:.1f} MB su disco\n")
+        print(f"scrittura:            {write_time * 1000:8.1f} ms ({write_time / args.messages * 1e6:.1f} µs/messaggio)")
+        print(f"riapertura:           {open_time * 1000:8.1f} ms")
+        print(f"pagina di 50 (disco): {page_time * 1000:8.2f} ms")
+        print(f"memoria cronologia:   {history_mem / 1e6:8.2f} MB")
+        print(f"memoria lista:        {list_mem / 1e6:8.2f} MB")
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
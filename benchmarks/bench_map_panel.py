@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark del pannello della mappa su un progetto molto grande
+
+Costruisce in memoria il modello di un progetto sintetico (default 100.000
+file) e misura, in un'app Textual senza terminale, la visualizzazione
+iniziale, l'espansione di una cartella, lo scorrimento e il ricaricamento
+dopo un cambiamento, confrontandoli con la mappa testuale completa
+mostrata in un widget Static.
+
+Uso: python benchmarks/bench_map_panel.py [--files N] [--per-dir N]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from textual.app import App
+from textual.widgets import Static
+
+from fylia.mapgen import CodeMapGenerator
+from fylia.maptree import MapTree
+from fylia.model import ProjectModel
+from fylia.walker import Entry
+
+
+RECORD = {'classes': [['Servizio', ['__init__', 'esegui']]], 'functions': ['helper']}
+
+
+def synthetic_model(files: int, per_dir: int) -> ProjectModel:
+    """Modello con `files` file Python in cartelle da `per_dir` elementi"""
+    generator = CodeMapGenerator()
+    model = ProjectModel(Path('progetto'), generator)
+    dirs = (files + per_dir - 1) // per_dir
+    root = [Entry(f"pkg{d}", f"pkg{d}", 0, True, d == dirs - 1, None) for d in range(dirs)]
+    children = {'': root}
+    records = {}
+    for d in range(dirs):
+        count = min(per_dir, files - d * per_dir)
+        entries = []
+        for i in range(count):
+            rel_path = f"pkg{d}/mod{i}.py"
+            entries.append(Entry(rel_path, f"mod{i}.py", 1, False, i == count - 1, None))
+            records[rel_path] = RECORD
+        children[f"pkg{d}"] = entries
+    model.children = children
+    model.records = records
+    return model
+
+
+class TreeApp(App):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def compose(self):
+        yield MapTree(self.model.generator, id="map-content")
+
+
+class StaticApp(App):
+    def compose(self):
+        yield Static("", id="map-content")
+
+
+async def bench_tree(model) -> dict:
+    results = {}
+    app = TreeApp(model)
+    async with app.run_test(size=(60, 40)) as pilot:
+        tree = app.query_one(MapTree)
+
+        # Riferimento: un ciclo dell'interfaccia senza nulla da fare
+        start = time.perf_counter()
+        for _ in range(20):
+            await pilot.pause()
+        results['pausa a vuoto'] = (time.perf_counter() - start) / 20
+
+        start = time.perf_counter()
+        tree.show_model(model)
+        await pilot.pause()
+        results['mostra'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        tree.root.children[0].expand()
+        await pilot.pause()
+        results['espandi cartella'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        tree.root.children[0].children[0].expand()
+        await pilot.pause()
+        results['espandi file'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(50):
+            tree.action_scroll_down()
+            await pilot.pause()
+        results['scorrimento (per passo)'] = (time.perf_counter() - start) / 50
+
+        start = time.perf_counter()
+        tree.refresh_paths({'pkg0/mod1.py'})
+        await pilot.pause()
+        results['aggiorna file'] = time.perf_counter() - start
+
+        results['nodi creati'] = tree.last_line + 1
+    return results
+
+
+async def bench_static(model) -> dict:
+    results = {}
+    app = StaticApp()
+    async with app.run_test(size=(60, 40)) as pilot:
+        start = time.perf_counter()
+        text = model.generator.render_model(model)
+        results['genera testo'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        app.query_one(Static).update(text)
+        await pilot.pause()
+        results['mostra'] = time.perf_counter() - start
+        results['righe'] = text.count('\n') + 1
+    return results
+
+
+def report(title: str, results: dict) -> None:
+    print(title)
+    for name, value in results.items():
+        if isinstance(value, float):
+            print(f"  {name:<26} {value * 1000:9.1f} ms")
+        else:
+            print(f"  {name:<26} {value:9d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=100000)
+    parser.add_argument('--per-dir', type=int, default=2000)
+    parser.add_argument('--skip-static', action='store_true',
+                        help="non misura la mappa testuale completa (lenta)")
+    args = parser.parse_args()
+
+    model = synthetic_model(args.files, args.per_dir)
+    print(f"Progetto sintetico: {args.files} file in cartelle da {args.per_dir}\n")
+    report("Albero virtualizzato (MapTree)", asyncio.run(bench_tree(model)))
+    if not args.skip_static:
+        print()
+        report("Mappa testuale completa (Static)", asyncio.run(bench_static(model)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark della mappa in streaming (fylia map --format ndjson)
+
+Su un repository sintetico misura il tempo al primo record, il tempo totale
+e il picco di memoria Python della mappa NDJSON in streaming, confrontati
+con la mappa testuale costruita per intero da generate_map().
+
+Uso: python benchmarks/bench_map_stream.py [--py-files N]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fylia.mapgen import CodeMapGenerator
+from fylia.mapstream import iter_ndjson
+from synthrepo import make_python_tree
+
+
+def measure(consume) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = consume(start)
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'first': first, 'total': total, 'peak': peak}
+
+
+def run_full(root: Path):
+    def consume(start):
+        mappa = CodeMapGenerator(use_cache=False).generate_map(str(root))
+        first = time.perf_counter() - start
+        with open(os.devnull, 'w') as sink:
+            sink.write(mappa)
+        return first
+    return measure(consume)
+
+
+def run_stream(root: Path):
+    def consume(start):
+        first = None
+        with open(os.devnull, 'w') as sink:
+            for line in iter_ndjson(CodeMapGenerator(use_cache=False), str(root)):
+                if first is None:
+                    first = time.perf_counter() - start
+                sink.write(line)
+        return first
+    return measure(consume)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--py-files', type=int, default=5000)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="fylia-bench-")
+    try:
+        root = Path(tmpdir)
+        make_python_tree(root, args.py_files)
+        print(f"Repository sintetico: {args.py_files} file Python\n")
+        print(f"{'':<24}{'primo byte':>12}{'totale':>12}{'picco memoria':>16}")
+        for name, run in (("generate_map (testo)", run_full), ("ndjson in streaming", run_stream)):
+            r = run(root)
+            print(f"{name:<24}{r['first'] * 1000:>9.1f} ms{r['total'] * 1000:>9.1f} ms"
+                  f"{r['peak'] / 1024 / 1024:>13.2f} MB")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
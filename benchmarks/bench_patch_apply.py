@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark dell'applicazione di patch unified diff
+
+Genera un file di testo grande (default 50 MB), una patch con hunk sparsi
+e confronta l'applicazione in una fylia.transaction.Transaction con
+`git apply` (se disponibile).
+
+Uso: python benchmarks/bench_patch_apply.py [--size-mb N] [--hunks N]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fylia.transaction import Transaction
+
+
+def make_file(path: str, size_mb: int, seed: int = 0) -> int:
+    """Scrive un file di righe pseudo-casuali, restituisce il numero di righe"""
+    rng = random.Random(seed)
+    words = [f"parola{i}" for i in range(500)]
+    lines = 0
+    written = 0
+    target = size_mb * 1024 * 1024
+    with open(path, 'w') as f:
+        block = []
+        while written < target:
+            line = f"{lines:08d} " + " ".join(rng.choice(words) for _ in range(6)) + "\n"
+            block.append(line)
+            written += len(line)
+            lines += 1
+            if len(block) >= 10000:
+                f.write("".join(block))
+                block = []
+        f.write("".join(block))
+    return lines
+
+
+def make_patch(path: str, name: str, lines: int, hunks: int, seed: int = 1) -> str:
+    """Crea una patch che modifica, aggiunge e rimuove righe in punti sparsi"""
+    rng = random.Random(seed)
+    with open(path) as f:
+        content = f.readlines()
+    targets = sorted(rng.sample(range(10, lines - 10), hunks))
+    out = [f"--- a/{name}\n", f"+++ b/{name}\n"]
+    delta = 0
+    for t in targets:
+        before = content[t - 3:t]
+        after = content[t + 1:t + 4]
+        out.append(f"@@ -{t - 2},7 +{t - 2 + delta},8 @@\n")
+        out.extend(" " + l for l in before)
+        out.append("-" + content[t])
+        out.append("+" + content[t].upper())
+        out.append("+riga aggiunta dal benchmark\n")
+        out.extend(" " + l for l in after)
+        delta += 1
+    return "".join(out)
+
+
+def timed(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        elapsed = func()
+        best = min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=50)
+    parser.add_argument('--hunks', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="fylia-bench-")
+    try:
+        original = os.path.join(tmpdir, "originale.txt")
+        lines = make_file(original, args.size_mb)
+        patch = make_patch(original, "grande.txt", lines, args.hunks)
+        patch_path = os.path.join(tmpdir, "modifica.patch")
+        with open(patch_path, "w") as f:
+            f.write(patch)
+        print(f"File: {os.path.getsize(original) / 1e6:.1f} MB, {lines} righe, {args.hunks} hunk\n")
+
+        work = os.path.join(tmpdir, "work")
+        os.mkdir(work)
+        target = os.path.join(work, "grande.txt")
+
+        def run_fylia():
+            shutil.copyfile(original, target)
+            start = time.perf_counter()
+            with Transaction(work, durable=False) as tx:
+                tx.apply_patch(patch)
+            return time.perf_counter() - start
+
+        def run_git():
+            shutil.copyfile(original, target)
+            start = time.perf_counter()
+            subprocess.run(["git", "apply", patch_path], cwd=work, check=True)
+            return time.perf_counter() - start
+
+        fylia_time = timed(run_fylia, args.repeat)
+        with open(target, 'rb') as f:
+            fylia_result = f.read()
+        print(f"fylia Transaction:    {fylia_time * 1000:8.1f} ms")
+
+        if shutil.which("git"):
+            git_time = timed(run_git, args.repeat)
+            with open(target, 'rb') as f:
+                same = f.read() == fylia_result
+            print(f"git apply:            {git_time * 1000:8.1f} ms")
+            print(f"\nRisultato identico a git apply: {'sì' if same else 'NO'}")
+            print(f"Rapporto fylia/git: {fylia_time / git_time:.2f}")
+        else:
+            print("git non disponibile: confronto saltato")
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark del daemon di progetto (fylia serve)
+
+Genera un progetto sintetico e confronta, per ogni comando, il tempo del
+processo `fylia ...` senza daemon (cache su disco già piene) e con il daemon
+in esecuzione, più la latenza di una richiesta sul socket già aperto
+(quello che vedrebbe un editor collegato in modo persistente).
+Obiettivo: risposte del daemon nell'ordine dei millisecondi.
+
+Uso: python benchmarks/bench_serve.py [--files N] [--repeat R]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from synthrepo import make_python_tree
+from fylia.daemon import connect
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+# Quello che fa lo script installato da pip per il comando fylia
+LAUNCHER = "import sys; from fylia.__main__ import main; sys.argv[0] = 'fylia'; main()"
+
+COMMANDS = [
+    ['map', '.'],
+    ['map', '.', '-f', 'json'],
+    ['def', 'funzione_1'],
+    ['refs', 'Classe1'],
+    ['deps'],
+    ['context', 'Classe1 metodo_a'],
+]
+
+# Richieste equivalenti sul socket già aperto
+REQUESTS = [
+    ('map', {'format': 'text'}),
+    ('map', {'format': 'json'}),
+    ('def', {'symbol': 'funzione_1'}),
+    ('refs', {'symbol': 'Classe1'}),
+    ('deps', {}),
+    ('context', {'request': 'Classe1 metodo_a'}),
+]
+
+
+def run_command(args, cwd: Path, env: dict) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', LAUNCHER] + args, cwd=cwd, env=env,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def median_ms(func, repeat: int) -> float:
+    return statistics.median(func() for _ in range(repeat)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=SRC + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    tmpdir = Path(tempfile.mkdtemp(prefix="fylia-bench-"))
+    daemon = None
+    try:
+        make_python_tree(tmpdir, args.files)
+        local = {}
+        for command in COMMANDS:
+            run_command(command, tmpdir, env)    # riempie le cache su disco
+            local[tuple(command)] = median_ms(lambda: run_command(command, tmpdir, env), args.repeat)
+
+        start = time.perf_counter()
+        daemon = subprocess.Popen([sys.executable, '-c', LAUNCHER, 'serve', '.'], cwd=tmpdir, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        client = None
+        while client is None:
+            if daemon.poll() is not None:
+                sys.exit("Il daemon non è partito")
+            time.sleep(0.05)
+            client = connect(tmpdir)
+        client.request('ping')
+        print(f"{args.files} moduli, daemon pronto in {time.perf_counter() - start:.2f} s\n")
+
+        print(f"{'comando':<32}{'locale':>10}{'daemon':>10}{'socket':>10}")
+        with client:
+            for command, (op, params) in zip(COMMANDS, REQUESTS):
+                client.request(op, **params)    # riempie le mappe formattate
+                served = median_ms(lambda: run_command(command, tmpdir, env), args.repeat)
+                socket_ms = median_ms(lambda: _timed(client.request, op, **params), args.repeat * 10)
+                label = "fylia " + " ".join(command)
+                print(f"{label:<32}{local[tuple(command)]:8.1f}ms{served:8.1f}ms{socket_ms:8.2f}ms")
+            client.request('shutdown')
+        daemon.wait(10)
+    finally:
+        if daemon is not None and daemon.poll() is None:
+            daemon.kill()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    print("\nlocale: processo senza daemon; daemon: processo con il daemon attivo;")
+    print("socket: richiesta su una connessione già aperta")
+
+
+def _timed(func, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    main()
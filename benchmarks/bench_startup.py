@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark dell'avvio dei comandi fylia
+
+Esegue ogni comando con `python -X importtime` come farebbe lo script
+`fylia` installato (fylia.__main__.main) in un progetto sintetico (dopo un primo giro che riempie le cache) e misura:
+- import: millisecondi spesi negli import oltre a quelli dell'interprete
+  vuoto (`python -X importtime -c pass`), mediana di R esecuzioni
+- totale: tempo complessivo del processo
+Controlla inoltre che nessun comando da riga di comando importi moduli
+della TUI o dei provider.
+
+Esce con stato 1 se un comando supera il suo budget di import o importa un
+modulo vietato: può girare negli hook o in CI. --scale moltiplica i budget
+per macchine lente (es. --scale 3 su Termux).
+
+Uso: python benchmarks/bench_startup.py [--files N] [--repeat R] [--scale S]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthrepo import make_python_tree
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+# Comando -> budget degli import in millisecondi
+COMMANDS = [
+    (['--version'], 5),
+    (['--help'], 80),
+    (['chat', '--help'], 80),
+    (['map', '.'], 90),
+    (['map', '.', '-f', 'ndjson'], 90),
+    (['def', 'funzione_1'], 90),
+    (['refs', 'Classe1'], 90),
+    (['deps'], 90),
+    (['context', 'Classe1 metodo_a'], 90),
+    (['undo', '--list'], 90),
+    (['serve', '--status'], 90),
+]
+
+# Quello che fa lo script installato da pip per il comando fylia
+LAUNCHER = "import sys; from fylia.__main__ import main; sys.argv[0] = 'fylia'; main()"
+
+# Moduli che i comandi da riga di comando non devono caricare
+FORBIDDEN = ('textual', 'rich', 'fylia.tui', 'fylia.maptree', 'fylia.providers')
+
+
+def import_times(args, cwd: Path):
+    """Esegue un processo con -X importtime: (moduli importati, ms degli import di primo livello, secondi)"""
+    env = dict(os.environ, PYTHONPATH=SRC + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + args, cwd=cwd, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    elapsed = time.perf_counter() - start
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Il livello di annidamento è dato dagli spazi prima del nome
+        if name.startswith('  '):
+            modules.setdefault(name.strip(), 0)
+        else:
+            modules[name.strip()] = int(cumulative) / 1000
+    return modules, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scale', type=float, default=1.0, help="moltiplicatore dei budget")
+    args = parser.parse_args()
+
+    tmpdir = Path(tempfile.mkdtemp(prefix="fylia-bench-"))
+    failures = []
+    try:
+        make_python_tree(tmpdir, args.files)
+        baseline = [import_times(['-c', 'pass'], tmpdir) for _ in range(args.repeat)]
+        base_modules = set(baseline[0][0])
+        base_time = statistics.median(t for _, t in baseline)
+
+        print(f"Interprete vuoto: {base_time * 1000:.1f} ms\n")
+        print(f"{'comando':<34}{'import':>9}{'budget':>9}{'totale':>10}")
+        for command, budget in COMMANDS:
+            argv = ['-c', LAUNCHER] + command
+            import_times(argv, tmpdir)    # riempie le cache del progetto
+            runs = [import_times(argv, tmpdir) for _ in range(args.repeat)]
+            imports = statistics.median(sum(ms for name, ms in modules.items() if name not in base_modules)
+                                        for modules, _ in runs)
+            total = statistics.median(t for _, t in runs)
+            budget *= args.scale
+            loaded = runs[0][0]
+            forbidden = sorted(name for name in loaded
+                               if any(name == f or name.startswith(f + '.') for f in FORBIDDEN))
+            status = ""
+            if imports > budget:
+                status = "  OLTRE IL BUDGET"
+                failures.append(command)
+            if forbidden:
+                status += "  importa " + ", ".join(forbidden[:3])
+                failures.append(command)
+            label = "fylia " + " ".join(command)
+            print(f"{label:<34}{imports:7.1f}ms{budget:7.0f}ms{total * 1000:8.1f}ms{status}")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    if failures:
+        print(f"\n{len(failures)} controlli non superati")
+        sys.exit(1)
+    print("\nTutti i comandi entro il budget")
+
+
+if __name__ == '__main__':
+    main()
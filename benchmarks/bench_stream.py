@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark del tempo al primo token con il provider mock
+
+Confronta il tempo dopo cui l'utente vede qualcosa con generate_response
+(risposta intera) e con stream_response / astream_response (primo chunk),
+usando latenza e velocità simulate del MockProvider.
+
+Uso: python benchmarks/bench_stream.py [--latency S] [--tps N]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fylia.providers.mock import MockProvider
+
+
+PROMPT = "crea una classe"
+
+
+def measure_blocking(provider):
+    start = time.perf_counter()
+    provider.generate_response(PROMPT)
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed
+
+
+def measure_stream(provider):
+    start = time.perf_counter()
+    first = None
+    for _ in provider.stream_response(PROMPT):
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def measure_astream(provider):
+    async def run():
+        start = time.perf_counter()
+        first = None
+        async for _ in provider.astream_response(PROMPT):
+            if first is None:
+                first = time.perf_counter() - start
+        return first, time.perf_counter() - start
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.3, help="secondi prima del primo token")
+    parser.add_argument('--tps', type=float, default=200, help="token al secondo")
+    args = parser.parse_args()
+
+    provider = MockProvider(latency=args.latency, tokens_per_second=args.tps)
+    print(f"MockProvider(latency={args.latency}, tokens_per_second={args.tps})\n")
+    print(f"{'modalità':<20} {'primo token':>12} {'totale':>10}")
+    for name, measure in (("generate_response", measure_blocking),
+                          ("stream_response", measure_stream),
+                          ("astream_response", measure_astream)):
+        first, total = measure(provider)
+        print(f"{name:<20} {first * 1000:9.1f} ms {total * 1000:7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
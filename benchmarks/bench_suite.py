@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Suite di benchmark di FYLIA con risultati in JSON
+
+Genera un repository sintetico deterministico (1k, 10k o 100k file: moduli
+Python, rumore in node_modules, cartelle profonde e un file enorme) e
+misura:
+- map.*: CodeMapGenerator.generate_map senza cache, con cache piena, sulla
+  catena di cartelle profonde e sul file enorme
+- patcher.*: Patcher.generate_diff, apply_patch e modify_file sul file enorme
+- provider.*: andata e ritorno di una richiesta attraverso contesto, cache
+  delle risposte e MockProvider (richieste nuove e ripetute)
+
+Di ogni caso si riporta la mediana di R esecuzioni. Con --output i
+risultati vengono salvati in JSON; con --compare vengono confrontati con un
+JSON salvato in precedenza e il comando esce con stato 1 se un caso è più
+lento della baseline oltre la soglia. Tutto gira offline.
+
+Uso: python benchmarks/bench_suite.py [--size 1k|10k|100k] [--repeat R]
+         [--only PREFISSO] [--output FILE] [--compare BASELINE] [--threshold F]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fylia.context import ContextBuilder
+from fylia.deps import DependencyGraph
+from fylia.index import SymbolIndex
+from fylia.mapgen import CodeMapGenerator
+from fylia.patcher import Patcher
+from fylia.providers.cache import CachedProvider
+from fylia.providers.context import ContextProvider
+from fylia.providers.mock import MockProvider
+from synthrepo import SIZES, make_suite_repo
+
+# Versione dello schema del JSON dei risultati
+RESULTS_VERSION = 1
+
+# Sotto questa differenza (secondi) un rallentamento è considerato rumore
+MIN_DELTA = 0.001
+
+
+def time_runs(case, repeat: int) -> dict:
+    """
+    Esegue `case` R volte e riassume i tempi
+
+    `case()` restituisce i secondi misurati (la preparazione, es. ripristinare
+    un file, resta fuori dalla misura).
+    """
+    times = [case() for _ in range(repeat)]
+    return {'median': statistics.median(times), 'min': min(times), 'max': max(times), 'runs': repeat}
+
+
+def timed(func, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def map_cases(root: Path) -> dict:
+    def cold():
+        return timed(CodeMapGenerator(use_cache=False, use_git=False).generate_map, str(root))
+
+    warm_generator = CodeMapGenerator(use_git=False)
+    warm_generator.generate_map(str(root))    # riempie .fylia/cache
+
+    def warm():
+        return timed(CodeMapGenerator(use_git=False).generate_map, str(root))
+
+    def deep():
+        return timed(CodeMapGenerator(use_cache=False, use_git=False).generate_map, str(root / "deep"))
+
+    def huge_file():
+        return timed(CodeMapGenerator(use_cache=False, use_git=False).generate_map, str(root / "big"))
+
+    return {'map.cold': cold, 'map.warm': warm, 'map.deep': deep, 'map.huge_file': huge_file}
+
+
+def patcher_cases(root: Path) -> dict:
+    # durable=False: si misura il lavoro di FYLIA, non i tempi di fsync del disco
+    patcher = Patcher(durable=False)
+    path = root / "big" / "enorme.py"
+    original = path.read_text()
+    # Un metodo cambiato ogni 10 classi: molti hunk sparsi in tutto il file
+    parts = original.split("return self.value + 1")
+    changed = parts[0] + "".join(("return self.value + 2" if i % 10 == 0 else "return self.value + 1") + part
+                                 for i, part in enumerate(parts[1:]))
+    patch = patcher.generate_diff(str(path), original, changed)
+
+    def generate_diff():
+        return timed(patcher.generate_diff, str(path), original, changed)
+
+    def apply_patch():
+        path.write_text(original)
+        elapsed = timed(patcher.apply_patch, str(path), patch)
+        assert path.read_text() == changed, "patch non applicata"
+        return elapsed
+
+    def modify_file():
+        path.write_text(original)
+        return timed(patcher.modify_file, str(path), "class Grande1000:", "class GrandeMille:")
+
+    return {'patcher.generate_diff': generate_diff, 'patcher.apply_patch': apply_patch,
+            'patcher.modify_file': modify_file}
+
+
+def provider_cases(root: Path) -> dict:
+    index = SymbolIndex(str(root)).update()
+    graph = DependencyGraph(str(root), use_git=False).update()
+    builder = ContextBuilder(index, graph)
+    builder.refresh()
+    provider = ContextProvider(CachedProvider(MockProvider()), lambda request: builder.build(request).text)
+    counter = iter(range(10 ** 9))
+
+    def roundtrip():
+        # Richiesta sempre nuova: contesto da assemblare e miss della cache
+        return timed(provider.generate_response, f"scrivi una funzione come funzione_{next(counter)} in Classe1")
+
+    provider.generate_response("scrivi un test per Classe1")
+
+    def cached():
+        return timed(provider.generate_response, "scrivi un test per Classe1")
+
+    return {'provider.roundtrip': roundtrip, 'provider.cached': cached}
+
+
+def run_suite(root: Path, repeat: int, only: str = '') -> dict:
+    results = {}
+    for make_cases in (map_cases, patcher_cases, provider_cases):
+        for name, case in make_cases(root).items():
+            if only and not name.startswith(only):
+                continue
+            case()    # primo giro: import, cache del sistema operativo
+            results[name] = time_runs(case, repeat)
+            print(f"{name:<26}{results[name]['median'] * 1000:10.2f} ms", file=sys.stderr)
+    return results
+
+
+def compare(current: dict, baseline: dict, threshold: float, out=sys.stdout) -> list:
+    """Confronta due risultati; restituisce i casi più lenti della baseline oltre la soglia"""
+    if baseline.get('size') != current['size']:
+        print(f"Attenzione: baseline di dimensione {baseline.get('size')}, "
+              f"risultati di dimensione {current['size']}", file=out)
+    regressions = []
+    print(f"\n{'caso':<26}{'baseline':>12}{'attuale':>12}{'variazione':>12}", file=out)
+    for name, result in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if before is None:
+            print(f"{name:<26}{'-':>12}{result['median'] * 1000:10.2f}ms{'nuovo':>12}", file=out)
+            continue
+        old, new = before['median'], result['median']
+        change = (new - old) / old if old else 0.0
+        status = ""
+        if change > threshold and new - old > MIN_DELTA:
+            status = "  REGRESSIONE"
+            regressions.append(name)
+        print(f"{name:<26}{old * 1000:10.2f}ms{new * 1000:10.2f}ms{change * 100:+11.1f}%{status}", file=out)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', choices=sorted(SIZES, key=SIZES.get), default='1k')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', default='', help="solo i casi che iniziano così (es. map. o patcher.)")
+    parser.add_argument('--output', help="file in cui salvare i risultati in JSON ('-' = stdout)")
+    parser.add_argument('--compare', metavar='BASELINE', help="JSON di un'esecuzione precedente")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="rallentamento relativo oltre cui segnalare una regressione")
+    args = parser.parse_args()
+
+    tmpdir = Path(tempfile.mkdtemp(prefix="fylia-bench-"))
+    try:
+        start = time.perf_counter()
+        make_suite_repo(tmpdir, SIZES[args.size])
+        print(f"Repository sintetico {args.size} creato in {time.perf_counter() - start:.1f} s",
+              file=sys.stderr)
+        results = run_suite(tmpdir, args.repeat, args.only)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    current = {
+        'version': RESULTS_VERSION,
+        'size': args.size,
+        'files': SIZES[args.size],
+        'repeat': args.repeat,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+    if args.output == '-':
+        json.dump(current, sys.stdout, indent=2)
+        print()
+    elif args.output:
+        Path(args.output).write_text(json.dumps(current, indent=2) + "\n")
+
+    if args.compare:
+        # Con il JSON su stdout il confronto va su stderr
+        out = sys.stderr if args.output == '-' else sys.stdout
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(current, baseline, args.threshold, out)
+        if regressions:
+            print(f"\n{len(regressions)} regressioni oltre il {args.threshold:.0%}: {', '.join(regressions)}",
+                  file=out)
+            sys.exit(1)
+        print(f"\nNessuna regressione oltre il {args.threshold:.0%}", file=out)
+
+
+if __name__ == '__main__':
+    main()
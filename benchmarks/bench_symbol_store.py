@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark della memoria della tabella dei simboli
+
+Genera i record di N file sintetici (classi con metodi e attributi,
+funzioni, variabili) e misura la memoria Python di tre rappresentazioni:
+- ingenua: dizionario nome -> liste [nome, tipo, riga, colonna, fine, file]
+- SymbolTable: colonne array e pool di stringhe
+- SymbolStore: lo stesso file aperto con mmap (le pagine lette dal kernel
+  non sono memoria Python e si possono scartare)
+più il tempo di apertura e di ricerca per nome.
+
+Uso: python benchmarks/bench_symbol_store.py [--files N] [--classes K]
+"""
+
+import argparse
+import gc
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fylia.index import short_name
+from fylia.symstore import SymbolStore, SymbolTable
+
+COMMON_METHODS = ['__init__', '__repr__', 'run', 'get', 'update', 'close', 'save', 'load']
+
+
+def make_records(files: int, classes: int, seed: int = 0):
+    """Record come quelli di extract_references: circa 12 simboli per classe"""
+    rng = random.Random(seed)
+    for f in range(files):
+        defs, ends = [], []
+        line = 1
+        defs.append([f"COSTANTE_{f}", 'variable', line, 0])
+        ends.append(line)
+        for c in range(classes):
+            cls = f"Classe{f}_{c}"
+            line += 2
+            defs.append([cls, 'class', line, 0])
+            ends.append(0)
+            class_index = len(ends) - 1
+            defs.append([f"{cls}.valore", 'variable', line + 1, 4])
+            ends.append(line + 1)
+            line += 1
+            methods = rng.sample(COMMON_METHODS, 4) + [f"metodo_{f}_{c}_{m}" for m in range(6)]
+            for method in methods:
+                line += 2
+                defs.append([f"{cls}.{method}", 'method', line, 4])
+                ends.append(line + 3)
+                line += 3
+            ends[class_index] = line
+            line += 2
+            defs.append([f"funzione_{f}_{c}", 'function', line, 0])
+            ends.append(line + 4)
+            line += 4
+        yield f"src/pkg{f // 400}/sub{(f // 20) % 20}/mod{f}.py", {'defs': defs, 'ends': ends}
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=20000)
+    parser.add_argument('--classes', type=int, default=4)
+    args = parser.parse_args()
+
+    def build_naive():
+        defs = {}
+        for rel_path, record in make_records(args.files, args.classes):
+            for item, end in zip(record['defs'], record['ends']):
+                defs.setdefault(short_name(item[0]), []).append(item + [end, rel_path])
+        return defs
+
+    def build_table():
+        table = SymbolTable()
+        for rel_path, record in make_records(args.files, args.classes):
+            table.add_file(rel_path, 0, 0, record)
+        # Il dizionario di interning serve solo durante la costruzione
+        table._strings = None
+        return table
+
+    naive, naive_bytes, naive_time = measure(build_naive)
+    symbols = sum(len(items) for items in naive.values())
+    table, table_bytes, table_time = measure(build_table)
+
+    tmpdir = tempfile.mkdtemp(prefix="fylia-bench-")
+    try:
+        path = Path(tmpdir) / "symbols.fysym"
+        start = time.perf_counter()
+        table.write(path)
+        write_time = time.perf_counter() - start
+        del table
+        store, store_bytes, open_time = measure(lambda: SymbolStore(path))
+
+        names = [f"metodo_{f}_1_2" for f in range(0, args.files, max(1, args.files // 1000))] + COMMON_METHODS
+        start = time.perf_counter()
+        naive_hits = sum(len(naive.get(name, ())) for name in names)
+        naive_query = (time.perf_counter() - start) / len(names)
+        start = time.perf_counter()
+        store_hits = sum(len(store.find(name)) for name in names)
+        store_query = (time.perf_counter() - start) / len(names)
+        assert naive_hits == store_hits
+
+        mib = 1024 * 1024
+        print(f"{symbols} simboli in {args.files} file\n")
+        print(f"{'rappresentazione':<28}{'memoria':>12}{'per simbolo':>14}{'costruzione':>14}")
+        for label, size, elapsed in (("ingenua (dict e liste)", naive_bytes, naive_time),
+                                     ("SymbolTable (colonne)", table_bytes, table_time),
+                                     ("SymbolStore (mmap)", store_bytes, open_time)):
+            print(f"{label:<28}{size / mib:9.1f} MiB{size / symbols:11.1f} B{elapsed * 1000:11.1f} ms")
+        print("(tempi di costruzione rallentati da tracemalloc, utili solo per confronto)")
+        print(f"\nFile su disco: {path.stat().st_size / mib:.1f} MiB (scritto in {write_time * 1000:.0f} ms)")
+        print(f"Ricerca per nome: dict {naive_query * 1e6:.1f} µs, mmap {store_query * 1e6:.1f} µs "
+              f"({store_hits} risultati su {len(names)} nomi)")
+        store.close()
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
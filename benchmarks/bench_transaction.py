@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark di un refactoring su molti file
+
+Modifica N moduli di un repository sintetico (default 500) e confronta
+N chiamate separate a Patcher.modify_file con una sola transazione.
+Entrambe le varianti sincronizzano i dati su disco (durable=True): la
+transazione fa una fsync per cartella invece che una per file.
+
+Uso: python benchmarks/bench_transaction.py [--files N] [--no-durable]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fylia.patcher import Patcher
+from synthrepo import make_python_tree
+
+
+def python_files(root: Path) -> list:
+    return sorted(str(p.relative_to(root)) for p in root.rglob("*.py"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=500)
+    parser.add_argument('--no-durable', action='store_true', help="senza fsync")
+    args = parser.parse_args()
+
+    patcher = Patcher(durable=not args.no_durable)
+    tmpdir = Path(tempfile.mkdtemp(prefix="fylia-bench-"))
+    try:
+        template = tmpdir / "template"
+        make_python_tree(template, args.files)
+        files = python_files(template)
+        print(f"Refactoring di {len(files)} file (durable={patcher.durable})\n")
+
+        separate = tmpdir / "separate"
+        shutil.copytree(template, separate)
+        start = time.perf_counter()
+        for rel in files:
+            assert patcher.modify_file(str(separate / rel), "metodo_a", "metodo_rinominato")
+        separate_time = time.perf_counter() - start
+        print(f"modify_file x {len(files)}:  {separate_time * 1000:8.1f} ms")
+
+        batched = tmpdir / "batched"
+        shutil.copytree(template, batched)
+        start = time.perf_counter()
+        with patcher.transaction(str(batched)) as tx:
+            for rel in files:
+                tx.modify(rel, "metodo_a", "metodo_rinominato")
+        batched_time = time.perf_counter() - start
+        print(f"una transazione:     {batched_time * 1000:8.1f} ms")
+
+        same = all((separate / rel).read_bytes() == (batched / rel).read_bytes() for rel in files)
+        print(f"\nRisultato identico: {'sì' if same else 'NO'}")
+        print(f"Accelerazione: {separate_time / batched_time:.2f}x")
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark della reattività della TUI durante una generazione
+
+Avvia FyliaApp senza terminale (App.run_test) con un MockProvider
+rallentato, invia una richiesta e, mentre la risposta è in streaming,
+digita caratteri nella chat misurando:
+- la latenza di ogni tasto (dalla pressione all'aggiornamento dell'input)
+- il blocco massimo del loop dell'interfaccia (battito ogni millisecondo)
+
+Per confronto ripete la misura con la vecchia chiamata bloccante a
+generate_response dentro on_input_submitted.
+
+Uso: python benchmarks/bench_ui_latency.py [--latency S] [--tps N] [--keys N]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from textual.widgets import Input, Static
+
+from fylia.providers.base import BaseProvider
+from fylia.providers.mock import MockProvider
+from fylia.tui import FyliaApp
+
+
+class SyncOnlyProvider(MockProvider):
+    """Mock che attende con time.sleep, come un client HTTP sincrono"""
+    astream_response = BaseProvider.astream_response
+
+
+class BlockingApp(FyliaApp):
+    """Comportamento precedente: risposta calcolata nel gestore dell'evento"""
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        if event.value == "crea una classe":
+            response = self.provider.generate_response(event.value)
+            self.query_one("#output-content", Static).update(response)
+            event.input.value = ""
+
+
+class MeasuredMixin:
+    changed_at = 0.0
+
+    def on_input_changed(self, event: Input.Changed) -> None:
+        self.changed_at = time.perf_counter()
+
+
+class MeasuredApp(MeasuredMixin, FyliaApp):
+    pass
+
+
+class MeasuredBlockingApp(MeasuredMixin, BlockingApp):
+    pass
+
+
+async def heartbeat(gaps: list, stop: asyncio.Event) -> None:
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0.001)
+        now = time.perf_counter()
+        gaps.append(now - last)
+        last = now
+
+
+async def run(app_class, provider, keys: int) -> dict:
+    app = app_class()
+    app.provider = provider
+    latencies = []
+    gaps = []
+    async with app.run_test() as pilot:
+        await pilot.pause(0.2)
+        chat = app.query_one("#chat-input", Input)
+        stop = asyncio.Event()
+        beat = asyncio.ensure_future(heartbeat(gaps, stop))
+        start = time.perf_counter()
+        chat.value = "crea una classe"
+        await pilot.press("enter")
+        for _ in range(keys):
+            pressed = time.perf_counter()
+            await pilot.press("x")
+            latencies.append(app.changed_at - pressed)
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await beat
+    return {'latencies': latencies, 'max_stall': max(gaps), 'elapsed': elapsed}
+
+
+def report(name: str, result: dict) -> None:
+    lat = sorted(result['latencies'])
+    p95 = lat[int(len(lat) * 0.95) - 1]
+    print(f"{name:<22} tasto p50 {statistics.median(lat) * 1000:6.1f} ms  "
+          f"p95 {p95 * 1000:6.1f} ms  max {lat[-1] * 1000:6.1f} ms  "
+          f"blocco loop max {result['max_stall'] * 1000:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.5, help="secondi prima del primo token")
+    parser.add_argument('--tps', type=float, default=100, help="token al secondo")
+    parser.add_argument('--keys', type=int, default=60)
+    args = parser.parse_args()
+
+    # La mappa viene costruita sulla cartella corrente: se ne usa una vuota
+    os.chdir(tempfile.mkdtemp(prefix="fylia-bench-"))
+    print(f"MockProvider(latency={args.latency}, tokens_per_second={args.tps}), {args.keys} tasti\n")
+    report("worker asincrono", asyncio.run(
+        run(MeasuredApp, MockProvider(args.latency, args.tps), args.keys)))
+    report("provider sincrono", asyncio.run(
+        run(MeasuredApp, SyncOnlyProvider(args.latency, args.tps), args.keys)))
+    report("chiamata bloccante", asyncio.run(
+        run(MeasuredBlockingApp, MockProvider(args.latency, args.tps), args.keys)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark del registro delle modifiche (fylia undo)
+
+Simula una sessione di K changeset su un repository sintetico: ogni
+changeset modifica alcuni file con una transazione. Confronta il tempo
+senza registro e con registro, lo spazio occupato dall'archivio dei
+contenuti rispetto a copie complete dei file prima e dopo ogni modifica,
+e il tempo per annullare e ripristinare tutta la sessione.
+
+Uso: python benchmarks/bench_undo.py [--files N] [--changesets K] [--per-changeset M] [--repeat R]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fylia.patcher import Patcher
+from fylia.undo import UndoJournal
+from synthrepo import make_python_tree
+
+
+def make_repo(root: Path, files: int, repeat: int) -> None:
+    """Moduli sintetici ingranditi a qualche KiB, come file sorgente reali"""
+    make_python_tree(root, files)
+    for path in root.rglob("*.py"):
+        path.write_text(path.read_text() * repeat)
+
+
+def disk_usage(directory: Path) -> int:
+    return sum(p.stat().st_size for p in directory.rglob("*") if p.is_file())
+
+
+def run_session(root: Path, patcher: Patcher, changesets: int, per_changeset: int, seed: int = 0):
+    rng = random.Random(seed)
+    files = sorted(str(p.relative_to(root)) for p in root.rglob("*.py") if ".fylia" not in p.parts)
+    copied_bytes = 0
+    start = time.perf_counter()
+    for step in range(changesets):
+        with patcher.transaction(str(root)) as tx:
+            for rel_path in rng.sample(files, per_changeset):
+                before = (root / rel_path).stat().st_size
+                tx.modify(rel_path, "return a + b", f"return a + b  # passo {step}")
+                # Una copia per annullare e una per ripristinare
+                copied_bytes += before + len(tx.read(rel_path))
+    return time.perf_counter() - start, copied_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=500)
+    parser.add_argument('--changesets', type=int, default=100)
+    parser.add_argument('--per-changeset', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=20, help="moltiplicatore della dimensione dei moduli")
+    args = parser.parse_args()
+
+    tmpdir = Path(tempfile.mkdtemp(prefix="fylia-bench-"))
+    try:
+        plain_root = tmpdir / "senza"
+        journal_root = tmpdir / "con"
+        make_repo(plain_root, args.files, args.repeat)
+        make_repo(journal_root, args.files, args.repeat)
+
+        plain_time, copied = run_session(plain_root, Patcher(durable=False),
+                                          args.changesets, args.per_changeset)
+        journal = UndoJournal(journal_root)
+        journal_time, _ = run_session(journal_root, Patcher(durable=False, journal=journal),
+                                      args.changesets, args.per_changeset)
+        store_bytes = disk_usage(journal.directory)
+
+        start = time.perf_counter()
+        journal.undo(steps=len(journal.changesets), durable=False)
+        undo_time = time.perf_counter() - start
+        start = time.perf_counter()
+        journal.redo(steps=len(journal.changesets), durable=False)
+        redo_time = time.perf_counter() - start
+
+        changes = args.changesets * args.per_changeset
+        kib = 1024
+        print(f"Sessione: {args.changesets} changeset da {args.per_changeset} file "
+              f"su {args.files} moduli\n")
+        print(f"{'senza registro':<34}{plain_time * 1000:9.1f} ms")
+        print(f"{'con registro':<34}{journal_time * 1000:9.1f} ms  "
+              f"(+{(journal_time - plain_time) / changes * 1e6:.0f} µs per file modificato)")
+        print(f"{'annulla tutta la sessione':<34}{undo_time * 1000:9.1f} ms")
+        print(f"{'ripristina tutta la sessione':<34}{redo_time * 1000:9.1f} ms\n")
+        print(f"Copie complete prima e dopo ogni modifica: {copied / kib:9.1f} KiB")
+        print(f"Archivio (compresso, senza duplicati):     {store_bytes / kib:9.1f} KiB")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Benchmark della visita del filesystem di CodeMapGenerator
+
+Confronta la visita precedente (albero con Path.iterdir + rglob('*.py')
+filtrato a posteriori) con la visita unica basata su os.scandir, su un
+repository sintetico con una grande cartella node_modules.
+
+Uso: python benchmarks/bench_walk.py [--py-files N] [--node-packages N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fylia.mapgen import CodeMapGenerator
+from fylia.walker import walk_project
+from synthrepo import make_repo
+
+
+def legacy_scan(generator: CodeMapGenerator, root: Path):
+    """Visita in due passaggi, come prima della visita unica"""
+    def tree(path: Path, depth: int = 0):
+        if depth >= 3:
+            return
+        items = sorted(path.iterdir(), key=lambda x: (not x.is_dir(), x.name))
+        items = [i for i in items if i.name not in generator.ignore_files and i.name not in generator.ignore_dirs]
+        for item in items:
+            if item.is_dir():
+                tree(item, depth + 1)
+
+    tree(root)
+    return [p for p in root.rglob('*.py') if not any(ig in p.parts for ig in generator.ignore_dirs)]
+
+
+def new_scan(generator: CodeMapGenerator, root: Path):
+    """Visita unica con os.scandir, come in ProjectModel.build()"""
+    return [e for e in walk_project(str(root), generator.ignore_dirs, generator.ignore_files)
+            if not e.is_dir and e.name.endswith('.py')]
+
+
+class SyscallCounter:
+    """Conta le chiamate al filesystem fatte da Python (scandir, listdir, stat)"""
+
+    def __init__(self):
+        self.counts = {}
+        self._saved = {}
+
+    def _bump(self, name):
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def __enter__(self):
+        counter = self
+
+        class EntryProxy:
+            def __init__(self, entry):
+                self._entry = entry
+
+            def stat(self, *args, **kwargs):
+                counter._bump('DirEntry.stat')
+                return self._entry.stat(*args, **kwargs)
+
+            def __getattr__(self, name):
+                return getattr(self._entry, name)
+
+            def __fspath__(self):
+                return self._entry.path
+
+        class ScandirProxy:
+            def __init__(self, it):
+                self._it = it
+
+            def __iter__(self):
+                return (EntryProxy(e) for e in self._it)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                self._it.close()
+
+            def close(self):
+                self._it.close()
+
+        for name in ('listdir', 'stat', 'lstat'):
+            real = getattr(os, name)
+            self._saved[name] = real
+            setattr(os, name, self._wrap(name, real))
+
+        real_scandir = os.scandir
+        self._saved['scandir'] = real_scandir
+
+        def scandir(*args, **kwargs):
+            counter._bump('scandir')
+            return ScandirProxy(real_scandir(*args, **kwargs))
+
+        os.scandir = scandir
+        return self
+
+    def _wrap(self, name, real):
+        def wrapper(*args, **kwargs):
+            self._bump(name)
+            return real(*args, **kwargs)
+        return wrapper
+
+    def __exit__(self, *exc):
+        for name, real in self._saved.items():
+            setattr(os, name, real)
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+
+def measure(func, generator, root, repeat):
+    with SyscallCounter() as counter:
+        result = func(generator, root)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(generator, root)
+        best = min(best, time.perf_counter() - start)
+    return len(result), counter, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--py-files', type=int, default=1000)
+    parser.add_argument('--node-packages', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    generator = CodeMapGenerator(use_cache=False)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = make_repo(Path(tmpdir), args.py_files, args.node_packages)
+        print(f"Repository: {args.py_files} file .py, node_modules con "
+              f"{args.node_packages * 30} file\n")
+
+        rows = []
+        for label, func in (("legacy (iterdir + rglob)", legacy_scan), ("scandir unico", new_scan)):
+            found, counter, best = measure(func, generator, root, args.repeat)
+            rows.append((label, found, counter, best))
+            details = ", ".join(f"{k}={v}" for k, v in sorted(counter.counts.items()))
+            print(f"{label:26} file .py={found:6}  chiamate fs={counter.total:7}  "
+                  f"tempo={best * 1000:8.1f} ms  ({details})")
+
+        (_, _, old_c, old_t), (_, _, new_c, new_t) = rows
+        print(f"\nChiamate risparmiate: {old_c.total - new_c.total} "
+              f"({old_c.total / max(new_c.total, 1):.1f}x), "
+              f"tempo: {old_t / new_t:.1f}x più veloce")
+
+
+if __name__ == '__main__':
+    main()
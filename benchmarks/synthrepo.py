@@ -0,0 +1,135 @@
+"""
+Generatore deterministico di repository sintetici per i benchmark
+"""
+
+import os
+import random
+from pathlib import Path
+
+
+PY_TEMPLATE = '''"""Modulo sintetico {name}"""
+
+import os
+
+
+class {cls}:
+    """Classe generata"""
+
+    def __init__(self):
+        self.value = {n}
+
+    def metodo_a(self):
+        return self.value + 1
+
+    def metodo_b(self, x):
+        return x * self.value
+
+
+def funzione_{n}(a, b):
+    return a + b
+'''
+
+
+def make_python_tree(root: Path, files: int, per_dir: int = 20, seed: int = 0) -> None:
+    """Crea `files` moduli Python distribuiti in pacchetti annidati"""
+    rng = random.Random(seed)
+    for i in range(files):
+        pkg = root / "src" / f"pkg{i // (per_dir * per_dir)}" / f"sub{(i // per_dir) % per_dir}"
+        pkg.mkdir(parents=True, exist_ok=True)
+        name = f"mod{i}"
+        (pkg / f"{name}.py").write_text(
+            PY_TEMPLATE.format(name=name, cls=f"Classe{i}", n=rng.randint(0, 1000))
+        )
+
+
+def make_node_modules(root: Path, packages: int, files_per_package: int = 30) -> None:
+    """Crea una cartella node_modules rumorosa, con qualche file .py sparso"""
+    base = root / "node_modules"
+    for p in range(packages):
+        pkg = base / f"pacchetto-{p}" / "lib"
+        pkg.mkdir(parents=True, exist_ok=True)
+        for f in range(files_per_package):
+            suffix = ".py" if f == 0 else ".js"
+            (pkg / f"file{f}{suffix}").write_text("module.exports = {};\n")
+
+
+def make_repo(root: Path, py_files: int = 500, node_packages: int = 300) -> Path:
+    """Crea un repository sintetico completo in `root`"""
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    make_python_tree(root, py_files)
+    make_node_modules(root, node_packages)
+    (root / "README.md").write_text("# Repo sintetico\n")
+    os.makedirs(root / ".git", exist_ok=True)
+    return root
+
+
+# Dimensioni predefinite della suite di benchmark (file totali, rumore compreso)
+SIZES = {'1k': 1_000, '10k': 10_000, '100k': 100_000}
+
+
+def make_deep_tree(root: Path, depth: int, files_per_level: int = 2) -> Path:
+    """Crea una catena di `depth` cartelle annidate con pochi moduli per livello"""
+    path = root / "deep"
+    for level in range(depth):
+        path = path / f"livello{level}"
+        path.mkdir(parents=True, exist_ok=True)
+        for f in range(files_per_level):
+            n = level * files_per_level + f
+            (path / f"nodo{f}.py").write_text(PY_TEMPLATE.format(name=f"nodo{n}", cls=f"Nodo{n}", n=n))
+    return root / "deep"
+
+
+HUGE_CLASS_TEMPLATE = '''
+
+class Grande{i}:
+    """Classe generata"""
+
+    def __init__(self):
+        self.value = {n}
+
+    def metodo_a(self):
+        return self.value + 1
+
+    def metodo_b(self, x):
+        return x * self.value
+
+
+def funzione_grande_{i}(a, b):
+    return a + b
+'''
+
+
+def huge_source(classes: int, seed: int = 0) -> str:
+    """Sorgente Python di un unico file enorme (`classes` classi da 17 righe)"""
+    rng = random.Random(seed)
+    parts = ['"""Modulo sintetico enorme"""\n\nimport os\n']
+    parts += [HUGE_CLASS_TEMPLATE.format(i=i, n=rng.randint(0, 1000)) for i in range(classes)]
+    return "".join(parts)
+
+
+def make_huge_file(root: Path, classes: int = 2000, seed: int = 0) -> Path:
+    """Crea big/enorme.py con `classes` classi (2000 classi ≈ 34k righe, 500 KB)"""
+    path = root / "big" / "enorme.py"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(huge_source(classes, seed))
+    return path
+
+
+def make_suite_repo(root: Path, files: int, seed: int = 0) -> Path:
+    """
+    Repository della suite con circa `files` file in tutto
+
+    60% moduli Python in pacchetti, 30% rumore in node_modules, il resto in
+    una catena di cartelle profonde (al massimo 100 livelli, per restare
+    lontani dal limite di lunghezza dei percorsi); più un file enorme a parte.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    make_python_tree(root, files * 6 // 10, seed=seed)
+    make_node_modules(root, max(1, files * 3 // 10 // 30))
+    depth = min(100, max(1, files // 20))
+    make_deep_tree(root, depth, files_per_level=max(1, files // 10 // depth))
+    make_huge_file(root, seed=seed)
+    (root / "README.md").write_text("# Repo sintetico\n")
+    return root
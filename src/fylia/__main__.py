@@ -0,0 +1,22 @@
+"""
+Avvio del comando fylia (anche come `python -m fylia`)
+`fylia --version` risponde senza importare click; gli altri comandi passano
+al gruppo click di fylia.cli, che importa i moduli pesanti (textual, provider)
+solo dentro i comandi che li usano.
+"""
+
+import sys
+
+
+def main() -> None:
+    if sys.argv[1:] == ['--version']:
+        from fylia import __version__
+        # Stesso testo di click.version_option
+        print(f"fylia, version {__version__}")
+        return
+    from fylia.cli import cli
+    cli(prog_name='fylia')
+
+
+if __name__ == '__main__':
+    main()
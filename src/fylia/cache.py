@@ -0,0 +1,182 @@
+"""
+Cache persistente su disco per i dati estratti dai file del progetto
+Evita di rileggere e rianalizzare i file che non sono cambiati
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Set
+
+
+# Sottocartella del progetto in cui FYLIA salva i propri dati
+FYLIA_DIR = '.fylia'
+
+# File modificati da meno di questo intervallo (ns) non vengono considerati
+# affidabili tramite mtime: una seconda modifica nello stesso "tick" del
+# filesystem lascerebbe mtime e dimensione invariati
+_RACY_WINDOW_NS = 2_000_000_000
+
+
+def default_cache_dir(root: Path) -> Path:
+    """Restituisce la cartella di cache predefinita per un progetto"""
+    return Path(root) / FYLIA_DIR / 'cache'
+
+
+def content_hash(data: bytes) -> str:
+    """Calcola l'hash del contenuto di un file"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class FileCache:
+    """
+    Cache di record per file, indicizzata per percorso relativo
+
+    Ogni voce memorizza mtime, dimensione e hash del contenuto del file
+    insieme al record estratto. Un file viene rianalizzato solo se mtime o
+    dimensione sono cambiati e anche l'hash del contenuto è diverso.
+    Le voci dei file non più visti vengono eliminate al salvataggio.
+    """
+
+    def __init__(self, cache_dir: Path, name: str, version: int):
+        self.path = Path(cache_dir) / f"{name}.json"
+        self.version = version
+        self.entries: Dict[str, list] = {}
+        self.hits = 0
+        self.misses = 0
+        self._seen: Set[str] = set()
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        """Carica la cache dal disco, scartandola se di un'altra versione"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if not isinstance(data, dict) or data.get('version') != self.version:
+            # Formato cambiato: la cache verrà riscritta da zero
+            self._dirty = True
+            return
+
+        entries = data.get('entries')
+        if isinstance(entries, dict):
+            self.entries = entries
+
+    def start_pass(self) -> None:
+        """Inizia una nuova visita completa: i file visti vengono ricontati da zero"""
+        self._seen.clear()
+
+    def get(self, rel_path: str, file_path: Path, mtime_ns: int, size: int,
+            compute: Callable[[bytes], Any]) -> Any:
+        """
+        Restituisce il record di un file, ricalcolandolo solo se necessario
+
+        Args:
+            rel_path: chiave del file (percorso relativo alla radice)
+            file_path: percorso del file da leggere in caso di miss
+            mtime_ns: mtime corrente del file in nanosecondi
+            size: dimensione corrente del file
+            compute: funzione che produce il record dal contenuto del file
+
+        Returns:
+            Il record (dalla cache o appena calcolato)
+        """
+        self._seen.add(rel_path)
+        entry = self.entries.get(rel_path)
+
+        if entry is not None and entry[0] == mtime_ns and entry[1] == size:
+            self.hits += 1
+            return entry[3]
+
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        digest = content_hash(data)
+
+        if entry is not None and entry[2] == digest:
+            # Solo i metadati sono cambiati (es. touch o checkout)
+            self.hits += 1
+            record = entry[3]
+        else:
+            self.misses += 1
+            record = compute(data)
+
+        self.put(rel_path, mtime_ns, size, digest, record)
+        return record
+
+    def lookup(self, rel_path: str, mtime_ns: int, size: int) -> Optional[list]:
+        """
+        Cerca una voce valida senza leggere il file
+
+        Returns:
+            La voce [mtime_ns, size, hash, record] se mtime e dimensione
+            coincidono, altrimenti None
+        """
+        self._seen.add(rel_path)
+        entry = self.entries.get(rel_path)
+        if entry is not None and entry[0] == mtime_ns and entry[1] == size:
+            self.hits += 1
+            return entry
+        return None
+
+    def known_hash(self, rel_path: str) -> Optional[str]:
+        """Restituisce l'hash del contenuto memorizzato per un file, se presente"""
+        entry = self.entries.get(rel_path)
+        return entry[2] if entry is not None else None
+
+    def record_for(self, rel_path: str) -> Any:
+        """Restituisce il record memorizzato per un file, senza verifiche"""
+        entry = self.entries.get(rel_path)
+        return entry[3] if entry is not None else None
+
+    def put(self, rel_path: str, mtime_ns: int, size: int, digest: str, record: Any) -> None:
+        """Memorizza il record di un file"""
+        self._seen.add(rel_path)
+        if time.time_ns() - mtime_ns < _RACY_WINDOW_NS:
+            # mtime troppo recente: alla prossima lettura si verifica l'hash
+            mtime_ns = -1
+        self.entries[rel_path] = [mtime_ns, size, digest, record]
+        self._dirty = True
+
+    def save(self, prune: bool = True) -> bool:
+        """
+        Salva la cache su disco in modo atomico
+
+        Args:
+            prune: se True elimina le voci dei file non visti in questa sessione
+
+        Returns:
+            True se la cache è stata scritta (o non c'era nulla da scrivere)
+        """
+        if prune:
+            stale = [key for key in self.entries if key not in self._seen]
+            for key in stale:
+                del self.entries[key]
+            if stale:
+                self._dirty = True
+
+        if not self._dirty:
+            return True
+
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # json.dumps usa l'encoder in C, json.dump su file no
+            data = json.dumps({'version': self.version, 'entries': self.entries}, separators=(',', ':'))
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # Progetto in sola lettura: la cache è solo un'ottimizzazione
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            return False
+
+        self._dirty = False
+        return True
@@ -1,36 +1,371 @@
 #!/usr/bin/env python3
 """
 CLI entry point per FYLIA
-Comandi disponibili: chat, map
+Comandi disponibili: chat, map, refs, def, deps, context, serve, apply, undo, redo
 """
 
+import os
+import sys
+
 import click
 from fylia import __version__
 
 
 @click.group()
 @click.version_option(version=__version__)
-def cli():
+@click.option('--profile', 'profile_path', metavar='FILE',
+              help="Registra i tempi delle fasi e scrivili in FILE (formato Chrome trace)")
+@click.option('--cprofile', 'cprofile_path', metavar='FILE',
+              help="Profila il comando con cProfile e salva le statistiche in FILE")
+@click.pass_context
+def cli(ctx, profile_path, cprofile_path):
     """FYLIA - Ambiente di sviluppo conversazionale"""
-    pass
+    if profile_path:
+        from fylia import trace
+        tracer = trace.enable()
+        ctx.call_on_close(lambda: _write_profile(tracer, profile_path))
+    if cprofile_path:
+        from fylia.trace import start_cprofile
+        stop = start_cprofile(cprofile_path)
+        ctx.call_on_close(lambda: _stop_cprofile(stop, cprofile_path))
+
+
+def _write_profile(tracer, path) -> None:
+    from fylia.trace import format_summary
+    tracer.write(path)
+    click.echo(format_summary(tracer.summary()), err=True)
+    click.echo(f"Traccia salvata in {path} (apribile con chrome://tracing o ui.perfetto.dev)", err=True)
+
+
+def _stop_cprofile(stop, path) -> None:
+    stop()
+    click.echo(f"Profilo salvato in {path} (python -m pstats {path})", err=True)
 
 
 @cli.command()
-def chat():
+@click.option('--jobs', '-j', default=1, show_default=True,
+              help="Processi per l'analisi della mappa (0 = tutti i core)")
+@click.option('--timeout', default=120.0, show_default=True,
+              help="Secondi massimi per una risposta del provider")
+def chat(jobs, timeout):
     """Avvia l'interfaccia TUI a 3 pannelli"""
     from fylia.tui import run_tui
-    run_tui()
+    run_tui(jobs=jobs, request_timeout=timeout)
+
+
+def _ask_daemon(path, op, **params):
+    """
+    Risposta del daemon del progetto (fylia serve), None se va calcolata in locale
+    """
+    from fylia.daemon import DaemonError, query
+    try:
+        return query(path, op, **params)
+    except DaemonError as e:
+        raise click.ClickException(str(e))
 
 
 @cli.command()
 @click.argument('path', default='.')
-def map(path):
+@click.option('--no-cache', is_flag=True, help="Non usare la cache dei simboli in .fylia/cache")
+@click.option('--jobs', '-j', default=1, show_default=True,
+              help="Processi per l'analisi dei file (0 = tutti i core)")
+@click.option('--no-git', is_flag=True,
+              help="Visita tutte le cartelle invece di usare .git/index e .gitignore")
+@click.option('--format', '-f', 'output_format', default='text', show_default=True,
+              type=click.Choice(['text', 'json', 'ndjson']),
+              help="Formato di uscita (json/ndjson per altri programmi)")
+@click.option('--no-daemon', is_flag=True, help="Non chiedere la mappa al daemon (fylia serve)")
+@click.option('--shallow', is_flag=True,
+              help="File Python analizzati per righe invece che con l'AST (più veloce)")
+def map(path, no_cache, jobs, no_git, output_format, no_daemon, shallow):
     """Mostra la mappa concettuale del progetto"""
-    from fylia.mapgen import CodeMapGenerator
+    from pathlib import Path
+    
+    if not Path(path).exists():
+        if output_format == 'text':
+            click.echo(f"❌ Percorso non trovato: {path}")
+            return
+        raise click.ClickException(f"Percorso non trovato: {path}")
     
-    generator = CodeMapGenerator()
-    mappa = generator.generate_map(path)
-    click.echo(mappa)
+    # Il daemon ha la mappa già pronta (con l'AST); --no-cache chiede una visita da zero
+    rendered = None
+    if not (no_daemon or no_cache or shallow):
+        rendered = _ask_daemon(path, 'map', format=output_format, use_git=not no_git)
+    if rendered is not None:
+        chunks = iter([rendered])
+    else:
+        chunks = _map_chunks(path, no_cache, jobs, no_git, output_format, shallow)
+    
+    try:
+        for chunk in chunks:
+            click.echo(chunk, nl=False)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # Lettore chiuso prima della fine (es. `fylia map -f ndjson | head`):
+        # si interrompe la visita e si evita l'errore al flush finale
+        if hasattr(chunks, 'close'):
+            chunks.close()
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+
+
+def _map_chunks(path, no_cache, jobs, no_git, output_format, shallow=False):
+    """La mappa calcolata in locale, a pezzi"""
+    from fylia.mapgen import CodeMapGenerator
+    from fylia.mapstream import iter_json, iter_ndjson, iter_text
+
+    generator = CodeMapGenerator(use_cache=not no_cache, jobs=jobs, use_git=not no_git,
+                                 python_mode='shallow' if shallow else 'full')
+    if output_format == 'json':
+        return iter_json(generator, path)
+    if output_format == 'ndjson':
+        return iter_ndjson(generator, path)
+    return (line + '\n' for line in iter_text(generator, path))
+
+
+
+def _open_index(path):
+    from fylia.index import SymbolIndex
+    from fylia.symstore import save_index_store
+    index = SymbolIndex(path).update()
+    save_index_store(index)
+    return index
+
+
+@cli.command()
+@click.argument('symbol')
+@click.option('--path', '-p', default='.', help="Radice del progetto")
+@click.option('--kind', '-k', multiple=True,
+              type=click.Choice(['import', 'module', 'call', 'attribute', 'name']),
+              help="Filtra per tipo di riferimento (ripetibile)")
+def refs(symbol, path, kind):
+    """Mostra dove viene usato un simbolo"""
+    from fylia.index import Location, format_locations
+
+    found = _ask_daemon(path, 'refs', symbol=symbol, kinds=list(kind) or None)
+    if found is not None:
+        locations = [Location(*loc) for loc in found]
+    else:
+        locations = _open_index(path).references(symbol, kinds=kind)
+    if not locations:
+        click.echo(f"Nessun riferimento trovato per {symbol}")
+        return
+    click.echo(format_locations(locations))
+
+
+@cli.command(name='def')
+@click.argument('symbol')
+@click.option('--path', '-p', default='.', help="Radice del progetto")
+def definition(symbol, path):
+    """Mostra dove è definito un simbolo"""
+    from fylia.index import Location, format_locations
+    from fylia.symstore import open_fresh_store
+
+    found = _ask_daemon(path, 'def', symbol=symbol)
+    # Con i file invariati basta la tabella compatta, senza ricaricare l'indice
+    store = open_fresh_store(path) if found is None else None
+    if found is not None:
+        locations = [Location(*loc) for loc in found]
+    elif store is not None:
+        with store:
+            locations = store.definitions(symbol)
+    else:
+        locations = _open_index(path).definitions(symbol)
+    if not locations:
+        click.echo(f"Nessuna definizione trovata per {symbol}")
+        return
+    click.echo(format_locations(locations))
+
+
+@cli.command()
+@click.argument('target', required=False)
+@click.option('--path', '-p', default='.', help="Radice del progetto")
+@click.option('--reverse', '-r', is_flag=True, help="Mostra chi importa il file invece delle sue dipendenze")
+@click.option('--transitive', '-t', is_flag=True, help="Includi anche le dipendenze indirette")
+@click.option('--cycles', is_flag=True, help="Elenca gli import circolari")
+@click.option('--no-git', is_flag=True,
+              help="Visita tutte le cartelle invece di usare .git/index e .gitignore")
+def deps(target, path, reverse, transitive, cycles, no_git):
+    """Mostra le dipendenze tra i moduli (TARGET: file o nome del modulo)"""
+    result = _ask_daemon(path, 'deps', target=target, reverse=reverse, transitive=transitive,
+                         cycles=cycles, use_git=not no_git)
+    if result is None:
+        result = _local_deps(path, target, reverse, transitive, cycles, no_git)
+
+    if cycles:
+        groups = result['cycles']
+        if not groups:
+            click.echo("Nessun import circolare")
+        for i, group in enumerate(groups, 1):
+            click.echo(f"Ciclo {i} ({len(group)} file):")
+            for rel_path in group:
+                click.echo(f"  {rel_path}")
+        return
+
+    if target is None:
+        stats = result['stats']
+        click.echo(f"{stats['files']} file Python, {stats['edges']} dipendenze interne, "
+                   f"{result['cycles']} cicli")
+        return
+
+    found = result['found']
+    if not found:
+        click.echo("Nessun file usa " + target if reverse else f"{target} non dipende da altri file del progetto")
+        return
+    for rel_path in found:
+        click.echo(rel_path)
+
+
+def _local_deps(path, target, reverse, transitive, cycles, no_git) -> dict:
+    """Come la richiesta 'deps' del daemon, calcolata in locale"""
+    from fylia.deps import DependencyGraph
+
+    graph = DependencyGraph(path, use_git=not no_git).update()
+    if cycles:
+        return {'cycles': graph.cycles()}
+    if target is None:
+        return {'stats': graph.stats(), 'cycles': len(graph.cycles())}
+    if graph.node_id(target) is None:
+        raise click.ClickException(f"File o modulo non trovato nel progetto: {target}")
+    if reverse:
+        return {'found': graph.dependents(target, transitive=transitive)}
+    return {'found': graph.dependencies(target, transitive=transitive)}
+
+
+@cli.command()
+@click.argument('request')
+@click.option('--path', '-p', default='.', help="Radice del progetto")
+@click.option('--budget', '-b', default=2000, show_default=True, help="Token stimati massimi del contesto")
+@click.option('--no-git', is_flag=True,
+              help="Visita tutte le cartelle invece di usare .git/index e .gitignore")
+def context(request, path, budget, no_git):
+    """Mostra il contesto del progetto che accompagna una richiesta"""
+    from fylia.context import ContextBuilder, PackedContext
+
+    found = _ask_daemon(path, 'context', request=request, budget=budget, use_git=not no_git)
+    if found is not None:
+        packed = PackedContext(**found)
+    else:
+        from fylia.deps import DependencyGraph
+        graph = DependencyGraph(path, use_git=not no_git).update()
+        packed = ContextBuilder(_open_index(path), graph).build(request, budget)
+    if packed.text:
+        click.echo(packed.text)
+    summary = (f"{len(packed.files)} file, {packed.symbols} simboli, ~{packed.tokens} token "
+               f"in {packed.elapsed * 1000:.1f} ms")
+    click.echo(summary if packed.text else f"Nessun file pertinente trovato ({summary})", err=True)
+
+
+@cli.command()
+@click.argument('path', default='.')
+@click.option('--idle-timeout', default=30.0, show_default=True,
+              help="Minuti senza richieste dopo cui il daemon si chiude (0 = mai)")
+@click.option('--memory-limit', default=256, show_default=True,
+              help="MiB di memoria oltre cui il daemon svuota le cache o si chiude (0 = nessun limite)")
+@click.option('--jobs', '-j', default=1, show_default=True,
+              help="Processi per la prima analisi del progetto (0 = tutti i core)")
+@click.option('--no-git', is_flag=True,
+              help="Visita tutte le cartelle invece di usare .git/index e .gitignore")
+@click.option('--status', is_flag=True, help="Mostra lo stato del daemon in esecuzione")
+@click.option('--stop', is_flag=True, help="Ferma il daemon in esecuzione")
+def serve(path, idle_timeout, memory_limit, jobs, no_git, status, stop):
+    """Tiene il progetto in memoria per rispondere subito agli altri comandi"""
+    from fylia.daemon import DaemonError, connect
+
+    if status or stop:
+        client = connect(path)
+        if client is None:
+            click.echo("Nessun daemon in esecuzione per questo progetto")
+            return
+        with client:
+            try:
+                if stop:
+                    client.request('shutdown')
+                    click.echo("Daemon fermato")
+                    return
+                info = client.request('ping')
+            except (OSError, ValueError, DaemonError) as e:
+                raise click.ClickException(f"Il daemon non risponde: {e}")
+        memory = f"{info['memory'] / 1048576:.0f} MiB" if info.get('memory') else "n/d"
+        click.echo(f"Daemon attivo (pid {info['pid']}) per {info['root']}")
+        click.echo(f"Da {info['uptime'] / 60:.1f} minuti, {info['requests']} richieste, memoria {memory}")
+        return
+
+    from fylia.server import FyliaServer
+    server = FyliaServer(path, idle_timeout=idle_timeout * 60, memory_limit=memory_limit * 1024 * 1024,
+                         use_git=not no_git, jobs=jobs, log=lambda message: click.echo(message, err=True))
+    try:
+        server.start()
+    except DaemonError as e:
+        raise click.ClickException(str(e))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+@cli.command()
+@click.argument('patch_file', type=click.File('r', encoding='utf-8'))
+@click.option('--path', '-p', default='.', help="Radice del progetto")
+@click.option('--label', '-m', default='', help="Descrizione della modifica nel registro")
+def apply(patch_file, path, label):
+    """Applica una patch (unified diff, - per stdin) annullabile con fylia undo"""
+    from fylia.patcher import project_patcher
+    from fylia.transaction import TransactionError
+    try:
+        with project_patcher(path).transaction(path, label) as tx:
+            changed = tx.apply_patch(patch_file.read())
+    except TransactionError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"✅ Patch applicata: {', '.join(changed)}")
+
+
+def _format_changeset(changeset: dict) -> str:
+    import time
+    when = time.strftime('%Y-%m-%d %H:%M', time.localtime(changeset['time']))
+    return f"{when}  {changeset['label']}"
+
+
+def _undo_or_redo(path, steps, force, redo):
+    from fylia.undo import UndoError, UndoJournal
+    journal = UndoJournal(path)
+    try:
+        done = journal.redo(steps, force) if redo else journal.undo(steps, force)
+    except UndoError as e:
+        raise click.ClickException(str(e))
+    for changeset in done:
+        click.echo(f"{'↪️  Ripristinato' if redo else '↩️  Annullato'}: {_format_changeset(changeset)}")
+
+
+@cli.command()
+@click.option('--path', '-p', default='.', help="Radice del progetto")
+@click.option('--steps', '-n', default=1, show_default=True, help="Changeset da annullare")
+@click.option('--force', is_flag=True, help="Sovrascrivi anche i file modificati nel frattempo")
+@click.option('--list', 'show_list', is_flag=True, help="Mostra il registro delle modifiche")
+@click.option('--gc', is_flag=True, help="Elimina i contenuti non più usati dal registro")
+def undo(path, steps, force, show_list, gc):
+    """Annulla le ultime modifiche applicate ai file"""
+    from fylia.undo import UndoJournal
+    if show_list:
+        journal = UndoJournal(path)
+        if not journal.changesets:
+            click.echo("Nessuna modifica registrata")
+        for applied, changeset in journal.history():
+            click.echo(f"{'  ' if applied else '↪ '}{_format_changeset(changeset)}")
+        return
+    if gc:
+        removed, freed = UndoJournal(path).collect()
+        click.echo(f"Eliminati {removed} contenuti ({freed / 1024:.1f} KiB)")
+        return
+    _undo_or_redo(path, steps, force, redo=False)
+
+
+@cli.command()
+@click.option('--path', '-p', default='.', help="Radice del progetto")
+@click.option('--steps', '-n', default=1, show_default=True, help="Changeset da ripristinare")
+@click.option('--force', is_flag=True, help="Sovrascrivi anche i file modificati nel frattempo")
+def redo(path, steps, force):
+    """Ripristina le modifiche annullate con fylia undo"""
+    _undo_or_redo(path, steps, force, redo=True)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,371 @@
+"""
+Contesto del progetto per le richieste al provider
+Sceglie i file e i simboli più pertinenti a una richiesta (parole in comune
+con nomi e percorsi, vicinanza nel grafo degli import) e ne impacchetta il
+codice entro un budget di token stimati.
+"""
+
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from fylia import trace
+from fylia.index import Location
+
+
+# Budget di default del contesto, in token stimati
+CONTEXT_BUDGET = 2000
+
+# Caratteri per token: media tipica dei tokenizer BPE su codice e testo inglese
+CHARS_PER_TOKEN = 4
+
+# Righe massime di codice per simbolo (il resto di una definizione lunga è omesso)
+MAX_SNIPPET_LINES = 40
+
+# Nomi con il punteggio più alto considerati per richiesta e file da cui
+# parte la propagazione lungo il grafo degli import
+MAX_NAMES = 200
+GRAPH_SEEDS = 10
+# Frazione del punteggio di un file passata ai file che importa o che lo importano
+GRAPH_WEIGHT = 0.3
+
+_IDENTIFIER = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+# Parti di un identificatore: snake_case, CamelCase, ACRONIMI e numeri
+_WORD_PART = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+')
+
+# Parole troppo comuni nelle richieste per indicare un simbolo
+_STOPWORDS = frozenset("""
+    the and for with from that this into not are was use using add make get set new
+    che per con una uno del della dei delle nel nella non come dove quando cosa
+    sono fare crea aggiungi modifica questo questa quello quella anche più alla
+    alle agli dal dalla
+""".split())
+
+
+def estimate_tokens(text: str) -> int:
+    """Stima veloce dei token di un testo (senza tokenizer)"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def split_terms(text: str) -> List[str]:
+    """
+    Parole significative di un testo, in minuscolo e senza ripetizioni
+
+    Ogni identificatore conta intero e per parti: 'FileCache' dà
+    'filecache', 'file' e 'cache'. Parole corte e comuni sono escluse.
+    """
+    terms = {}
+    for identifier in _IDENTIFIER.findall(text):
+        for term in _identifier_terms(identifier):
+            terms[term] = None
+    return list(terms)
+
+
+def _identifier_terms(identifier: str) -> List[str]:
+    lower = identifier.lower()
+    terms = [lower] if len(lower) >= 3 and lower not in _STOPWORDS else []
+    parts = _WORD_PART.findall(identifier)
+    if len(parts) > 1:
+        terms.extend(part for part in map(str.lower, parts)
+                     if len(part) >= 3 and part not in _STOPWORDS and part != lower)
+    return terms
+
+
+def _path_terms(rel_path: str) -> List[str]:
+    return split_terms(rel_path.rpartition('.')[0] if rel_path.endswith('.py') else rel_path)
+
+
+class PackedContext(NamedTuple):
+    """Contesto impacchettato per una richiesta"""
+    text: str
+    tokens: int         # token stimati del testo
+    files: List[str]    # file inclusi, dal più pertinente
+    symbols: int        # simboli di cui è incluso il codice
+    elapsed: float      # secondi impiegati per ottenerlo
+    cached: bool        # True se servito dalla cache dei contesti
+
+
+class ContextBuilder:
+    """
+    Costruisce il contesto di una richiesta dai dati dell'indice dei simboli
+
+    Punteggio: ogni parola della richiesta che compare nel nome di un
+    simbolo o nel percorso di un file vale tanto più quanto è rara nel
+    progetto (idf); un nome uguale a una parola della richiesta vale doppio.
+    I file più pertinenti passano parte del punteggio ai vicini nel grafo
+    degli import. Il codice dei simboli migliori entra nel contesto finché
+    resta budget.
+
+    La mappa parola -> nomi è aggiornata in modo incrementale quando
+    l'indice cambia; i contesti già costruiti sono tenuti in una LRU con
+    chiave (generazione di indice e grafo, budget, parole della richiesta).
+    """
+
+    def __init__(self, index, graph=None, budget: int = CONTEXT_BUDGET, cache_items: int = 32):
+        """
+        Args:
+            index: SymbolIndex aggiornato
+            graph: DependencyGraph per la vicinanza tra file (opzionale)
+            budget: token stimati massimi del contesto
+            cache_items: contesti tenuti in memoria
+        """
+        self.index = index
+        self.graph = graph
+        self.budget = budget
+        self.cache_items = cache_items
+        # Parola -> nomi brevi di simboli e parola -> file che la contengono;
+        # voci di nomi o file spariti restano e vengono scartate in lettura
+        self._name_terms: Dict[str, Set[str]] = {}
+        self._file_terms: Dict[str, Set[str]] = {}
+        self._known_names: Set[str] = set()
+        self._known_files: Set[str] = set()
+        self._generation = -1
+        self._packed: 'OrderedDict[tuple, PackedContext]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.last_elapsed = 0.0
+        self.total_elapsed = 0.0
+        self.lock = threading.RLock()
+
+    # Mappa delle parole
+
+    @trace.traced('context.refresh')
+    def refresh(self) -> None:
+        """
+        Aggiunge alla mappa delle parole i nomi e i file nuovi dell'indice
+
+        Viene chiamata da build() se l'indice è cambiato; chiamarla subito
+        dopo un aggiornamento dell'indice toglie il lavoro alla richiesta.
+        """
+        with self.lock:
+            generation = self.index.generation
+            if generation == self._generation:
+                return
+            names = self.index.definition_names()
+            with self.index.lock:
+                files = list(self.index.files)
+            if len(self._known_names) > 2 * len(names) + 1000:
+                # Troppe voci superate: si ricostruisce da capo
+                self._name_terms, self._file_terms = {}, {}
+                self._known_names, self._known_files = set(), set()
+
+            for name in set(names) - self._known_names:
+                for term in _identifier_terms(name):
+                    self._name_terms.setdefault(term, set()).add(name)
+                self._known_names.add(name)
+            for rel_path in set(files) - self._known_files:
+                for term in _path_terms(rel_path):
+                    self._file_terms.setdefault(term, set()).add(rel_path)
+                self._known_files.add(rel_path)
+            self._generation = generation
+
+    # Punteggio
+
+    def rank(self, prompt: str) -> Tuple[List[Tuple[str, float]], Dict[str, List[Tuple[float, Location]]]]:
+        """
+        Ordina i file del progetto per pertinenza a una richiesta
+
+        Returns:
+            ([(file, punteggio)] dal più pertinente, file -> [(punteggio, definizione)])
+        """
+        self.refresh()
+        terms = split_terms(prompt)
+        identifiers = {identifier.lower() for identifier in _IDENTIFIER.findall(prompt)}
+
+        name_scores: Dict[str, float] = {}
+        total_names = len(self._known_names) or 1
+        for term in terms:
+            names = self._name_terms.get(term)
+            if not names:
+                continue
+            weight = math.log(1 + total_names / len(names))
+            for name in names:
+                name_scores[name] = name_scores.get(name, 0.0) + weight
+        for name in name_scores:
+            if name.lower() in identifiers:
+                name_scores[name] *= 2
+
+        file_scores: Dict[str, float] = {}
+        symbols: Dict[str, List[Tuple[float, Location]]] = {}
+        best = sorted(name_scores.items(), key=lambda item: -item[1])[:MAX_NAMES]
+        for name, score in best:
+            for location in self.index.definitions(name):
+                file_scores[location.path] = file_scores.get(location.path, 0.0) + score
+                symbols.setdefault(location.path, []).append((score, location))
+
+        total_files = len(self._known_files) or 1
+        for term in terms:
+            paths = self._file_terms.get(term)
+            if not paths:
+                continue
+            weight = math.log(1 + total_files / len(paths))
+            for rel_path in paths:
+                if rel_path in self.index.files:
+                    file_scores[rel_path] = file_scores.get(rel_path, 0.0) + weight
+
+        if self.graph is not None:
+            self._spread(file_scores)
+        ranked = sorted(file_scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked, symbols
+
+    def _spread(self, file_scores: Dict[str, float]) -> None:
+        """Passa parte del punteggio dei file migliori ai file collegati da import"""
+        seeds = sorted(file_scores.items(), key=lambda item: -item[1])[:GRAPH_SEEDS]
+        graph = self.graph
+        with graph.lock:
+            for rel_path, score in seeds:
+                node = graph.node_id(rel_path)
+                if node is None:
+                    continue
+                for neighbor in graph.dependencies_ids(node) + graph.dependents_ids(node):
+                    other = graph.paths[neighbor]
+                    if other is not None:
+                        file_scores[other] = file_scores.get(other, 0.0) + GRAPH_WEIGHT * score
+
+    # Impacchettamento
+
+    @trace.traced('context.build')
+    def build(self, prompt: str, budget: Optional[int] = None) -> PackedContext:
+        """
+        Contesto per una richiesta, entro il budget di token stimati
+
+        Un contesto vuoto indica che nessun file del progetto è pertinente.
+        """
+        start = time.perf_counter()
+        budget = self.budget if budget is None else budget
+        with self.lock:
+            key = (self.index.generation, self.graph.generation if self.graph is not None else 0,
+                   budget, tuple(sorted(split_terms(prompt))))
+            packed = self._packed.get(key)
+            if packed is not None:
+                self._packed.move_to_end(key)
+                self.hits += 1
+                packed = packed._replace(elapsed=time.perf_counter() - start, cached=True)
+            else:
+                self.misses += 1
+                ranked, symbols = self.rank(prompt)
+                packed = self._pack(ranked, symbols, budget)._replace(elapsed=time.perf_counter() - start)
+                self._packed[key] = packed
+                while len(self._packed) > self.cache_items:
+                    self._packed.popitem(last=False)
+            self.last_elapsed = packed.elapsed
+            self.total_elapsed += packed.elapsed
+        return packed
+
+    def _pack(self, ranked: List[Tuple[str, float]], symbols: Dict[str, List[Tuple[float, Location]]],
+              budget: int) -> PackedContext:
+        title = "Contesto del progetto (file più pertinenti alla richiesta):\n"
+        blocks = []
+        files = []
+        used = estimate_tokens(title)
+        count = 0
+        for rel_path, _ in ranked:
+            header = f"\nFile: {rel_path}\n"
+            used_file = estimate_tokens(header)
+            if used + used_file > budget:
+                break
+            record = self.index.files.get(rel_path)
+            if record is None:
+                continue
+            snippets, cost, included = self._snippets(rel_path, record, symbols.get(rel_path, []),
+                                                       budget - used - used_file)
+            if not snippets:
+                outline = self._outline(record)
+                if not outline or used + used_file + estimate_tokens(outline) > budget:
+                    continue
+                snippets, cost = [outline], estimate_tokens(outline)
+            blocks.append(header + "".join(snippets))
+            files.append(rel_path)
+            used += used_file + cost
+            count += included
+        if not files:
+            return PackedContext('', 0, [], 0, 0.0, False)
+        text = title + "".join(blocks)
+        return PackedContext(text, estimate_tokens(text), files, count, 0.0, False)
+
+    def _snippets(self, rel_path: str, record: dict, matches: List[Tuple[float, Location]],
+                  budget: int) -> Tuple[List[str], int, int]:
+        """Codice dei simboli trovati in un file, dal più pertinente, finché c'è budget"""
+        # Il file si legge solo se ci sta almeno la prima riga di un simbolo
+        if not matches or min(estimate_tokens(f"```python\n# riga {loc.line}: {loc.kind} {loc.name}\n```\n")
+                              for _, loc in matches) >= budget:
+            return [], 0, 0
+        try:
+            lines = (self.index.root / rel_path).read_text(encoding='utf-8', errors='replace').splitlines(True)
+        except OSError:
+            return [], 0, 0
+        ends = {(d[0], d[2]): end for d, end in zip(record['defs'], record.get('ends', ()))}
+
+        snippets = []
+        used = 0
+        covered: List[Tuple[int, int]] = []
+        for _, location in sorted(matches, key=lambda m: (-m[0], m[1].line)):
+            first = location.line
+            last = ends.get((location.name, first), first)
+            if any(a <= first and last <= b for a, b in covered):
+                continue
+            # Un simbolo che contiene codice già incluso (la classe di un metodo) lo omette
+            inner = sorted((a, b) for a, b in covered if first < a and b <= last)
+            code = self._code(lines, first, last, inner)
+            lines_range = f"righe {first}-{last}" if last > first else f"riga {first}"
+            snippet = f"```python\n# {lines_range}: {location.kind} {location.name}\n{code}```\n"
+            cost = estimate_tokens(snippet)
+            if used + cost > budget:
+                # Solo la prima riga, se il codice completo non ci sta
+                snippet = f"```python\n# riga {first}: {location.kind} {location.name}\n" \
+                          f"{''.join(lines[first - 1:first])}```\n"
+                cost = estimate_tokens(snippet)
+                if used + cost > budget:
+                    continue
+                last = first
+            snippets.append(snippet)
+            used += cost
+            covered.append((first, last))
+        return snippets, used, len(snippets)
+
+    @staticmethod
+    def _code(lines: List[str], first: int, last: int, skip: List[Tuple[int, int]]) -> str:
+        """Righe first-last (al più MAX_SNIPPET_LINES), con gli intervalli in skip omessi"""
+        code = []
+        shown = 0
+        line = first
+        for a, b in skip + [(last + 1, last)]:
+            while line < a:
+                if shown == MAX_SNIPPET_LINES:
+                    code.append(f"    ... (fino alla riga {last})\n")
+                    return "".join(code)
+                if line <= len(lines):
+                    code.append(lines[line - 1])
+                shown += 1
+                line += 1
+            if a <= last:
+                text = lines[a - 1] if a <= len(lines) else ""
+                indent = text[:len(text) - len(text.lstrip())]
+                where = f"righe {a}-{b}" if b > a else f"riga {a}"
+                code.append(f"{indent}... ({where}, già sopra)\n")
+                line = b + 1
+        return "".join(code)
+
+    @staticmethod
+    def _outline(record: dict) -> str:
+        """Elenco delle definizioni di primo livello (file trovato per percorso o import)"""
+        names = [name for name, kind, _, _ in record['defs'] if '.' not in name and kind != 'variable']
+        if not names:
+            return ''
+        shown = ", ".join(names[:20])
+        return f"Definisce: {shown}{' ...' if len(names) > 20 else ''}\n"
+
+    def stats(self) -> dict:
+        """Contesti serviti dalla cache o costruiti e tempi di assemblaggio"""
+        with self.lock:
+            requests = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'items': len(self._packed),
+                'last_ms': self.last_elapsed * 1000,
+                'mean_ms': self.total_elapsed / requests * 1000 if requests else 0.0,
+            }
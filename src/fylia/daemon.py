@@ -0,0 +1,128 @@
+"""
+Protocollo e client del daemon di FYLIA (fylia serve)
+Il daemon tiene in memoria modello, indice e grafo di un progetto e risponde
+su un socket Unix in .fylia/serve.sock. Una richiesta è una riga JSON
+{"version": 1, "op": "map", ...}; la risposta è una riga JSON
+{"ok": true, "result": ...} oppure {"ok": false, "error": "..."}.
+
+Questo modulo è leggero di proposito: i comandi da riga di comando lo
+importano per provare il daemon prima di lavorare da soli.
+"""
+
+import json
+import os
+import socket
+from pathlib import Path
+from typing import Any, Optional
+
+from fylia.cache import content_hash, default_cache_dir
+
+
+# Versione del protocollo (un daemon di versione diversa rifiuta le richieste)
+PROTOCOL_VERSION = 1
+
+# Lunghezza massima sicura del percorso di un socket Unix (108 byte su Linux)
+_MAX_SOCKET_PATH = 100
+
+
+class DaemonError(Exception):
+    """Errore restituito dal daemon per una richiesta"""
+
+
+class DaemonDeclined(DaemonError):
+    """Il daemon non può rispondere a questa richiesta: va eseguita in locale"""
+
+
+def default_socket_path(root) -> Path:
+    """
+    Socket del daemon di un progetto
+
+    Di norma .fylia/serve.sock; se il percorso è troppo lungo per un socket
+    Unix si usa un nome ricavato dalla radice nella cartella temporanea.
+    """
+    root = os.path.realpath(root)
+    path = default_cache_dir(Path(root)).parent / "serve.sock"
+    if len(os.fsencode(str(path))) <= _MAX_SOCKET_PATH:
+        return path
+    import tempfile
+    digest = content_hash(os.fsencode(root))[:16]
+    return Path(tempfile.gettempdir()) / f"fylia-{os.getuid()}-{digest}.sock"
+
+
+class DaemonClient:
+    """Connessione a un daemon: più richieste sulla stessa connessione"""
+
+    def __init__(self, sock: socket.socket):
+        self._sock = sock
+        self._file = sock.makefile('rwb')
+
+    def request(self, op: str, **params) -> Any:
+        """
+        Invia una richiesta e restituisce il risultato
+
+        Raises:
+            DaemonDeclined: il daemon chiede di eseguire la richiesta in locale
+            DaemonError: la richiesta è fallita sul daemon
+            OSError: connessione interrotta
+        """
+        message = dict(params, version=PROTOCOL_VERSION, op=op)
+        self._file.write(json.dumps(message).encode('utf-8') + b'\n')
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Il daemon ha chiuso la connessione")
+        response = json.loads(line)
+        if response.get('ok'):
+            return response.get('result')
+        if response.get('fallback'):
+            raise DaemonDeclined(response.get('error', ''))
+        raise DaemonError(response.get('error', 'errore sconosciuto'))
+
+    def close(self) -> None:
+        try:
+            self._file.close()
+        finally:
+            self._sock.close()
+
+    def __enter__(self) -> 'DaemonClient':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def connect(root, socket_path: Optional[Path] = None, timeout: float = 30.0) -> Optional[DaemonClient]:
+    """Si collega al daemon del progetto, None se non è in esecuzione"""
+    path = socket_path if socket_path is not None else default_socket_path(root)
+    if not os.path.exists(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        # Socket rimasto da un daemon terminato male
+        sock.close()
+        return None
+    return DaemonClient(sock)
+
+
+def query(root, op: str, socket_path: Optional[Path] = None, **params) -> Optional[Any]:
+    """
+    Chiede una risposta al daemon del progetto, se c'è
+
+    Returns:
+        Il risultato, oppure None se il daemon non è in esecuzione, non
+        risponde o chiede di eseguire la richiesta in locale
+
+    Raises:
+        DaemonError: la richiesta è fallita sul daemon (es. simbolo non trovato)
+    """
+    client = connect(root, socket_path)
+    if client is None:
+        return None
+    with client:
+        try:
+            return client.request(op, **params)
+        except (OSError, ValueError, DaemonDeclined):
+            return None
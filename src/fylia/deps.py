@@ -0,0 +1,584 @@
+"""
+Grafo delle dipendenze tra i moduli del progetto
+Gli import di ogni file Python vengono risolti sulla struttura dei pacchetti
+del progetto; il grafo risponde a domande come "chi usa questo modulo?",
+"da cosa dipende, anche indirettamente?" e "ci sono import circolari?".
+"""
+
+import ast
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from fylia import trace
+from fylia.cache import FileCache, default_cache_dir
+from fylia.gitindex import enumerate_project
+from fylia.walker import (DEFAULT_IGNORE_DIRS, DEFAULT_IGNORE_FILES, Entry, IgnorePredicate, path_ignored,
+                          walk_project)
+
+
+# Versione del formato dei record degli import (invalida la cache su disco)
+DEPS_CACHE_VERSION = 1
+
+
+def extract_imports(source: bytes, filename: str = '<unknown>') -> Optional[list]:
+    """
+    Estrae gli import di un sorgente Python, anche quelli dentro funzioni
+
+    Returns:
+        Lista di [modulo, livello, nomi]: nomi è vuota per "import modulo",
+        livello è il numero di punti di un import relativo. None se il file
+        non è analizzabile.
+    """
+    try:
+        tree = ast.parse(source, filename=filename)
+    except (SyntaxError, UnicodeDecodeError, ValueError):
+        return None
+
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                imports.append([alias.name, 0, []])
+        elif isinstance(node, ast.ImportFrom):
+            imports.append([node.module or '', node.level, [alias.name for alias in node.names]])
+    return imports
+
+
+def module_name(rel_path: str, is_package_dir) -> Tuple[str, str]:
+    """
+    Calcola il nome del modulo di un file e la cartella radice dei sorgenti
+
+    Si risale finché le cartelle contengono __init__.py: la prima senza è
+    la radice (es. src/fylia/cli.py -> ('fylia.cli', 'src')).
+
+    Args:
+        is_package_dir: funzione che indica se una cartella relativa è un pacchetto
+    """
+    parts = rel_path[:-3].split('/')
+    if parts[-1] == '__init__':
+        parts.pop()
+    # parts[:i] sono le cartelle; si risale dalla più interna
+    start = len(parts) - 1
+    while start > 0 and is_package_dir('/'.join(parts[:start])):
+        start -= 1
+    return '.'.join(parts[start:]), '/'.join(parts[:start])
+
+
+class DependencyGraph:
+    """
+    Grafo file -> file degli import interni al progetto
+
+    Ogni file Python ha un identificativo intero; gli archi uscenti di ogni
+    nodo sono un array di interi e per le interrogazioni vengono compattati
+    in due rappresentazioni CSR (diretta e inversa), ricostruite solo dopo
+    una modifica.
+
+    Aggiornamenti incrementali: quando un file cambia vengono ricalcolati
+    solo i suoi archi; quando un modulo compare o sparisce vengono risolti
+    di nuovo solo gli import che lo nominavano. Le chiusure transitive già
+    calcolate restano valide se non contengono i nodi toccati.
+    """
+
+    def __init__(self, root: str, ignore_dirs: Iterable[str] = DEFAULT_IGNORE_DIRS,
+                 ignore_files: Iterable[str] = DEFAULT_IGNORE_FILES, use_cache: bool = True,
+                 use_git: bool = True):
+        self.root = Path(root)
+        self.ignore_dirs = frozenset(ignore_dirs)
+        self.ignore_files = frozenset(ignore_files)
+        self.use_cache = use_cache
+        self.use_git = use_git
+        self.is_ignored: IgnorePredicate = None
+        # Nodi: percorso <-> id (gli id dei file rimossi vengono riusati)
+        self.paths: List[Optional[str]] = []
+        self._ids: Dict[str, int] = {}
+        self._free: List[int] = []
+        # Per nodo: import estratti, nome del modulo, radice dei sorgenti, archi
+        self._imports: List[Optional[list]] = []
+        self._module: List[Optional[str]] = []
+        self._source_root: List[Optional[str]] = []
+        self._edges: List[array] = []
+        # Nome di modulo -> nodi che lo definiscono (più radici possono averlo)
+        self._modules: Dict[str, List[int]] = {}
+        # Nome di modulo cercato -> nodi i cui import lo hanno provato
+        self._wanted: Dict[str, Set[int]] = {}
+        self._tried: List[Set[str]] = []
+        self._csr: Optional[tuple] = None
+        # (id, inversa) -> chiusura transitiva già calcolata
+        self._closures: Dict[Tuple[int, bool], Set[int]] = {}
+        self._cache: Optional[FileCache] = None
+        # Cresce a ogni cambiamento degli archi (invalida i dati derivati)
+        self.generation = 0
+        self.lock = threading.RLock()
+
+    # Aggiornamento
+
+    def _open_cache(self) -> Optional[FileCache]:
+        if not self.use_cache:
+            return None
+        if self._cache is None:
+            self._cache = FileCache(default_cache_dir(self.root), 'deps', DEPS_CACHE_VERSION)
+        return self._cache
+
+    @trace.traced('deps.update')
+    def update(self) -> 'DependencyGraph':
+        """Allinea il grafo al contenuto attuale del progetto"""
+        cache = self._open_cache()
+        if cache is not None:
+            cache.start_pass()
+        cache_dir = default_cache_dir(self.root) if self.use_cache else None
+        entries, self.is_ignored = enumerate_project(self.root, self.ignore_dirs, self.ignore_files,
+                                                     cache_dir, self.use_git)
+        imports = {}
+        for entry in entries:
+            if not entry.is_dir and entry.name.endswith('.py'):
+                imports[entry.rel_path] = self._read_imports(entry.rel_path, cache, entry)
+
+        with self.lock:
+            self._reset()
+            for rel_path in imports:
+                self._add_node(rel_path)
+            for rel_path, record in imports.items():
+                self._imports[self._ids[rel_path]] = record
+            self._name_all()
+            for node in self._ids.values():
+                self._resolve(node)
+        if cache is not None:
+            cache.save()
+        return self
+
+    @trace.traced('deps.update_files')
+    def update_files(self, rel_paths: Iterable[str]) -> Set[str]:
+        """
+        Aggiorna il grafo per i percorsi cambiati (creati, modificati o eliminati)
+
+        Un percorso di cartella aggiorna tutti i file Python al suo interno;
+        '' indica un cambiamento non localizzabile e ricostruisce il grafo.
+
+        Returns:
+            I file i cui archi (entranti o uscenti) sono cambiati
+        """
+        rel_paths = set(rel_paths)
+        if '' in rel_paths:
+            self.update()
+            return set(self._ids)
+
+        cache = self._open_cache()
+        changed: Dict[str, Optional[list]] = {}
+        removed: Set[str] = set()
+        for rel_path in sorted(rel_paths):
+            path = self.root / rel_path
+            prefix = rel_path + '/'
+            if path_ignored(rel_path, path.is_dir(), self.ignore_dirs, self.ignore_files, self.is_ignored):
+                # Esclusi (anche solo per una cartella che li contiene): come se fossero spariti
+                removed.update(p for p in self._ids if p == rel_path or p.startswith(prefix))
+            elif path.is_dir():
+                present = set()
+                for entry in walk_project(str(self.root), self.ignore_dirs, self.ignore_files,
+                                          start=rel_path, is_ignored=self.is_ignored):
+                    if not entry.is_dir and entry.name.endswith('.py'):
+                        present.add(entry.rel_path)
+                        changed[entry.rel_path] = self._read_imports(entry.rel_path, cache, entry)
+                removed.update(p for p in self._ids if p.startswith(prefix) and p not in present)
+            elif path.is_file():
+                if rel_path.endswith('.py'):
+                    changed[rel_path] = self._read_imports(rel_path, cache)
+            else:
+                removed.update(p for p in self._ids if p == rel_path or p.startswith(prefix))
+        if cache is not None:
+            cache.save(prune=False)
+
+        with self.lock:
+            return self._apply(changed, removed)
+
+    def _read_imports(self, rel_path: str, cache: Optional[FileCache], entry: Optional[Entry] = None) -> Optional[list]:
+        path = self.root / rel_path
+        try:
+            if cache is not None:
+                st = entry.stat() if entry is not None else path.stat()
+                return cache.get(rel_path, path, st.st_mtime_ns, st.st_size,
+                                 lambda data: extract_imports(data, str(path)))
+            return extract_imports(path.read_bytes(), str(path))
+        except OSError:
+            return None
+
+    def _apply(self, changed: Dict[str, Optional[list]], removed: Set[str]) -> Set[str]:
+        touched: Set[str] = set(removed)
+        added = [p for p in changed if p not in self._ids]
+        # Un __init__.py nuovo o sparito cambia i nomi di tutti i moduli sotto
+        # la sua cartella: caso raro, si ricalcolano nomi e archi da capo
+        renames = any(p.rpartition('/')[2] == '__init__.py' for p in added + list(removed))
+
+        affected_names: Set[str] = set()
+        for rel_path in removed:
+            node = self._ids[rel_path]
+            touched.update(self.paths[n] for n in self._edges[node])
+            touched.update(self.paths[n] for n in self.dependents_ids(node))
+            affected_names.add(self._module[node])
+            self._remove_node(node)
+        if removed:
+            # Gli id liberati possono essere riusati: nessuna chiusura resta affidabile
+            self._closures = {}
+        for rel_path in added:
+            self._add_node(rel_path)
+        for rel_path, record in changed.items():
+            self._imports[self._ids[rel_path]] = record
+
+        if renames:
+            self._name_all()
+            nodes = set(self._ids.values())
+        else:
+            for rel_path in added:
+                node = self._ids[rel_path]
+                self._name(node)
+                affected_names.add(self._module[node])
+            nodes = {self._ids[p] for p in changed}
+            for name in affected_names:
+                nodes.update(self._wanted.get(name, ()))
+
+        for node in nodes:
+            old = set(self._edges[node])
+            self._resolve(node)
+            new = set(self._edges[node])
+            if old != new:
+                touched.add(self.paths[node])
+                touched.update(self.paths[n] for n in old ^ new if self.paths[n] is not None)
+        touched.update(added)
+        touched.discard(None)
+        return touched
+
+    # Nodi e nomi
+
+    def _reset(self) -> None:
+        self.paths = []
+        self._ids = {}
+        self._free = []
+        self._imports = []
+        self._module = []
+        self._source_root = []
+        self._edges = []
+        self._modules = {}
+        self._wanted = {}
+        self._tried = []
+        self._invalidate_all()
+
+    def _add_node(self, rel_path: str) -> int:
+        if self._free:
+            node = self._free.pop()
+            self.paths[node] = rel_path
+        else:
+            node = len(self.paths)
+            self.paths.append(rel_path)
+            self._imports.append(None)
+            self._module.append(None)
+            self._source_root.append(None)
+            self._edges.append(array('I'))
+            self._tried.append(set())
+        self._ids[rel_path] = node
+        # Anche un nodo senza archi cambia la dimensione delle CSR
+        self._csr = None
+        self.generation += 1
+        return node
+
+    def _remove_node(self, node: int) -> None:
+        self._set_edges(node, array('I'))
+        self._forget_tried(node)
+        self._unname(node)
+        del self._ids[self.paths[node]]
+        self.paths[node] = None
+        self._imports[node] = None
+        self._free.append(node)
+        self._csr = None
+        self.generation += 1
+
+    def _is_package_dir(self, rel_dir: str) -> bool:
+        return (rel_dir + '/__init__.py') in self._ids
+
+    def _name(self, node: int) -> None:
+        name, source_root = module_name(self.paths[node], self._is_package_dir)
+        self._module[node] = name
+        self._source_root[node] = source_root
+        self._modules.setdefault(name, []).append(node)
+
+    def _unname(self, node: int) -> None:
+        name = self._module[node]
+        owners = self._modules.get(name)
+        if owners is not None:
+            owners.remove(node)
+            if not owners:
+                del self._modules[name]
+        self._module[node] = None
+
+    def _name_all(self) -> None:
+        self._modules = {}
+        for node in self._ids.values():
+            self._name(node)
+
+    # Risoluzione degli import
+
+    def _lookup(self, name: str, importer: int) -> Optional[int]:
+        owners = self._modules.get(name)
+        if not owners:
+            return None
+        if len(owners) > 1:
+            # Stesso nome in più radici (es. src/ e tests/): si preferisce la propria
+            for owner in owners:
+                if self._source_root[owner] == self._source_root[importer]:
+                    return owner
+        return owners[0]
+
+    def _resolve_prefix(self, name: str, importer: int, tried: Set[str]) -> Optional[int]:
+        """Il modulo più specifico tra name e i suoi prefissi (a.b.c, a.b, a)"""
+        parts = name.split('.')
+        for i in range(len(parts), 0, -1):
+            candidate = '.'.join(parts[:i])
+            tried.add(candidate)
+            target = self._lookup(candidate, importer)
+            if target is not None:
+                return target
+        return None
+
+    def _resolve(self, node: int) -> None:
+        """Ricalcola gli archi uscenti di un nodo dai suoi import"""
+        self._forget_tried(node)
+        tried: Set[str] = set()
+        targets: Set[int] = set()
+        module = self._module[node]
+        package = module if self.paths[node].endswith('__init__.py') else module.rpartition('.')[0]
+
+        for name, level, names in self._imports[node] or ():
+            if level:
+                parts = package.split('.') if package else []
+                if level - 1 > len(parts):
+                    continue
+                base_parts = parts[:len(parts) - (level - 1)]
+                if name:
+                    base_parts.append(name)
+                base = '.'.join(base_parts)
+            else:
+                base = name
+
+            need_base = not names
+            for alias in names:
+                if alias == '*':
+                    need_base = True
+                    continue
+                # "from pacchetto import modulo" dipende dal sottomodulo
+                candidate = f"{base}.{alias}" if base else alias
+                tried.add(candidate)
+                target = self._lookup(candidate, node)
+                if target is not None:
+                    targets.add(target)
+                else:
+                    need_base = True
+            if need_base and base:
+                target = self._resolve_prefix(base, node, tried)
+                if target is not None:
+                    targets.add(target)
+
+        targets.discard(node)
+        self._tried[node] = tried
+        for name in tried:
+            self._wanted.setdefault(name, set()).add(node)
+        self._set_edges(node, array('I', sorted(targets)))
+
+    def _forget_tried(self, node: int) -> None:
+        for name in self._tried[node]:
+            importers = self._wanted.get(name)
+            if importers is not None:
+                importers.discard(node)
+                if not importers:
+                    del self._wanted[name]
+        self._tried[node] = set()
+
+    def _set_edges(self, node: int, edges: array) -> None:
+        old = self._edges[node]
+        if old == edges:
+            return
+        self._edges[node] = edges
+        self._csr = None
+        self.generation += 1
+        # Chiusure da buttare: in avanti quelle che attraversano il nodo,
+        # all'indietro quelle che raggiungono un suo vecchio o nuovo vicino
+        ends = set(old) | set(edges)
+        for key in list(self._closures):
+            start, reverse = key
+            closure = self._closures[key]
+            if reverse:
+                stale = any(t == start or t in closure for t in ends)
+            else:
+                stale = start == node or node in closure
+            if stale:
+                del self._closures[key]
+
+    def _invalidate_all(self) -> None:
+        self._csr = None
+        self.generation += 1
+        self._closures = {}
+
+    # Interrogazioni
+
+    def _adjacency(self) -> tuple:
+        """Rappresentazioni CSR (offset, destinazioni) diretta e inversa"""
+        if self._csr is None:
+            n = len(self.paths)
+            offsets = array('I', [0]) * (n + 1)
+            targets = array('I')
+            in_degree = [0] * (n + 1)
+            for node in range(n):
+                edges = self._edges[node]
+                targets.extend(edges)
+                offsets[node + 1] = len(targets)
+                for t in edges:
+                    in_degree[t + 1] += 1
+
+            # Inversa con un counting sort sulle destinazioni
+            rev_offsets = array('I', [0]) * (n + 1)
+            for node in range(n):
+                rev_offsets[node + 1] = rev_offsets[node] + in_degree[node + 1]
+            sources = array('I', [0]) * len(targets)
+            fill = array('I', rev_offsets)
+            for node in range(n):
+                for i in range(offsets[node], offsets[node + 1]):
+                    t = targets[i]
+                    sources[fill[t]] = node
+                    fill[t] += 1
+            self._csr = (offsets, targets, rev_offsets, sources)
+        return self._csr
+
+    def node_id(self, name: str) -> Optional[int]:
+        """Identificativo di un file (percorso relativo) o di un modulo (nome puntato)"""
+        name = name.replace('\\', '/')
+        if name.startswith('./'):
+            name = name[2:]
+        node = self._ids.get(name)
+        if node is None:
+            owners = self._modules.get(name)
+            if owners:
+                node = owners[0]
+        return node
+
+    def dependencies_ids(self, node: int) -> List[int]:
+        offsets, targets, _, _ = self._adjacency()
+        return list(targets[offsets[node]:offsets[node + 1]])
+
+    def dependents_ids(self, node: int) -> List[int]:
+        _, _, rev_offsets, sources = self._adjacency()
+        return list(sources[rev_offsets[node]:rev_offsets[node + 1]])
+
+    def _closure(self, node: int, reverse: bool) -> Set[int]:
+        key = (node, reverse)
+        closure = self._closures.get(key)
+        if closure is None:
+            offsets, targets, rev_offsets, sources = self._adjacency()
+            if reverse:
+                offsets, targets = rev_offsets, sources
+            seen = bytearray(len(offsets) - 1)
+            seen[node] = 1
+            stack = [node]
+            closure = set()
+            while stack:
+                current = stack.pop()
+                for i in range(offsets[current], offsets[current + 1]):
+                    t = targets[i]
+                    if not seen[t]:
+                        seen[t] = 1
+                        closure.add(t)
+                        stack.append(t)
+            self._closures[key] = closure
+        return closure
+
+    def _paths_of(self, nodes: Iterable[int]) -> List[str]:
+        return sorted(self.paths[n] for n in nodes)
+
+    def dependencies(self, name: str, transitive: bool = False) -> List[str]:
+        """File da cui dipende un file o modulo (direttamente o anche indirettamente)"""
+        with self.lock:
+            node = self.node_id(name)
+            if node is None:
+                return []
+            if transitive:
+                return self._paths_of(self._closure(node, False))
+            return self._paths_of(self.dependencies_ids(node))
+
+    def dependents(self, name: str, transitive: bool = False) -> List[str]:
+        """File che importano un file o modulo (direttamente o anche indirettamente)"""
+        with self.lock:
+            node = self.node_id(name)
+            if node is None:
+                return []
+            if transitive:
+                return self._paths_of(self._closure(node, True))
+            return self._paths_of(self.dependents_ids(node))
+
+    def cycles(self) -> List[List[str]]:
+        """
+        Gruppi di file che si importano a vicenda (componenti fortemente connesse)
+
+        Returns:
+            Un elenco ordinato di percorsi per ogni ciclo, dal gruppo più grande
+        """
+        with self.lock:
+            offsets, targets, _, _ = self._adjacency()
+            n = len(self.paths)
+            # Tarjan iterativo
+            index = [-1] * n
+            low = [0] * n
+            on_stack = bytearray(n)
+            stack: List[int] = []
+            counter = 0
+            groups = []
+            for start in range(n):
+                if self.paths[start] is None or index[start] >= 0:
+                    continue
+                work = [(start, offsets[start])]
+                index[start] = low[start] = counter
+                counter += 1
+                stack.append(start)
+                on_stack[start] = 1
+                while work:
+                    node, i = work[-1]
+                    if i < offsets[node + 1]:
+                        work[-1] = (node, i + 1)
+                        t = targets[i]
+                        if index[t] < 0:
+                            index[t] = low[t] = counter
+                            counter += 1
+                            stack.append(t)
+                            on_stack[t] = 1
+                            work.append((t, offsets[t]))
+                        elif on_stack[t]:
+                            low[node] = min(low[node], index[t])
+                        continue
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] == index[node]:
+                        group = []
+                        while True:
+                            member = stack.pop()
+                            on_stack[member] = 0
+                            group.append(member)
+                            if member == node:
+                                break
+                        if len(group) > 1:
+                            groups.append(self._paths_of(group))
+            groups.sort(key=lambda g: (-len(g), g))
+            return groups
+
+    def module_of(self, rel_path: str) -> Optional[str]:
+        """Nome del modulo di un file del grafo"""
+        node = self._ids.get(rel_path)
+        return self._module[node] if node is not None else None
+
+    def stats(self) -> dict:
+        """Numero di file, di archi e dimensione delle strutture CSR"""
+        with self.lock:
+            offsets, targets, rev_offsets, sources = self._adjacency()
+            return {
+                'files': len(self._ids),
+                'edges': len(targets),
+                'csr_bytes': sum(a.itemsize * len(a) for a in (offsets, targets, rev_offsets, sources)),
+            }
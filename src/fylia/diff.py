@@ -0,0 +1,336 @@
+"""
+Calcolo di diff minimi tra due testi
+Algoritmo histogram (come git diff --histogram) con ripiego su Myers in
+spazio lineare; le righe vengono convertite in interi prima del confronto.
+"""
+
+from collections import Counter
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+
+# Righe che compaiono più di così nella regione non vengono usate come ancore
+MAX_CHAIN = 64
+
+# Tipo di un blocco di righe uguali: (inizio in a, inizio in b, lunghezza)
+Block = Tuple[int, int, int]
+
+
+def split_lines(text: str) -> List[str]:
+    """Divide un testo in righe mantenendo i '\\n' (solo '\\n' separa le righe)"""
+    if not text:
+        return []
+    lines = [line + '\n' for line in text.split('\n')]
+    last = lines.pop()
+    if last != '\n':
+        lines.append(last[:-1])
+    return lines
+
+
+def intern_lines(a: Sequence[str], b: Sequence[str]) -> Tuple[List[int], List[int]]:
+    """Converte le righe in interi: righe uguali hanno lo stesso identificativo"""
+    ids: Dict[str, int] = {}
+    setdefault = ids.setdefault
+    a_ids = [setdefault(line, len(ids)) for line in a]
+    b_ids = [setdefault(line, len(ids)) for line in b]
+    return a_ids, b_ids
+
+
+def _middle_snake(a: List[int], alo: int, ahi: int, b: List[int], blo: int, bhi: int) -> Tuple[int, int, int, int]:
+    """
+    Trova lo "snake" centrale del percorso minimo di modifica (Myers 1986)
+
+    Esegue la ricerca in avanti e all'indietro contemporaneamente usando
+    solo due vettori di diagonali, quindi spazio O(N + M).
+
+    Returns:
+        (x, y, u, v): lo snake va da (x, y) a (u, v) in coordinate assolute
+    """
+    n = ahi - alo
+    m = bhi - blo
+    delta = n - m
+    odd = delta & 1
+    limit = (n + m + 1) // 2 + 1
+    offset = limit + 1
+    size = 2 * offset + 1
+    vf = [0] * size
+    vb = [0] * size
+
+    for d in range(limit):
+        # Ricerca in avanti
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and vf[offset + k - 1] < vf[offset + k + 1]):
+                x = vf[offset + k + 1]
+            else:
+                x = vf[offset + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            vf[offset + k] = x
+            if odd and delta - (d - 1) <= k <= delta + (d - 1):
+                if x + vb[offset + delta - k] >= n:
+                    return alo + x0, blo + y0, alo + x, blo + y
+
+        # Ricerca all'indietro (sulle sequenze rovesciate)
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and vb[offset + k - 1] < vb[offset + k + 1]):
+                x = vb[offset + k + 1]
+            else:
+                x = vb[offset + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[ahi - 1 - x] == b[bhi - 1 - y]:
+                x += 1
+                y += 1
+            vb[offset + k] = x
+            if not odd and -d <= delta - k <= d:
+                if x + vf[offset + delta - k] >= n:
+                    return ahi - x, bhi - y, ahi - x0, bhi - y0
+
+    raise AssertionError("snake centrale non trovato")
+
+
+def _trim(a, alo, ahi, b, blo, bhi, out: List[Block]):
+    """Emette prefisso e suffisso comuni, restituisce la regione rimasta"""
+    start = alo
+    while alo < ahi and blo < bhi and a[alo] == b[blo]:
+        alo += 1
+        blo += 1
+    if alo > start:
+        out.append((start, blo - (alo - start), alo - start))
+
+    end = ahi
+    while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+        ahi -= 1
+        bhi -= 1
+    if ahi < end:
+        out.append((ahi, bhi, end - ahi))
+    return alo, ahi, blo, bhi
+
+
+def myers_blocks(a: List[int], b: List[int], alo: int = 0, ahi: int = None,
+                 blo: int = 0, bhi: int = None) -> List[Block]:
+    """
+    Blocchi di righe uguali di un diff minimo con Myers in spazio lineare
+
+    Returns:
+        Blocchi (i, j, n) non ordinati
+    """
+    out: List[Block] = []
+    stack = [(alo, len(a) if ahi is None else ahi, blo, len(b) if bhi is None else bhi)]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        alo, ahi, blo, bhi = _trim(a, alo, ahi, b, blo, bhi, out)
+        if alo == ahi or blo == bhi:
+            continue
+        x, y, u, v = _middle_snake(a, alo, ahi, b, blo, bhi)
+        if u > x:
+            out.append((x, y, u - x))
+        stack.append((alo, x, blo, y))
+        stack.append((u, ahi, v, bhi))
+    return out
+
+
+def histogram_blocks(a: List[int], b: List[int]) -> List[Block]:
+    """
+    Blocchi di righe uguali con l'euristica histogram
+
+    In ogni regione si sceglie come ancora la sequenza comune che contiene
+    le righe meno frequenti, poi si ripete a sinistra e a destra. Le regioni
+    senza righe abbastanza rare vengono passate a Myers.
+
+    Returns:
+        Blocchi (i, j, n) non ordinati
+    """
+    out: List[Block] = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        alo, ahi, blo, bhi = _trim(a, alo, ahi, b, blo, bhi, out)
+        if alo == ahi or blo == bhi:
+            continue
+
+        anchor = _find_anchor(a, alo, ahi, b, blo, bhi)
+        if anchor is None:
+            out.extend(myers_blocks(a, b, alo, ahi, blo, bhi))
+            continue
+
+        i, j, n = anchor
+        out.append(anchor)
+        stack.append((alo, i, blo, j))
+        stack.append((i + n, ahi, j + n, bhi))
+    return out
+
+
+def _find_anchor(a, alo, ahi, b, blo, bhi):
+    """Cerca la sequenza comune più lunga tra quelle con le righe più rare"""
+    region = a[alo:ahi]
+    counts = Counter(region)
+
+    # Prima passata solo sulle righe uniche in a: è il caso comune nel codice
+    # e non richiede le liste complete delle posizioni
+    last = dict(zip(region, range(alo, ahi)))
+    best = _scan_anchor(a, alo, ahi, b, blo, bhi, counts,
+                        lambda line: (last[line],) if counts[line] == 1 else None, 1)
+    if best is not None:
+        return best
+
+    positions: Dict[int, List[int]] = {}
+    for i in range(alo, ahi):
+        positions.setdefault(a[i], []).append(i)
+    return _scan_anchor(a, alo, ahi, b, blo, bhi, counts, positions.get, MAX_CHAIN)
+
+
+def _scan_anchor(a, alo, ahi, b, blo, bhi, counts, occurrences_of, max_count):
+    best = None
+    best_count = max_count + 1
+    j = blo
+    while j < bhi:
+        line = b[j]
+        occurrences = occurrences_of(line) if line in counts else None
+        if occurrences is None or len(occurrences) > best_count:
+            j += 1
+            continue
+
+        next_j = j + 1
+        for i in occurrences:
+            # Estende la corrispondenza in entrambe le direzioni
+            si, sj = i, j
+            while si > alo and sj > blo and a[si - 1] == b[sj - 1]:
+                si -= 1
+                sj -= 1
+            ei, ej = i + 1, j + 1
+            while ei < ahi and ej < bhi and a[ei] == b[ej]:
+                ei += 1
+                ej += 1
+            count = len(occurrences)
+            if count > 1:
+                count = min(count, min(counts[a[k]] for k in range(si, ei)))
+            next_j = max(next_j, ej)
+
+            length = ei - si
+            if best is None or count < best_count or (count == best_count and length > best[2]):
+                best = (si, sj, length)
+                best_count = count
+        j = next_j
+
+    return best
+
+
+def matching_blocks(a: List[int], b: List[int], algorithm: str = 'histogram') -> List[Block]:
+    """
+    Calcola i blocchi di righe uguali tra due sequenze di interi
+
+    Args:
+        algorithm: 'histogram' (default) oppure 'myers'
+
+    Returns:
+        Blocchi (i, j, n) ordinati, fusi se adiacenti
+    """
+    if algorithm == 'histogram':
+        blocks = histogram_blocks(a, b)
+    elif algorithm == 'myers':
+        blocks = myers_blocks(a, b)
+    else:
+        raise ValueError(f"Algoritmo di diff sconosciuto: {algorithm}")
+
+    blocks.sort()
+    merged: List[Block] = []
+    for i, j, n in blocks:
+        if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+            pi, pj, pn = merged[-1]
+            merged[-1] = (pi, pj, pn + n)
+        elif n:
+            merged.append((i, j, n))
+    return merged
+
+
+def _opcodes(blocks: List[Block], len_a: int, len_b: int) -> Iterator[Tuple[str, int, int, int, int]]:
+    """Converte i blocchi uguali in operazioni ('equal' / 'change') come difflib"""
+    i = j = 0
+    for bi, bj, n in blocks + [(len_a, len_b, 0)]:
+        if i < bi or j < bj:
+            yield 'change', i, bi, j, bj
+        if n:
+            yield 'equal', bi, bi + n, bj, bj + n
+        i, j = bi + n, bj + n
+
+
+def _format_range(start: int, length: int) -> str:
+    # Per intervalli vuoti il numero indica la riga dopo cui inserire
+    if length == 1:
+        return f"{start + 1}"
+    if length == 0:
+        return f"{start},0"
+    return f"{start + 1},{length}"
+
+
+def _emit(prefix: str, line: str, out: List[str]) -> None:
+    if line.endswith('\n'):
+        out.append(prefix + line[:-1])
+    else:
+        out.append(prefix + line)
+        out.append('\\ No newline at end of file')
+
+
+def unified_diff(a: Sequence[str], b: Sequence[str], from_file: str = 'a', to_file: str = 'b',
+                 context: int = 3, algorithm: str = 'histogram') -> List[str]:
+    """
+    Produce un unified diff standard tra due liste di righe
+
+    Args:
+        a, b: righe con i loro '\\n' (vedi split_lines)
+        from_file, to_file: nomi nelle intestazioni --- e +++
+        context: righe di contesto attorno a ogni modifica
+        algorithm: 'histogram' oppure 'myers'
+
+    Returns:
+        Righe del diff senza '\\n' finale (lista vuota se i testi sono uguali)
+    """
+    a_ids, b_ids = intern_lines(a, b)
+    ops = list(_opcodes(matching_blocks(a_ids, b_ids, algorithm), len(a), len(b)))
+    if not any(op[0] == 'change' for op in ops):
+        return []
+
+    # Raggruppa le modifiche vicine in hunk con al massimo `context` righe attorno
+    groups = []
+    current = []
+    for op in ops:
+        tag, i1, i2, j1, j2 = op
+        if tag == 'equal':
+            if not current:
+                continue
+            if i2 - i1 > 2 * context:
+                current.append((tag, i1, i1 + context, j1, j1 + context))
+                groups.append(current)
+                current = []
+                continue
+        elif not current:
+            # Contesto iniziale preso dal blocco uguale precedente
+            start = max(0, i1 - context)
+            if start < i1:
+                current.append(('equal', start, i1, j1 - (i1 - start), j1))
+        current.append(op)
+    if current:
+        if current[-1][0] == 'equal':
+            tag, i1, i2, j1, j2 = current[-1]
+            current[-1] = (tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context))
+        groups.append(current)
+
+    out = [f"--- {from_file}", f"+++ {to_file}"]
+    for group in groups:
+        i_start, j_start = group[0][1], group[0][3]
+        i_end, j_end = group[-1][2], group[-1][4]
+        out.append(f"@@ -{_format_range(i_start, i_end - i_start)} "
+                   f"+{_format_range(j_start, j_end - j_start)} @@")
+        for tag, i1, i2, j1, j2 in group:
+            if tag == 'equal':
+                for line in a[i1:i2]:
+                    _emit(' ', line, out)
+            else:
+                for line in a[i1:i2]:
+                    _emit('-', line, out)
+                for line in b[j1:j2]:
+                    _emit('+', line, out)
+    return out
@@ -0,0 +1,141 @@
+"""
+Modifiche puntuali di un file per sostituzione di testo
+Un insieme di modifiche (ancora, vecchio, nuovo) viene localizzato tutto sul
+contenuto originale e applicato in un solo passaggio, così N modifiche allo
+stesso file costano una lettura e una scrittura.
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class EditError(Exception):
+    """Modifica non localizzabile in modo univoco nel file"""
+
+
+class Edit(NamedTuple):
+    """
+    Sostituzione di testo in un file
+
+    - senza ancora, old deve comparire una sola volta nel file (oppure
+      replace_all=True per sostituirle tutte)
+    - con un'ancora (unica nel file) si sostituisce la prima occorrenza di
+      old a partire dall'inizio dell'ancora; con old vuoto il testo nuovo
+      viene inserito subito dopo l'ancora
+    """
+    old: str
+    new: str
+    anchor: Optional[str] = None
+    replace_all: bool = False
+
+
+class _Occurrences:
+    """
+    Posizioni dei testi cercati nel contenuto, calcolate una volta sola
+
+    Ogni testo distinto (vecchio contenuto o ancora) viene cercato una sola
+    volta anche se compare in più modifiche; per verificare che sia unico
+    basta trovarne la seconda occorrenza.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self._first: Dict[str, List[int]] = {}
+        self._all: Dict[str, List[int]] = {}
+
+    def first_two(self, pattern: str) -> List[int]:
+        found = self._all.get(pattern) or self._first.get(pattern)
+        if found is None:
+            found = []
+            start = self.text.find(pattern)
+            if start >= 0:
+                found.append(start)
+                second = self.text.find(pattern, start + 1)
+                if second >= 0:
+                    found.append(second)
+            self._first[pattern] = found
+        return found[:2]
+
+    def all(self, pattern: str) -> List[int]:
+        found = self._all.get(pattern)
+        if found is None:
+            found = []
+            # Occorrenze non sovrapposte, come str.replace
+            start = self.text.find(pattern)
+            while start >= 0:
+                found.append(start)
+                start = self.text.find(pattern, start + len(pattern))
+            self._all[pattern] = found
+        return found
+
+    def after(self, pattern: str, position: int) -> int:
+        return self.text.find(pattern, position)
+
+
+def _describe(edit: Edit, index: int) -> str:
+    snippet = (edit.old or edit.anchor or '').strip().splitlines()
+    return f"modifica {index + 1} ({snippet[0][:40]!r})" if snippet else f"modifica {index + 1}"
+
+
+def locate_edits(text: str, edits: Sequence[Edit]) -> List[Tuple[int, int, str]]:
+    """
+    Trova dove applicare ogni modifica nel contenuto originale
+
+    Returns:
+        Intervalli (inizio, fine, testo nuovo) ordinati e non sovrapposti
+
+    Raises:
+        EditError: testo non trovato, ambiguo o modifiche sovrapposte
+    """
+    occurrences = _Occurrences(text)
+    spans = []
+    for index, edit in enumerate(edits):
+        if edit.anchor is not None:
+            if not edit.anchor:
+                raise EditError(f"{_describe(edit, index)}: ancora vuota")
+            anchors = occurrences.first_two(edit.anchor)
+            if not anchors:
+                raise EditError(f"{_describe(edit, index)}: ancora non trovata")
+            if len(anchors) > 1:
+                raise EditError(f"{_describe(edit, index)}: ancora presente più volte")
+            if not edit.old:
+                end = anchors[0] + len(edit.anchor)
+                spans.append((end, end, edit.new, index))
+                continue
+            start = occurrences.after(edit.old, anchors[0])
+            if start < 0:
+                raise EditError(f"{_describe(edit, index)}: testo non trovato dopo l'ancora")
+            spans.append((start, start + len(edit.old), edit.new, index))
+            continue
+
+        if not edit.old:
+            raise EditError(f"{_describe(edit, index)}: testo da sostituire vuoto senza ancora")
+        if edit.replace_all:
+            starts = occurrences.all(edit.old)
+        else:
+            starts = occurrences.first_two(edit.old)
+            if len(starts) > 1:
+                raise EditError(f"{_describe(edit, index)}: testo presente più volte "
+                                f"(usa un'ancora o replace_all)")
+        if not starts:
+            raise EditError(f"{_describe(edit, index)}: testo non trovato")
+        spans.extend((start, start + len(edit.old), edit.new, index) for start in starts)
+
+    # Più inserimenti nello stesso punto restano nell'ordine delle modifiche
+    spans.sort(key=lambda span: (span[0], span[1], span[3]))
+    for previous, current in zip(spans, spans[1:]):
+        if current[0] < previous[1]:
+            raise EditError(f"{_describe(edits[previous[3]], previous[3])} e "
+                            f"{_describe(edits[current[3]], current[3])} si sovrappongono")
+    return [(start, end, new) for start, end, new, _ in spans]
+
+
+def apply_edits(text: str, edits: Iterable[Edit]) -> str:
+    """Applica tutte le modifiche al contenuto originale in un solo passaggio"""
+    parts = []
+    position = 0
+    for start, end, new in locate_edits(text, list(edits)):
+        parts.append(text[position:start])
+        parts.append(new)
+        position = end
+    parts.append(text[position:])
+    return ''.join(parts)
@@ -0,0 +1,320 @@
+"""
+Estrattori di simboli per la mappa del progetto
+Un registro per estensione associa a ogni tipo di file la funzione che ne
+ricava il record dei simboli: AST completo per Python, scansione leggera
+con espressioni regolari per gli altri linguaggi e per il Python "shallow".
+
+Un record contiene solo le chiavi che hanno senso per il file:
+    'classes':  [[nome, [metodi]]]     classi (e interfacce TS) con i metodi
+    'functions': [nomi]                funzioni top-level
+    'sections': [[livello, nome]]      titoli Markdown, tabelle TOML, chiavi YAML
+"""
+
+import ast
+import os
+import re
+from typing import Callable, Dict, Iterable, NamedTuple, Optional
+
+
+class Extractor(NamedTuple):
+    """Estrattore registrato per una o più estensioni"""
+    name: str
+    # (sorgente in byte, percorso) -> record, oppure None se il file non è analizzabile
+    extract: Callable[[bytes, str], Optional[dict]]
+    # Va incrementata a ogni modifica dell'estrazione (invalida le cache)
+    version: int = 1
+
+
+def extract_python_symbols(source: bytes, filename: str = '<unknown>') -> Optional[dict]:
+    """
+    Estrae classi, metodi e funzioni top-level da un sorgente Python
+
+    Returns:
+        Record {'classes': [[nome, [metodi]]], 'functions': [nomi]},
+        oppure None se il file non è analizzabile
+    """
+    try:
+        tree = ast.parse(source, filename=filename)
+    except (SyntaxError, UnicodeDecodeError, ValueError):
+        return None
+
+    classes = []
+    functions = []
+
+    # Estrai classi e funzioni top-level direttamente dal body del modulo
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            methods = [m.name for m in node.body if isinstance(m, ast.FunctionDef)]
+            classes.append([node.name, methods])
+        elif isinstance(node, ast.FunctionDef):
+            # Funzioni top-level (direttamente nel body del modulo)
+            functions.append(node.name)
+
+    return {'classes': classes, 'functions': functions}
+
+
+# Chiavi dei simboli di un record, nell'ordine in cui vengono mostrate
+SYMBOL_KEYS = ('classes', 'functions', 'sections')
+
+
+def has_symbols(record: Optional[dict]) -> bool:
+    """True se il record contiene almeno un simbolo"""
+    return record is not None and any(record.get(key) for key in SYMBOL_KEYS)
+
+
+def _decode(source: bytes) -> Optional[str]:
+    try:
+        return source.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return None
+
+
+# Python shallow: stringhe e commenti vengono consumati interi, così un "def"
+# dentro una docstring non viene scambiato per una definizione
+_PY_SCAN = re.compile(r'''
+    (?P<string>[rRbBuUfF]{0,2}(?:"""(?:\\[\s\S]|[^\\])*?"""|\'\'\'(?:\\[\s\S]|[^\\])*?\'\'\'
+        |"(?:\\[\s\S]|[^"\\\n])*"|'(?:\\[\s\S]|[^'\\\n])*'))
+    |\#[^\n]*
+    |^(?P<indent>[ \t]*)(?P<async>async[ \t]+)?(?P<kind>def|class)[ \t]+(?P<name>\w+)
+    |^(?P<statement>[^\s#@)\]}])
+''', re.M | re.X)
+# Prima riga del corpo di una classe: dà il rientro dei metodi anche quando
+# il primo `def` è annidato (es. sotto un `if`)
+_PY_CLASS_BODY = re.compile(r':[ \t]*(?:\#[^\n]*)?\r?\n(?:[ \t]*(?:\#[^\n]*)?\r?\n)*(?P<indent>[ \t]+)\S')
+
+
+def extract_python_shallow(source: bytes, filename: str = '<unknown>') -> Optional[dict]:
+    """
+    Come extract_python_symbols, ma con una scansione delle righe invece dell'AST
+
+    Diverse volte più veloce sui file grandi; in cambio non riconosce i file
+    con errori di sintassi e può sbagliare su codice molto insolito (es.
+    metodi definiti sotto un `if` nel corpo della classe).
+    """
+    text = _decode(source)
+    if text is None:
+        # Codifica dichiarata diversa da UTF-8: la gestisce l'AST
+        return extract_python_symbols(source, filename)
+    classes = []
+    functions = []
+    current = None          # [nome, metodi] della classe top-level aperta
+    body_indent = None      # rientro dei metodi della classe aperta
+    for match in _PY_SCAN.finditer(text):
+        kind = match.group('kind')
+        if kind is None:
+            if match.group('statement') is not None:
+                # Qualunque altra istruzione top-level chiude la classe
+                current = None
+            continue
+        indent = match.group('indent')
+        if not indent:
+            current = None
+            if kind == 'class':
+                current = [match.group('name'), []]
+                body = _PY_CLASS_BODY.search(text, match.end())
+                body_indent = body.group('indent') if body else None
+                classes.append(current)
+            elif not match.group('async'):
+                functions.append(match.group('name'))
+        elif current is not None:
+            if indent == body_indent and kind == 'def' and not match.group('async'):
+                current[1].append(match.group('name'))
+    return {'classes': classes, 'functions': functions}
+
+
+# JavaScript/TypeScript: commenti, stringhe e template consumati interi; le
+# graffe danno la profondità per distinguere top-level e corpo delle classi
+_JS_IDENT = r'[A-Za-z_$][\w$]*'
+_JS_SCAN = re.compile(rf'''
+    //[^\n]*|/\*.*?\*/
+    |"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`
+    |(?P<open>\{{)|(?P<close>\}})
+    |\b(?:class|interface)\s+(?P<cls>{_JS_IDENT})
+    |\bfunction\b\s*\*?\s*(?P<func>{_JS_IDENT})
+    |\b(?:const|let|var)\s+(?P<var>{_JS_IDENT})\s*(?::[^=;]+)?=\s*(?:async\s+)?
+        (?:function\b|\([^()]*\)\s*(?::[^=;{{]+)?=>|{_JS_IDENT}\s*=>)
+    |^[ \t]*(?:(?:static|async|get|set|public|private|protected|readonly|override)[ \t]+)*
+        (?P<method>{_JS_IDENT})[ \t]*(?:<[^>\n]*>)?\([^()]*\)[ \t]*(?::[^{{;\n]+)?(?P<body>\{{)?
+''', re.M | re.S | re.X)
+
+_JS_NOT_METHODS = frozenset(('if', 'for', 'while', 'switch', 'catch', 'function', 'return', 'super', 'with'))
+
+
+def extract_javascript(source: bytes, filename: str = '<unknown>') -> Optional[dict]:
+    """Classi (e interfacce TypeScript) con i metodi e funzioni top-level di JS/TS"""
+    text = _decode(source)
+    if text is None:
+        return None
+    classes = []
+    functions = []
+    depth = 0
+    pending = None      # classe dichiarata, in attesa della graffa del corpo
+    open_classes = []   # (profondità del corpo, [nome, metodi])
+    for match in _JS_SCAN.finditer(text):
+        group = match.lastgroup
+        if group == 'open':
+            depth += 1
+            if pending is not None:
+                open_classes.append((depth, pending))
+                pending = None
+        elif group == 'close':
+            if open_classes and open_classes[-1][0] == depth:
+                open_classes.pop()
+            depth = max(0, depth - 1)
+        elif match.group('cls') is not None:
+            pending = [match.group('cls'), []]
+            if depth == 0:
+                classes.append(pending)
+        elif match.group('func') is not None or match.group('var') is not None:
+            if depth == 0:
+                functions.append(match.group('func') or match.group('var'))
+        elif match.group('method') is not None:
+            name = match.group('method')
+            if open_classes and open_classes[-1][0] == depth and name not in _JS_NOT_METHODS:
+                open_classes[-1][1][1].append(name)
+            if match.group('body') is not None:
+                depth += 1
+    return {'classes': classes, 'functions': functions}
+
+
+_SHELL_FUNCTION = re.compile(
+    r'^[ \t]*(?:function[ \t]+(?P<named>[\w.:-]+)(?:[ \t]*\(\))?|(?P<plain>[A-Za-z_][\w.:-]*)[ \t]*\(\))',
+    re.M)
+
+
+def extract_shell(source: bytes, filename: str = '<unknown>') -> Optional[dict]:
+    """Funzioni definite in uno script shell (`nome()` o `function nome`)"""
+    text = _decode(source)
+    if text is None:
+        return None
+    return {'functions': [m.group('named') or m.group('plain') for m in _SHELL_FUNCTION.finditer(text)]}
+
+
+_TOML_LINE = re.compile(r'^[ \t]*(?:\[\[(?P<array>[^\]\n]+)\]\]|\[(?P<table>[^\]\n]+)\]|(?P<key>[\w"\'.-]+)[ \t]*=)', re.M)
+
+
+def extract_toml(source: bytes, filename: str = '<unknown>') -> Optional[dict]:
+    """Chiavi top-level e tabelle TOML (livello = parti del nome puntato)"""
+    text = _decode(source)
+    if text is None:
+        return None
+    sections = []
+    seen = set()
+    in_table = False
+    for match in _TOML_LINE.finditer(text):
+        name = match.group('table') or match.group('array')
+        if name is not None:
+            in_table = True
+            name = name.strip()
+            if name not in seen:
+                seen.add(name)
+                sections.append([name.count('.') + 1, name])
+        elif not in_table:
+            sections.append([1, match.group('key')])
+    return {'sections': sections}
+
+
+_YAML_KEY = re.compile(r'^(?P<indent>[ ]*)(?P<key>[^\s#\-:][^:#\n]*?|"[^"\n]*"|\'[^\'\n]*\')[ \t]*:(?:[ \t]|$)',
+                       re.M)
+
+
+def extract_yaml(source: bytes, filename: str = '<unknown>') -> Optional[dict]:
+    """Chiavi YAML dei primi due livelli (es. jobs e i singoli job di una CI)"""
+    text = _decode(source)
+    if text is None:
+        return None
+    sections = []
+    child_indent = None
+    for match in _YAML_KEY.finditer(text):
+        indent = len(match.group('indent'))
+        if indent == 0:
+            sections.append([1, match.group('key').strip('"\'')])
+            child_indent = None
+        elif sections:
+            if child_indent is None:
+                child_indent = indent
+            if indent == child_indent:
+                sections.append([2, match.group('key').strip('"\'')])
+    return {'sections': sections}
+
+
+_MD_LINE = re.compile(r'^(?:(?P<fence>```|~~~)|(?P<atx>#{1,6})[ \t]+(?P<title>.*?)[ \t#]*$|(?P<setext>=+|-+)[ \t]*$)',
+                      re.M)
+_MD_FRONT_MATTER = re.compile(r'\A---[ \t]*\n.*?^---[ \t]*$', re.M | re.S)
+
+
+def extract_markdown(source: bytes, filename: str = '<unknown>') -> Optional[dict]:
+    """Titoli Markdown (# titolo e sottolineati con === o ---), esclusi i blocchi di codice"""
+    text = _decode(source)
+    if text is None:
+        return None
+    sections = []
+    fence = None
+    front_matter = _MD_FRONT_MATTER.match(text)
+    for match in _MD_LINE.finditer(text, front_matter.end() if front_matter else 0):
+        if match.group('fence') is not None:
+            if fence is None:
+                fence = match.group('fence')
+            elif match.group('fence') == fence:
+                fence = None
+        elif fence is not None:
+            continue
+        elif match.group('atx') is not None:
+            if match.group('title'):
+                sections.append([len(match.group('atx')), match.group('title')])
+        elif match.start() > 0:
+            # Titolo sottolineato: la riga precedente, se è testo, è il titolo
+            end = match.start() - 1
+            previous = text[text.rfind('\n', 0, end) + 1:end].strip()
+            if previous and not previous.startswith(('#', '-', '*', '>', '|', '```', '~~~')):
+                sections.append([1 if match.group('setext')[0] == '=' else 2, previous])
+    return {'sections': sections}
+
+
+PYTHON = Extractor('python', extract_python_symbols)
+PYTHON_SHALLOW = Extractor('python-shallow', extract_python_shallow)
+JAVASCRIPT = Extractor('javascript', extract_javascript)
+SHELL = Extractor('shell', extract_shell)
+TOML = Extractor('toml', extract_toml)
+YAML = Extractor('yaml', extract_yaml)
+MARKDOWN = Extractor('markdown', extract_markdown)
+
+# Estensione (minuscola, con il punto) -> estrattore
+_REGISTRY: Dict[str, Extractor] = {}
+
+
+def register_extractor(extensions: Iterable[str], extractor: Extractor) -> None:
+    """
+    Associa un estrattore alle estensioni indicate (es. ['.rs'])
+
+    Vale per i generatori creati dopo la registrazione. `extractor.extract`
+    deve essere una funzione di modulo: con più job viene eseguita nei
+    processi del pool, che la importano per nome.
+    """
+    for extension in extensions:
+        _REGISTRY[extension.lower()] = extractor
+
+
+def registered_extractors() -> Dict[str, Extractor]:
+    """Copia del registro attuale (estensione -> estrattore)"""
+    return dict(_REGISTRY)
+
+
+def extension_of(filename: str) -> str:
+    return os.path.splitext(filename)[1].lower()
+
+
+def registry_signature(extractors: Dict[str, Extractor]) -> str:
+    """Descrizione stabile di un registro (entra nel nome della cache)"""
+    return ";".join(f"{ext}={ex.name}/{ex.version}" for ext, ex in sorted(extractors.items()))
+
+
+register_extractor(['.py'], PYTHON)
+register_extractor(['.js', '.jsx', '.mjs', '.cjs', '.ts', '.tsx', '.mts', '.cts'], JAVASCRIPT)
+register_extractor(['.sh', '.bash', '.zsh'], SHELL)
+register_extractor(['.toml'], TOML)
+register_extractor(['.yaml', '.yml'], YAML)
+register_extractor(['.md', '.markdown'], MARKDOWN)
+
+# Registro predefinito: usa la cache "mapgen" senza suffisso
+DEFAULT_SIGNATURE = registry_signature(_REGISTRY)
@@ -0,0 +1,547 @@
+"""
+Elenco dei file di un repository git senza invocare git
+Legge i file tracciati da .git/index, applica le regole di .gitignore ai
+file non tracciati e ricorda l'elenco delle cartelle tra un'esecuzione e
+l'altra, così da non rielencarle finché non cambiano.
+"""
+
+import json
+import os
+import re
+import struct
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from fylia.walker import Entry, IgnorePredicate, PathEntry, list_entries, walk_project
+
+
+# Versione del formato della cache degli elenchi
+GITENUM_CACHE_VERSION = 1
+
+# Cartelle modificate da meno di così (ns) vanno rielencate alla prossima
+# visita: un file aggiunto nello stesso "tick" non cambierebbe l'mtime
+_RACY_WINDOW_NS = 2_000_000_000
+
+_HEADER = struct.Struct('>4sII')
+# ctime, mtime (secondi e ns), dev, ino, mode, uid, gid, size
+_ENTRY_STAT = struct.Struct('>10I')
+_ENTRY_FIXED = _ENTRY_STAT.size + 20 + 2   # stat, sha1, flags
+
+_MODE_GITLINK = 0o160000
+_MODE_SPARSE_DIR = 0o040000
+
+
+class GitIndexError(ValueError):
+    """Il file .git/index non è leggibile o ha un formato non supportato"""
+
+
+def find_git_dir(path: Path) -> Optional[Tuple[Path, Path]]:
+    """
+    Cerca il repository che contiene path risalendo le cartelle
+
+    Returns:
+        (cartella di lavoro, cartella .git) oppure None
+    """
+    path = Path(path).resolve()
+    for candidate in (path, *path.parents):
+        dot_git = candidate / '.git'
+        if dot_git.is_dir():
+            return candidate, dot_git
+        if dot_git.is_file():
+            # Worktree aggiuntivi e submodule: ".git" contiene "gitdir: <percorso>"
+            try:
+                content = dot_git.read_text(encoding='utf-8').strip()
+            except (OSError, UnicodeDecodeError):
+                return None
+            if content.startswith('gitdir:'):
+                git_dir = Path(content[len('gitdir:'):].strip())
+                return candidate, (candidate / git_dir).resolve()
+            return None
+    return None
+
+
+def read_index(path: Path) -> List[str]:
+    """
+    Legge i percorsi dei file tracciati da un file index di git (versioni 2-4)
+
+    I submodule non compaiono (sono cartelle con un proprio repository);
+    le cartelle di un indice "sparse" compaiono con lo '/' finale. Con lo
+    split index vengono letti anche i percorsi dell'indice condiviso.
+
+    Raises:
+        GitIndexError: se il file non è un index valido
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    paths, shared = _parse_index(data)
+    if shared is not None:
+        # Unione con l'indice condiviso: qualche file eliminato può restare,
+        # ma per le regole di esclusione basta un sovrainsieme dei tracciati
+        shared_paths, _ = _parse_index(Path(path).with_name(f'sharedindex.{shared}').read_bytes())
+        paths = sorted(set(paths).union(shared_paths))
+    return paths
+
+
+def _parse_index(data: bytes) -> Tuple[List[str], Optional[str]]:
+    if len(data) < _HEADER.size:
+        raise GitIndexError("index troppo corto")
+    signature, version, count = _HEADER.unpack_from(data)
+    if signature != b'DIRC' or version not in (2, 3, 4):
+        raise GitIndexError(f"index non supportato (versione {version})")
+
+    paths: List[str] = []
+    pos = _HEADER.size
+    previous = b''
+    try:
+        for _ in range(count):
+            mode = _ENTRY_STAT.unpack_from(data, pos)[6]
+            flags = int.from_bytes(data[pos + 60:pos + 62], 'big')
+            name_start = pos + _ENTRY_FIXED
+            if flags & 0x4000:
+                # Flag estesi (versione 3+)
+                name_start += 2
+
+            if version == 4:
+                # Il nome condivide un prefisso con il precedente: varint con il
+                # numero di byte da togliere, poi il resto terminato da NUL
+                strip, name_start = _read_varint(data, name_start)
+                end = data.index(b'\0', name_start)
+                name = previous[:len(previous) - strip] + data[name_start:end]
+                pos = end + 1
+            else:
+                end = data.index(b'\0', name_start)
+                name = data[name_start:end]
+                # Voce riempita con 1-8 NUL fino a un multiplo di 8 byte
+                pos += (end - pos + 8) & ~7
+            previous = name
+
+            if mode & 0o170000 == _MODE_GITLINK:
+                continue
+            if mode & 0o170000 == _MODE_SPARSE_DIR and not name.endswith(b'/'):
+                name += b'/'
+            path = name.decode('utf-8', 'surrogateescape')
+            # Più stadi dello stesso file durante un merge: voci consecutive
+            if not paths or paths[-1] != path:
+                paths.append(path)
+    except (struct.error, ValueError) as e:
+        raise GitIndexError(f"index danneggiato: {e}") from e
+
+    return paths, _shared_index(data, pos)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """Intero a lunghezza variabile dell'offset encoding di git"""
+    byte = data[pos]
+    value = byte & 0x7f
+    pos += 1
+    while byte & 0x80:
+        byte = data[pos]
+        value = ((value + 1) << 7) | (byte & 0x7f)
+        pos += 1
+    return value, pos
+
+
+def _shared_index(data: bytes, pos: int) -> Optional[str]:
+    """Cerca l'estensione 'link' (split index) tra le estensioni dopo le voci"""
+    end = len(data) - 20   # checksum finale
+    while pos + 8 <= end:
+        signature = data[pos:pos + 4]
+        size = int.from_bytes(data[pos + 4:pos + 8], 'big')
+        if signature == b'link':
+            return data[pos + 8:pos + 28].hex()
+        pos += 8 + size
+    return None
+
+
+def _translate_glob(pattern: str) -> str:
+    """Converte un pattern di .gitignore in una regex (senza ancore)"""
+    out = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**', i) and (i == 0 or pattern[i - 1] == '/'):
+                if i + 2 == n:
+                    # "dir/**": tutto il contenuto
+                    out.append('.*')
+                    i += 2
+                    continue
+                if pattern[i + 2] == '/':
+                    # "**/" : zero o più cartelle
+                    out.append('(?:.*/)?')
+                    i += 3
+                    continue
+            while i < n and pattern[i] == '*':
+                i += 1
+            out.append('[^/]*')
+            continue
+        if c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            start = i + 1
+            if pattern[start:start + 1] in ('!', '^'):
+                start += 1
+            if pattern[start:start + 1] == ']':
+                # "]" subito dopo "[" fa parte della classe
+                start += 1
+            end = pattern.find(']', start)
+            if end < 0:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body[0] in '!^':
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\').replace('[', '\\[') + ']')
+                i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+def parse_ignore(lines) -> List[tuple]:
+    """
+    Compila le righe di un file .gitignore
+
+    Returns:
+        Regole (regex, negata, solo cartelle, sul percorso completo) in ordine
+    """
+    rules = []
+    for line in lines:
+        line = line.rstrip('\n').rstrip('\r')
+        # Spazi finali ignorati, a meno che non siano preceduti da '\'
+        stripped = line.rstrip(' ')
+        if stripped.endswith('\\') and len(stripped) < len(line):
+            stripped += ' '
+        line = stripped
+        if not line or line.startswith('#'):
+            continue
+        negate = line.startswith('!')
+        if negate:
+            line = line[1:]
+        elif line.startswith('\\#') or line.startswith('\\!'):
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            continue
+        # Con uno '/' all'inizio o in mezzo il pattern è relativo alla
+        # cartella del .gitignore, altrimenti vale per il nome a ogni livello
+        anchored = '/' in line
+        line = line.lstrip('/')
+        rules.append((re.compile(_translate_glob(line)), negate, dir_only, anchored))
+    return rules
+
+
+def enumerate_project(root: Path, ignore_dirs=(), ignore_files=(), cache_dir: Optional[Path] = None,
+                      use_git: bool = True) -> Tuple[Iterator[Entry], IgnorePredicate]:
+    """
+    Elenca i file del progetto, con .git/index e .gitignore se è un repository
+
+    Returns:
+        (elementi in pre-ordine, predicato delle esclusioni aggiuntive da
+        usare per rielencare singole cartelle, o None)
+    """
+    if use_git:
+        enumerator = GitEnumerator.for_root(root, ignore_dirs, ignore_files, cache_dir)
+        if enumerator is not None:
+            return enumerator.walk(), enumerator.is_ignored
+    return walk_project(str(root), ignore_dirs, ignore_files), None
+
+
+class GitIgnore:
+    """
+    Regole di esclusione di un repository, con la semantica di git
+
+    - .git/info/exclude e i .gitignore di ogni cartella (letti al primo uso)
+    - nello stesso file vince l'ultima regola che corrisponde, e un
+      .gitignore più profondo ha la precedenza su quelli più in alto
+    - i file tracciati (e le cartelle che li contengono) non sono mai esclusi
+
+    Si assume che le cartelle superiori siano già state controllate, come
+    avviene durante una visita che non entra nelle cartelle escluse.
+    """
+
+    def __init__(self, worktree: Path, git_dir: Path, tracked: List[str],
+                 ignore_stats: Optional[Dict[str, Optional[list]]] = None):
+        self.worktree = Path(worktree)
+        self.tracked: Set[str] = set()
+        self.tracked_dirs: Set[str] = set()
+        for path in tracked:
+            path = path.rstrip('/')
+            self.tracked.add(path)
+            parent = path.rpartition('/')[0]
+            while parent and parent not in self.tracked_dirs:
+                self.tracked_dirs.add(parent)
+                parent = parent.rpartition('/')[0]
+        # Percorso del .gitignore -> [mtime_ns, size] (None se assente),
+        # per accorgersi quando le regole cambiano
+        self.ignore_stats = ignore_stats if ignore_stats is not None else {}
+        self._rules: Dict[str, List[tuple]] = {}
+        self._excluded: Dict[str, bool] = {}
+        self._exclude = self._load(os.path.join(str(git_dir), 'info', 'exclude'), None)
+
+    def _load(self, path: str, key: Optional[str]) -> List[tuple]:
+        try:
+            with open(path, 'r', encoding='utf-8', errors='surrogateescape') as f:
+                st = os.fstat(f.fileno())
+                rules = parse_ignore(f)
+        except OSError:
+            if key is not None:
+                self.ignore_stats[key] = None
+            return []
+        if key is not None:
+            self.ignore_stats[key] = [st.st_mtime_ns, st.st_size]
+        return rules
+
+    def rules_for(self, rel_dir: str) -> List[tuple]:
+        """Regole del .gitignore di una cartella relativa alla radice del repository"""
+        rules = self._rules.get(rel_dir)
+        if rules is None:
+            key = f"{rel_dir}/.gitignore" if rel_dir else '.gitignore'
+            rules = self._load(os.path.join(str(self.worktree), key), key)
+            self._rules[rel_dir] = rules
+        return rules
+
+    def is_ignored(self, rel_path: str, is_dir: bool) -> bool:
+        """Indica se un percorso relativo alla radice del repository è escluso"""
+        if rel_path in self.tracked or (is_dir and rel_path in self.tracked_dirs):
+            return False
+        parent = rel_path.rpartition('/')[0]
+        # Una cartella esclusa viene visitata solo se contiene file tracciati:
+        # gli altri file al suo interno restano esclusi
+        if parent in self.tracked_dirs and self._excluded_dir(parent):
+            return True
+        return self._match_rules(rel_path, is_dir)
+
+    def _excluded_dir(self, rel_dir: str) -> bool:
+        """Indica se le regole escludono una cartella o un suo antenato (ignorando i tracciati)"""
+        if not rel_dir:
+            return False
+        excluded = self._excluded.get(rel_dir)
+        if excluded is None:
+            excluded = self._excluded_dir(rel_dir.rpartition('/')[0]) or self._match_rules(rel_dir, True)
+            self._excluded[rel_dir] = excluded
+        return excluded
+
+    def _match_rules(self, rel_path: str, is_dir: bool) -> bool:
+        name = rel_path.rpartition('/')[2]
+
+        # Dalla cartella più vicina alla radice, poi info/exclude
+        rel_dir = rel_path
+        while True:
+            rel_dir = rel_dir.rpartition('/')[0] if '/' in rel_dir else ''
+            decision = self._match(self.rules_for(rel_dir), rel_dir, rel_path, name, is_dir)
+            if decision is not None:
+                return decision
+            if not rel_dir:
+                break
+        decision = self._match(self._exclude, '', rel_path, name, is_dir)
+        return bool(decision)
+
+    @staticmethod
+    def _match(rules: List[tuple], rel_dir: str, rel_path: str, name: str, is_dir: bool) -> Optional[bool]:
+        if not rules:
+            return None
+        local = rel_path[len(rel_dir) + 1:] if rel_dir else rel_path
+        for regex, negate, dir_only, anchored in reversed(rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.fullmatch(local if anchored else name):
+                return not negate
+        return None
+
+
+def _stat_key(path: str) -> Optional[list]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+class GitEnumerator:
+    """
+    Elenco dei file del progetto basato su .git/index e .gitignore
+
+    Le cartelle escluse da .gitignore (build, dist, ambienti virtuali...)
+    non vengono mai aperte, mentre i file tracciati compaiono sempre.
+
+    Con una cache (cache_dir) l'elenco di ogni cartella viene salvato con
+    il suo mtime: alla visita successiva, se .git/index e i .gitignore
+    non sono cambiati, le cartelle invariate vengono solo controllate con
+    uno stat e il loro elenco ripreso dalla cache; .git/index viene letto
+    solo quando qualche cartella va davvero rielencata.
+    """
+
+    def __init__(self, root: Path, worktree: Path, git_dir: Path,
+                 ignore_dirs=(), ignore_files=(), cache_dir: Optional[Path] = None):
+        self.root = Path(root)
+        self.worktree = Path(worktree)
+        self.git_dir = Path(git_dir)
+        self.ignore_dirs = frozenset(ignore_dirs)
+        self.ignore_files = frozenset(ignore_files)
+        self.cache_path = Path(cache_dir) / 'gitenum.json' if cache_dir is not None else None
+        # Prefisso della radice del progetto rispetto alla radice del repository
+        rel_root = os.path.relpath(self.root.resolve(), self.worktree)
+        self.prefix = '' if rel_root == '.' else rel_root.replace(os.sep, '/') + '/'
+        self.relisted = 0
+        self.reused = 0
+        self._ignore: Optional[GitIgnore] = None
+        self._ignore_stats: Dict[str, Optional[list]] = {}
+        # Cartella relativa -> [mtime_ns, nomi, tipi] dell'ultimo elenco
+        self._dirs: Dict[str, list] = {}
+        self._dirty = True
+        self._index_stat = _stat_key(str(self.git_dir / 'index'))
+        self._load_cache()
+
+    @classmethod
+    def for_root(cls, root: Path, ignore_dirs=(), ignore_files=(),
+                 cache_dir: Optional[Path] = None) -> Optional['GitEnumerator']:
+        """Crea l'enumeratore se root è dentro un repository git, altrimenti None"""
+        found = find_git_dir(root)
+        if found is None:
+            return None
+        worktree, git_dir = found
+        return cls(root, worktree, git_dir, ignore_dirs, ignore_files, cache_dir)
+
+    # Regole di esclusione
+
+    @property
+    def ignore(self) -> GitIgnore:
+        if self._ignore is None:
+            try:
+                tracked = read_index(self.git_dir / 'index')
+            except (OSError, GitIndexError):
+                # Repository appena creato o index illeggibile: solo .gitignore
+                tracked = []
+            self._ignore = GitIgnore(self.worktree, self.git_dir, tracked, self._ignore_stats)
+        return self._ignore
+
+    def is_ignored(self, rel_path: str, is_dir: bool) -> bool:
+        """Predicato per walker.list_entries (percorsi relativi alla radice del progetto)"""
+        return self.ignore.is_ignored(self.prefix + rel_path, is_dir)
+
+    # Visita
+
+    def walk(self) -> Iterator[Entry]:
+        """
+        Visita il progetto in pre-ordine, come walker.walk_project()
+
+        Al termine della visita la cache viene aggiornata.
+        """
+        root = str(self.root)
+        seen: Dict[str, list] = {}
+        stack = [iter(self._list(root, '', seen))]
+        while stack:
+            entry = next(stack[-1], None)
+            if entry is None:
+                stack.pop()
+                continue
+            yield entry
+            if entry.is_dir and not entry.dirent.is_symlink():
+                children = self._list(root, entry.rel_path, seen)
+                if children:
+                    stack.append(iter(children))
+        if self.relisted or len(seen) != len(self._dirs):
+            self._dirty = True
+        self._dirs = seen
+        # I .gitignore delle cartelle sparite non servono più
+        for key in list(self._ignore_stats):
+            rel_dir = key.rpartition('/')[0]
+            if (rel_dir + '/').startswith(self.prefix) and rel_dir[len(self.prefix):] not in seen:
+                del self._ignore_stats[key]
+                self._dirty = True
+        self._save_cache()
+
+    def _list(self, root: str, rel_dir: str, seen: Dict[str, list]) -> List[Entry]:
+        path = root + '/' + rel_dir if rel_dir else root
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return []
+
+        cached = self._dirs.get(rel_dir)
+        if cached is not None and cached[0] == mtime:
+            self.reused += 1
+            seen[rel_dir] = cached
+            return self._entries_from_cache(path, rel_dir, cached[1], cached[2])
+
+        self.relisted += 1
+        entries = list_entries(root, rel_dir, self.ignore_dirs, self.ignore_files, self.is_ignored)
+        if time.time_ns() - mtime < _RACY_WINDOW_NS:
+            mtime = -1
+        # Elenco compatto: nomi e un carattere per tipo ('f' file, 'd' cartella,
+        # 'l' link a cartella, che non viene visitato)
+        kinds = ''.join(('l' if e.dirent.is_symlink() else 'd') if e.is_dir else 'f' for e in entries)
+        seen[rel_dir] = [mtime, [e.name for e in entries], kinds]
+        return entries
+
+    @staticmethod
+    def _entries_from_cache(path: str, rel_dir: str, names: List[str], kinds: str) -> List[Entry]:
+        prefix = rel_dir + '/' if rel_dir else ''
+        depth = rel_dir.count('/') + 1 if rel_dir else 0
+        last = len(names) - 1
+        path += '/'
+        return [Entry(prefix + name, name, depth, kind != 'f', i == last,
+                      PathEntry(path + name, name, kind != 'f', kind == 'l'))
+                for i, (name, kind) in enumerate(zip(names, kinds))]
+
+    # Cache
+
+    def _load_cache(self) -> None:
+        """Riprende gli elenchi salvati se index e .gitignore sono invariati"""
+        if self.cache_path is None:
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get('version') != GITENUM_CACHE_VERSION:
+            return
+        if data.get('root') != self.prefix or data.get('index') != self._index_stat:
+            return
+        ignore_stats = data.get('ignores', {})
+        exclude = str(self.git_dir / 'info' / 'exclude')
+        if data.get('exclude') != _stat_key(exclude):
+            return
+        for key, stat in ignore_stats.items():
+            if _stat_key(os.path.join(str(self.worktree), key)) != stat:
+                return
+        self._ignore_stats = ignore_stats
+        self._dirs = data.get('dirs', {})
+        self._dirty = False
+
+    def _save_cache(self) -> None:
+        if self.cache_path is None or not self._dirty:
+            return
+        if self._index_stat is not None and time.time_ns() - self._index_stat[0] < _RACY_WINDOW_NS:
+            # Index appena scritto: alla prossima visita va riletto
+            return
+        data = {
+            'version': GITENUM_CACHE_VERSION,
+            'root': self.prefix,
+            'index': self._index_stat,
+            'exclude': _stat_key(str(self.git_dir / 'info' / 'exclude')),
+            'ignores': self._ignore_stats,
+            'dirs': self._dirs,
+        }
+        tmp_path = self.cache_path.with_name(f".{self.cache_path.name}.{os.getpid()}.tmp")
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(data, separators=(',', ':')))
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            return
+        self._dirty = False
@@ -0,0 +1,197 @@
+"""
+Cronologia della chat salvata su disco
+I messaggi recenti restano in memoria, quelli vecchi vengono letti dal log
+solo quando servono (es. scorrendo la chat verso l'alto).
+"""
+
+import json
+import os
+import struct
+import time
+from collections import deque
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from fylia.cache import FYLIA_DIR
+
+
+# Una voce dell'indice: offset (in byte) dell'inizio del messaggio nel log
+_OFFSET = struct.Struct('<Q')
+
+ROLE_LABELS = {'user': 'Tu', 'assistant': 'FYLIA'}
+
+
+def default_history_path(root: Path) -> Path:
+    """Restituisce il log della chat predefinito per un progetto"""
+    return Path(root) / FYLIA_DIR / 'history' / 'chat.jsonl'
+
+
+def format_message(message: dict) -> str:
+    """Formatta un messaggio per il pannello della chat"""
+    return f"{ROLE_LABELS.get(message['role'], message['role'])}: {message['text']}"
+
+
+class ChatHistory:
+    """
+    Cronologia append-only con buffer circolare in memoria
+
+    Su disco:
+    - <nome>.jsonl: un messaggio JSON per riga
+    - <nome>.jsonl.idx: offset di ogni riga come interi a 64 bit
+
+    L'apertura legge solo la dimensione dell'indice e gli ultimi
+    `capacity` messaggi, quindi il tempo non dipende dalla lunghezza della
+    cronologia. Con path=None la cronologia resta solo in memoria (e i
+    messaggi più vecchi di `capacity` vengono persi).
+    """
+
+    def __init__(self, path: Optional[Path] = None, capacity: int = 200):
+        self.path = Path(path) if path is not None else None
+        self.capacity = capacity
+        self._recent: deque = deque(maxlen=capacity)
+        self._count = 0
+        self._log = None
+        self._index = None
+        if self.path is not None:
+            self._open()
+
+    # Apertura e recupero
+
+    @property
+    def index_path(self) -> Path:
+        return self.path.with_name(self.path.name + '.idx')
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._log = open(self.path, 'ab+')
+        self._index = open(self.index_path, 'ab+')
+        log_size = os.fstat(self._log.fileno()).st_size
+        self._count = os.fstat(self._index.fileno()).st_size // _OFFSET.size
+        if not self._index_is_valid(log_size):
+            self._rebuild_index()
+        start = max(0, self._count - self.capacity)
+        self._recent.extend(self._read_range(start, self._count))
+
+    def _offset(self, i: int) -> int:
+        self._index.seek(i * _OFFSET.size)
+        return _OFFSET.unpack(self._index.read(_OFFSET.size))[0]
+
+    def _index_is_valid(self, log_size: int) -> bool:
+        """Controlla che indice e log finiscano insieme (niente scritture interrotte)"""
+        if os.fstat(self._index.fileno()).st_size % _OFFSET.size:
+            return False
+        if self._count == 0:
+            return log_size == 0
+        last = self._offset(self._count - 1)
+        if last >= log_size:
+            return False
+        self._log.seek(last)
+        tail = self._log.read(log_size - last)
+        return tail.endswith(b'\n') and tail.count(b'\n') == 1
+
+    def _rebuild_index(self) -> None:
+        """Ricostruisce l'indice dal log, scartando un'eventuale riga incompleta"""
+        offsets = []
+        position = 0
+        self._log.seek(0)
+        for line in self._log:
+            if not line.endswith(b'\n'):
+                break
+            offsets.append(position)
+            position += len(line)
+        self._log.truncate(position)
+        self._index.truncate(0)
+        self._index.write(b''.join(_OFFSET.pack(offset) for offset in offsets))
+        self._index.flush()
+        self._count = len(offsets)
+
+    # Lettura
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def first_in_memory(self) -> int:
+        """Indice del messaggio più vecchio ancora nel buffer in memoria"""
+        return self._count - len(self._recent)
+
+    def __getitem__(self, i: int) -> dict:
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        return self.page(i, i + 1)[0]
+
+    def page(self, start: int, stop: int) -> List[dict]:
+        """
+        Restituisce i messaggi con indice in [start, stop)
+
+        I messaggi nel buffer vengono presi dalla memoria, gli altri con una
+        sola lettura contigua del log.
+        """
+        start = max(0, start)
+        stop = min(stop, self._count)
+        if start >= stop:
+            return []
+        first = self.first_in_memory
+        if start >= first:
+            return [self._recent[i - first] for i in range(start, stop)]
+        if self._log is None:
+            raise IndexError("messaggio non più disponibile in memoria")
+        if stop <= first:
+            return self._read_range(start, stop)
+        return self._read_range(start, first) + list(self._recent)[:stop - first]
+
+    def tail(self, n: int) -> List[dict]:
+        """Restituisce gli ultimi n messaggi"""
+        return self.page(self._count - n, self._count)
+
+    def __iter__(self) -> Iterator[dict]:
+        for start in range(0, self._count, self.capacity):
+            yield from self.page(start, start + self.capacity)
+
+    def _read_range(self, start: int, stop: int) -> List[dict]:
+        if start >= stop:
+            return []
+        begin = self._offset(start)
+        if stop < self._count:
+            end = self._offset(stop)
+        else:
+            end = os.fstat(self._log.fileno()).st_size
+        self._log.seek(begin)
+        data = self._log.read(end - begin)
+        return [json.loads(line) for line in data.splitlines()]
+
+    # Scrittura
+
+    def append(self, role: str, text: str) -> int:
+        """
+        Aggiunge un messaggio alla cronologia
+
+        Args:
+            role: 'user' oppure 'assistant'
+            text: testo del messaggio
+
+        Returns:
+            L'indice del messaggio
+        """
+        message = {'role': role, 'text': text, 'time': time.time()}
+        if self._log is not None:
+            line = json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n'
+            offset = os.fstat(self._log.fileno()).st_size
+            # Prima il log, poi l'indice: dopo un'interruzione l'indice
+            # non punta mai a una riga incompleta
+            self._log.write(line)
+            self._log.flush()
+            self._index.write(_OFFSET.pack(offset))
+            self._index.flush()
+        self._recent.append(message)
+        self._count += 1
+        return self._count - 1
+
+    def close(self) -> None:
+        """Chiude i file del log"""
+        for f in (self._log, self._index):
+            if f is not None:
+                f.close()
+        self._log = self._index = None
@@ -0,0 +1,369 @@
+"""
+Indice dei simboli e dei riferimenti del progetto
+Risponde a domande come "dove è definita / dove viene usata questa classe?"
+"""
+
+import ast
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from fylia import trace
+from fylia.cache import FileCache, default_cache_dir
+from fylia.gitindex import enumerate_project
+from fylia.walker import (DEFAULT_IGNORE_DIRS, DEFAULT_IGNORE_FILES, Entry, IgnorePredicate, path_ignored,
+                          walk_project)
+
+
+# Versione del formato dei record dell'indice (invalida la cache su disco)
+INDEX_CACHE_VERSION = 2
+
+# Tipi di definizione e di riferimento registrati nell'indice
+DEF_KINDS = ('class', 'function', 'method', 'variable')
+REF_KINDS = ('import', 'module', 'call', 'attribute', 'name')
+
+
+class Location(NamedTuple):
+    """Posizione di una definizione o di un riferimento"""
+    path: str       # file relativo alla radice del progetto
+    line: int
+    col: int
+    kind: str
+    name: str       # nome qualificato (es. Classe.metodo o pacchetto.modulo)
+
+
+def short_name(name: str) -> str:
+    """Restituisce l'ultima parte di un nome puntato"""
+    return name.rpartition('.')[2]
+
+
+class _ReferenceVisitor(ast.NodeVisitor):
+    """Raccoglie definizioni e riferimenti di un modulo"""
+
+    def __init__(self):
+        self.defs = []
+        self.ends = []         # ultima riga di ogni definizione
+        self.refs = []
+        self._scope = []       # nomi delle classi/funzioni che racchiudono il nodo
+        self._in_class = []    # True se lo scope corrente è una classe
+
+    def _qualname(self, name: str) -> str:
+        return '.'.join(self._scope + [name])
+
+    def _define(self, node, kind: str, name: str) -> None:
+        self.defs.append([self._qualname(name), kind, node.lineno, node.col_offset])
+        self.ends.append(getattr(node, 'end_lineno', None) or node.lineno)
+
+    def _refer(self, node, kind: str, name: str) -> None:
+        self.refs.append([name, kind, node.lineno, node.col_offset])
+
+    def _visit_scope(self, node, kind: str) -> None:
+        self._define(node, kind, node.name)
+        for decorator in node.decorator_list:
+            self.visit(decorator)
+        if isinstance(node, ast.ClassDef):
+            for base in node.bases:
+                self.visit(base)
+            for keyword in node.keywords:
+                self.visit(keyword)
+        else:
+            self.visit(node.args)
+            if node.returns is not None:
+                self.visit(node.returns)
+
+        self._scope.append(node.name)
+        self._in_class.append(isinstance(node, ast.ClassDef))
+        for child in node.body:
+            self.visit(child)
+        self._in_class.pop()
+        self._scope.pop()
+
+    def visit_ClassDef(self, node):
+        self._visit_scope(node, 'class')
+
+    def visit_FunctionDef(self, node):
+        self._visit_scope(node, 'method' if self._in_class and self._in_class[-1] else 'function')
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self._refer(node, 'module', alias.name)
+
+    def visit_ImportFrom(self, node):
+        module = ('.' * node.level) + (node.module or '')
+        if node.module:
+            self._refer(node, 'module', module)
+        for alias in node.names:
+            if alias.name != '*':
+                full = f"{module}.{alias.name}" if node.module else alias.name
+                self._refer(node, 'import', full)
+
+    def visit_Assign(self, node):
+        # Solo le variabili di modulo e gli attributi di classe sono definizioni
+        if not self._scope or self._in_class[-1]:
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    self._define(target, 'variable', target.id)
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        func = node.func
+        if isinstance(func, ast.Name):
+            self._refer(func, 'call', func.id)
+        elif isinstance(func, ast.Attribute):
+            self._refer(func, 'call', func.attr)
+            self.visit(func.value)
+        else:
+            self.visit(func)
+        for arg in node.args:
+            self.visit(arg)
+        for keyword in node.keywords:
+            self.visit(keyword)
+
+    def visit_Attribute(self, node):
+        self._refer(node, 'attribute', node.attr)
+        self.visit(node.value)
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Load):
+            self._refer(node, 'name', node.id)
+
+
+def extract_references(source: bytes, filename: str = '<unknown>') -> Optional[dict]:
+    """
+    Estrae definizioni e riferimenti da un sorgente Python
+
+    Returns:
+        Record {'defs': [[nome, tipo, riga, colonna]], 'refs': [...],
+        'ends': [ultima riga di ogni definizione]}, oppure None se il file
+        non è analizzabile
+    """
+    try:
+        tree = ast.parse(source, filename=filename)
+    except (SyntaxError, UnicodeDecodeError, ValueError):
+        return None
+
+    visitor = _ReferenceVisitor()
+    visitor.visit(tree)
+    return {'defs': visitor.defs, 'refs': visitor.refs, 'ends': visitor.ends}
+
+
+class SymbolIndex:
+    """
+    Indice invertito nome -> posizioni per definizioni e riferimenti
+
+    I record per file sono salvati in .fylia/cache/symbols.json: a ogni
+    aggiornamento vengono rianalizzati solo i file cambiati e le liste
+    invertite vengono corrette solo per quei file.
+    """
+
+    def __init__(self, root: str, ignore_dirs: Iterable[str] = DEFAULT_IGNORE_DIRS,
+                 ignore_files: Iterable[str] = DEFAULT_IGNORE_FILES, use_cache: bool = True,
+                 use_git: bool = True):
+        self.root = Path(root)
+        self.ignore_dirs = frozenset(ignore_dirs)
+        self.ignore_files = frozenset(ignore_files)
+        self.use_cache = use_cache
+        # Nei repository git: gli stessi file di mappa e grafo (.git/index e .gitignore)
+        self.use_git = use_git
+        self.is_ignored: IgnorePredicate = None
+        # File relativo -> record estratto e hash del contenuto indicizzato
+        self.files: Dict[str, dict] = {}
+        self._digests: Dict[str, Optional[str]] = {}
+        self._cache: Optional[FileCache] = None
+        # Nome breve -> file -> lista di [nome, tipo, riga, colonna]
+        self._defs: Dict[str, Dict[str, list]] = {}
+        self._refs: Dict[str, Dict[str, list]] = {}
+        # Cresce a ogni file aggiunto o rimosso (invalida i dati derivati)
+        self.generation = 0
+        self.lock = threading.RLock()
+
+    def _open_cache(self) -> Optional[FileCache]:
+        if not self.use_cache:
+            return None
+        if self._cache is None:
+            self._cache = FileCache(default_cache_dir(self.root), 'symbols', INDEX_CACHE_VERSION)
+        return self._cache
+
+    @trace.traced('index.update')
+    def update(self) -> 'SymbolIndex':
+        """Allinea l'indice al contenuto attuale del progetto"""
+        cache = self._open_cache()
+        if cache is not None:
+            cache.start_pass()
+        seen = set()
+        cache_dir = default_cache_dir(self.root) if self.use_cache else None
+        entries, self.is_ignored = enumerate_project(self.root, self.ignore_dirs, self.ignore_files,
+                                                     cache_dir, self.use_git)
+        for entry in entries:
+            if entry.is_dir or not entry.name.endswith('.py'):
+                continue
+            seen.add(entry.rel_path)
+            self._index_entry(entry, cache)
+
+        with self.lock:
+            for rel_path in [p for p in self.files if p not in seen]:
+                self._remove(rel_path)
+        if cache is not None:
+            cache.save()
+        return self
+
+    @trace.traced('index.update_files')
+    def update_files(self, rel_paths: Iterable[str]) -> None:
+        """
+        Aggiorna l'indice solo per i percorsi indicati (creati, modificati o eliminati)
+
+        Un percorso di cartella aggiorna tutti i file Python al suo interno;
+        '' indica un cambiamento non localizzabile e rifà la visita completa.
+        """
+        rel_paths = set(rel_paths)
+        if '' in rel_paths:
+            self.update()
+            return
+
+        cache = self._open_cache()
+        for rel_path in sorted(rel_paths):
+            path = self.root / rel_path
+            if path_ignored(rel_path, path.is_dir(), self.ignore_dirs, self.ignore_files, self.is_ignored):
+                # Esclusi (anche solo per una cartella che li contiene): come se fossero spariti
+                with self.lock:
+                    self._remove(rel_path)
+                self._remove_prefix(rel_path)
+            elif path.is_dir():
+                self._remove_prefix(rel_path)
+                for entry in walk_project(str(self.root), self.ignore_dirs, self.ignore_files,
+                                          start=rel_path, is_ignored=self.is_ignored):
+                    if not entry.is_dir and entry.name.endswith('.py'):
+                        self._index_entry(entry, cache)
+            elif path.is_file():
+                if rel_path.endswith('.py'):
+                    self._index_file(rel_path, path, cache)
+            else:
+                with self.lock:
+                    self._remove(rel_path)
+                self._remove_prefix(rel_path)
+        if cache is not None:
+            cache.save(prune=False)
+
+    def _remove_prefix(self, rel_dir: str) -> None:
+        """Rimuove dall'indice tutti i file sotto una cartella"""
+        prefix = rel_dir + '/'
+        with self.lock:
+            for rel_path in [p for p in self.files if p.startswith(prefix)]:
+                self._remove(rel_path)
+
+    def _index_entry(self, entry: Entry, cache: Optional[FileCache]) -> None:
+        self._index_file(entry.rel_path, Path(entry.dirent.path), cache, entry)
+
+    def _index_file(self, rel_path: str, path: Path, cache: Optional[FileCache],
+                    entry: Optional[Entry] = None) -> None:
+        digest = None
+        try:
+            if cache is not None:
+                st = entry.stat() if entry is not None else path.stat()
+                record = cache.get(rel_path, path, st.st_mtime_ns, st.st_size,
+                                   lambda data: extract_references(data, str(path)))
+                digest = cache.known_hash(rel_path)
+            else:
+                record = extract_references(path.read_bytes(), str(path))
+        except OSError:
+            return
+
+        with self.lock:
+            if digest is not None and rel_path in self.files and self._digests.get(rel_path) == digest:
+                # Contenuto già indicizzato: le liste invertite restano valide
+                return
+            self._remove(rel_path)
+            if record is not None:
+                self._add(rel_path, record)
+                self._digests[rel_path] = digest
+
+    def _add(self, rel_path: str, record: dict) -> None:
+        self.generation += 1
+        self.files[rel_path] = record
+        for table, items in ((self._defs, record['defs']), (self._refs, record['refs'])):
+            for item in items:
+                table.setdefault(short_name(item[0]), {}).setdefault(rel_path, []).append(item)
+
+    def _remove(self, rel_path: str) -> None:
+        self._digests.pop(rel_path, None)
+        record = self.files.pop(rel_path, None)
+        if record is None:
+            return
+        self.generation += 1
+        for table, items in ((self._defs, record['defs']), (self._refs, record['refs'])):
+            for item in items:
+                key = short_name(item[0])
+                by_file = table.get(key)
+                if by_file is not None and by_file.pop(rel_path, None) is not None and not by_file:
+                    del table[key]
+
+    def _query(self, table: Dict[str, Dict[str, list]], symbol: str,
+               kinds: Optional[Iterable[str]]) -> List[Location]:
+        by_file = table.get(short_name(symbol))
+        if not by_file:
+            return []
+        kinds = set(kinds) if kinds else None
+        dotted = '.' in symbol
+        results = []
+        with self.lock:
+            for rel_path, items in by_file.items():
+                for name, kind, line, col in items:
+                    if kinds is not None and kind not in kinds:
+                        continue
+                    # Con un nome puntato deve coincidere anche il suffisso qualificato
+                    if dotted and name != symbol and not name.endswith('.' + symbol):
+                        continue
+                    results.append(Location(rel_path, line, col, kind, name))
+        results.sort()
+        return results
+
+    def definitions(self, symbol: str, kinds: Optional[Iterable[str]] = None) -> List[Location]:
+        """
+        Cerca dove è definito un simbolo
+
+        Args:
+            symbol: nome semplice (es. 'saluta') o qualificato (es. 'Persona.saluta')
+            kinds: tipi di definizione da includere (default: tutti)
+        """
+        return self._query(self._defs, symbol, kinds)
+
+    def definition_names(self) -> List[str]:
+        """Nomi brevi di tutti i simboli definiti nel progetto"""
+        with self.lock:
+            return list(self._defs)
+
+    def references(self, symbol: str, kinds: Optional[Iterable[str]] = None) -> List[Location]:
+        """
+        Cerca dove viene usato un simbolo (import, chiamate, attributi, nomi)
+
+        Il confronto è per nome: 'Persona.saluta' trova ogni chiamata a
+        un metodo chiamato saluta, senza inferenza dei tipi.
+        """
+        if '.' in symbol:
+            # I riferimenti sono per nome semplice, tranne import e moduli
+            return [loc for loc in self._query(self._refs, short_name(symbol), kinds)
+                    if loc.kind not in ('import', 'module') or loc.name.endswith(symbol)]
+        return self._query(self._refs, symbol, kinds)
+
+    def file_stats(self) -> Dict[str, tuple]:
+        """
+        Percorso -> (mtime_ns, dimensione) dei file Python visti, dalla cache
+
+        Un mtime -1 indica un file modificato troppo di recente per fidarsi
+        dei metadati. Vuoto se la cache è disattivata.
+        """
+        if self._cache is None:
+            return {}
+        return {rel_path: (entry[0], entry[1]) for rel_path, entry in self._cache.entries.items()}
+
+    def format_locations(self, locations: List[Location]) -> str:
+        """Formatta i risultati di una ricerca, una riga per posizione"""
+        return format_locations(locations)
+
+
+def format_locations(locations: List[Location]) -> str:
+    """Formatta i risultati di una ricerca, una riga per posizione"""
+    return "\n".join(f"{loc.path}:{loc.line}:{loc.col + 1}  {loc.kind:<9} {loc.name}"
+                     for loc in locations)
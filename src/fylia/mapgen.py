@@ -1,20 +1,138 @@
 """
 Generatore di mappa concettuale del codice
-Analizza la struttura dei file e del codice Python
+Analizza la struttura dei file e i simboli dei sorgenti (vedi fylia.extractors)
 """
 
+import functools
 import os
-import ast
+from contextlib import ExitStack
 from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from fylia import trace
+from fylia.cache import FileCache, content_hash, default_cache_dir
+from fylia.extractors import (DEFAULT_SIGNATURE, PYTHON_SHALLOW, Extractor, extension_of,
+                              extract_python_symbols, has_symbols, registered_extractors,
+                              registry_signature)
+from fylia.model import ProjectModel
+from fylia.gitindex import enumerate_project
+from fylia.walker import DEFAULT_IGNORE_DIRS, DEFAULT_IGNORE_FILES, Entry, IgnorePredicate
+
+# concurrent.futures (con logging e multiprocessing) si importa solo quando
+# serve un pool: da solo costa più del resto dell'avvio di `fylia map`
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+
+# Versione del formato dei record estratti: va incrementata a ogni modifica
+# dell'estrazione, così le cache su disco esistenti vengono invalidate
+MAPGEN_CACHE_VERSION = 1
+
+# Sotto questa soglia di file da analizzare l'avvio del pool di processi
+# costa più di quanto si risparmi: l'estrazione resta seriale
+PARALLEL_MIN_FILES = 200
+
+# Numero di file inviati a ogni worker per ogni task
+PARALLEL_BATCH_SIZE = 64
+
+# Modalità di analisi dei file Python: AST completo o scansione delle righe
+PYTHON_MODES = ('full', 'shallow')
+
+# Intestazione della mappa testuale
+MAP_HEADER = (
+    "╔═══════════════════════════════╗",
+    "║   MAPPA PROGETTO FYLIA       ║",
+    "╚═══════════════════════════════╝",
+    "",
+    "📁 Struttura File:",
+)
+
+# Sezione dei simboli della mappa testuale
+SYMBOLS_HEADER = "🔎 Simboli:"
+NO_SYMBOLS = "Nessun file analizzabile trovato."
+
+
+def _extract_batch(tasks: Sequence[Tuple[str, Optional[str]]],
+                   extractors: Optional[Dict[str, Extractor]] = None) -> List[Optional[tuple]]:
+    """
+    Legge ed analizza un lotto di file (eseguito anche nei worker)
+
+    Args:
+        tasks: coppie (percorso, hash noto in cache oppure None)
+        extractors: estensione -> estrattore (None = solo Python, con l'AST)
+
+    Returns:
+        Per ogni file (hash, record, analizzato) oppure None se illeggibile.
+        Se l'hash coincide con quello noto il file non viene rianalizzato
+        e il record è None: va ripreso dalla cache.
+    """
+    results = []
+    for path, known_hash in tasks:
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            results.append(None)
+            continue
+        
+        digest = content_hash(data)
+        if digest == known_hash:
+            results.append((digest, None, False))
+        else:
+            extractor = extractors.get(extension_of(path)) if extractors is not None else None
+            extract = extractor.extract if extractor is not None else extract_python_symbols
+            results.append((digest, extract(data, path), True))
+    return results
+
+
+def _map_batches(executor: 'Executor', batches: List[list],
+                 extractors: Optional[Dict[str, Extractor]] = None) -> List[Optional[tuple]]:
+    results = []
+    # map() restituisce i lotti nell'ordine di invio
+    for batch_result in executor.map(functools.partial(_extract_batch, extractors=extractors), batches):
+        results.extend(batch_result)
+    return results
+
+
+def resolve_jobs(jobs: int) -> int:
+    """Converte il numero di job richiesto (0 = tutti i core) in un valore effettivo"""
+    if jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
 
 
 class CodeMapGenerator:
     """Genera una mappa della struttura del progetto"""
     
-    def __init__(self):
-        self.ignore_dirs = {'.git', '__pycache__', 'node_modules', '.venv', 'venv', '.tox'}
-        self.ignore_files = {'.DS_Store', '.gitignore'}
+    def __init__(self, use_cache: bool = True, cache_dir: Optional[str] = None, jobs: int = 1,
+                 use_git: bool = True, python_mode: str = 'full'):
+        if python_mode not in PYTHON_MODES:
+            raise ValueError(f"Modalità Python non valida: {python_mode}")
+        self.ignore_dirs = set(DEFAULT_IGNORE_DIRS)
+        self.ignore_files = set(DEFAULT_IGNORE_FILES)
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+        self.jobs = resolve_jobs(jobs)
+        # Nei repository git: file da .git/index e regole di .gitignore
+        self.use_git = use_git
+        # Estensione -> estrattore dei simboli, fissato alla creazione
+        self.extractors = registered_extractors()
+        if python_mode == 'shallow':
+            self.extractors['.py'] = PYTHON_SHALLOW
+    
+    def has_extractor(self, entry: Entry) -> bool:
+        """True se per il file c'è un estrattore di simboli"""
+        return not entry.is_dir and extension_of(entry.name) in self.extractors
     
+    def enumerate_project(self, root: Path) -> Tuple[Iterator[Entry], IgnorePredicate]:
+        """Elenca i file del progetto (vedi gitindex.enumerate_project)"""
+        root = Path(root)
+        cache_dir = None
+        if self.use_cache:
+            cache_dir = Path(self.cache_dir) if self.cache_dir else default_cache_dir(root)
+        return enumerate_project(root, self.ignore_dirs, self.ignore_files, cache_dir, self.use_git)
+    
+    @trace.traced('map.generate_map')
     def generate_map(self, root_path: str) -> str:
         """Genera la mappa completa del progetto"""
         root = Path(root_path)
@@ -22,55 +140,102 @@ class CodeMapGenerator:
         if not root.exists():
             return f"❌ Percorso non trovato: {root_path}"
         
-        output = []
-        output.append("╔═══════════════════════════════╗")
-        output.append("║   MAPPA PROGETTO FYLIA       ║")
-        output.append("╚═══════════════════════════════╝")
-        output.append("")
-        output.append("📁 Struttura File:")
+        return self.render_model(self.build_model(root))
+    
+    def iter_entries(self, root_path: str) -> Iterator[Tuple[Entry, Optional[dict]]]:
+        """
+        Visita il progetto restituendo ogni elemento con il suo record
         
-        # Genera albero dei file
-        file_tree = self._generate_file_tree(root)
-        output.append(file_tree)
+        Gli elementi arrivano in pre-ordine, a lotti di poche decine: i file
+        con un estrattore vengono analizzati (o ripresi dalla cache) prima di
+        restituire il lotto, quindi la memoria usata non dipende dalla
+        dimensione del progetto e il primo elemento è disponibile subito.
         
-        output.append("")
-        output.append("🐍 Struttura Python:")
+        Yields:
+            (elemento, record) con record None per cartelle, file senza
+            estrattore e file non analizzabili
+        """
+        root = Path(root_path)
+        cache = self._open_cache(root)
+        window_size = PARALLEL_BATCH_SIZE * self.jobs
+        completed = False
+        with ExitStack() as stack:
+            executor = self._open_stream_pool(stack)
+            try:
+                window = []
+                entries, _ = self.enumerate_project(root)
+                for entry in entries:
+                    window.append(entry)
+                    if len(window) >= window_size:
+                        yield from self._flush_window(cache, window, executor)
+                        window = []
+                yield from self._flush_window(cache, window, executor)
+                completed = True
+            finally:
+                # Se la visita è stata interrotta la cache non va sfoltita
+                if cache is not None:
+                    cache.save(prune=completed)
+    
+    def _open_stream_pool(self, stack: ExitStack) -> Optional['Executor']:
+        if self.jobs <= 1:
+            return None
+        try:
+            from concurrent.futures import ProcessPoolExecutor
+            return stack.enter_context(ProcessPoolExecutor(max_workers=self.jobs))
+        except (OSError, ImportError, NotImplementedError):
+            return None
+    
+    def _flush_window(self, cache: Optional[FileCache], window: List[Entry],
+                      executor: Optional['Executor']) -> Iterator[Tuple[Entry, Optional[dict]]]:
+        sources = [entry for entry in window if self.has_extractor(entry)]
+        records = dict(zip((entry.rel_path for entry in sources),
+                           self._extract_cached(cache, sources, executor)))
+        for entry in window:
+            yield entry, records.get(entry.rel_path)
+    
+    def build_model(self, root: Path) -> ProjectModel:
+        """Costruisce il modello in memoria del progetto con una visita completa"""
+        model = ProjectModel(root, self)
+        model.build()
+        return model
+    
+    def render_model(self, model: ProjectModel) -> str:
+        """Formatta la mappa testuale a partire dal modello del progetto"""
+        output = list(MAP_HEADER)
         
-        # Analizza file Python
-        python_structure = self._analyze_python_files(root)
-        output.append(python_structure)
+        with trace.span('map.render'), model.lock:
+            # Genera albero dei file
+            file_tree = self._generate_file_tree(model.iter_tree(max_depth=3))
+            output.append(file_tree)
+            
+            output.append("")
+            output.append(SYMBOLS_HEADER)
+            
+            # Simboli dei file analizzati
+            output.append(self._render_symbol_files(model.symbol_records()))
         
         return "\n".join(output)
     
-    def _generate_file_tree(self, root: Path, prefix: str = "", max_depth: int = 3, current_depth: int = 0) -> str:
-        """Genera un albero dei file"""
-        if current_depth >= max_depth:
-            return ""
-        
-        output = []
+    def _generate_file_tree(self, entries: Iterable[Entry]) -> str:
+        """Genera un albero dei file dagli elementi visitati in pre-ordine"""
+        return "\n".join(self._iter_tree_lines(entries))
+    
+    def _iter_tree_lines(self, entries: Iterable[Entry]) -> Iterator[str]:
+        """Restituisce una riga dell'albero per ogni elemento, man mano"""
+        # Per ogni livello aperto: True se l'antenato era l'ultimo della sua cartella
+        last_flags = []
         
-        try:
-            items = sorted(root.iterdir(), key=lambda x: (not x.is_dir(), x.name))
-            items = [item for item in items if item.name not in self.ignore_files and item.name not in self.ignore_dirs]
-        except PermissionError:
-            return ""
-        
-        for i, item in enumerate(items):
-            is_last = i == len(items) - 1
-            connector = "└── " if is_last else "├── "
+        for entry in entries:
+            del last_flags[entry.depth:]
+            prefix = "".join("    " if last else "│   " for last in last_flags)
+            last_flags.append(entry.is_last)
+            connector = "└── " if entry.is_last else "├── "
             
-            if item.is_dir():
-                output.append(f"{prefix}{connector}📁 {item.name}/")
-                if item.name not in self.ignore_dirs:
-                    extension = "    " if is_last else "│   "
-                    subtree = self._generate_file_tree(item, prefix + extension, max_depth, current_depth + 1)
-                    if subtree:
-                        output.append(subtree)
+            if entry.is_dir:
+                yield f"{prefix}{connector}📁 {entry.name}/"
             else:
-                icon = self._get_file_icon(item.name)
-                output.append(f"{prefix}{connector}{icon} {item.name}")
-        
-        return "\n".join(output)
+                icon = self._get_file_icon(entry.name)
+                yield f"{prefix}{connector}{icon} {entry.name}"
     
     def _get_file_icon(self, filename: str) -> str:
         """Restituisce un'icona per il tipo di file"""
@@ -89,50 +254,132 @@ class CodeMapGenerator:
         
         return icons.get(ext, '📄')
     
-    def _analyze_python_files(self, root: Path) -> str:
-        """Analizza file Python per estrarre classi e funzioni"""
-        output = []
-        
-        for py_file in root.rglob('*.py'):
-            if any(ignored in py_file.parts for ignored in self.ignore_dirs):
+    def _open_cache(self, root: Path) -> Optional[FileCache]:
+        """Apre la cache dei simboli per il progetto, se abilitata"""
+        if not self.use_cache:
+            return None
+        cache_dir = Path(self.cache_dir) if self.cache_dir else default_cache_dir(root)
+        return FileCache(cache_dir, self.cache_name(), MAPGEN_CACHE_VERSION)
+    
+    def cache_name(self) -> str:
+        """
+        Nome della cache dei simboli: con estrattori diversi da quelli
+        predefiniti (es. Python shallow, plugin) i record finiscono in una
+        cache separata, così i due modi non si invalidano a vicenda
+        """
+        signature = registry_signature(self.extractors)
+        if signature == DEFAULT_SIGNATURE:
+            return 'mapgen'
+        return 'mapgen-' + content_hash(signature.encode())[:8]
+    
+    def _extract_cached(self, cache: Optional[FileCache], py_entries: List[Entry],
+                        executor=None) -> List[Optional[dict]]:
+        """Estrae i record riusando la cache già aperta (senza salvarla)"""
+        records = [None] * len(py_entries)
+        pending = []
+        for i, entry in enumerate(py_entries):
+            if cache is None:
+                pending.append((i, None))
                 continue
-            
             try:
-                with open(py_file, 'r', encoding='utf-8') as f:
-                    tree = ast.parse(f.read(), filename=str(py_file))
-                
-                classes = []
-                functions = []
-                
-                # Estrai classi e funzioni top-level direttamente dal body del modulo
-                for node in tree.body:
-                    if isinstance(node, ast.ClassDef):
-                        methods = [m.name for m in node.body if isinstance(m, ast.FunctionDef)]
-                        classes.append((node.name, methods))
-                    elif isinstance(node, ast.FunctionDef):
-                        # Funzioni top-level (direttamente nel body del modulo)
-                        functions.append(node.name)
-                
-                if classes or functions:
-                    rel_path = py_file.relative_to(root)
-                    output.append(f"\n📄 {rel_path}")
-                    
-                    for class_name, methods in classes:
-                        output.append(f"  🔷 class {class_name}")
-                        for method in methods[:5]:  # Mostra max 5 metodi
-                            output.append(f"    ├─ {method}()")
-                        if len(methods) > 5:
-                            output.append(f"    └─ ... (+{len(methods)-5} metodi)")
-                    
-                    for func in functions[:5]:  # Mostra max 5 funzioni
-                        output.append(f"  🔹 def {func}()")
-                    if len(functions) > 5:
-                        output.append(f"  └─ ... (+{len(functions)-5} funzioni)")
-            
-            except (SyntaxError, UnicodeDecodeError):
+                st = entry.stat()
+            except OSError:
                 continue
+            cached = cache.lookup(entry.rel_path, st.st_mtime_ns, st.st_size)
+            if cached is not None:
+                records[i] = cached[3]
+            else:
+                pending.append((i, st))
+        
+        tasks = [(py_entries[i].dirent.path, cache.known_hash(py_entries[i].rel_path) if cache else None)
+                 for i, _ in pending]
+        results = self._extract_files(tasks, executor)
+        
+        for (i, st), result in zip(pending, results):
+            if result is None:
+                continue
+            rel_path = py_entries[i].rel_path
+            digest, record, parsed = result
+            if not parsed:
+                # Contenuto invariato: riusa il record in cache
+                record = cache.record_for(rel_path)
+            records[i] = record
+            if cache is not None:
+                if parsed:
+                    cache.misses += 1
+                else:
+                    cache.hits += 1
+                cache.put(rel_path, st.st_mtime_ns, st.st_size, digest, record)
+        
+        return records
+    
+    def _render_symbol_files(self, records: Iterable[Tuple[str, Optional[dict]]]) -> str:
+        """Formatta i simboli dei file analizzati, già ordinati per percorso"""
+        output = []
+        for rel_path, record in records:
+            if record is not None:
+                output.extend(self._render_symbols(Path(rel_path), record))
         
         if not output:
-            output.append("Nessun file Python trovato o analizzabile.")
+            output.append(NO_SYMBOLS)
         
         return "\n".join(output)
+    
+    def _extract_files(self, tasks: List[Tuple[str, Optional[str]]],
+                       executor: Optional['Executor'] = None) -> List[Optional[tuple]]:
+        """
+        Estrae i simboli dei file, in parallelo se conviene
+        
+        Con un executor già avviato (visita in streaming) il pool viene usato
+        anche per pochi file, dato che il suo avvio è già stato pagato.
+        """
+        if not tasks:
+            return []
+        trace.count('map.files_parsed', len(tasks))
+        with trace.span('map.parse', files=len(tasks), jobs=self.jobs):
+            return self._extract_tasks(tasks, executor)
+    
+    def _extract_tasks(self, tasks: List[Tuple[str, Optional[str]]],
+                       executor: Optional['Executor']) -> List[Optional[tuple]]:
+        if self.jobs <= 1 or (executor is None and len(tasks) < PARALLEL_MIN_FILES):
+            return _extract_batch(tasks, self.extractors)
+        
+        batches = [tasks[i:i + PARALLEL_BATCH_SIZE] for i in range(0, len(tasks), PARALLEL_BATCH_SIZE)]
+        try:
+            if executor is not None:
+                return _map_batches(executor, batches, self.extractors)
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+                return _map_batches(executor, batches, self.extractors)
+        except (OSError, ImportError, NotImplementedError):
+            # Alcuni ambienti (es. Termux senza sem_open) non supportano il pool
+            return _extract_batch(tasks, self.extractors)
+    
+    def _render_symbols(self, rel_path: Path, record: dict) -> list:
+        """Formatta classi, funzioni e sezioni di un file"""
+        if not has_symbols(record):
+            return []
+        classes = record.get('classes', ())
+        functions = record.get('functions', ())
+        sections = record.get('sections', ())
+        
+        output = [f"\n📄 {rel_path}"]
+        
+        for class_name, methods in classes:
+            output.append(f"  🔷 class {class_name}")
+            for method in methods[:5]:  # Mostra max 5 metodi
+                output.append(f"    ├─ {method}()")
+            if len(methods) > 5:
+                output.append(f"    └─ ... (+{len(methods)-5} metodi)")
+        
+        for func in functions[:5]:  # Mostra max 5 funzioni
+            output.append(f"  🔹 def {func}()")
+        if len(functions) > 5:
+            output.append(f"  └─ ... (+{len(functions)-5} funzioni)")
+        
+        for level, title in sections[:8]:  # Mostra max 8 sezioni
+            output.append(f"  {'  ' * (level - 1)}§ {title}")
+        if len(sections) > 8:
+            output.append(f"  └─ ... (+{len(sections)-8} sezioni)")
+        
+        return output
@@ -0,0 +1,127 @@
+"""
+Formati in streaming della mappa del progetto
+Testo, JSON e NDJSON prodotti man mano che la visita trova file e simboli,
+senza costruire prima la mappa completa in memoria.
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Tuple
+
+from fylia.extractors import SYMBOL_KEYS, has_symbols
+from fylia.mapgen import MAP_HEADER, NO_SYMBOLS, SYMBOLS_HEADER, CodeMapGenerator
+from fylia.walker import Entry
+
+
+# Versione dello schema dei record JSON/NDJSON
+MAP_FORMAT_VERSION = 1
+
+MAP_FORMATS = ('text', 'json', 'ndjson')
+
+
+def entry_record(entry: Entry, record: Optional[dict], extracted: bool = False) -> dict:
+    """
+    Converte un elemento visitato in un record serializzabile
+
+    Schema:
+        {"type": "dir", "path": "src/pkg", "depth": 1}
+        {"type": "file", "path": "src/pkg/a.py", "depth": 2,
+         "classes": [{"name": "A", "methods": ["f"]}], "functions": ["g"]}
+        {"type": "file", "path": "README.md", "depth": 0,
+         "sections": [{"level": 1, "name": "Titolo"}]}
+    Ogni file ha solo le chiavi dei simboli del suo tipo; quelli con un
+    estrattore (`extracted`) ma non analizzabili hanno "error": "parse".
+    """
+    data = {'type': 'dir' if entry.is_dir else 'file', 'path': entry.rel_path, 'depth': entry.depth}
+    if record is None:
+        if extracted:
+            data['error'] = 'parse'
+        return data
+    for key in SYMBOL_KEYS:
+        if key not in record:
+            continue
+        if key == 'classes':
+            data[key] = [{'name': name, 'methods': methods} for name, methods in record[key]]
+        elif key == 'sections':
+            data[key] = [{'level': level, 'name': name} for level, name in record[key]]
+        else:
+            data[key] = record[key]
+    return data
+
+
+def model_entries(model) -> Iterator[Tuple[Entry, Optional[dict]]]:
+    """Gli elementi di un ProjectModel già costruito, come da CodeMapGenerator.iter_entries"""
+    with model.lock:
+        for entry in model.iter_tree(max_depth=sys.maxsize):
+            yield entry, model.records.get(entry.rel_path)
+
+
+def iter_records(generator: CodeMapGenerator, root_path: str,
+                 entries: Optional[Iterable[Tuple[Entry, Optional[dict]]]] = None) -> Iterator[dict]:
+    """
+    Restituisce un record di intestazione e poi uno per ogni elemento
+
+    Gli elementi vengono dalla visita del progetto, o da `entries` se indicato
+    (es. model_entries() di un modello già in memoria).
+    """
+    yield {'type': 'map', 'version': MAP_FORMAT_VERSION, 'root': str(Path(root_path).resolve())}
+    for entry, record in (generator.iter_entries(root_path) if entries is None else entries):
+        yield entry_record(entry, record, generator.has_extractor(entry))
+
+
+def iter_ndjson(generator: CodeMapGenerator, root_path: str, entries=None) -> Iterator[str]:
+    """Una riga JSON per record (memoria costante)"""
+    for record in iter_records(generator, root_path, entries):
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def iter_json(generator: CodeMapGenerator, root_path: str, entries=None) -> Iterator[str]:
+    """
+    Un unico documento JSON scritto a pezzi (memoria costante)
+
+    Forma: {"type": "map", "version": 1, "root": "...", "entries": [...]}
+    """
+    records = iter_records(generator, root_path, entries)
+    header = json.dumps(next(records), ensure_ascii=False)
+    yield header[:-1] + ', "entries": ['
+    separator = '\n'
+    for record in records:
+        yield separator + json.dumps(record, ensure_ascii=False)
+        separator = ',\n'
+    yield '\n]}\n'
+
+
+def iter_text(generator: CodeMapGenerator, root_path: str, entries=None) -> Iterator[str]:
+    """
+    La mappa testuale di generate_map(), una riga alla volta
+
+    L'albero dei file viene scritto durante la visita; la sezione dei simboli
+    è ordinata per percorso, quindi vengono tenuti da parte solo i record
+    dei file con simboli fino alla fine della visita.
+    """
+    yield from MAP_HEADER
+    symbol_records = []
+
+    def tree_entries():
+        for entry, record in (generator.iter_entries(root_path) if entries is None else entries):
+            if has_symbols(record):
+                symbol_records.append((entry.rel_path, record))
+            # Come ProjectModel.iter_tree(max_depth=3)
+            if entry.depth < 3:
+                yield entry
+
+    empty = True
+    for line in generator._iter_tree_lines(tree_entries()):
+        empty = False
+        yield line
+    if empty:
+        yield ""
+
+    yield ""
+    yield SYMBOLS_HEADER
+    if not symbol_records:
+        yield NO_SYMBOLS
+    symbol_records.sort(key=lambda item: item[0])
+    for rel_path, record in symbol_records:
+        yield from generator._render_symbols(Path(rel_path), record)
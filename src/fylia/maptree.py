@@ -0,0 +1,240 @@
+"""
+Pannello della mappa come albero navigabile
+Le cartelle e i file vengono caricati solo quando si espandono e il widget
+Tree disegna solo le righe visibili, anche su progetti molto grandi.
+"""
+
+from typing import Dict, NamedTuple, Optional, Set
+
+from rich.text import Text
+from textual.widgets import Tree
+from textual.widgets.tree import TreeNode
+
+from fylia import trace
+from fylia.deps import DependencyGraph
+from fylia.extractors import has_symbols
+from fylia.model import ProjectModel, parent_of
+
+
+# Elementi aggiunti a una cartella per volta: gli altri restano dietro un
+# nodo "altri N elementi" che li carica quando viene espanso. Le etichette
+# sono Text e non stringhe, così i nomi con [ ] non vengono letti come markup
+CHILDREN_BATCH = 200
+
+
+class MapNode(NamedTuple):
+    """Dati associati a un nodo dell'albero"""
+    kind: str       # 'dir', 'file', 'class', 'symbol', 'deps', 'cycles' oppure 'more'
+    path: str       # percorso relativo del file o della cartella
+    offset: int = 0  # per 'more': indice del primo elemento ancora da mostrare
+
+
+class MapTree(Tree):
+    """
+    Albero del progetto costruito pigramente dal ProjectModel
+
+    Tiene traccia dei nodi già caricati, così gli aggiornamenti del watcher
+    ricaricano solo le cartelle visibili toccate, conservando quali nodi
+    erano espansi. Con un grafo delle dipendenze i file Python mostrano
+    anche da cosa dipendono e chi li usa, e la radice gli import circolari.
+    """
+
+    def __init__(self, generator, **kwargs):
+        super().__init__("📁 progetto", data=MapNode('dir', ''), **kwargs)
+        self.generator = generator
+        self.model: Optional[ProjectModel] = None
+        # Cartelle e file Python il cui contenuto è già nell'albero
+        self._dir_nodes: Dict[str, TreeNode] = {}
+        self._file_nodes: Dict[str, TreeNode] = {}
+        self.graph: Optional[DependencyGraph] = None
+        self._cycles_node: Optional[TreeNode] = None
+
+    def set_graph(self, graph: DependencyGraph) -> None:
+        """Associa il grafo delle dipendenze e aggiorna i nodi già caricati"""
+        self.graph = graph
+        if self.model is not None:
+            self.show_model(self.model)
+
+    def show_cycles(self) -> None:
+        """Mostra in cima all'albero gli import circolari, se ce ne sono"""
+        if self._cycles_node is not None:
+            self._cycles_node.remove()
+            self._cycles_node = None
+        if self.graph is None:
+            return
+        groups = self.graph.cycles()
+        if not groups:
+            return
+        label = f"🔁 {len(groups)} cicli di import" if len(groups) > 1 else "🔁 un ciclo di import"
+        if self.root.children:
+            self._cycles_node = self.root.add(Text(label), data=MapNode('cycles', ''), before=0)
+        else:
+            self._cycles_node = self.root.add(Text(label), data=MapNode('cycles', ''))
+        for group in groups:
+            group_node = self._cycles_node.add(Text(" → ".join(p.rpartition('/')[2] for p in group)),
+                                               data=MapNode('cycles', group[0]))
+            for rel_path in group:
+                group_node.add_leaf(Text(rel_path), data=MapNode('file', rel_path))
+
+    @trace.traced('tui.map_tree')
+    def show_model(self, model: ProjectModel) -> None:
+        """Mostra un modello (nuovo o ricostruito) mantenendo le espansioni"""
+        expanded = self._expanded_paths()
+        self.model = model
+        self.clear()
+        self.root.set_label(Text(f"📁 {model.root.resolve().name}/"))
+        self.root.data = MapNode('dir', '')
+        self._dir_nodes = {}
+        self._file_nodes = {}
+        self._load(self.root, expanded)
+        self.root.expand()
+
+    @trace.traced('tui.map_refresh')
+    def refresh_paths(self, paths: Set[str]) -> None:
+        """Ricarica le parti caricate dell'albero toccate dai percorsi cambiati"""
+        if self.model is None:
+            return
+        if '' in paths:
+            self.show_model(self.model)
+            return
+
+        targets = set()
+        for path in paths:
+            parent = parent_of(path)
+            if parent in self._dir_nodes:
+                targets.add(parent)
+            if path in self._dir_nodes or path in self._file_nodes:
+                targets.add(path)
+
+        expanded = self._expanded_paths()
+        reloaded = []
+        for rel_path in sorted(targets, key=lambda p: (p.count('/'), p) if p else (-1, p)):
+            # Un antenato ricaricato ha già ricostruito questo sottoalbero
+            if any(rel_path == r or rel_path.startswith(r + '/') or not r for r in reloaded):
+                continue
+            node = self._dir_nodes.get(rel_path) or self._file_nodes.get(rel_path)
+            if node is None:
+                continue
+            # Restano visibili almeno gli elementi già caricati con "altri N"
+            shown = sum(1 for child in node.children if child.data.kind != 'more')
+            self._forget(rel_path)
+            node.remove_children()
+            self._load(node, expanded, shown)
+            reloaded.append(rel_path)
+
+    def _expanded_paths(self) -> Set[tuple]:
+        """Insieme (tipo, percorso) dei nodi caricati ed espansi"""
+        expanded = set()
+        for nodes in (self._dir_nodes, self._file_nodes):
+            for node in nodes.values():
+                if node.is_expanded:
+                    expanded.add((node.data.kind, node.data.path))
+        for node in self._file_nodes.values():
+            for child in node.children:
+                if child.is_expanded:
+                    expanded.add((child.data.kind, child.data.path))
+        return expanded
+
+    def _forget(self, rel_path: str) -> None:
+        """Dimentica i nodi caricati sotto un percorso (che sta per essere ricaricato)"""
+        prefix = rel_path + '/' if rel_path else ''
+        for nodes in (self._dir_nodes, self._file_nodes):
+            for key in [k for k in nodes if k == rel_path or k.startswith(prefix)]:
+                del nodes[key]
+
+    def on_tree_node_expanded(self, event: Tree.NodeExpanded) -> None:
+        """Carica il contenuto di un nodo alla prima espansione"""
+        node = event.node
+        data = node.data
+        if data is None or self.model is None:
+            return
+        if data.kind == 'more':
+            parent = node.parent
+            node.remove()
+            self._add_entries(parent, data.path, data.offset, set())
+        elif data.kind == 'dir' and data.path not in self._dir_nodes:
+            self._load(node, set())
+        elif data.kind == 'file' and data.path not in self._file_nodes and node.allow_expand:
+            self._load(node, set())
+
+    # Costruzione dei nodi
+
+    def _load(self, node: TreeNode, expanded: Set[tuple], shown: int = 0) -> None:
+        data = node.data
+        if data.kind == 'dir':
+            self._dir_nodes[data.path] = node
+            if node is self.root:
+                self._cycles_node = None
+                self.show_cycles()
+            self._add_entries(node, data.path, 0, expanded, shown)
+        elif data.kind == 'file':
+            self._file_nodes[data.path] = node
+            self._add_symbols(node, data.path, expanded)
+        if (data.kind, data.path) in expanded:
+            node.expand()
+
+    def _add_entries(self, node: TreeNode, rel_dir: str, offset: int, expanded: Set[tuple],
+                     shown: int = 0) -> None:
+        """Aggiunge un lotto di elementi di una cartella (almeno `shown` elementi)"""
+        with self.model.lock:
+            entries = self.model.children.get(rel_dir, [])
+            batch = entries[offset:offset + max(CHILDREN_BATCH, shown)]
+            remaining = len(entries) - offset - len(batch)
+            records = [self.model.records.get(entry.rel_path) for entry in batch]
+
+        for entry, record in zip(batch, records):
+            if entry.is_dir:
+                child = node.add(Text(f"📁 {entry.name}/"), data=MapNode('dir', entry.rel_path))
+            else:
+                label = Text(f"{self.generator._get_file_icon(entry.name)} {entry.name}")
+                has_deps = self.graph is not None and entry.name.endswith('.py') and self._has_deps(entry.rel_path)
+                child = node.add(label, data=MapNode('file', entry.rel_path),
+                                 allow_expand=has_symbols(record) or has_deps)
+            if ('dir' if entry.is_dir else 'file', entry.rel_path) in expanded:
+                self._load(child, expanded)
+
+        if remaining > 0:
+            label = f"… altri {remaining} elementi" if remaining > 1 else "… un altro elemento"
+            node.add(Text(label, style="dim"),
+                     data=MapNode('more', rel_dir, offset + len(batch)))
+
+    def _add_symbols(self, node: TreeNode, rel_path: str, expanded: Set[tuple]) -> None:
+        """Aggiunge i simboli di un file e, per i file Python, le dipendenze"""
+        with self.model.lock:
+            record = self.model.records.get(rel_path)
+        if record:
+            self._add_record(node, rel_path, record, expanded)
+        if self.graph is not None and rel_path.endswith('.py'):
+            self._add_deps(node, rel_path, expanded)
+
+    def _add_record(self, node: TreeNode, rel_path: str, record: dict, expanded: Set[tuple]) -> None:
+        for class_name, methods in record.get('classes', ()):
+            class_node = node.add(Text(f"🔷 class {class_name}"), data=MapNode('class', f"{rel_path}::{class_name}"),
+                                  allow_expand=bool(methods))
+            for method in methods:
+                class_node.add_leaf(Text(f"{method}()"), data=MapNode('symbol', rel_path))
+            if ('class', class_node.data.path) in expanded:
+                class_node.expand()
+        for func in record.get('functions', ()):
+            node.add_leaf(Text(f"🔹 def {func}()"), data=MapNode('symbol', rel_path))
+        for level, title in record.get('sections', ()):
+            node.add_leaf(Text(f"{'  ' * (level - 1)}§ {title}"), data=MapNode('symbol', rel_path))
+
+    def _has_deps(self, rel_path: str) -> bool:
+        return bool(self.graph.dependencies(rel_path) or self.graph.dependents(rel_path))
+
+    def _add_deps(self, node: TreeNode, rel_path: str, expanded: Set[tuple]) -> None:
+        """Aggiunge i gruppi "dipende da" e "usato da" di un file Python"""
+        groups = (
+            ('⬇ dipende da', 'deps', self.graph.dependencies(rel_path)),
+            ('⬆ usato da', 'users', self.graph.dependents(rel_path)),
+        )
+        for title, suffix, paths in groups:
+            if not paths:
+                continue
+            group = node.add(Text(f"{title} {len(paths)}", style="dim"),
+                             data=MapNode('deps', f"{rel_path}::{suffix}"))
+            for path in paths:
+                group.add_leaf(Text(path), data=MapNode('file', path))
+            if ('deps', group.data.path) in expanded:
+                group.expand()
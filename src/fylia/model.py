@@ -0,0 +1,194 @@
+"""
+Modello in memoria del progetto
+Mantiene albero dei file e simboli dei sorgenti, aggiornabili per singoli percorsi
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from fylia import trace
+from fylia.cache import FileCache
+from fylia.walker import Entry, IgnorePredicate, list_entries, walk_project
+
+
+# Secondi minimi fra due salvataggi della cache dei simboli durante gli
+# aggiornamenti incrementali (le voci restano in memoria fino a flush())
+CACHE_SAVE_INTERVAL = 30.0
+
+
+def parent_of(rel_path: str) -> str:
+    """Restituisce la cartella che contiene un percorso relativo ('' = radice)"""
+    return rel_path.rpartition('/')[0]
+
+
+class ProjectModel:
+    """
+    Struttura del progetto: elenco di ogni cartella e record dei sorgenti
+
+    Il modello viene costruito con una visita completa e poi aggiornato in
+    modo incrementale con apply_changes(): vengono rielencate solo le
+    cartelle toccate e rianalizzati solo i sorgenti coinvolti. La cache dei
+    simboli resta aperta fra un aggiornamento e l'altro: su disco viene
+    riscritta al più ogni CACHE_SAVE_INTERVAL secondi e con flush().
+    """
+
+    def __init__(self, root: Path, generator):
+        self.root = Path(root)
+        self.generator = generator
+        # Cartella relativa -> elementi contenuti (ordinati come nell'albero)
+        self.children: Dict[str, List[Entry]] = {}
+        # File con un estrattore -> record dei simboli (None se non analizzabile)
+        self.records: Dict[str, Optional[dict]] = {}
+        # Esclusioni oltre ai nomi ignorati (es. .gitignore), fissate da build()
+        self.is_ignored: IgnorePredicate = None
+        # Cache dei simboli aperta da build() (None se disabilitata)
+        self.cache: Optional[FileCache] = None
+        self._cache_saved = 0.0
+        # Protegge il modello quando viene aggiornato da thread in background
+        self.lock = threading.RLock()
+
+    def build(self) -> None:
+        """Costruisce il modello con una visita completa del progetto"""
+        children: Dict[str, List[Entry]] = {'': []}
+        sources = []
+        with trace.span('map.walk') as span:
+            entries, self.is_ignored = self.generator.enumerate_project(self.root)
+            for entry in entries:
+                children.setdefault(parent_of(entry.rel_path), []).append(entry)
+                if entry.is_dir:
+                    children.setdefault(entry.rel_path, [])
+                elif self.generator.has_extractor(entry):
+                    sources.append(entry)
+            span.set(dirs=len(children), sources=len(sources))
+
+        cache = self.cache if self.cache is not None else self.generator._open_cache(self.root)
+        if cache is not None:
+            cache.start_pass()
+        records = self.generator._extract_cached(cache, sources)
+        if cache is not None:
+            # Visita completa: si eliminano anche le voci dei file spariti
+            cache.save()
+        with self.lock:
+            self.children = children
+            self.records = dict(zip((e.rel_path for e in sources), records))
+            self.cache = cache
+            self._cache_saved = time.monotonic()
+
+    @trace.traced('map.apply_changes')
+    def apply_changes(self, paths: Iterable[str]) -> None:
+        """
+        Aggiorna il modello per un insieme di percorsi cambiati
+
+        Args:
+            paths: percorsi relativi creati, modificati o eliminati.
+                   '' indica un cambiamento non localizzabile (visita completa)
+        """
+        paths = set(paths)
+        if not paths:
+            return
+        if '' in paths:
+            self.build()
+            return
+
+        with self.lock:
+            # Cartelle da rielencare: quelle che contengono i percorsi cambiati,
+            # risalendo fino a una cartella già nota al modello
+            dirs = set()
+            for path in paths:
+                parent = parent_of(path)
+                while parent and parent not in self.children:
+                    parent = parent_of(parent)
+                dirs.add(parent)
+
+            to_extract: List[Entry] = []
+            for rel_dir in sorted(dirs):
+                if rel_dir in self.children:
+                    self._relist(rel_dir, paths, to_extract)
+
+            if to_extract:
+                records = self.generator._extract_cached(self.cache, to_extract)
+                for entry, record in zip(to_extract, records):
+                    self.records[entry.rel_path] = record
+                if time.monotonic() - self._cache_saved >= CACHE_SAVE_INTERVAL:
+                    self.flush()
+
+    def flush(self) -> None:
+        """Salva su disco le voci della cache dei simboli aggiornate dopo build()"""
+        with self.lock:
+            if self.cache is not None:
+                self.cache.save(prune=False)
+                self._cache_saved = time.monotonic()
+
+    def _relist(self, rel_dir: str, changed: Set[str], to_extract: List[Entry]) -> None:
+        """Rielenca una cartella e aggiorna i sottoalberi aggiunti o rimossi"""
+        if rel_dir and not os.path.isdir(self.root / rel_dir):
+            self._drop(rel_dir)
+            return
+
+        old = {entry.name: entry for entry in self.children.get(rel_dir, [])}
+        new = list_entries(str(self.root), rel_dir, self.generator.ignore_dirs, self.generator.ignore_files,
+                           self.is_ignored)
+        self.children[rel_dir] = new
+        new_names = set()
+
+        for entry in new:
+            new_names.add(entry.name)
+            previous = old.get(entry.name)
+            if previous is not None and previous.is_dir != entry.is_dir:
+                self._drop(entry.rel_path)
+                previous = None
+
+            if entry.is_dir:
+                if previous is None or entry.rel_path in changed:
+                    self._drop(entry.rel_path)
+                    self._add_subtree(entry, to_extract)
+            elif self.generator.has_extractor(entry) and (previous is None or entry.rel_path in changed):
+                to_extract.append(entry)
+
+        for name, entry in old.items():
+            if name not in new_names:
+                self._drop(entry.rel_path)
+
+    def _add_subtree(self, dir_entry: Entry, to_extract: List[Entry]) -> None:
+        """Aggiunge al modello una cartella nuova con tutto il suo contenuto"""
+        self.children[dir_entry.rel_path] = []
+        if dir_entry.dirent.is_symlink():
+            return
+        for entry in walk_project(str(self.root), self.generator.ignore_dirs,
+                                  self.generator.ignore_files, start=dir_entry.rel_path,
+                                  is_ignored=self.is_ignored):
+            self.children.setdefault(parent_of(entry.rel_path), []).append(entry)
+            if entry.is_dir:
+                self.children.setdefault(entry.rel_path, [])
+            elif self.generator.has_extractor(entry):
+                to_extract.append(entry)
+
+    def _drop(self, rel_path: str) -> None:
+        """Rimuove un percorso (e l'eventuale sottoalbero) dal modello"""
+        self.records.pop(rel_path, None)
+        if rel_path not in self.children:
+            return
+        prefix = rel_path + '/'
+        for key in [k for k in self.children if k == rel_path or k.startswith(prefix)]:
+            del self.children[key]
+        for key in [k for k in self.records if k.startswith(prefix)]:
+            del self.records[key]
+
+    def iter_tree(self, max_depth: int = 3) -> Iterator[Entry]:
+        """Restituisce gli elementi dell'albero in pre-ordine fino a max_depth"""
+        stack = [iter(self.children.get('', []))]
+        while stack:
+            entry = next(stack[-1], None)
+            if entry is None:
+                stack.pop()
+                continue
+            yield entry
+            if entry.is_dir and entry.depth + 1 < max_depth:
+                stack.append(iter(self.children.get(entry.rel_path, [])))
+
+    def symbol_records(self) -> List[tuple]:
+        """Restituisce le coppie (percorso, record) ordinate per percorso"""
+        return sorted(self.records.items())
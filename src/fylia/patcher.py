@@ -5,35 +5,89 @@ Supporta creazione, modifica e cancellazione di file
 
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional
+
+from fylia import trace
+from fylia.diff import split_lines, unified_diff
+from fylia.edits import Edit
+from fylia.transaction import Transaction
+from fylia.undo import UndoJournal
+from fylia.unidiff import parse_patch
+
+
+def project_patcher(root='.', durable: bool = True) -> 'Patcher':
+    """Patcher che salva ogni modifica nel registro del progetto, per `fylia undo`"""
+    return Patcher(durable=durable, journal=UndoJournal(root))
 
 
 class Patcher:
     """Applica patch e diff ai file del progetto"""
     
+    def __init__(self, fuzz: int = 2, max_offset: int = 1000, durable: bool = True,
+                 journal: Optional[UndoJournal] = None):
+        """
+        Args:
+            fuzz: righe di contesto iniziali/finali che un hunk può ignorare
+            max_offset: distanza massima (in righe) in cui cercare un hunk spostato
+            durable: sincronizza file e cartelle su disco a ogni scrittura
+            journal: registro in cui salvare ogni modifica per `fylia undo`
+        """
+        self.fuzz = fuzz
+        self.max_offset = max_offset
+        self.durable = durable
+        self.journal = journal
+    
+    def transaction(self, root: str = '.', label: str = '') -> Transaction:
+        """
+        Crea una transazione per applicare più modifiche tutte insieme
+        
+        Da usare con `with`: le modifiche diventano effettive all'uscita dal
+        blocco, oppure nessuna se il blocco solleva un'eccezione.
+        
+        Args:
+            root: cartella a cui sono relativi i percorsi delle operazioni
+            label: descrizione del changeset nel registro delle modifiche
+        """
+        return Transaction(root, self.durable, self.fuzz, self.max_offset, self.journal, label)
+    
+    @trace.traced('patcher.apply_patch')
     def apply_patch(self, file_path: str, patch_content: str) -> bool:
         """
         Applica una patch a un file
         
         Args:
-            file_path: percorso del file da modificare
+            file_path: percorso del file da modificare, oppure cartella
+                       radice per una patch multi-file
             patch_content: contenuto della patch in formato unified diff
             
         Returns:
             True se la patch è stata applicata con successo
         """
-        # Implementazione semplificata - supporto base
         try:
-            path = Path(file_path)
+            file_patches = parse_patch(patch_content)
             
-            # Se il file non esiste, crealo
-            if not path.exists():
-                path.parent.mkdir(parents=True, exist_ok=True)
-                path.write_text(patch_content)
+            # Patch multi-file: i percorsi sono relativi alla cartella indicata
+            if os.path.isdir(file_path):
+                with self.transaction(file_path) as tx:
+                    tx.apply_patch(file_patches)
                 return True
             
-            # Altrimenti sovrascrivi (logica base)
-            path.write_text(patch_content)
+            if len(file_patches) != 1:
+                print(f"La patch modifica {len(file_patches)} file: indica una cartella radice")
+                return False
+            
+            # Patch di un solo file: si applica a file_path qualunque sia il nome nella patch
+            file_patch = file_patches[0]
+            is_new, is_delete = file_patch.is_new, file_patch.is_delete
+            if not is_new and not os.path.exists(file_path):
+                print(f"File non trovato: {file_path}")
+                return False
+            file_patch.old_path = None if is_new else file_path
+            file_patch.new_path = None if is_delete else file_path
+            file_patch.rename = False
+            
+            with self.transaction('') as tx:
+                tx.apply_patch([file_patch])
             return True
         
         except Exception as e:
@@ -52,14 +106,14 @@ class Patcher:
             True se il file è stato creato con successo
         """
         try:
-            path = Path(file_path)
-            path.parent.mkdir(parents=True, exist_ok=True)
-            path.write_text(content)
+            with self.transaction('') as tx:
+                tx.write(file_path, content)
             return True
         except Exception as e:
             print(f"Errore nella creazione del file: {e}")
             return False
     
+    @trace.traced('patcher.modify_file')
     def modify_file(self, file_path: str, old_content: str, new_content: str) -> bool:
         """
         Modifica un file sostituendo old_content con new_content
@@ -78,14 +132,40 @@ class Patcher:
                 print(f"File non trovato: {file_path}")
                 return False
             
-            current_content = path.read_text()
+            with self.transaction('') as tx:
+                current_content = tx.read(file_path).decode('utf-8')
+                
+                if old_content not in current_content:
+                    print(f"Contenuto da sostituire non trovato nel file")
+                    return False
+                
+                tx.write(file_path, current_content.replace(old_content, new_content))
+            return True
+        
+        except Exception as e:
+            print(f"Errore nella modifica del file: {e}")
+            return False
+    
+    @trace.traced('patcher.edit_file')
+    def edit_file(self, file_path: str, edits: Iterable[Edit]) -> bool:
+        """
+        Applica più modifiche puntuali a un file con una sola lettura e scrittura
+        
+        Args:
+            file_path: percorso del file da modificare
+            edits: modifiche Edit(old, new, anchor=None, replace_all=False);
+                   un testo presente più volte va disambiguato con un'ancora
             
-            if old_content not in current_content:
-                print(f"Contenuto da sostituire non trovato nel file")
+        Returns:
+            True se tutte le modifiche sono state applicate (altrimenti nessuna)
+        """
+        try:
+            if not Path(file_path).exists():
+                print(f"File non trovato: {file_path}")
                 return False
             
-            new_file_content = current_content.replace(old_content, new_content)
-            path.write_text(new_file_content)
+            with self.transaction('') as tx:
+                tx.edit(file_path, edits)
             return True
         
         except Exception as e:
@@ -105,7 +185,8 @@ class Patcher:
         try:
             path = Path(file_path)
             if path.exists():
-                path.unlink()
+                with self.transaction('') as tx:
+                    tx.delete(file_path)
                 return True
             else:
                 print(f"File non trovato: {file_path}")
@@ -114,37 +195,22 @@ class Patcher:
             print(f"Errore nell'eliminazione del file: {e}")
             return False
     
-    def generate_diff(self, file_path: str, old_content: str, new_content: str) -> str:
+    @trace.traced('patcher.generate_diff')
+    def generate_diff(self, file_path: str, old_content: str, new_content: str,
+                      context: int = 3, algorithm: str = 'histogram') -> str:
         """
-        Genera un diff tra vecchio e nuovo contenuto
+        Genera un unified diff tra vecchio e nuovo contenuto
         
         Args:
             file_path: percorso del file
             old_content: contenuto originale
             new_content: nuovo contenuto
+            context: righe di contesto attorno a ogni modifica
+            algorithm: 'histogram' (default) oppure 'myers'
             
         Returns:
-            Stringa con il diff in formato leggibile
+            Diff applicabile con apply_patch (stringa vuota se non ci sono differenze)
         """
-        old_lines = old_content.splitlines()
-        new_lines = new_content.splitlines()
-        
-        diff = []
-        diff.append(f"--- {file_path} (originale)")
-        diff.append(f"+++ {file_path} (modificato)")
-        diff.append("@@ Differenze @@")
-        
-        # Diff semplificato linea per linea
-        max_lines = max(len(old_lines), len(new_lines))
-        
-        for i in range(max_lines):
-            old_line = old_lines[i] if i < len(old_lines) else ""
-            new_line = new_lines[i] if i < len(new_lines) else ""
-            
-            if old_line != new_line:
-                if old_line:
-                    diff.append(f"- {old_line}")
-                if new_line:
-                    diff.append(f"+ {new_line}")
-        
-        return "\n".join(diff)
+        lines = unified_diff(split_lines(old_content), split_lines(new_content),
+                             f"a/{file_path}", f"b/{file_path}", context, algorithm)
+        return "\n".join(lines) + "\n" if lines else ""
@@ -2,6 +2,9 @@
 Package providers per FYLIA
 """
 
+from .base import BaseProvider
+from .cache import CachedProvider
+from .context import ContextProvider
 from .mock import MockProvider
 
-__all__ = ['MockProvider']
+__all__ = ['BaseProvider', 'CachedProvider', 'ContextProvider', 'MockProvider']
@@ -0,0 +1,73 @@
+"""
+Interfaccia comune dei provider
+Un provider produce la risposta a pezzi (chunk), in modo sincrono o asincrono
+"""
+
+import asyncio
+from typing import AsyncIterator, Iterator, Tuple
+
+
+# Separa il contesto del progetto dalla richiesta dell'utente in un prompt
+CONTEXT_SEPARATOR = "\n\n--- Richiesta ---\n"
+
+
+def compose_prompt(context: str, user_input: str) -> str:
+    """Prompt con il contesto del progetto prima della richiesta (se c'è)"""
+    return f"{context}{CONTEXT_SEPARATOR}{user_input}" if context else user_input
+
+
+def split_prompt(prompt: str) -> Tuple[str, str]:
+    """Divide un prompt di compose_prompt in (contesto, richiesta)"""
+    context, separator, user_input = prompt.rpartition(CONTEXT_SEPARATOR)
+    return (context, user_input) if separator else ('', prompt)
+
+
+class BaseProvider:
+    """
+    Base dei provider di risposte
+
+    Le sottoclassi implementano stream_response(); generate_response() e
+    astream_response() sono ricavate da lì, ma possono essere ridefinite
+    (es. da un provider con un client HTTP asincrono).
+    """
+
+    def stream_response(self, user_input: str) -> Iterator[str]:
+        """
+        Genera la risposta un chunk alla volta
+
+        Args:
+            user_input: testo inserito dall'utente
+
+        Returns:
+            Iteratore sui chunk di testo della risposta
+        """
+        raise NotImplementedError
+
+    def settings(self) -> dict:
+        """
+        Impostazioni che influenzano il contenuto delle risposte
+
+        Entrano nella chiave della cache delle risposte: un provider con
+        modello o temperatura configurabili deve aggiungerli qui.
+        """
+        return {'provider': type(self).__name__}
+
+    def generate_response(self, user_input: str) -> str:
+        """Restituisce la risposta completa in una sola stringa"""
+        return "".join(self.stream_response(user_input))
+
+    async def astream_response(self, user_input: str) -> AsyncIterator[str]:
+        """
+        Versione asincrona di stream_response
+
+        Di default ogni chunk viene letto in un thread dell'executor, così
+        un provider sincrono non blocca il loop asyncio.
+        """
+        loop = asyncio.get_running_loop()
+        iterator = self.stream_response(user_input)
+        done = object()
+        while True:
+            chunk = await loop.run_in_executor(None, next, iterator, done)
+            if chunk is done:
+                return
+            yield chunk
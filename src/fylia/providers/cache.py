@@ -0,0 +1,279 @@
+"""
+Cache delle risposte davanti a un provider
+Le richieste ripetute (o quasi uguali) vengono servite dalla memoria o dal
+disco invece di interrogare di nuovo il modello.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Union
+
+from fylia import trace
+from fylia.cache import content_hash
+from .base import BaseProvider, compose_prompt, split_prompt
+
+
+# Versione del formato delle voci su disco (entra nella chiave)
+RESPONSE_CACHE_VERSION = 1
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Forma canonica di un prompt: richiesta con spazi compattati e senza maiuscole
+
+    Il contesto del progetto anteposto da ContextProvider resta com'è: nel
+    codice maiuscole e indentazione contano.
+    """
+    context, user_input = split_prompt(prompt)
+    return compose_prompt(context, _WHITESPACE.sub(' ', user_input).strip().casefold())
+
+
+class CachedProvider(BaseProvider):
+    """
+    Provider che memorizza le risposte di un altro provider
+
+    La chiave è l'hash di prompt normalizzato, impronta del contesto del
+    progetto e impostazioni del provider. Le risposte sono salvate come
+    lista di chunk, così lo streaming viene riprodotto com'era.
+
+    Livelli:
+    - memoria: LRU con al massimo `memory_items` risposte
+    - disco: un file JSON per risposta in cache_dir, scadenza dopo `ttl`
+      secondi e rimozione delle meno usate oltre `max_disk_bytes`
+    """
+
+    def __init__(self, provider: BaseProvider, cache_dir: Optional[Path] = None,
+                 memory_items: int = 64, max_disk_bytes: int = 50 * 1024 * 1024,
+                 ttl: float = 7 * 24 * 3600,
+                 context: Union[str, Callable[[], str]] = ''):
+        """
+        Args:
+            provider: provider da interrogare in caso di miss
+            cache_dir: cartella del livello su disco (None = solo memoria)
+            memory_items: risposte tenute in memoria
+            max_disk_bytes: dimensione massima del livello su disco
+            ttl: secondi dopo cui una risposta non è più valida
+            context: impronta del contesto del progetto, o funzione che la calcola
+        """
+        self.provider = provider
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.memory_items = memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self.context = context
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self.bytes_served = 0
+        self.bytes_written = 0
+        self.evictions = 0
+        # Chiave -> (istante di creazione, chunk)
+        self._memory: 'OrderedDict[str, tuple]' = OrderedDict()
+        # Chiave -> dimensione del file su disco (caricato alla prima scrittura)
+        self._disk_sizes: Optional[Dict[str, int]] = None
+        self._lock = threading.Lock()
+
+    def settings(self) -> dict:
+        return self.provider.settings()
+
+    def cache_key(self, user_input: str) -> str:
+        """Calcola la chiave di cache di un prompt"""
+        context = self.context() if callable(self.context) else self.context
+        data = json.dumps([RESPONSE_CACHE_VERSION, normalize_prompt(user_input), context,
+                           self.provider.settings()], sort_keys=True)
+        return content_hash(data.encode('utf-8'))
+
+    # Lettura
+
+    def lookup(self, user_input: str) -> Optional[List[str]]:
+        """Restituisce i chunk in cache per un prompt, o None (senza contare miss)"""
+        key = self.cache_key(user_input)
+        with self._lock:
+            return self._get(key)
+
+    def _get(self, key: str) -> Optional[List[str]]:
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            if now - entry[0] < self.ttl:
+                self._memory.move_to_end(key)
+                self.hits_memory += 1
+                return entry[1]
+            del self._memory[key]
+
+        entry = self._read_disk(key, now)
+        if entry is not None:
+            self.hits_disk += 1
+            self._remember(key, entry)
+            return entry[1]
+        return None
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _read_disk(self, key: str, now: float) -> Optional[tuple]:
+        if self.cache_dir is None:
+            return None
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            created, chunks = data['created'], data['chunks']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if now - created >= self.ttl:
+            self._remove_disk(key)
+            return None
+        try:
+            # mtime = ultimo uso, per scegliere cosa eliminare oltre il limite
+            os.utime(path)
+        except OSError:
+            pass
+        return created, chunks
+
+    # Scrittura
+
+    def _remember(self, key: str, entry: tuple) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _store(self, key: str, chunks: List[str]) -> None:
+        entry = (time.time(), chunks)
+        with self._lock:
+            self._remember(key, entry)
+            if self.cache_dir is not None:
+                self._write_disk(key, entry)
+
+    def _write_disk(self, key: str, entry: tuple) -> None:
+        data = json.dumps({'created': entry[0], 'chunks': entry[1]}, ensure_ascii=False).encode('utf-8')
+        path = self._entry_path(key)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            sizes = self._load_disk_sizes()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            # La cache su disco è un'ottimizzazione: si prosegue senza
+            return
+        sizes[key] = len(data)
+        self.bytes_written += len(data)
+        self._evict_disk(sizes)
+
+    def _load_disk_sizes(self) -> Dict[str, int]:
+        """Elenca le voci su disco con la loro dimensione (una sola volta)"""
+        if self._disk_sizes is None:
+            self._disk_sizes = {}
+            for path, st in self._scan_disk():
+                self._disk_sizes[path.stem] = st.st_size
+        return self._disk_sizes
+
+    def _scan_disk(self):
+        try:
+            subdirs = list(os.scandir(self.cache_dir))
+        except OSError:
+            return
+        for subdir in subdirs:
+            if not subdir.is_dir():
+                continue
+            for entry in os.scandir(subdir.path):
+                if entry.name.endswith('.json'):
+                    try:
+                        yield Path(entry.path), entry.stat()
+                    except OSError:
+                        continue
+
+    def _evict_disk(self, sizes: Dict[str, int]) -> None:
+        """Elimina le voci usate meno di recente finché si rientra nel limite"""
+        total = sum(sizes.values())
+        if total <= self.max_disk_bytes:
+            return
+        by_age = sorted(self._scan_disk(), key=lambda item: item[1].st_mtime)
+        for path, st in by_age:
+            if total <= self.max_disk_bytes:
+                break
+            total -= sizes.get(path.stem, st.st_size)
+            self._remove_disk(path.stem)
+            self.evictions += 1
+
+    def _remove_disk(self, key: str) -> None:
+        try:
+            os.unlink(self._entry_path(key))
+        except OSError:
+            pass
+        if self._disk_sizes is not None:
+            self._disk_sizes.pop(key, None)
+
+    def clear(self) -> None:
+        """Svuota entrambi i livelli della cache"""
+        with self._lock:
+            self._memory.clear()
+            if self.cache_dir is not None:
+                for path, _ in list(self._scan_disk()):
+                    self._remove_disk(path.stem)
+            self._disk_sizes = None
+
+    # Interfaccia del provider
+
+    def _hit(self, user_input: str):
+        key = self.cache_key(user_input)
+        with self._lock:
+            chunks = self._get(key)
+            if chunks is None:
+                self.misses += 1
+            else:
+                self.bytes_served += sum(len(chunk.encode('utf-8')) for chunk in chunks)
+        trace.count('provider.cache_misses' if chunks is None else 'provider.cache_hits')
+        return key, chunks
+
+    def stream_response(self, user_input: str) -> Iterator[str]:
+        key, chunks = self._hit(user_input)
+        if chunks is not None:
+            yield from chunks
+            return
+        # La risposta viene salvata solo se lo streaming arriva alla fine
+        received = []
+        for chunk in self.provider.stream_response(user_input):
+            received.append(chunk)
+            yield chunk
+        self._store(key, received)
+
+    async def astream_response(self, user_input: str) -> AsyncIterator[str]:
+        key, chunks = self._hit(user_input)
+        if chunks is not None:
+            for chunk in chunks:
+                yield chunk
+            return
+        received = []
+        async for chunk in self.provider.astream_response(user_input):
+            received.append(chunk)
+            yield chunk
+        self._store(key, received)
+
+    def stats(self) -> dict:
+        """Contatori di hit/miss e byte, per regolare dimensioni e scadenze"""
+        with self._lock:
+            disk_sizes = self._load_disk_sizes() if self.cache_dir is not None else {}
+            requests = self.hits_memory + self.hits_disk + self.misses
+            return {
+                'hits_memory': self.hits_memory,
+                'hits_disk': self.hits_disk,
+                'misses': self.misses,
+                'hit_rate': (self.hits_memory + self.hits_disk) / requests if requests else 0.0,
+                'memory_items': len(self._memory),
+                'disk_items': len(disk_sizes),
+                'disk_bytes': sum(disk_sizes.values()),
+                'bytes_served': self.bytes_served,
+                'bytes_written': self.bytes_written,
+                'evictions': self.evictions,
+            }
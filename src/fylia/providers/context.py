@@ -0,0 +1,47 @@
+"""
+Contesto del progetto davanti a un provider
+Ogni richiesta viene inviata insieme al codice del progetto più pertinente.
+"""
+
+import asyncio
+from typing import AsyncIterator, Callable, Iterator
+
+from fylia import trace
+from .base import BaseProvider, compose_prompt
+
+
+class ContextProvider(BaseProvider):
+    """
+    Provider che aggiunge il contesto del progetto alle richieste
+
+    `context` riceve la richiesta e restituisce il testo da anteporre
+    (stringa vuota = nessun contesto). Con una cache delle risposte dietro
+    questo provider, il contesto entra nella chiave insieme alla richiesta.
+    """
+
+    def __init__(self, provider: BaseProvider, context: Callable[[str], str]):
+        """
+        Args:
+            provider: provider che riceve il prompt completo
+            context: funzione richiesta -> contesto (es. ContextBuilder.build(...).text)
+        """
+        self.provider = provider
+        self.context = context
+
+    def settings(self) -> dict:
+        return self.provider.settings()
+
+    def prompt(self, user_input: str) -> str:
+        """Prompt completo inviato al provider per una richiesta"""
+        with trace.span('provider.context'):
+            return compose_prompt(self.context(user_input), user_input)
+
+    def stream_response(self, user_input: str) -> Iterator[str]:
+        yield from self.provider.stream_response(self.prompt(user_input))
+
+    async def astream_response(self, user_input: str) -> AsyncIterator[str]:
+        # L'assemblaggio legge file dal disco: fuori dal loop asyncio
+        loop = asyncio.get_running_loop()
+        prompt = await loop.run_in_executor(None, self.prompt, user_input)
+        async for chunk in self.provider.astream_response(prompt):
+            yield chunk
@@ -3,11 +3,35 @@ Provider finto per test senza API reali
 Simula risposte di un assistente AI
 """
 
+import asyncio
+import re
+import time
+from typing import AsyncIterator, Iterator, List
 
-class MockProvider:
+from fylia.context import estimate_tokens
+from .base import BaseProvider, split_prompt
+
+
+# Un "token" simulato: una parola con lo spazio che la precede
+_TOKEN = re.compile(r'\s*\S+|\s+')
+
+
+def split_tokens(text: str) -> List[str]:
+    """Divide un testo in token simulati (concatenati ridanno il testo)"""
+    return _TOKEN.findall(text)
+
+
+class MockProvider(BaseProvider):
     """Provider mock per simulare risposte AI durante lo sviluppo"""
     
-    def __init__(self):
+    def __init__(self, latency: float = 0.0, tokens_per_second: float = 0.0):
+        """
+        Args:
+            latency: secondi di attesa prima del primo token
+            tokens_per_second: velocità di generazione simulata (0 = immediata)
+        """
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
         self.responses = {
             'funzione': self._generate_function_response,
             'classe': self._generate_class_response,
@@ -25,6 +49,36 @@ class MockProvider:
         Returns:
             Risposta simulata
         """
+        if self.latency or self.tokens_per_second:
+            return super().generate_response(user_input)
+        return self._select_response(user_input)
+    
+    def stream_response(self, user_input: str) -> Iterator[str]:
+        """Restituisce la risposta token per token con latenza e velocità simulate"""
+        tokens = split_tokens(self._select_response(user_input))
+        if self.latency:
+            time.sleep(self.latency)
+        delay = 1.0 / self.tokens_per_second if self.tokens_per_second else 0.0
+        for i, token in enumerate(tokens):
+            if delay and i:
+                time.sleep(delay)
+            yield token
+    
+    async def astream_response(self, user_input: str) -> AsyncIterator[str]:
+        """Come stream_response, ma le attese non bloccano il loop asyncio"""
+        tokens = split_tokens(self._select_response(user_input))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        delay = 1.0 / self.tokens_per_second if self.tokens_per_second else 0.0
+        for i, token in enumerate(tokens):
+            if delay and i:
+                await asyncio.sleep(delay)
+            yield token
+    
+    def _select_response(self, user_input: str) -> str:
+        """Sceglie la risposta predefinita in base alle keyword"""
+        # Le keyword si cercano solo nella richiesta, non nel contesto del progetto
+        context, user_input = split_prompt(user_input)
         user_input_lower = user_input.lower()
         
         # Cerca keyword nell'input
@@ -33,7 +87,10 @@ class MockProvider:
                 return response_func(user_input)
         
         # Risposta di default
-        return self._generate_default_response(user_input)
+        response = self._generate_default_response(user_input)
+        if context:
+            response += f"\n\n(Contesto ricevuto: circa {estimate_tokens(context)} token del progetto.)"
+        return response
     
     def _generate_function_response(self, user_input: str) -> str:
         """Genera esempio di funzione Python"""
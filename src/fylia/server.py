@@ -0,0 +1,328 @@
+"""
+Daemon di FYLIA (fylia serve)
+Tiene in memoria modello del progetto, indice dei simboli, grafo delle
+dipendenze e contesti, li aggiorna con il watcher dei file e risponde alle
+richieste dei client su un socket Unix (protocollo in fylia.daemon).
+"""
+
+import gc
+import json
+import os
+import socketserver
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+from fylia import trace
+from fylia.context import ContextBuilder
+from fylia.daemon import PROTOCOL_VERSION, DaemonDeclined, DaemonError, connect, default_socket_path
+from fylia.deps import DependencyGraph
+from fylia.index import SymbolIndex
+from fylia.mapgen import CodeMapGenerator
+from fylia.mapstream import MAP_FORMATS, iter_json, iter_ndjson, iter_text, model_entries
+from fylia.symstore import save_index_store
+from fylia.watcher import create_watcher
+
+
+# Secondi senza richieste dopo cui il daemon si chiude da solo
+IDLE_TIMEOUT = 30 * 60
+
+# Memoria residente oltre cui il daemon svuota le cache e, se non basta, si chiude
+MEMORY_LIMIT = 256 * 1024 * 1024
+
+# Intervallo dei controlli di inattività e memoria
+CHECK_INTERVAL = 5.0
+
+
+def resident_memory() -> Optional[int]:
+    """Memoria residente del processo in byte (None se non misurabile)"""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ProjectService:
+    """
+    Stato caldo di un progetto e risposte alle richieste
+
+    Richieste e aggiornamenti dal watcher sono serializzati da un unico
+    lock: le risposte sono brevi e vedono sempre uno stato coerente. Le
+    mappe già formattate restano in memoria fino al cambiamento successivo.
+    """
+
+    def __init__(self, root, use_git: bool = True, jobs: int = 1):
+        self.root = os.path.realpath(root)
+        self.use_git = use_git
+        self.generator = CodeMapGenerator(jobs=jobs, use_git=use_git)
+        self.model = None
+        self.index: Optional[SymbolIndex] = None
+        self.graph: Optional[DependencyGraph] = None
+        self.context: Optional[ContextBuilder] = None
+        # Formato -> mappa formattata per lo stato attuale del modello
+        self._rendered: Dict[str, str] = {}
+        self.lock = threading.RLock()
+
+    def load(self) -> None:
+        """Costruisce modello, indice e grafo con una visita completa"""
+        with self.lock:
+            self.model = self.generator.build_model(Path(self.root))
+            self.index = SymbolIndex(self.root, self.generator.ignore_dirs, self.generator.ignore_files,
+                                     use_git=self.use_git).update()
+            save_index_store(self.index)
+            self.graph = DependencyGraph(self.root, self.generator.ignore_dirs, self.generator.ignore_files,
+                                         use_git=self.use_git).update()
+            self.context = ContextBuilder(self.index, self.graph)
+            self.context.refresh()
+            self._rendered = {}
+
+    def apply_changes(self, paths: Iterable[str]) -> None:
+        """Aggiorna solo le parti dello stato toccate dai cambiamenti"""
+        paths = set(paths)
+        with self.lock:
+            self.model.apply_changes(paths)
+            self.index.update_files(paths)
+            self.graph.update_files(paths)
+            self.context.refresh()
+            self._rendered = {}
+
+    def flush(self) -> None:
+        """Salva le cache tenute aperte fra un aggiornamento e l'altro"""
+        with self.lock:
+            if self.model is not None:
+                self.model.flush()
+
+    def trim(self) -> None:
+        """Libera le cache ricostruibili (mappe formattate e contesti)"""
+        with self.lock:
+            self._rendered = {}
+            self.context = ContextBuilder(self.index, self.graph)
+
+    # Richieste
+
+    def handle(self, request: dict):
+        """Esegue una richiesta e ne restituisce il risultato (serializzabile in JSON)"""
+        op = request.get('op')
+        handler = getattr(self, f"_op_{op}", None)
+        if handler is None:
+            raise DaemonError(f"Richiesta sconosciuta: {op}")
+        if 'use_git' in request and request['use_git'] != self.use_git:
+            raise DaemonDeclined("Il daemon usa opzioni diverse per l'elenco dei file")
+        with trace.span('serve.' + op), self.lock:
+            return handler(request)
+
+    def _op_map(self, request: dict) -> str:
+        output_format = request.get('format', 'text')
+        if output_format not in MAP_FORMATS:
+            raise DaemonError(f"Formato sconosciuto: {output_format}")
+        rendered = self._rendered.get(output_format)
+        if rendered is None:
+            entries = model_entries(self.model)
+            if output_format == 'json':
+                rendered = "".join(iter_json(self.generator, self.root, entries))
+            elif output_format == 'ndjson':
+                rendered = "".join(iter_ndjson(self.generator, self.root, entries))
+            else:
+                rendered = "".join(line + '\n' for line in iter_text(self.generator, self.root, entries))
+            self._rendered[output_format] = rendered
+        return rendered
+
+    def _op_def(self, request: dict) -> list:
+        return [list(loc) for loc in self.index.definitions(request['symbol'], request.get('kinds'))]
+
+    def _op_refs(self, request: dict) -> list:
+        return [list(loc) for loc in self.index.references(request['symbol'], request.get('kinds'))]
+
+    def _op_deps(self, request: dict) -> dict:
+        if request.get('cycles'):
+            return {'cycles': self.graph.cycles()}
+        target = request.get('target')
+        if target is None:
+            return {'stats': self.graph.stats(), 'cycles': len(self.graph.cycles())}
+        if self.graph.node_id(target) is None:
+            raise DaemonError(f"File o modulo non trovato nel progetto: {target}")
+        transitive = bool(request.get('transitive'))
+        if request.get('reverse'):
+            return {'found': self.graph.dependents(target, transitive=transitive)}
+        return {'found': self.graph.dependencies(target, transitive=transitive)}
+
+    def _op_context(self, request: dict) -> dict:
+        packed = self.context.build(request['request'], request.get('budget'))
+        return packed._asdict()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Una connessione: una risposta per ogni riga ricevuta"""
+
+    def handle(self) -> None:
+        server = self.server.fylia
+        for line in self.rfile:
+            self.wfile.write(server.respond(line))
+            self.wfile.flush()
+            if server.stopping.is_set():
+                break
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class FyliaServer:
+    """
+    Daemon di un progetto su un socket Unix
+
+    Si chiude da solo dopo `idle_timeout` secondi senza richieste e, se la
+    memoria residente supera `memory_limit` anche dopo aver svuotato le
+    cache, per non pesare su dispositivi con poca memoria. I client che non
+    trovano il daemon lavorano da soli, quindi chiudersi è sempre sicuro.
+    """
+
+    def __init__(self, root, socket_path: Optional[Path] = None, idle_timeout: float = IDLE_TIMEOUT,
+                 memory_limit: int = MEMORY_LIMIT, use_git: bool = True, jobs: int = 1,
+                 log: Optional[Callable[[str], None]] = None):
+        """
+        Args:
+            idle_timeout: secondi di inattività prima di chiudersi (0 = mai)
+            memory_limit: byte di memoria residente ammessi (0 = nessun limite)
+            log: funzione per i messaggi di stato (es. su stderr)
+        """
+        self.service = ProjectService(root, use_git=use_git, jobs=jobs)
+        self.socket_path = Path(socket_path) if socket_path is not None else default_socket_path(root)
+        self.idle_timeout = idle_timeout
+        self.memory_limit = memory_limit
+        self.log = log or (lambda message: None)
+        self.started = time.time()
+        self.last_request = time.monotonic()
+        self.requests = 0
+        self.stopping = threading.Event()
+        self._server: Optional[_UnixServer] = None
+        self._watcher = None
+        self._monitor: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """
+        Carica il progetto e apre il socket (le richieste partono con serve_forever)
+
+        Raises:
+            DaemonError: un altro daemon risponde già sullo stesso socket
+        """
+        client = connect(self.service.root, self.socket_path, timeout=1.0)
+        if client is not None:
+            client.close()
+            raise DaemonError(f"Un daemon è già in esecuzione su {self.socket_path}")
+        try:
+            self.socket_path.unlink()
+        except FileNotFoundError:
+            pass
+
+        start = time.perf_counter()
+        self.service.load()
+        self.log(f"Progetto caricato in {time.perf_counter() - start:.2f} s")
+
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        self._server = _UnixServer(str(self.socket_path), _RequestHandler)
+        self._server.fylia = self
+        os.chmod(self.socket_path, 0o600)
+        self._watcher = create_watcher(self.service.root, self.service.apply_changes,
+                                       ignore_dirs=self.service.generator.ignore_dirs,
+                                       ignore_files=self.service.generator.ignore_files,
+                                       is_ignored=self.service.model.is_ignored)
+        self._monitor = threading.Thread(target=self._watch_limits, name="fylia-serve-monitor", daemon=True)
+        self._monitor.start()
+        self.log(f"In ascolto su {self.socket_path}")
+
+    def serve_forever(self) -> None:
+        """Risponde alle richieste finché il daemon non viene fermato"""
+        try:
+            self._server.serve_forever(poll_interval=0.5)
+        finally:
+            self._close()
+
+    def shutdown(self, reason: str = '') -> None:
+        """Ferma il daemon (da qualunque thread tranne quello di serve_forever)"""
+        if self.stopping.is_set():
+            return
+        self.stopping.set()
+        if reason:
+            self.log(reason)
+        if self._server is not None:
+            self._server.shutdown()
+
+    def _close(self) -> None:
+        self.stopping.set()
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+        self.service.flush()
+        if self._server is not None:
+            self._server.server_close()
+        try:
+            self.socket_path.unlink()
+        except OSError:
+            pass
+
+    def respond(self, line: bytes) -> bytes:
+        """Risposta serializzata a una riga di richiesta"""
+        self.last_request = time.monotonic()
+        self.requests += 1
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict) or request.get('version') != PROTOCOL_VERSION:
+                raise DaemonDeclined(f"Versione del protocollo diversa (il daemon usa {PROTOCOL_VERSION})")
+            op = request.get('op')
+            if op == 'ping':
+                result = self.status()
+            elif op == 'shutdown':
+                threading.Thread(target=self.shutdown, args=("Fermato su richiesta",), daemon=True).start()
+                result = True
+            else:
+                result = self.service.handle(request)
+            response = {'ok': True, 'result': result}
+        except DaemonDeclined as e:
+            response = {'ok': False, 'error': str(e), 'fallback': True}
+        except DaemonError as e:
+            response = {'ok': False, 'error': str(e)}
+        except (ValueError, KeyError, TypeError) as e:
+            response = {'ok': False, 'error': f"Richiesta non valida: {e!r}"}
+        return json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n'
+
+    def status(self) -> dict:
+        """Stato del daemon per `fylia serve --status`"""
+        return {
+            'version': PROTOCOL_VERSION,
+            'pid': os.getpid(),
+            'root': self.service.root,
+            'uptime': time.time() - self.started,
+            'requests': self.requests,
+            'memory': resident_memory(),
+            'memory_limit': self.memory_limit,
+        }
+
+    def _watch_limits(self) -> None:
+        """Controlla periodicamente inattività e memoria (thread in background)"""
+        interval = CHECK_INTERVAL
+        if self.idle_timeout:
+            interval = min(interval, self.idle_timeout / 2)
+        while not self.stopping.wait(interval):
+            if self.idle_timeout and time.monotonic() - self.last_request > self.idle_timeout:
+                self.shutdown(f"Nessuna richiesta da {self.idle_timeout:g} secondi: chiusura")
+                return
+            if self.memory_limit and not self._check_memory():
+                return
+
+    def _check_memory(self) -> bool:
+        """Svuota le cache oltre il limite di memoria; False se il daemon è stato chiuso"""
+        memory = resident_memory()
+        if memory is None or memory <= self.memory_limit:
+            return True
+        self.service.trim()
+        gc.collect()
+        memory = resident_memory()
+        if memory is not None and memory > self.memory_limit:
+            self.shutdown(f"Memoria oltre il limite ({memory / 1048576:.0f} MiB "
+                          f"> {self.memory_limit / 1048576:.0f} MiB): chiusura")
+            return False
+        self.log("Cache svuotate per restare nel limite di memoria")
+        return True
@@ -0,0 +1,375 @@
+"""
+Tabella compatta delle definizioni del progetto
+I simboli sono colonne di interi (nome, tipo, genitore, file, righe) e i
+nomi stanno una sola volta in un pool di stringhe. La tabella si salva in
+un file binario che si apre con mmap: le colonne vengono lette dal file
+senza costruire un oggetto Python per simbolo.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fylia.cache import default_cache_dir
+from fylia.gitindex import enumerate_project
+from fylia.index import DEF_KINDS, Location, short_name
+from fylia.walker import DEFAULT_IGNORE_DIRS, DEFAULT_IGNORE_FILES
+
+
+# Versione del formato del file (un file di versione diversa viene ignorato)
+STORE_VERSION = 1
+STORE_MAGIC = b'FYLIASYM'
+
+# magic, versione, simboli, file, stringhe, byte del pool
+_HEADER = struct.Struct('<8sIIIII')
+# Genitore assente nella colonna dei genitori
+NO_PARENT = 0xFFFFFFFF
+
+# Sezioni del file nell'ordine in cui sono scritte: (nome, tipo, lunghezza)
+# con lunghezza in funzione di (simboli, file, stringhe, byte del pool)
+_SECTIONS = (
+    ('file_mtime', 'q', lambda n, f, s, p: f),
+    ('file_size', 'q', lambda n, f, s, p: f),
+    ('str_offsets', 'I', lambda n, f, s, p: s + 1),
+    ('name', 'I', lambda n, f, s, p: n),
+    ('parent', 'I', lambda n, f, s, p: n),
+    ('file', 'I', lambda n, f, s, p: n),
+    ('line', 'I', lambda n, f, s, p: n),
+    ('end_line', 'I', lambda n, f, s, p: n),
+    ('col', 'I', lambda n, f, s, p: n),
+    ('name_order', 'I', lambda n, f, s, p: n),
+    ('file_path', 'I', lambda n, f, s, p: f),
+    ('file_first', 'I', lambda n, f, s, p: f + 1),
+    ('kind', 'B', lambda n, f, s, p: n),
+    ('pool', 'B', lambda n, f, s, p: p),
+)
+
+_KIND_IDS = {kind: i for i, kind in enumerate(DEF_KINDS)}
+
+
+def _padding(offset: int) -> int:
+    return -offset % 8
+
+
+class SymbolTable:
+    """
+    Costruzione in memoria della tabella, file per file
+
+    Le colonne sono array di interi: un simbolo costa una ventina di byte
+    invece delle centinaia di una lista Python con le sue stringhe.
+    """
+
+    def __init__(self):
+        self._strings: Dict[str, int] = {}
+        self.pool = bytearray()
+        self.str_offsets = array('I', [0])
+        self.columns = {name: array(code) for name, code, _ in _SECTIONS
+                        if name not in ('str_offsets', 'pool', 'name_order')}
+        self.columns['file_first'].append(0)
+
+    def intern(self, text: str) -> int:
+        """Restituisce l'id di una stringa, aggiungendola al pool se nuova"""
+        string_id = self._strings.get(text)
+        if string_id is None:
+            string_id = len(self.str_offsets) - 1
+            self._strings[text] = string_id
+            self.pool += text.encode('utf-8', 'surrogatepass')
+            self.str_offsets.append(len(self.pool))
+        return string_id
+
+    def __len__(self) -> int:
+        return len(self.columns['name'])
+
+    def add_file(self, rel_path: str, mtime_ns: int, size: int, record: Optional[dict]) -> None:
+        """
+        Aggiunge le definizioni di un file (record di extract_references)
+
+        mtime e dimensione servono a capire se la tabella salvata è ancora
+        valida; un record None (file non analizzabile) aggiunge solo il file.
+        """
+        columns = self.columns
+        file_id = len(columns['file_path'])
+        columns['file_path'].append(self.intern(rel_path))
+        columns['file_mtime'].append(mtime_ns)
+        columns['file_size'].append(size)
+
+        if record is not None:
+            # Nome qualificato -> id, per collegare metodi e attributi al genitore
+            scope: Dict[str, int] = {}
+            ends = record.get('ends') or ()
+            for i, (qualname, kind, line, col) in enumerate(record['defs']):
+                parent_name, _, name = qualname.rpartition('.')
+                symbol_id = len(columns['name'])
+                scope[qualname] = symbol_id
+                columns['name'].append(self.intern(name))
+                columns['parent'].append(scope.get(parent_name, NO_PARENT) if parent_name else NO_PARENT)
+                columns['file'].append(file_id)
+                columns['line'].append(line)
+                columns['end_line'].append(ends[i] if i < len(ends) else line)
+                columns['col'].append(col)
+                columns['kind'].append(_KIND_IDS[kind])
+        columns['file_first'].append(len(columns['name']))
+
+    def _name_order(self) -> array:
+        """Id dei simboli ordinati per nome (byte UTF-8), per la ricerca binaria"""
+        pool, offsets = bytes(self.pool), self.str_offsets
+        names = self.columns['name']
+        keys = [pool[offsets[s]:offsets[s + 1]] for s in range(len(offsets) - 1)]
+        return array('I', sorted(range(len(names)), key=lambda i: (keys[names[i]], i)))
+
+    def write(self, path: Path) -> bool:
+        """
+        Scrive la tabella in modo atomico
+
+        Returns:
+            True se il file è stato scritto
+        """
+        path = Path(path)
+        sections = dict(self.columns, str_offsets=self.str_offsets, pool=self.pool,
+                        name_order=self._name_order())
+        header = _HEADER.pack(STORE_MAGIC, STORE_VERSION, len(self), len(self.columns['file_path']),
+                              len(self.str_offsets) - 1, len(self.pool))
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(header)
+                offset = len(header)
+                for name, code, _ in _SECTIONS:
+                    f.write(b'\0' * _padding(offset))
+                    offset += _padding(offset)
+                    data = sections[name]
+                    if isinstance(data, array) and sys.byteorder == 'big' and data.itemsize > 1:
+                        data = array(code, data)
+                        data.byteswap()
+                    data = bytes(data) if not isinstance(data, array) else data.tobytes()
+                    f.write(data)
+                    offset += len(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            return False
+        return True
+
+
+class SymbolStore:
+    """
+    Tabella dei simboli aperta da file con mmap, in sola lettura
+
+    Le colonne sono memoryview sul file: aprirla costa un mmap e la memoria
+    occupata è quella delle pagine effettivamente lette.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._open()
+        except (ValueError, struct.error):
+            self.close()
+            raise
+
+    def _open(self) -> None:
+        # Le colonne restano valide anche dopo il rilascio della vista intera
+        with memoryview(self._mmap) as buffer:
+            self._read_sections(buffer)
+
+    def _read_sections(self, buffer: memoryview) -> None:
+        magic, version, n_symbols, n_files, n_strings, pool_size = _HEADER.unpack_from(buffer)
+        if magic != STORE_MAGIC or version != STORE_VERSION:
+            raise ValueError(f"{self.path}: formato della tabella dei simboli non riconosciuto")
+        self.symbol_count = n_symbols
+        self.file_count = n_files
+        self._views = []
+        offset = _HEADER.size
+        for name, code, length in _SECTIONS:
+            offset += _padding(offset)
+            count = length(n_symbols, n_files, n_strings, pool_size)
+            size = count * array(code).itemsize
+            if offset + size > len(buffer):
+                raise ValueError(f"{self.path}: tabella dei simboli troncata")
+            view = buffer[offset:offset + size]
+            if code != 'B':
+                if sys.byteorder == 'big':
+                    # Host big-endian: si paga una copia per avere l'ordine giusto
+                    column = array(code, view.tobytes())
+                    column.byteswap()
+                    view = memoryview(column)
+                else:
+                    view = view.cast(code)
+            self._views.append(view)
+            setattr(self, '_' + name, view)
+            offset += size
+
+    def close(self) -> None:
+        """Rilascia le colonne e chiude il mmap"""
+        for view in getattr(self, '_views', ()):
+            view.release()
+        self._views = []
+        self._mmap.close()
+
+    def __enter__(self) -> 'SymbolStore':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.symbol_count
+
+    # Accesso alle colonne
+
+    def string(self, string_id: int) -> str:
+        offsets = self._str_offsets
+        return bytes(self._pool[offsets[string_id]:offsets[string_id + 1]]).decode('utf-8', 'surrogatepass')
+
+    def name(self, symbol_id: int) -> str:
+        return self.string(self._name[symbol_id])
+
+    def kind(self, symbol_id: int) -> str:
+        return DEF_KINDS[self._kind[symbol_id]]
+
+    def parent(self, symbol_id: int) -> Optional[int]:
+        parent = self._parent[symbol_id]
+        return None if parent == NO_PARENT else parent
+
+    def file_path(self, file_id: int) -> str:
+        return self.string(self._file_path[file_id])
+
+    def lines(self, symbol_id: int) -> Tuple[int, int]:
+        """Prima e ultima riga della definizione"""
+        return self._line[symbol_id], self._end_line[symbol_id]
+
+    def qualname(self, symbol_id: int) -> str:
+        """Nome qualificato ricostruito risalendo i genitori (es. Classe.metodo)"""
+        parts = [self.name(symbol_id)]
+        parent = self.parent(symbol_id)
+        while parent is not None:
+            parts.append(self.name(parent))
+            parent = self.parent(parent)
+        return '.'.join(reversed(parts))
+
+    def location(self, symbol_id: int) -> Location:
+        return Location(self.file_path(self._file[symbol_id]), self._line[symbol_id],
+                        self._col[symbol_id], self.kind(symbol_id), self.qualname(symbol_id))
+
+    def files(self) -> Dict[str, Tuple[int, int]]:
+        """Percorso -> (mtime_ns, dimensione) dei file al momento della scrittura"""
+        return {self.file_path(i): (self._file_mtime[i], self._file_size[i]) for i in range(self.file_count)}
+
+    def symbols_in(self, rel_path: str) -> range:
+        """Id dei simboli definiti in un file (contigui, in ordine di sorgente)"""
+        for file_id in range(self.file_count):
+            if self.file_path(file_id) == rel_path:
+                return range(self._file_first[file_id], self._file_first[file_id + 1])
+        return range(0)
+
+    # Ricerca
+
+    def _name_bytes(self, symbol_id: int) -> bytes:
+        offsets = self._str_offsets
+        string_id = self._name[symbol_id]
+        return self._pool[offsets[string_id]:offsets[string_id + 1]].tobytes()
+
+    def find(self, name: str) -> List[int]:
+        """Id dei simboli con questo nome semplice (ricerca binaria sull'ordine dei nomi)"""
+        key = name.encode('utf-8', 'surrogatepass')
+        order = self._name_order
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._name_bytes(order[mid]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        found = []
+        while lo < len(order) and self._name_bytes(order[lo]) == key:
+            found.append(order[lo])
+            lo += 1
+        return found
+
+    def definitions(self, symbol: str, kinds: Optional[Iterable[str]] = None) -> List[Location]:
+        """Come SymbolIndex.definitions, leggendo solo le pagine necessarie"""
+        kinds = set(kinds) if kinds else None
+        dotted = '.' in symbol
+        results = []
+        for symbol_id in self.find(short_name(symbol)):
+            if kinds is not None and self.kind(symbol_id) not in kinds:
+                continue
+            location = self.location(symbol_id)
+            if dotted and location.name != symbol and not location.name.endswith('.' + symbol):
+                continue
+            results.append(location)
+        results.sort()
+        return results
+
+
+def default_store_path(root: Path) -> Path:
+    """Percorso della tabella dei simboli di un progetto"""
+    return default_cache_dir(Path(root)) / "symbols.fysym"
+
+
+def save_index_store(index) -> bool:
+    """
+    Scrive la tabella compatta delle definizioni di un SymbolIndex aggiornato
+
+    Returns:
+        True se il file è stato scritto (serve la cache dell'indice attiva)
+    """
+    stats = index.file_stats()
+    if not stats:
+        return False
+    table = SymbolTable()
+    with index.lock:
+        for rel_path in sorted(stats):
+            mtime_ns, size = stats[rel_path]
+            table.add_file(rel_path, mtime_ns, size, index.files.get(rel_path))
+    return table.write(default_store_path(index.root))
+
+
+def open_fresh_store(root, ignore_dirs: Iterable[str] = DEFAULT_IGNORE_DIRS,
+                     ignore_files: Iterable[str] = DEFAULT_IGNORE_FILES,
+                     use_git: bool = True) -> Optional[SymbolStore]:
+    """
+    Apre la tabella salvata se corrisponde ancora ai file Python del progetto
+
+    Il controllo costa una visita con stat dei file (la stessa enumerazione
+    di SymbolIndex.update), senza leggerne il contenuto né deserializzare la
+    cache dell'indice.
+
+    Returns:
+        La tabella aperta, oppure None se manca, è illeggibile o è superata
+    """
+    try:
+        store = SymbolStore(default_store_path(root))
+    except (OSError, ValueError):
+        return None
+    expected = store.files()
+    seen = 0
+    entries, _ = enumerate_project(Path(root), ignore_dirs, ignore_files, default_cache_dir(root), use_git)
+    for entry in entries:
+        if entry.is_dir or not entry.name.endswith('.py'):
+            continue
+        known = expected.get(entry.rel_path)
+        if known is None:
+            break
+        try:
+            st = entry.stat()
+        except OSError:
+            break
+        if known != (st.st_mtime_ns, st.st_size):
+            break
+        seen += 1
+    else:
+        if seen == len(expected):
+            return store
+    store.close()
+    return None
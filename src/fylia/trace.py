@@ -0,0 +1,264 @@
+"""
+Tracciamento dei tempi di FYLIA
+Intervalli con nome (span) e contatori registrati dai moduli principali,
+esportabili nel formato Chrome trace (chrome://tracing, Perfetto) e
+riassunti per l'overlay della TUI.
+
+Disattivato, ogni span costa una chiamata di funzione: i moduli lo usano
+liberamente nelle fasi principali (non per singola riga o singolo token).
+Si attiva con `fylia --profile FILE` o con la variabile d'ambiente
+FYLIA_PROFILE=FILE, che scrivono la traccia all'uscita.
+"""
+
+import functools
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+
+# Variabile d'ambiente con il file in cui scrivere la traccia all'uscita
+ENV_VAR = 'FYLIA_PROFILE'
+
+# Eventi conservati al massimo (i più vecchi vengono scartati)
+MAX_EVENTS = 200_000
+
+now = time.perf_counter_ns
+
+
+class _NullSpan:
+    """Span del tracciamento disattivato: non misura niente"""
+    __slots__ = ()
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+    def set(self, **args) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer: 'Tracer', name: str, args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def __enter__(self) -> '_Span':
+        self.start = now()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.tracer.add(self.name, self.start, now(), self.args)
+        return False
+
+    def set(self, **args) -> None:
+        """Aggiunge argomenti noti solo alla fine (es. numero di file)"""
+        self.args.update(args)
+
+
+class Tracer:
+    """
+    Raccolta degli span e dei contatori di un processo
+
+    Thread-safe: gli span arrivano dai worker della TUI, dal watcher e dal
+    thread principale. Per nome si tengono anche le statistiche cumulative,
+    che restano esatte anche quando gli eventi più vecchi vengono scartati.
+    """
+
+    def __init__(self, max_events: int = MAX_EVENTS):
+        self.origin = now()
+        # (nome, inizio ns, fine ns, id del thread, argomenti)
+        self.events = deque(maxlen=max_events)
+        # (nome, istante ns, valore) a ogni variazione di un contatore
+        self.counter_events = deque(maxlen=max_events)
+        # Nome -> [chiamate, ns totali, ns massimi, ns dell'ultima]
+        self.stats: Dict[str, list] = {}
+        self.counters: Dict[str, int] = {}
+        self.thread_names: Dict[int, str] = {}
+        self.lock = threading.Lock()
+
+    def add(self, name: str, start: int, end: int, args: Optional[dict] = None) -> None:
+        """Registra uno span già concluso (istanti di perf_counter_ns)"""
+        tid = threading.get_ident()
+        duration = end - start
+        with self.lock:
+            self.events.append((name, start, end, tid, args or None))
+            if tid not in self.thread_names:
+                self.thread_names[tid] = threading.current_thread().name
+            stat = self.stats.get(name)
+            if stat is None:
+                self.stats[name] = [1, duration, duration, duration]
+            else:
+                stat[0] += 1
+                stat[1] += duration
+                stat[3] = duration
+                if duration > stat[2]:
+                    stat[2] = duration
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self.lock:
+            value = self.counters.get(name, 0) + n
+            self.counters[name] = value
+            self.counter_events.append((name, now(), value))
+
+    def summary(self) -> List[tuple]:
+        """(nome, chiamate, ms totali, ms medi, ms massimi, ms dell'ultima) per tempo totale decrescente"""
+        with self.lock:
+            rows = [(name, calls, total / 1e6, total / calls / 1e6, peak / 1e6, last / 1e6)
+                    for name, (calls, total, peak, last) in self.stats.items()]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows
+
+    def chrome_trace(self) -> dict:
+        """La traccia nel formato JSON di Chrome (eventi completi "X" e contatori "C")"""
+        pid = os.getpid()
+        with self.lock:
+            events = list(self.events)
+            counter_events = list(self.counter_events)
+            thread_names = dict(self.thread_names)
+        trace = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                 for tid, name in thread_names.items()]
+        for name, start, end, tid, args in events:
+            event = {'name': name, 'cat': name.partition('.')[0], 'ph': 'X', 'pid': pid, 'tid': tid,
+                     'ts': (start - self.origin) / 1000, 'dur': (end - start) / 1000}
+            if args:
+                event['args'] = args
+            trace.append(event)
+        for name, at, value in counter_events:
+            trace.append({'name': name, 'ph': 'C', 'pid': pid, 'ts': (at - self.origin) / 1000,
+                          'args': {name.rpartition('.')[2]: value}})
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+
+    def write(self, path) -> None:
+        """Scrive la traccia in formato Chrome in `path`"""
+        import json
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f, default=str)
+
+
+# Tracciatore attivo (None = tracciamento disattivato)
+_tracer: Optional[Tracer] = None
+
+
+def span(name: str, **args):
+    """
+    Misura un blocco `with`
+
+    Esempio:
+        with trace.span('map.parse', files=len(tasks)):
+            ...
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return _Span(tracer, name, args)
+
+
+def add(name: str, start: int, **args) -> None:
+    """Registra uno span iniziato a `start` (trace.now()) e concluso adesso"""
+    tracer = _tracer
+    if tracer is not None:
+        tracer.add(name, start, now(), args)
+
+
+def count(name: str, n: int = 1) -> None:
+    """Incrementa un contatore"""
+    tracer = _tracer
+    if tracer is not None:
+        tracer.count(name, n)
+
+
+def traced(name: str) -> Callable:
+    """Decoratore: misura ogni chiamata della funzione come span `name`"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return func(*args, **kwargs)
+            start = now()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                tracer.add(name, start, now())
+        return wrapper
+    return decorate
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+def enable(path=None) -> Tracer:
+    """
+    Attiva il tracciamento (se non è già attivo)
+
+    Args:
+        path: file in cui scrivere la traccia all'uscita del processo
+    """
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    if path is not None:
+        import atexit
+        atexit.register(_write_at_exit, _tracer, os.fspath(path), os.getpid())
+    return _tracer
+
+
+def disable() -> Optional[Tracer]:
+    """Disattiva il tracciamento e restituisce il tracciatore con quanto raccolto"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def _write_at_exit(tracer: Tracer, path: str, pid: int) -> None:
+    # I processi figli (es. il pool dell'analisi) non sovrascrivono la traccia
+    if os.getpid() != pid:
+        return
+    try:
+        tracer.write(path)
+    except OSError as e:
+        print(f"Impossibile scrivere la traccia in {path}: {e}")
+
+
+def format_summary(rows: List[tuple], limit: int = 15) -> str:
+    """Tabella testuale dei tempi per nome (overlay della TUI, fine di un comando)"""
+    lines = [f"{'span':<24}{'n':>6}{'totale':>10}{'medio':>9}{'ultimo':>9}{'max':>9}"]
+    for name, calls, total, mean, peak, last in rows[:limit]:
+        lines.append(f"{name[:24]:<24}{calls:>6}{total:>8.1f}ms{mean:>7.1f}ms{last:>7.1f}ms{peak:>7.1f}ms")
+    return "\n".join(lines)
+
+
+def start_cprofile(path) -> Callable[[], None]:
+    """
+    Avvia cProfile sul thread corrente; la funzione restituita lo ferma e
+    salva le statistiche in `path` (da leggere con `python -m pstats`)
+    """
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+    def stop() -> None:
+        profiler.disable()
+        profiler.dump_stats(os.fspath(path))
+
+    return stop
+
+
+if os.environ.get(ENV_VAR):
+    enable(os.environ[ENV_VAR])
@@ -0,0 +1,396 @@
+"""
+Transazioni su più file
+Le modifiche di un changeset vengono preparate in file temporanei e rese
+effettive tutte insieme con rename atomiche; se un passo fallisce il
+progetto torna com'era prima della transazione.
+"""
+
+import itertools
+import os
+import shutil
+from contextlib import ExitStack
+from typing import Dict, Iterable, List, Optional, Union
+
+from fylia.edits import Edit, EditError, apply_edits
+from fylia.unidiff import FilePatch, PatchError, apply_hunks, parse_patch
+
+
+class TransactionError(Exception):
+    """Errore nella preparazione o nell'applicazione di una transazione"""
+
+
+# Contatore per dare nomi unici ai temporanei e ai backup dello stesso file
+_counter = itertools.count()
+
+
+def _side_path(path: str, suffix: str) -> str:
+    """Percorso nascosto accanto a path (stessa cartella, quindi stessa rename atomica)"""
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.{os.getpid()}.{next(_counter)}.{suffix}")
+
+
+def fsync_dir(directory: str) -> None:
+    """Rende persistenti le voci di una cartella (ignorato dove non supportato)"""
+    try:
+        fd = os.open(directory or '.', os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class Transaction:
+    """
+    Insieme di modifiche ai file applicate in blocco
+
+    Uso:
+        with patcher.transaction(root) as tx:
+            tx.write("a.py", "...")
+            tx.modify("b.py", "vecchio", "nuovo")
+            tx.edit("d.py", [Edit("x = 1", "x = 2"), Edit("pass", "return x", anchor="def f")])
+            tx.delete("c.py")
+        # all'uscita senza eccezioni esegue commit(), altrimenti rollback()
+
+    Le operazioni successive sullo stesso file vedono il contenuto già
+    preparato dalle precedenti. Con una radice ogni percorso (anche quelli
+    di una patch) deve restare al suo interno, link simbolici compresi;
+    con root='' i percorsi sono usati così come sono, già scelti dal
+    chiamante (es. Patcher.modify_file, il registro delle modifiche). Con durable=True ogni temporaneo viene
+    sincronizzato su disco prima della rename e ogni cartella toccata una
+    sola volta dopo tutte le rename.
+    """
+
+    def __init__(self, root: str = '.', durable: bool = True, fuzz: int = 2, max_offset: int = 1000,
+                 journal=None, label: str = ''):
+        self.root = root
+        # Radice reale per il controllo dei percorsi (None = nessun controllo)
+        self._real_root = os.path.realpath(root) if root else None
+        self.durable = durable
+        self.fuzz = fuzz
+        self.max_offset = max_offset
+        # Registro (UndoJournal) in cui salvare il changeset per poterlo annullare
+        self.journal = journal
+        self.label = label
+        # Destinazione -> temporaneo con il nuovo contenuto, None per eliminarla
+        self._staged: Dict[str, Optional[str]] = {}
+        self._temps: List[str] = []
+        self._created_dirs: List[str] = []
+        self._done = False
+
+    def __enter__(self) -> 'Transaction':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+    # Preparazione
+
+    def _target(self, path: str) -> str:
+        target = os.path.normpath(os.path.join(self.root, path))
+        if self._real_root is not None:
+            # "../x", percorsi assoluti o link verso l'esterno (es. in una patch generata)
+            real = os.path.realpath(target)
+            if real != self._real_root and not real.startswith(os.path.join(self._real_root, '')):
+                raise TransactionError(f"Percorso fuori dal progetto: {path}")
+        # Si scrive sul file puntato, non si sostituisce il link simbolico
+        if os.path.islink(target):
+            target = os.path.realpath(target)
+        return target
+
+    def _check_open(self) -> None:
+        if self._done:
+            raise TransactionError("Transazione già conclusa")
+
+    def exists(self, path: str) -> bool:
+        """Indica se il file esiste tenendo conto delle modifiche preparate"""
+        target = self._target(path)
+        if target in self._staged:
+            return self._staged[target] is not None
+        return os.path.isfile(target)
+
+    def read(self, path: str) -> bytes:
+        """Legge il contenuto di un file tenendo conto delle modifiche preparate"""
+        target = self._target(path)
+        source = self._staged.get(target, target)
+        if source is None or not os.path.isfile(source):
+            raise TransactionError(f"File non trovato: {path}")
+        with open(source, 'rb') as f:
+            return f.read()
+
+    def _ensure_dir(self, directory: str) -> None:
+        """Crea le cartelle mancanti ricordandole per il rollback"""
+        missing = []
+        while directory and not os.path.isdir(directory):
+            missing.append(directory)
+            directory = os.path.dirname(directory)
+        for path in reversed(missing):
+            os.mkdir(path)
+            self._created_dirs.append(path)
+
+    def _new_temp(self, target: str) -> str:
+        self._ensure_dir(os.path.dirname(target))
+        tmp = _side_path(target, 'fylia-tmp')
+        self._temps.append(tmp)
+        return tmp
+
+    def _finish_temp(self, tmp: str, target: str, fd: int) -> None:
+        """Sincronizza il temporaneo e gli dà i permessi del file originale"""
+        if self.durable:
+            os.fsync(fd)
+        source = self._staged.get(target, target)
+        if source is not None and os.path.isfile(source):
+            os.chmod(tmp, os.stat(source).st_mode & 0o7777)
+
+    def write(self, path: str, content: Union[str, bytes]) -> None:
+        """Prepara la scrittura completa di un file (creato se non esiste)"""
+        self._check_open()
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        target = self._target(path)
+        tmp = self._new_temp(target)
+        try:
+            # 0o666 come open(): i permessi finali dipendono dalla umask
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+                f.flush()
+                self._finish_temp(tmp, target, f.fileno())
+        except OSError as e:
+            raise TransactionError(f"Impossibile preparare {path}: {e}") from e
+        self._stage(target, tmp)
+
+    def create(self, path: str, content: Union[str, bytes]) -> None:
+        """Prepara la creazione di un file che non deve esistere"""
+        if self.exists(path):
+            raise TransactionError(f"Il file esiste già: {path}")
+        self.write(path, content)
+
+    def modify(self, path: str, old_content: str, new_content: str) -> None:
+        """Prepara la sostituzione di tutte le occorrenze di old_content"""
+        current = self.read(path).decode('utf-8')
+        if old_content not in current:
+            raise TransactionError(f"Contenuto da sostituire non trovato in {path}")
+        self.write(path, current.replace(old_content, new_content))
+
+    def edit(self, path: str, edits: Iterable[Edit]) -> None:
+        """
+        Prepara un insieme di modifiche puntuali allo stesso file
+
+        Le modifiche vengono localizzate tutte sul contenuto attuale e il file
+        viene letto e riscritto una sola volta; se una è ambigua, assente o
+        si sovrappone a un'altra non viene applicata nessuna.
+        """
+        current = self.read(path).decode('utf-8')
+        try:
+            updated = apply_edits(current, edits)
+        except EditError as e:
+            raise TransactionError(f"{path}: {e}") from e
+        self.write(path, updated)
+
+    def delete(self, path: str) -> None:
+        """Prepara l'eliminazione di un file"""
+        self._check_open()
+        if not self.exists(path):
+            raise TransactionError(f"File non trovato: {path}")
+        self._stage(self._target(path), None)
+
+    def apply_patch(self, patch: Union[str, bytes, List[FilePatch]]) -> List[str]:
+        """
+        Prepara una patch unified diff (anche multi-file) relativa alla radice
+
+        Returns:
+            I percorsi dei file toccati dalla patch
+        """
+        self._check_open()
+        try:
+            file_patches = parse_patch(patch) if not isinstance(patch, list) else patch
+        except PatchError as e:
+            raise TransactionError(str(e)) from e
+
+        for fp in file_patches:
+            old, new = fp.old_path, fp.new_path
+            if old is not None and new is not None and old != new and not fp.rename:
+                # diff -u tra due nomi diversi: si patcha quello esistente
+                old = new = old if self.exists(old) else new
+            if old is not None and not self.exists(old):
+                raise TransactionError(f"File non trovato: {old}")
+            if fp.is_new and self.exists(new):
+                raise TransactionError(f"Il file esiste già: {new}")
+
+            try:
+                if fp.is_delete:
+                    # Verifica che il contenuto corrisponda prima di eliminare
+                    self._patch_into(old, None, fp)
+                    self.delete(old)
+                    continue
+                self._patch_into(old, new, fp)
+            except (PatchError, OSError) as e:
+                raise TransactionError(f"{fp.path}: {e}") from e
+            if fp.rename and old != new:
+                self.delete(old)
+
+        return [fp.path for fp in file_patches]
+
+    def _patch_into(self, old: Optional[str], new: Optional[str], fp: FilePatch) -> None:
+        source = None
+        if old is not None:
+            source = self._staged.get(self._target(old), self._target(old))
+
+        if new is None:
+            with open(source, 'rb') as src, open(os.devnull, 'wb') as sink:
+                apply_hunks(src, sink, fp.hunks, self.fuzz, self.max_offset)
+            return
+
+        target = self._target(new)
+        tmp = self._new_temp(target)
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        with os.fdopen(fd, 'wb') as out:
+            if source is None:
+                apply_hunks(None, out, fp.hunks, self.fuzz, self.max_offset)
+            else:
+                with open(source, 'rb') as src:
+                    apply_hunks(src, out, fp.hunks, self.fuzz, self.max_offset)
+            out.flush()
+            if self.durable:
+                os.fsync(out.fileno())
+        if source is not None:
+            os.chmod(tmp, os.stat(source).st_mode & 0o7777)
+        self._stage(target, tmp)
+
+    def _stage(self, target: str, tmp: Optional[str]) -> None:
+        """Registra il nuovo stato di una destinazione, scartando il temporaneo precedente"""
+        previous = self._staged.get(target)
+        self._staged[target] = tmp
+        if previous is not None:
+            _remove_quietly(previous)
+            self._temps.remove(previous)
+
+    # Applicazione
+
+    def commit(self) -> List[str]:
+        """
+        Rende effettive tutte le modifiche preparate
+
+        Ogni file esistente viene prima salvato in un backup (hard link, senza
+        copiare i dati): se una rename fallisce i file già sostituiti vengono
+        ripristinati e la transazione viene annullata. Con un registro delle
+        modifiche il changeset viene registrato per poterlo annullare.
+
+        Returns:
+            I percorsi dei file scritti o eliminati
+
+        Raises:
+            TransactionError: se l'applicazione fallisce (dopo il rollback)
+        """
+        self._check_open()
+        with ExitStack() as stack:
+            if self.journal is not None:
+                try:
+                    stack.enter_context(self.journal.recording())
+                except OSError:
+                    # Registro non scrivibile: le modifiche si applicano comunque
+                    pass
+            return self._commit()
+
+    def _commit(self) -> List[str]:
+        snapshot = self._snapshot()
+        applied = []      # (destinazione, backup o None)
+        try:
+            for target, tmp in self._staged.items():
+                if tmp is None and not os.path.lexists(target):
+                    # Creato ed eliminato nella stessa transazione
+                    continue
+                backup = self._backup(target) if os.path.lexists(target) else None
+                applied.append((target, backup))
+                if tmp is None:
+                    os.unlink(target)
+                else:
+                    os.replace(tmp, target)
+            self._sync_dirs(target for target, _ in applied)
+        except OSError as e:
+            self._undo(applied)
+            self.rollback()
+            raise TransactionError(f"Transazione annullata: {e}") from e
+
+        self._done = True
+        for _, backup in applied:
+            if backup is not None:
+                _remove_quietly(backup)
+        if snapshot is not None:
+            try:
+                self.journal.record(snapshot, self.label)
+            except OSError:
+                # Le modifiche sono applicate: solo l'annullamento non sarà possibile
+                pass
+        return list(self._staged)
+
+    def _snapshot(self) -> Optional[list]:
+        """Salva nel registro i contenuti prima e dopo di ogni file (se c'è un registro)"""
+        if self.journal is None:
+            return None
+        try:
+            return [self.journal.snapshot(target, tmp) for target, tmp in self._staged.items()
+                    if tmp is not None or os.path.lexists(target)]
+        except OSError:
+            return None
+
+    def _backup(self, target: str) -> str:
+        backup = _side_path(target, 'fylia-bak')
+        try:
+            os.link(target, backup)
+        except OSError:
+            # File system senza hard link (es. memoria condivisa Android)
+            shutil.copy2(target, backup)
+        return backup
+
+    def _undo(self, applied: list) -> None:
+        """Ripristina i file già sostituiti, in ordine inverso"""
+        for target, backup in reversed(applied):
+            try:
+                if backup is not None:
+                    os.replace(backup, target)
+                    # Se target è ancora lo stesso inode la rename non fa nulla
+                    _remove_quietly(backup)
+                else:
+                    os.unlink(target)
+            except OSError:
+                pass
+        self._sync_dirs(target for target, _ in applied)
+
+    def rollback(self) -> None:
+        """Scarta le modifiche preparate e rimuove temporanei e cartelle create"""
+        for tmp in self._temps:
+            _remove_quietly(tmp)
+        for directory in reversed(self._created_dirs):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass
+        self._staged.clear()
+        self._temps.clear()
+        self._created_dirs.clear()
+        self._done = True
+
+    def _sync_dirs(self, targets) -> None:
+        """Una sola fsync per ogni cartella toccata (più le cartelle create)"""
+        if not self.durable:
+            return
+        dirs = {os.path.dirname(target) for target in targets}
+        dirs.update(os.path.dirname(d) for d in self._created_dirs)
+        for directory in sorted(dirs):
+            fsync_dir(directory)
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
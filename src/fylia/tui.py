@@ -5,13 +5,82 @@ Interfaccia TUI a 3 pannelli per FYLIA
 - Pannello destro: mappa concettuale del progetto
 """
 
+from rich.text import Text
 from textual.app import App, ComposeResult
-from textual.containers import Container, Horizontal
+from textual.containers import Container, Horizontal, VerticalScroll
 from textual.widgets import Header, Footer, TextArea, Static, Input
 from textual.binding import Binding
+from fylia import trace
+from fylia.cache import default_cache_dir
+from fylia.history import ChatHistory, default_history_path, format_message
+from fylia.providers.cache import CachedProvider
+from fylia.providers.context import ContextProvider
 from fylia.providers.mock import MockProvider
 from fylia.mapgen import CodeMapGenerator
+from fylia.maptree import MapTree
+from fylia.index import Location, SymbolIndex, format_locations
+from fylia.symstore import SymbolStore, default_store_path, save_index_store
+from fylia.deps import DependencyGraph
+from fylia.context import ContextBuilder
+from fylia.daemon import DaemonError, connect
+from fylia.patcher import project_patcher
+from fylia.undo import UndoError
+from fylia.watcher import create_watcher
+import asyncio
 import os
+import threading
+from collections import deque
+import time
+from pathlib import Path
+
+
+class ThrottledText:
+    """
+    Testo che cresce a chunk, ridisegnato al massimo `fps` volte al secondo
+    
+    Il primo chunk viene mostrato subito; i successivi arrivati troppo
+    presto vengono accumulati e mostrati da un timer alla scadenza.
+    """
+    
+    def __init__(self, widget: Static, fps: int = 30):
+        self.widget = widget
+        self.interval = 1.0 / fps
+        self.repaints = 0
+        self._chunks = []
+        self._last_paint = 0.0
+        self._timer = None
+    
+    @property
+    def text(self) -> str:
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+    
+    def append(self, chunk: str) -> None:
+        """Aggiunge un chunk e ridisegna se è passato abbastanza tempo"""
+        self._chunks.append(chunk)
+        if self._timer is not None:
+            return
+        wait = self._last_paint + self.interval - time.monotonic()
+        if wait <= 0:
+            self._paint()
+        else:
+            self._timer = self.widget.set_timer(wait, self._paint)
+    
+    def finish(self) -> str:
+        """Mostra il testo completo e annulla ridisegni in attesa"""
+        if self._timer is not None:
+            self._timer.stop()
+        self._paint()
+        return self.text
+    
+    def _paint(self) -> None:
+        self._timer = None
+        self._last_paint = time.monotonic()
+        self.repaints += 1
+        with trace.span('tui.paint'):
+            # Text semplice: una risposta parziale non va interpretata come markup
+            self.widget.update(Text(self.text))
 
 
 class FyliaApp(App):
@@ -37,18 +106,72 @@ class FyliaApp(App):
         height: 100%;
         overflow-y: scroll;
     }
+    
+    #chat-content {
+        height: 1fr;
+    }
+    
+    Screen {
+        layers: base overlay;
+    }
+    
+    #trace-overlay {
+        layer: overlay;
+        dock: bottom;
+        height: auto;
+        display: none;
+        background: $panel;
+        border: solid magenta;
+    }
     """
     
+    # Ridisegni al secondo del pannello di output durante lo streaming
+    STREAM_FPS = 30
+    # Richieste che possono attendere mentre un'altra è in generazione
+    REQUEST_QUEUE_SIZE = 8
+    # Messaggi caricati a ogni scorrimento della chat e massimo montati insieme
+    CHAT_PAGE = 50
+    CHAT_WINDOW = 200
+    # Secondi tra due aggiornamenti dell'overlay dei tempi
+    TRACE_REFRESH = 0.5
+    
     BINDINGS = [
         Binding("ctrl+c", "quit", "Esci"),
         Binding("ctrl+r", "refresh_map", "Aggiorna mappa"),
+        Binding("escape", "cancel_generation", "Annulla risposta"),
+        Binding("ctrl+z", "undo", "Annulla modifica"),
+        Binding("ctrl+y", "redo", "Ripristina modifica"),
+        Binding("f12", "toggle_trace", "Tempi"),
     ]
     
-    def __init__(self):
+    def __init__(self, jobs: int = 1, request_timeout: float = 120.0):
         super().__init__()
-        self.provider = MockProvider()
-        self.map_generator = CodeMapGenerator()
-        self.chat_history = []
+        # Il contesto del progetto precede la cache: entra nella chiave delle risposte
+        self.response_cache = CachedProvider(MockProvider(), default_cache_dir(Path.cwd()) / "responses")
+        self.provider = ContextProvider(self.response_cache, self._prompt_context)
+        self.request_timeout = request_timeout
+        self._requests = None
+        self._generation = None
+        self.map_generator = CodeMapGenerator(jobs=jobs)
+        self.chat_history = ChatHistory(default_history_path(Path.cwd()))
+        # Le modifiche ai file passano da qui, così fylia undo le può annullare
+        self.patcher = project_patcher(Path.cwd())
+        # Intervallo [primo, ultimo) dei messaggi mostrati nel pannello della chat
+        self._chat_first = 0
+        self._chat_last = 0
+        self._chat_widgets = deque()
+        self.project_model = None
+        self.symbol_index = None
+        self.dependency_graph = None
+        self.symbol_store = None
+        # La tabella salvata è letta dai thread worker e chiusa dal thread principale
+        self._store_lock = threading.Lock()
+        self.context_builder = None
+        self.watcher = None
+        # Serializza ricostruzione e aggiornamenti di modello, indice e grafo
+        # (e della loro cache su disco), come il lock di ProjectService
+        self._map_lock = threading.Lock()
+        self._trace_timer = None
     
     def compose(self) -> ComposeResult:
         """Crea il layout a 3 pannelli"""
@@ -57,7 +180,7 @@ class FyliaApp(App):
         with Horizontal():
             with Container(id="chat-panel"):
                 yield Static("💬 Chat\n" + "─" * 20, classes="panel-header")
-                yield Static("", id="chat-content", classes="panel-content")
+                yield VerticalScroll(id="chat-content", classes="panel-content")
                 yield Input(placeholder="Scrivi qui cosa vuoi costruire...", id="chat-input")
             
             with Container(id="output-panel"):
@@ -67,12 +190,19 @@ class FyliaApp(App):
             
             with Container(id="map-panel"):
                 yield Static("🗺️  Mappa Progetto\n" + "─" * 20, classes="panel-header")
-                yield Static("", id="map-content", classes="panel-content")
+                yield MapTree(self.map_generator, id="map-content", classes="panel-content")
         
+        yield Static(id="trace-overlay")
         yield Footer()
     
     def on_mount(self) -> None:
         """Inizializza l'app al caricamento"""
+        self._requests = asyncio.Queue(self.REQUEST_QUEUE_SIZE)
+        self.run_worker(self._process_requests(), group="chat")
+        self._load_chat_tail()
+        self.query_one("#chat-input", Input).focus()
+        chat = self.query_one("#chat-content", VerticalScroll)
+        self.watch(chat, "scroll_y", self._on_chat_scroll, init=False)
         self.refresh_map()
     
     def on_input_submitted(self, event: Input.Submitted) -> None:
@@ -81,37 +211,397 @@ class FyliaApp(App):
         if not user_input.strip():
             return
         
-        # Aggiungi alla chat history
-        self.chat_history.append(f"Tu: {user_input}")
-        
-        # Ottieni risposta dal provider
-        response = self.provider.generate_response(user_input)
-        self.chat_history.append(f"FYLIA: {response}")
-        
-        # Aggiorna i pannelli
-        chat_widget = self.query_one("#chat-content", Static)
-        chat_widget.update("\n".join(self.chat_history[-10:]))  # Mostra ultime 10 righe
+        # Comandi locali (/refs, /def, /cache, /context) oppure risposta dal provider in streaming
+        response = self._run_command(user_input)
+        if response is not None:
+            event.input.value = ""
+            self._add_message("user", user_input)
+            if callable(response):
+                # Risposta che può attendere (es. il daemon): in un thread worker
+                self.run_worker(lambda: self.call_from_thread(self._finish_response, response()),
+                                thread=True, group="command")
+            else:
+                self._finish_response(response)
+            return
+        try:
+            self._requests.put_nowait(user_input)
+        except asyncio.QueueFull:
+            self.notify("Troppe richieste in attesa, riprova tra poco", severity="warning")
+            return
         
+        # Aggiungi alla chat history e pulisci input
+        event.input.value = ""
+        self._add_message("user", user_input, "(in coda)" if self._generation is not None else "")
+    
+    async def _process_requests(self) -> None:
+        """Serve le richieste al provider una alla volta, nell'ordine di invio"""
+        while True:
+            user_input = await self._requests.get()
+            output = ThrottledText(self.query_one("#output-content", Static), self.STREAM_FPS)
+            self._generation = asyncio.ensure_future(self._stream_response(user_input, output))
+            
+            # asyncio.wait non propaga la cancellazione della generazione
+            done, _ = await asyncio.wait({self._generation}, timeout=self.request_timeout)
+            generation, self._generation = self._generation, None
+            if not done:
+                generation.cancel()
+                await asyncio.wait({generation})
+                note = f"[tempo scaduto dopo {self.request_timeout:g} secondi]"
+            elif generation.cancelled():
+                note = "[risposta annullata]"
+            elif generation.exception() is not None:
+                note = f"[errore del provider: {generation.exception()}]"
+            else:
+                note = ""
+            
+            response = output.finish()
+            if note:
+                response = f"{response}\n\n{note}" if response else note
+            self._finish_response(response)
+    
+    async def _stream_response(self, user_input: str, output: ThrottledText) -> None:
+        """Mostra la risposta del provider man mano che arrivano i chunk"""
+        start = trace.now()
+        with trace.span('provider.response'):
+            async for chunk in self.provider.astream_response(user_input):
+                if start:
+                    trace.add('provider.first_chunk', start)
+                    start = 0
+                output.append(chunk)
+    
+    def action_cancel_generation(self) -> None:
+        """Annulla la risposta in generazione (le richieste in coda proseguono)"""
+        if self._generation is not None:
+            self._generation.cancel()
+    
+    def _finish_response(self, response: str) -> None:
+        """Registra la risposta completa nella chat e la mostra nell'output"""
+        self._add_message("assistant", response)
         output_widget = self.query_one("#output-content", Static)
-        output_widget.update(response)
+        output_widget.update(Text(response))
+    
+    # Pannello della chat: solo una finestra di messaggi è montata come widget,
+    # quelli più vecchi vengono letti dalla cronologia quando si scorre
+    
+    def _message_widget(self, message: dict, note: str = "") -> Static:
+        text = format_message(message)
+        return Static(Text(f"{text} {note}" if note else text), classes="chat-message")
+    
+    @trace.traced('tui.chat_message')
+    def _add_message(self, role: str, text: str, note: str = "") -> None:
+        """Salva un messaggio nella cronologia e lo mostra in fondo alla chat"""
+        index = self.chat_history.append(role, text)
+        if self._chat_last != index:
+            # Il pannello mostra messaggi vecchi: si torna in fondo
+            self._load_chat_tail()
+            return
+        chat = self.query_one("#chat-content", VerticalScroll)
+        widget = self._message_widget(self.chat_history[index], note)
+        self._chat_widgets.append(widget)
+        chat.mount(widget)
+        self._chat_last = index + 1
+        self._trim_chat(from_top=True)
+        chat.scroll_end(animate=False)
+    
+    def _load_chat_tail(self) -> None:
+        """Mostra l'ultima pagina della cronologia"""
+        chat = self.query_one("#chat-content", VerticalScroll)
+        for widget in self._chat_widgets:
+            widget.remove()
+        count = len(self.chat_history)
+        self._chat_first = max(0, count - self.CHAT_PAGE)
+        self._chat_last = count
+        self._chat_widgets = deque(self._message_widget(m)
+                                   for m in self.chat_history.page(self._chat_first, count))
+        chat.mount_all(self._chat_widgets)
+        chat.scroll_end(animate=False)
+    
+    def _trim_chat(self, from_top: bool) -> None:
+        """Smonta i messaggi oltre CHAT_WINDOW dal lato opposto a quello visibile"""
+        excess = len(self._chat_widgets) - self.CHAT_WINDOW
+        if excess <= 0:
+            return
+        for _ in range(excess):
+            widget = self._chat_widgets.popleft() if from_top else self._chat_widgets.pop()
+            widget.remove()
+        if from_top:
+            self._chat_first += excess
+        else:
+            self._chat_last -= excess
+    
+    def _on_chat_scroll(self, scroll_y: float) -> None:
+        """Carica una pagina di messaggi quando si arriva a un bordo della chat"""
+        chat = self.query_one("#chat-content", VerticalScroll)
+        if scroll_y <= 0 and self._chat_first > 0:
+            start = max(0, self._chat_first - self.CHAT_PAGE)
+            anchor = self._chat_widgets[0] if self._chat_widgets else None
+            widgets = [self._message_widget(m) for m in self.chat_history.page(start, self._chat_first)]
+            self._chat_widgets.extendleft(reversed(widgets))
+            chat.mount_all(widgets, before=0)
+            self._chat_first = start
+            self._trim_chat(from_top=False)
+            if anchor is not None:
+                # Mantiene fermo il punto di lettura dopo l'inserimento in alto
+                self.call_after_refresh(chat.scroll_to_widget, anchor, top=True, animate=False)
+        elif scroll_y >= chat.max_scroll_y and self._chat_last < len(self.chat_history):
+            anchor = self._chat_widgets[-1] if self._chat_widgets else None
+            stop = min(len(self.chat_history), self._chat_last + self.CHAT_PAGE)
+            widgets = [self._message_widget(m) for m in self.chat_history.page(self._chat_last, stop)]
+            self._chat_widgets.extend(widgets)
+            chat.mount_all(widgets)
+            self._chat_last = stop
+            self._trim_chat(from_top=True)
+            if anchor is not None:
+                self.call_after_refresh(chat.scroll_to_widget, anchor, animate=False)
+    
+    def _run_command(self, user_input: str):
+        """
+        Esegue i comandi locali della chat, restituisce None se non è un comando
+
+        Le risposte che richiedono I/O bloccante sono restituite come funzione
+        senza argomenti, da eseguire fuori dal loop dell'interfaccia.
+        """
+        command, _, symbol = user_input.strip().partition(" ")
+        if command == "/cache":
+            return self._cache_report()
+        if command == "/context":
+            return self._context_report(symbol.strip())
+        if command not in ("/refs", "/def"):
+            return None
         
-        # Pulisci input
-        event.input.value = ""
+        symbol = symbol.strip()
+        if not symbol:
+            return f"Uso: {command} <simbolo>"
+        if self.symbol_index is None:
+            return lambda: self._lookup_without_index(command, symbol)
+        
+        if command == "/refs":
+            locations = self.symbol_index.references(symbol)
+            empty = f"Nessun riferimento trovato per {symbol}"
+        else:
+            locations = self.symbol_index.definitions(symbol)
+            empty = f"Nessuna definizione trovata per {symbol}"
+        return self.symbol_index.format_locations(locations) if locations else empty
+    
+    def _lookup_without_index(self, command: str, symbol: str) -> str:
+        """Risponde a /refs e /def mentre l'indice è in costruzione (in un thread worker)"""
+        # Un daemon (fylia serve) sullo stesso progetto ha già l'indice aggiornato
+        found = self._ask_daemon("refs" if command == "/refs" else "def", symbol)
+        if found:
+            return format_locations([Location(*loc) for loc in found])
+        if command == "/def":
+            with self._store_lock:
+                if self.symbol_index is not None:
+                    # Pronto nel frattempo (e la tabella salvata è già chiusa)
+                    return self._run_command(f"{command} {symbol}")
+                if not self._open_symbol_store():
+                    return "Indice dei simboli in costruzione, riprova tra poco."
+                # Tabella della sessione precedente: subito disponibile, forse superata
+                locations = self.symbol_store.definitions(symbol)
+            if not locations:
+                return f"Nessuna definizione trovata per {symbol} (indice in aggiornamento)"
+            return format_locations(locations) + "\n(dall'indice salvato, in aggiornamento)"
+        return "Indice dei simboli in costruzione, riprova tra poco."
+    
+    def _ask_daemon(self, op: str, symbol: str):
+        """Risposta del daemon del progetto, None se non è in esecuzione o non risponde"""
+        client = connect(Path.cwd(), timeout=1.0)
+        if client is None:
+            return None
+        with client:
+            try:
+                return client.request(op, symbol=symbol)
+            except (OSError, ValueError, DaemonError):
+                return None
+    
+    def _open_symbol_store(self) -> bool:
+        """Apre con mmap la tabella dei simboli salvata, se esiste"""
+        if self.symbol_store is None:
+            try:
+                self.symbol_store = SymbolStore(default_store_path(Path.cwd()))
+            except (OSError, ValueError):
+                return False
+        return True
+    
+    def _close_symbol_store(self) -> None:
+        """Chiude la tabella salvata, superata dall'indice appena costruito"""
+        with self._store_lock:
+            if self.symbol_store is not None:
+                self.symbol_store.close()
+                self.symbol_store = None
+    
+    def _cache_report(self) -> str:
+        """Statistiche della cache delle risposte e dei contesti"""
+        stats = self.response_cache.stats()
+        report = (f"Cache risposte: {stats['hits_memory']} hit in memoria, "
+                  f"{stats['hits_disk']} hit su disco, {stats['misses']} miss "
+                  f"({stats['hit_rate']:.0%})\n"
+                  f"{stats['memory_items']} risposte in memoria, {stats['disk_items']} su disco "
+                  f"({stats['disk_bytes'] / 1024:.1f} KiB), {stats['evictions']} eliminate")
+        if self.context_builder is not None:
+            stats = self.context_builder.stats()
+            report += (f"\nContesti: {stats['hits']} dalla cache, {stats['misses']} costruiti, "
+                       f"ultimo in {stats['last_ms']:.1f} ms (media {stats['mean_ms']:.1f} ms)")
+        return report
+    
+    def _prompt_context(self, user_input: str) -> str:
+        """Contesto del progetto per una richiesta (vuoto finché l'indice non è pronto)"""
+        if self.context_builder is None:
+            return ""
+        return self.context_builder.build(user_input).text
+    
+    def _context_report(self, user_input: str) -> str:
+        """Mostra il contesto che verrebbe inviato con una richiesta"""
+        if not user_input:
+            return "Uso: /context <richiesta>"
+        if self.context_builder is None:
+            return "Indice dei simboli in costruzione, riprova tra poco."
+        packed = self.context_builder.build(user_input)
+        summary = (f"{len(packed.files)} file, {packed.symbols} simboli, ~{packed.tokens} token "
+                   f"in {packed.elapsed * 1000:.1f} ms{' (dalla cache)' if packed.cached else ''}")
+        if not packed.text:
+            return f"Nessun file pertinente trovato ({summary})"
+        return f"{packed.text}\n{summary}"
+    
+    def on_unmount(self) -> None:
+        """Ferma l'osservazione dei file e chiude cronologia e cache all'uscita"""
+        self.chat_history.close()
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        if self.project_model is not None:
+            self.project_model.flush()
+    
+    def action_toggle_trace(self) -> None:
+        """Mostra o nasconde i tempi delle fasi (attiva il tracciamento se serve)"""
+        overlay = self.query_one("#trace-overlay", Static)
+        if self._trace_timer is not None:
+            self._trace_timer.stop()
+            self._trace_timer = None
+            overlay.display = False
+            return
+        if not trace.enabled():
+            trace.enable()
+            self.notify("Tracciamento attivato: i tempi compaiono dalle prossime operazioni")
+        overlay.display = True
+        self._refresh_trace()
+        self._trace_timer = self.set_interval(self.TRACE_REFRESH, self._refresh_trace)
+    
+    def _refresh_trace(self) -> None:
+        tracer = trace.get_tracer()
+        if tracer is None:
+            return
+        text = trace.format_summary(tracer.summary(), limit=12)
+        if tracer.counters:
+            text += "\n" + "  ".join(f"{name} {value}" for name, value in sorted(tracer.counters.items()))
+        self.query_one("#trace-overlay", Static).update(Text(text))
+    
+    def action_undo(self) -> None:
+        """Annulla l'ultimo changeset applicato ai file del progetto"""
+        self.run_worker(lambda: self._undo_or_redo(redo=False), thread=True,
+                        exclusive=True, group="undo")
+    
+    def action_redo(self) -> None:
+        """Ripristina l'ultimo changeset annullato"""
+        self.run_worker(lambda: self._undo_or_redo(redo=True), thread=True,
+                        exclusive=True, group="undo")
+    
+    def _undo_or_redo(self, redo: bool) -> None:
+        """Applica annulla/ripristina (in un thread worker); il watcher aggiorna la mappa"""
+        journal = self.patcher.journal
+        try:
+            done = journal.redo() if redo else journal.undo()
+        except UndoError as e:
+            self.call_from_thread(self.notify, str(e), severity="warning")
+            return
+        verb = "Ripristinato" if redo else "Annullato"
+        self.call_from_thread(self.notify, f"{verb}: {done[0]['label']}")
     
     def action_refresh_map(self) -> None:
         """Aggiorna la mappa del progetto"""
         self.refresh_map()
     
     def refresh_map(self) -> None:
-        """Genera e mostra la mappa del progetto corrente"""
-        current_dir = os.getcwd()
-        mappa = self.map_generator.generate_map(current_dir)
-        
-        map_widget = self.query_one("#map-content", Static)
-        map_widget.update(mappa)
+        """Rigenera la mappa del progetto corrente in background"""
+        self.run_worker(self._build_map, thread=True, exclusive=True, group="map")
+    
+    @trace.traced('tui.build_map')
+    def _build_map(self) -> None:
+        """Costruisce il modello completo del progetto (in un thread worker)"""
+        with self._map_lock:
+            current_dir = os.getcwd()
+            model = self.map_generator.build_model(current_dir)
+            self.project_model = model
+            self.call_from_thread(self._show_model, model)
+            
+            # L'indice diventa visibile ai comandi (/def, /refs) solo quando è
+            # completo: fino ad allora rispondono il daemon o la tabella salvata
+            index = self.symbol_index
+            if index is None:
+                index = SymbolIndex(current_dir, self.map_generator.ignore_dirs,
+                                    self.map_generator.ignore_files,
+                                    use_git=self.map_generator.use_git)
+            index.update()
+            self.symbol_index = index
+            save_index_store(index)
+            self.call_from_thread(self._close_symbol_store)
+            
+            if self.dependency_graph is None:
+                self.dependency_graph = DependencyGraph(current_dir, self.map_generator.ignore_dirs,
+                                                        self.map_generator.ignore_files,
+                                                        use_git=self.map_generator.use_git)
+            self.dependency_graph.update()
+            self.call_from_thread(self._show_graph, self.dependency_graph)
+            if self.context_builder is None:
+                self.context_builder = ContextBuilder(self.symbol_index, self.dependency_graph)
+            self.context_builder.refresh()
+            
+            if self.watcher is None:
+                self.watcher = create_watcher(
+                    current_dir, self._on_files_changed,
+                    ignore_dirs=self.map_generator.ignore_dirs,
+                    ignore_files=self.map_generator.ignore_files,
+                    is_ignored=model.is_ignored,
+                )
+    
+    def _show_model(self, model) -> None:
+        self.query_one("#map-content", MapTree).show_model(model)
+    
+    def _show_graph(self, graph: DependencyGraph) -> None:
+        self.query_one("#map-content", MapTree).set_graph(graph)
+    
+    def _on_files_changed(self, paths: set) -> None:
+        """Riceve dal watcher i percorsi cambiati (dal thread del watcher)"""
+        self.call_from_thread(self.run_worker, lambda: self._update_map(paths),
+                              thread=True, group="map-update")
+    
+    @trace.traced('tui.update_map')
+    def _update_map(self, paths: set) -> None:
+        """Aggiorna solo le parti del modello toccate dai cambiamenti"""
+        with self._map_lock:
+            model = self.project_model
+            if model is None:
+                return
+            model.apply_changes(paths)
+            if self.symbol_index is not None:
+                self.symbol_index.update_files(paths)
+            if self.context_builder is not None:
+                self.context_builder.refresh()
+            has_graph = self.dependency_graph is not None
+            if has_graph:
+                # Anche i file con archi cambiati mostrano "dipende da"/"usato da" diversi
+                paths = set(paths) | self.dependency_graph.update_files(paths)
+        self.call_from_thread(self._refresh_tree, paths, has_graph)
+    
+    def _refresh_tree(self, paths: set, show_cycles: bool) -> None:
+        """Ricarica i nodi già aperti toccati dai cambiamenti (nel thread principale)"""
+        tree = self.query_one("#map-content", MapTree)
+        if show_cycles:
+            tree.show_cycles()
+        tree.refresh_paths(paths)
 
 
-def run_tui():
+def run_tui(jobs: int = 1, request_timeout: float = 120.0):
     """Avvia l'interfaccia TUI"""
-    app = FyliaApp()
+    app = FyliaApp(jobs=jobs, request_timeout=request_timeout)
     app.run()
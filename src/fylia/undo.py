@@ -0,0 +1,356 @@
+"""
+Annulla e ripristina le modifiche ai file del progetto
+Ogni transazione applicata registra, per ogni file toccato, solo i
+riferimenti al contenuto prima e dopo; i contenuti stanno in un archivio
+indirizzato per hash (compresso e senza duplicati) in .fylia/undo.
+"""
+
+import json
+import os
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, List, Optional, Set, Tuple
+
+from fylia.cache import content_hash, default_cache_dir
+from fylia.transaction import Transaction, TransactionError
+
+try:
+    import fcntl
+except ImportError:    # Windows: nessun blocco fra processi
+    fcntl = None
+
+
+# Versione del formato del registro (un registro di versione diversa viene ignorato)
+UNDO_JOURNAL_VERSION = 1
+
+# Changeset conservati: i più vecchi vengono dimenticati e i loro contenuti
+# eliminati dalla raccolta dei blob non più usati
+MAX_CHANGESETS = 200
+
+
+class UndoError(Exception):
+    """Annullamento o ripristino non possibile"""
+
+
+def default_undo_dir(root: Path) -> Path:
+    """Cartella del registro delle modifiche di un progetto"""
+    return default_cache_dir(Path(root)).parent / "undo"
+
+
+class BlobStore:
+    """
+    Contenuti dei file indirizzati per hash, compressi con zlib
+
+    Un contenuto già presente non viene riscritto: lo stesso file salvato
+    in più changeset occupa spazio una volta sola.
+    """
+
+    def __init__(self, directory: Path, level: int = 6):
+        self.directory = Path(directory)
+        self.level = level
+
+    def _path(self, digest: str) -> Path:
+        return self.directory / digest[:2] / digest[2:]
+
+    def put(self, data: bytes) -> str:
+        """Memorizza un contenuto e ne restituisce l'hash"""
+        digest = content_hash(data)
+        path = self._path(digest)
+        if path.exists():
+            return digest
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(zlib.compress(data, self.level))
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            raise
+        return digest
+
+    def put_file(self, path: str) -> str:
+        with open(path, 'rb') as f:
+            return self.put(f.read())
+
+    def get(self, digest: str) -> bytes:
+        """Restituisce un contenuto memorizzato"""
+        try:
+            with open(self._path(digest), 'rb') as f:
+                return zlib.decompress(f.read())
+        except (OSError, zlib.error) as e:
+            raise UndoError(f"Contenuto {digest} mancante o danneggiato") from e
+
+    def digests(self) -> Set[str]:
+        """Hash di tutti i contenuti memorizzati"""
+        found = set()
+        try:
+            prefixes = list(os.scandir(self.directory))
+        except OSError:
+            return found
+        for prefix in prefixes:
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                if not entry.name.startswith('.'):
+                    found.add(prefix.name + entry.name)
+        return found
+
+    def collect(self, referenced: Set[str]) -> Tuple[int, int]:
+        """
+        Elimina i contenuti non più referenziati
+
+        Returns:
+            (contenuti eliminati, byte liberati)
+        """
+        removed = freed = 0
+        for digest in self.digests() - referenced:
+            path = self._path(digest)
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except OSError:
+                continue
+            removed += 1
+            freed += size
+        return removed, freed
+
+
+class UndoJournal:
+    """
+    Registro dei changeset applicati al progetto, con annulla e ripristina
+
+    Il registro è una pila: `position` changeset sono applicati, quelli dopo
+    si possono ripristinare. Un nuovo changeset dopo un annullamento elimina
+    quelli ripristinabili, come negli editor.
+
+    Più processi (la TUI e la CLI) possono usare lo stesso registro: ogni
+    operazione che lo modifica blocca journal.lock e rilegge journal.json,
+    così nessuno sovrascrive i changeset degli altri. Una transazione tiene
+    il blocco da snapshot() a record() (vedi recording()), così la raccolta
+    di un altro processo non elimina contenuti appena salvati ma non
+    ancora registrati.
+    """
+
+    def __init__(self, root, directory: Optional[Path] = None, max_changesets: int = MAX_CHANGESETS):
+        self.root = os.path.realpath(root)
+        self.directory = Path(directory) if directory is not None else default_undo_dir(Path(root))
+        self.blobs = BlobStore(self.directory / "blobs")
+        self.max_changesets = max_changesets
+        self.changesets: List[dict] = []
+        self.position = 0
+        # Blocco fra i thread del processo; _depth > 0 mentre journal.lock è tenuto
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._load()
+
+    @property
+    def _path(self) -> Path:
+        return self.directory / "journal.json"
+
+    @contextmanager
+    def _locked(self):
+        """Blocca il registro fra processi e thread e ne rilegge lo stato salvato (rientrante)"""
+        with self._thread_lock:
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield
+                finally:
+                    self._depth -= 1
+                return
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.directory / "journal.lock", 'a') as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                self._depth = 1
+                try:
+                    self._load()
+                    yield
+                finally:
+                    self._depth = 0
+
+    def recording(self):
+        """
+        Blocca il registro dal salvataggio dei contenuti (snapshot) alla
+        registrazione del changeset (record), da usare con `with`
+        """
+        return self._locked()
+
+    def _load(self) -> None:
+        self.changesets = []
+        self.position = 0
+        try:
+            with open(self._path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get('version') != UNDO_JOURNAL_VERSION:
+            return
+        self.changesets = data.get('changesets', [])
+        self.position = min(data.get('position', 0), len(self.changesets))
+
+    def _save(self) -> None:
+        data = json.dumps({'version': UNDO_JOURNAL_VERSION, 'position': self.position,
+                           'changesets': self.changesets}, separators=(',', ':'))
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path.with_name(f".journal.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self._path)
+
+    def relative(self, target: str) -> str:
+        """Percorso registrato per un file (relativo alla radice se è dentro)"""
+        target = os.path.realpath(target)
+        rel_path = os.path.relpath(target, self.root)
+        if rel_path.startswith(os.pardir):
+            return target
+        return rel_path.replace(os.sep, '/')
+
+    # Registrazione
+
+    def snapshot(self, target: str, source: Optional[str]) -> list:
+        """
+        Salva i contenuti prima e dopo di una modifica a un file
+
+        Args:
+            target: file che sta per essere sostituito o eliminato
+            source: file con il nuovo contenuto, None per un'eliminazione
+
+        Returns:
+            [percorso, hash prima o None, hash dopo o None]
+        """
+        before = self.blobs.put_file(target) if os.path.isfile(target) else None
+        after = self.blobs.put_file(source) if source is not None else None
+        return [self.relative(target), before, after]
+
+    def record(self, files: List[list], label: str = '') -> None:
+        """Aggiunge un changeset applicato in cima alla pila"""
+        files = [f for f in files if f[1] != f[2]]
+        if not files:
+            return
+        with self._locked():
+            dropped = len(self.changesets) - self.position
+            del self.changesets[self.position:]
+            self.changesets.append({
+                'time': time.time(),
+                'label': label or _default_label(files),
+                'files': files,
+            })
+            excess = len(self.changesets) - self.max_changesets
+            if excess > 0:
+                del self.changesets[:excess]
+                dropped += excess
+            self.position = len(self.changesets)
+            self._save()
+            if dropped:
+                self._collect()
+
+    def collect(self) -> Tuple[int, int]:
+        """Elimina dall'archivio i contenuti non usati da nessun changeset"""
+        with self._locked():
+            return self._collect()
+
+    def _collect(self) -> Tuple[int, int]:
+        referenced = set()
+        for changeset in self.changesets:
+            for _, before, after in changeset['files']:
+                referenced.update(d for d in (before, after) if d is not None)
+        return self.blobs.collect(referenced)
+
+    # Annulla e ripristina
+
+    def undo(self, steps: int = 1, force: bool = False, durable: bool = True) -> List[dict]:
+        """
+        Annulla gli ultimi changeset applicati, uno per volta e ognuno per intero
+
+        Args:
+            force: sovrascrive anche i file cambiati dopo il changeset
+
+        Returns:
+            I changeset annullati
+
+        Raises:
+            UndoError: niente da annullare o file modificati nel frattempo
+        """
+        done = []
+        with self._locked():
+            for _ in range(steps):
+                if self.position == 0:
+                    if not done:
+                        raise UndoError("Nessuna modifica da annullare")
+                    break
+                changeset = self.changesets[self.position - 1]
+                self._restore(changeset, 1, 2, force, durable)
+                self.position -= 1
+                self._save()
+                done.append(changeset)
+        return done
+
+    def redo(self, steps: int = 1, force: bool = False, durable: bool = True) -> List[dict]:
+        """Ripristina i changeset annullati (vedi undo)"""
+        done = []
+        with self._locked():
+            for _ in range(steps):
+                if self.position >= len(self.changesets):
+                    if not done:
+                        raise UndoError("Nessuna modifica da ripristinare")
+                    break
+                changeset = self.changesets[self.position]
+                self._restore(changeset, 2, 1, force, durable)
+                self.position += 1
+                self._save()
+                done.append(changeset)
+        return done
+
+    def _target(self, path: str) -> str:
+        return path if os.path.isabs(path) else os.path.join(self.root, path)
+
+    def _restore(self, changeset: dict, wanted: int, expected: int, force: bool, durable: bool) -> None:
+        """Riporta i file del changeset allo stato `wanted` in una sola transazione"""
+        if not force:
+            changed = [f[0] for f in changeset['files'] if self._current(self._target(f[0])) != f[expected]]
+            if changed:
+                raise UndoError("File modificati dopo la modifica da annullare: " + ", ".join(changed)
+                                + " (usa --force per sovrascriverli)")
+        try:
+            with Transaction('', durable) as tx:
+                for entry in changeset['files']:
+                    target = self._target(entry[0])
+                    digest = entry[wanted]
+                    if digest is None:
+                        if tx.exists(target):
+                            tx.delete(target)
+                    else:
+                        tx.write(target, self.blobs.get(digest))
+        except TransactionError as e:
+            raise UndoError(str(e)) from e
+
+    @staticmethod
+    def _current(target: str) -> Optional[str]:
+        try:
+            with open(target, 'rb') as f:
+                return content_hash(f.read())
+        except FileNotFoundError:
+            return None
+        except OSError:
+            return ''
+
+    def history(self) -> List[Tuple[bool, dict]]:
+        """Changeset dal più recente, con True per quelli applicati"""
+        # Un altro processo può aver cambiato il registro (journal.json è sostituito in blocco)
+        self._load()
+        return [(i < self.position, changeset)
+                for i, changeset in reversed(list(enumerate(self.changesets)))]
+
+
+def _default_label(files: Iterable[list]) -> str:
+    paths = [f[0] for f in files]
+    shown = ", ".join(paths[:3])
+    return shown if len(paths) <= 3 else f"{shown} e altri {len(paths) - 3}"
@@ -0,0 +1,449 @@
+"""
+Lettura e applicazione di patch in formato unified diff
+Supporta patch multi-file, creazione/cancellazione/rinomina di file,
+ricerca con offset, fuzz sul contesto e file senza newline finale.
+L'applicazione legge e scrive in streaming; i file del progetto vengono
+modificati solo attraverso fylia.transaction.
+"""
+
+import re
+from typing import BinaryIO, List, Optional, Tuple, Union
+
+
+# Dimensione dei blocchi letti e copiati durante l'applicazione
+_CHUNK_SIZE = 1 << 20
+# Dimensione dei blocchi spezzati in righe alla volta
+_SPLIT_SIZE = 1 << 14
+
+_HUNK_HEADER = re.compile(rb'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+_NO_NEWLINE = b'\\ No newline at end of file'
+DEV_NULL = '/dev/null'
+
+
+class PatchError(Exception):
+    """Patch non valida o non applicabile al file"""
+
+
+class Hunk:
+    """Blocco di modifiche introdotto da un'intestazione @@"""
+
+    __slots__ = ('old_start', 'old_len', 'new_start', 'new_len', 'lines')
+
+    def __init__(self, old_start: int, old_len: int, new_start: int, new_len: int):
+        self.old_start = old_start
+        self.old_len = old_len
+        self.new_start = new_start
+        self.new_len = new_len
+        # Righe (tipo, testo senza '\n', ha_newline) con tipo in b' ', b'-', b'+'
+        self.lines: List[Tuple[bytes, bytes, bool]] = []
+
+
+class FilePatch:
+    """Modifiche a un singolo file all'interno di una patch"""
+
+    def __init__(self):
+        self.old_path: Optional[str] = None   # None se il file viene creato
+        self.new_path: Optional[str] = None   # None se il file viene eliminato
+        self.hunks: List[Hunk] = []
+        self.rename = False
+
+    @property
+    def is_new(self) -> bool:
+        return self.old_path is None
+
+    @property
+    def is_delete(self) -> bool:
+        return self.new_path is None
+
+    @property
+    def path(self) -> str:
+        """Percorso di riferimento del file (quello nuovo, se esiste)"""
+        return self.new_path if self.new_path is not None else self.old_path
+
+
+def _parse_path(raw: bytes) -> Optional[str]:
+    """Estrae il percorso da una riga ---/+++ (scartando data e ora dopo il tab)"""
+    path = raw.split(b'\t', 1)[0].rstrip(b'\r').decode('utf-8', 'surrogateescape')
+    if path.startswith('"') and path.endswith('"'):
+        path = path[1:-1]
+    return None if path == DEV_NULL else path
+
+
+def _strip_component(path: Optional[str]) -> Optional[str]:
+    """Rimuove il prefisso a/ o b/ delle patch in stile git"""
+    if path is None:
+        return None
+    return path.split('/', 1)[1] if '/' in path else path
+
+
+def parse_patch(patch: Union[str, bytes]) -> List[FilePatch]:
+    """
+    Interpreta una patch unified diff, anche con più file
+
+    Args:
+        patch: testo della patch
+
+    Returns:
+        Lista di FilePatch nell'ordine in cui compaiono
+
+    Raises:
+        PatchError: se la patch è malformata o non contiene modifiche
+    """
+    if isinstance(patch, str):
+        patch = patch.encode('utf-8', 'surrogateescape')
+
+    lines = patch.split(b'\n')
+    if lines and lines[-1] == b'':
+        lines.pop()
+
+    files: List[FilePatch] = []
+    current: Optional[FilePatch] = None
+    git_style = False
+    i = 0
+
+    while i < len(lines):
+        line = lines[i]
+
+        if line.startswith(b'diff --git '):
+            current = FilePatch()
+            files.append(current)
+            git_style = True
+            # Percorsi provvisori, validi anche per rinomine e file senza hunk
+            parts = line[len(b'diff --git '):].decode('utf-8', 'surrogateescape').split(' b/', 1)
+            if len(parts) == 2:
+                current.old_path = parts[0][2:] if parts[0].startswith('a/') else parts[0]
+                current.new_path = parts[1]
+            i += 1
+            continue
+
+        if current is not None and not current.hunks:
+            if line.startswith(b'new file mode'):
+                current.old_path = None
+            elif line.startswith(b'deleted file mode'):
+                current.new_path = None
+            elif line.startswith(b'rename from '):
+                current.old_path = line[len(b'rename from '):].decode('utf-8', 'surrogateescape')
+                current.rename = True
+            elif line.startswith(b'rename to '):
+                current.new_path = line[len(b'rename to '):].decode('utf-8', 'surrogateescape')
+                current.rename = True
+
+        if line.startswith(b'--- ') and i + 1 < len(lines) and lines[i + 1].startswith(b'+++ '):
+            old_path = _parse_path(line[4:])
+            new_path = _parse_path(lines[i + 1][4:])
+            if current is None or current.hunks or not git_style:
+                current = FilePatch()
+                files.append(current)
+            strip = git_style or (
+                (old_path is None or old_path.startswith('a/'))
+                and (new_path is None or new_path.startswith('b/'))
+            )
+            current.old_path = _strip_component(old_path) if strip else old_path
+            current.new_path = _strip_component(new_path) if strip else new_path
+            i += 2
+            continue
+
+        match = _HUNK_HEADER.match(line)
+        if match:
+            if current is None:
+                raise PatchError(f"Hunk senza intestazione di file alla riga {i + 1}")
+            hunk = Hunk(
+                int(match.group(1)),
+                int(match.group(2)) if match.group(2) is not None else 1,
+                int(match.group(3)),
+                int(match.group(4)) if match.group(4) is not None else 1,
+            )
+            i = _parse_hunk_body(lines, i + 1, hunk)
+            current.hunks.append(hunk)
+            continue
+
+        i += 1
+
+    files = [f for f in files if f.hunks or f.rename or f.is_new or f.is_delete]
+    if not files:
+        raise PatchError("La patch non contiene modifiche in formato unified diff")
+    return files
+
+
+def _parse_hunk_body(lines: List[bytes], i: int, hunk: Hunk) -> int:
+    """Legge le righe di un hunk, restituisce l'indice della prima riga successiva"""
+    old_left = hunk.old_len
+    new_left = hunk.new_len
+
+    while i < len(lines) and (old_left > 0 or new_left > 0):
+        line = lines[i]
+        tag = line[:1]
+        if tag == b'\\':
+            i += 1
+            continue
+        if tag == b'' or line == b'\r':
+            # Alcuni editor eliminano lo spazio delle righe di contesto vuote
+            tag, text = b' ', line
+        elif tag in (b' ', b'-', b'+'):
+            text = line[1:]
+        else:
+            raise PatchError(f"Riga non valida nell'hunk alla riga {i + 1}: {line[:40]!r}")
+
+        has_newline = not (i + 1 < len(lines) and lines[i + 1].startswith(_NO_NEWLINE))
+        hunk.lines.append((tag, text, has_newline))
+        if tag != b'+':
+            old_left -= 1
+        if tag != b'-':
+            new_left -= 1
+        i += 1
+
+    if old_left != 0 or new_left != 0:
+        raise PatchError(f"Hunk troncato (@@ -{hunk.old_start},{hunk.old_len} "
+                         f"+{hunk.new_start},{hunk.new_len} @@)")
+    if i < len(lines) and lines[i].startswith(_NO_NEWLINE):
+        i += 1
+    return i
+
+
+def _strip_eol(line: bytes) -> bytes:
+    return line[:-1] if line.endswith(b'\n') else line
+
+
+class _LineStream:
+    """
+    Lettura a righe di un file con finestra limitata in memoria
+
+    Le righe vengono spezzate solo quando servono (ricerca del contesto
+    degli hunk); tra un hunk e l'altro i dati vengono copiati a blocchi.
+    """
+
+    def __init__(self, f: Optional[BinaryIO]):
+        self.f = f
+        self.window: List[bytes] = []   # righe già spezzate
+        self.start = 0                  # indice (assoluto) di window[0]
+        self.raw = b''                  # blocco letto dal file
+        self.pos = 0                    # inizio dei dati di raw non ancora spezzati
+        self.eof = f is None
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.window)
+
+    def _read(self) -> bool:
+        """Aggiunge un blocco del file ai dati non ancora spezzati"""
+        if self.eof:
+            return False
+        chunk = self.f.read(_CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.raw = self.raw[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def fill(self, upto: int) -> None:
+        """Garantisce che la finestra contenga le righe fino a upto (esclusa), se esistono"""
+        while self.start + len(self.window) < upto:
+            # Spezza un blocco di righe alla volta (in C) invece di una riga per volta
+            stop = self.raw.rfind(b'\n', self.pos, self.pos + _SPLIT_SIZE)
+            if stop < 0:
+                stop = self.raw.find(b'\n', self.pos)
+            if stop < 0:
+                if self._read():
+                    continue
+                if self.pos < len(self.raw):
+                    # Ultima riga senza newline finale
+                    self.window.append(self.raw[self.pos:])
+                    self.pos = len(self.raw)
+                return
+            lines = self.raw[self.pos:stop].split(b'\n')
+            self.window.extend([line + b'\n' for line in lines])
+            self.pos = stop + 1
+
+    def line(self, index: int) -> Optional[bytes]:
+        if index < self.start:
+            raise PatchError("Riga già consumata dalla patch precedente")
+        self.fill(index + 1)
+        offset = index - self.start
+        return self.window[offset] if offset < len(self.window) else None
+
+    def copy_to(self, upto: int, out: BinaryIO) -> None:
+        """Copia in out tutte le righe prima di upto"""
+        if upto <= self.start:
+            return
+        take = min(upto, self.end) - self.start
+        if take > 0:
+            out.write(b''.join(self.window[:take]))
+            del self.window[:take]
+            self.start += take
+        if self.window:
+            return
+
+        # Copia a blocchi contando i newline, senza spezzare le righe
+        needed = upto - self.start
+        while needed > 0:
+            if self.pos >= len(self.raw) and not self._read():
+                break
+            count = self.raw.count(b'\n', self.pos)
+            if count < needed:
+                if count == 0 and self.eof:
+                    # Ultima riga senza newline finale
+                    out.write(memoryview(self.raw)[self.pos:])
+                    self.pos = len(self.raw)
+                    self.start += 1
+                    break
+                out.write(memoryview(self.raw)[self.pos:])
+                self.pos = len(self.raw)
+                self.start += count
+                needed -= count
+                continue
+            begin = self.pos
+            end = self._nth_newline(needed)
+            out.write(memoryview(self.raw)[begin:end + 1])
+            self.start += needed
+            needed = 0
+
+    def _nth_newline(self, n: int) -> int:
+        """Trova l'n-esimo newline dopo pos e sposta pos subito dopo"""
+        raw = self.raw
+        block_start = self.pos
+        # Salta blocchi interi contando i newline, poi cerca nell'ultimo blocco
+        while True:
+            block_end = block_start + _SPLIT_SIZE
+            count = raw.count(b'\n', block_start, block_end)
+            if count >= n:
+                break
+            n -= count
+            block_start = block_end
+        end = block_start - 1
+        for _ in range(n):
+            end = raw.index(b'\n', end + 1)
+        self.pos = end + 1
+        return end
+
+    def skip_to(self, upto: int) -> None:
+        """Scarta le righe prima di upto (già sostituite dalla patch)"""
+        self.fill(upto)
+        drop = min(upto, self.end) - self.start
+        if drop > 0:
+            del self.window[:drop]
+            self.start += drop
+
+    def copy_rest(self, out: BinaryIO) -> None:
+        """Copia in out tutto ciò che resta del file"""
+        out.write(b''.join(self.window))
+        self.window = []
+        out.write(memoryview(self.raw)[self.pos:])
+        self.raw = b''
+        self.pos = 0
+        while not self.eof:
+            chunk = self.f.read(_CHUNK_SIZE)
+            if not chunk:
+                self.eof = True
+                break
+            out.write(chunk)
+
+    def at_eof(self, index: int) -> bool:
+        self.fill(index + 1)
+        return index >= self.end
+
+
+def _find_hunk(stream: _LineStream, pattern: List[bytes], expected: int, floor: int,
+               max_offset: int, anchor_end: bool) -> Optional[int]:
+    """Cerca la posizione del contesto più vicina a quella attesa"""
+    expected = max(expected, floor)
+
+    def matches(pos: int) -> bool:
+        for k, text in enumerate(pattern):
+            line = stream.line(pos + k)
+            if line is None or _strip_eol(line) != text:
+                return False
+        if anchor_end and not stream.at_eof(pos + len(pattern)):
+            return False
+        return True
+
+    if matches(expected):
+        return expected
+    # Solo se il contesto non è dove atteso si allarga la finestra di ricerca
+    stream.fill(expected + max_offset + len(pattern))
+
+    for delta in range(1, max_offset + 1):
+        for pos in (expected - delta, expected + delta):
+            if pos < floor:
+                continue
+            if pos + len(pattern) > stream.end and stream.eof and stream.pos >= len(stream.raw):
+                continue
+            if matches(pos):
+                return pos
+    return None
+
+
+def apply_hunks(src: Optional[BinaryIO], out: BinaryIO, hunks: List[Hunk],
+                fuzz: int = 2, max_offset: int = 1000) -> List[Tuple[int, int]]:
+    """
+    Applica gli hunk leggendo src e scrivendo il risultato in out
+
+    Args:
+        src: file sorgente aperto in binario (None per un file nuovo)
+        out: file di destinazione aperto in binario
+        hunks: hunk da applicare, in ordine
+        fuzz: numero massimo di righe di contesto iniziali/finali ignorabili
+        max_offset: distanza massima (in righe) dalla posizione attesa
+
+    Returns:
+        Per ogni hunk la coppia (offset applicato, fuzz usato)
+
+    Raises:
+        PatchError: se un hunk non trova il suo contesto
+    """
+    stream = _LineStream(src)
+    cursor = 0
+    # Come patch(1), l'offset trovato per un hunk sposta la ricerca dei successivi
+    offset = 0
+    applied = []
+
+    for number, hunk in enumerate(hunks, 1):
+        old = [text for tag, text, _ in hunk.lines if tag != b'+']
+        # Una riga di contesto o rimossa senza newline è per forza l'ultima del file
+        anchor_end = any(not has_newline for tag, _, has_newline in hunk.lines if tag != b'+')
+        lead = 0
+        while lead < len(hunk.lines) and hunk.lines[lead][0] == b' ':
+            lead += 1
+        trail = 0
+        while trail < len(hunk.lines) - lead and hunk.lines[-1 - trail][0] == b' ':
+            trail += 1
+
+        # Con old_len 0 la riga indicata è quella dopo cui inserire
+        expected = (hunk.old_start if hunk.old_len == 0 else hunk.old_start - 1) + offset
+        stream.copy_to(max(cursor, expected - max_offset), out)
+
+        found = None
+        for level in range(fuzz + 1):
+            top = min(level, lead)
+            bottom = min(level, trail)
+            if level and top == 0 and bottom == 0:
+                break
+            pattern = old[top:len(old) - bottom]
+            pos = _find_hunk(stream, pattern, expected + top, cursor, max_offset,
+                             anchor_end and bottom == 0)
+            if pos is not None:
+                found = (pos, top, bottom, level)
+                break
+        if found is None:
+            raise PatchError(f"Hunk #{number} non applicabile "
+                             f"(@@ -{hunk.old_start},{hunk.old_len} +{hunk.new_start},{hunk.new_len} @@)")
+
+        pos, top, bottom, level = found
+        stream.copy_to(pos, out)
+        body = hunk.lines[top:len(hunk.lines) - bottom]
+        index = pos
+        for tag, text, has_newline in body:
+            if tag == b' ':
+                out.write(stream.line(index))
+                index += 1
+            elif tag == b'-':
+                index += 1
+            else:
+                out.write(text + b'\n' if has_newline else text)
+        stream.skip_to(index)
+        cursor = index
+        offset += pos - (expected + top)
+        applied.append((offset, level))
+
+    stream.copy_rest(out)
+    return applied
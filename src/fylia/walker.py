@@ -0,0 +1,170 @@
+"""
+Visita del filesystem del progetto in un solo passaggio
+Usa os.scandir e scarta le cartelle ignorate prima di entrarci
+"""
+
+import os
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional
+
+
+# Cartelle e file esclusi per default da mappa, indice e osservazione
+DEFAULT_IGNORE_DIRS = frozenset({'.git', '__pycache__', 'node_modules', '.venv', 'venv', '.tox', '.fylia'})
+DEFAULT_IGNORE_FILES = frozenset({'.DS_Store', '.gitignore'})
+
+
+# Predicato opzionale per scartare elementi: (percorso relativo, è cartella) -> ignorato
+IgnorePredicate = Optional[Callable[[str, bool], bool]]
+
+
+class PathEntry:
+    """
+    Sostituto minimo di os.DirEntry per elementi non letti con scandir
+
+    Usato quando l'elenco di una cartella viene ripreso da una cache: lo
+    stat viene fatto solo se richiesto, come per os.DirEntry.
+    """
+
+    __slots__ = ('path', 'name', '_is_dir', '_is_link', '_stat')
+
+    def __init__(self, path: str, name: str, is_dir: bool, is_link: bool):
+        self.path = path
+        self.name = name
+        self._is_dir = is_dir
+        self._is_link = is_link
+        self._stat = None
+
+    def is_dir(self) -> bool:
+        return self._is_dir
+
+    def is_symlink(self) -> bool:
+        return self._is_link
+
+    def stat(self) -> os.stat_result:
+        if self._stat is None:
+            self._stat = os.stat(self.path)
+        return self._stat
+
+
+class Entry(NamedTuple):
+    """Elemento del progetto trovato durante la visita"""
+    rel_path: str      # percorso relativo alla radice, con separatore '/'
+    name: str
+    depth: int         # 0 per gli elementi direttamente nella radice
+    is_dir: bool
+    is_last: bool      # ultimo tra gli elementi della stessa cartella
+    dirent: Optional[os.DirEntry]   # oppure PathEntry
+
+    def stat(self) -> os.stat_result:
+        """Restituisce lo stat del file, riusando quello già letto dal DirEntry"""
+        return self.dirent.stat()
+
+
+def _sort_key(entry):
+    # Prima le cartelle, poi i file, in ordine alfabetico
+    return (not entry.is_dir, entry.name)
+
+
+def list_entries(root: str, rel_dir: str = '', ignore_dirs: Iterable[str] = (),
+                 ignore_files: Iterable[str] = (), is_ignored: IgnorePredicate = None) -> List[Entry]:
+    """
+    Elenca gli elementi di una sola cartella del progetto
+
+    Args:
+        root: cartella radice del progetto
+        rel_dir: cartella da elencare, relativa alla radice ('' per la radice)
+        ignore_dirs: nomi di cartelle da saltare
+        ignore_files: nomi di file da saltare
+        is_ignored: predicato per altre esclusioni (es. regole .gitignore)
+
+    Returns:
+        Entry ordinati come nell'albero dei file (cartelle prima), oppure
+        una lista vuota se la cartella non è leggibile
+    """
+    if rel_dir:
+        path = os.path.join(root, rel_dir)
+        prefix = rel_dir + '/'
+        depth = rel_dir.count('/') + 1
+    else:
+        path = root
+        prefix = ''
+        depth = 0
+
+    entries = []
+    try:
+        with os.scandir(path) as it:
+            for dirent in it:
+                name = dirent.name
+                if name in ignore_dirs or name in ignore_files:
+                    continue
+                try:
+                    is_dir = dirent.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_ignored is not None and is_ignored(prefix + name, is_dir):
+                    continue
+                entries.append(Entry(prefix + name, name, depth, is_dir, False, dirent))
+    except OSError:
+        return []
+
+    entries.sort(key=_sort_key)
+    if entries:
+        entries[-1] = entries[-1]._replace(is_last=True)
+    return entries
+
+
+def path_ignored(rel_path: str, is_dir: bool, ignore_dirs: Iterable[str] = (),
+                 ignore_files: Iterable[str] = (), is_ignored: IgnorePredicate = None) -> bool:
+    """
+    Indica se un percorso è escluso, controllando anche le cartelle che lo contengono
+
+    Per i percorsi che non arrivano da una visita (es. dal watcher): list_entries
+    controlla ogni elemento solo dopo averne già accettato gli antenati.
+    """
+    parts = rel_path.split('/')
+    for i, name in enumerate(parts):
+        if name in ignore_dirs or name in ignore_files:
+            return True
+        last = i == len(parts) - 1
+        if is_ignored is not None and is_ignored('/'.join(parts[:i + 1]), is_dir if last else True):
+            return True
+    return False
+
+
+def walk_project(root: str, ignore_dirs: Iterable[str] = (), ignore_files: Iterable[str] = (),
+                 start: str = '', is_ignored: IgnorePredicate = None) -> Iterator[Entry]:
+    """
+    Visita ricorsivamente il progetto in pre-ordine
+
+    Le cartelle in ignore_dirs non vengono mai aperte, gli elementi di ogni
+    cartella sono ordinati come nell'albero dei file (cartelle prima) e il
+    tipo di ogni elemento viene letto dal DirEntry senza stat aggiuntive.
+    I link simbolici a cartelle vengono elencati ma non visitati.
+
+    Args:
+        root: cartella radice del progetto
+        ignore_dirs: nomi di cartelle da saltare
+        ignore_files: nomi di file da saltare
+        start: sottocartella da cui iniziare, relativa alla radice
+        is_ignored: predicato per altre esclusioni; le cartelle scartate non
+                    vengono aperte
+
+    Yields:
+        Entry per ogni file e cartella non ignorati
+    """
+    ignore_dirs = frozenset(ignore_dirs)
+    ignore_files = frozenset(ignore_files)
+
+    # Pila degli elenchi di cartelle ancora da completare
+    stack = [iter(list_entries(root, start, ignore_dirs, ignore_files, is_ignored))]
+    while stack:
+        entry = next(stack[-1], None)
+        if entry is None:
+            stack.pop()
+            continue
+
+        yield entry
+
+        if entry.is_dir and not entry.dirent.is_symlink():
+            children = list_entries(root, entry.rel_path, ignore_dirs, ignore_files, is_ignored)
+            if children:
+                stack.append(iter(children))
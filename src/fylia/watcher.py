@@ -0,0 +1,284 @@
+"""
+Osservazione dei cambiamenti nei file del progetto
+Usa inotify su Linux e un polling periodico come ripiego (es. Termux)
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Set
+
+from fylia.walker import IgnorePredicate, path_ignored, walk_project
+
+
+# Costanti di <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+               | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+_EVENT_HEADER = struct.Struct('iIII')
+
+# Callback invocata con l'insieme dei percorsi relativi cambiati.
+# Il percorso '' indica un cambiamento non localizzabile (serve una visita completa)
+ChangeCallback = Callable[[Set[str]], None]
+
+
+class BaseWatcher:
+    """
+    Base comune dei watcher: thread in background e raggruppamento eventi
+
+    Gli eventi vengono accumulati e consegnati insieme alla callback solo
+    dopo `debounce` secondi senza nuovi eventi, e comunque non oltre
+    `max_delay` secondi dal primo evento in attesa. Le cartelle escluse
+    (per nome o da `is_ignored`, es. le regole .gitignore) non vengono
+    osservate né visitate dal polling.
+    """
+
+    def __init__(self, root: str, callback: ChangeCallback, ignore_dirs: Iterable[str] = (),
+                 ignore_files: Iterable[str] = (), debounce: float = 0.2, max_delay: float = 1.0,
+                 is_ignored: IgnorePredicate = None):
+        self.root = os.path.abspath(root)
+        self.callback = callback
+        self.ignore_dirs = frozenset(ignore_dirs)
+        self.ignore_files = frozenset(ignore_files)
+        self.is_ignored = is_ignored
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._pending: Set[str] = set()
+        self._first_event = 0.0
+        self._last_event = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Avvia l'osservazione in un thread daemon"""
+        self._setup()
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Ferma l'osservazione e attende la fine del thread"""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._teardown()
+
+    def _setup(self) -> None:
+        pass
+
+    def _teardown(self) -> None:
+        pass
+
+    def _run(self) -> None:
+        raise NotImplementedError
+
+    def _is_ignored(self, rel_path: str, is_dir: bool) -> bool:
+        return path_ignored(rel_path, is_dir, self.ignore_dirs, self.ignore_files, self.is_ignored)
+
+    def _add_pending(self, rel_path: str) -> None:
+        now = time.monotonic()
+        if not self._pending:
+            self._first_event = now
+        self._last_event = now
+        self._pending.add(rel_path)
+
+    def _flush_due(self) -> bool:
+        """Consegna gli eventi in attesa se il periodo di quiete è trascorso"""
+        if not self._pending:
+            return False
+        now = time.monotonic()
+        if now - self._last_event < self.debounce and now - self._first_event < self.max_delay:
+            return False
+        changes, self._pending = self._pending, set()
+        self.callback(changes)
+        return True
+
+    def _wait_timeout(self, idle: float) -> float:
+        """Tempo di attesa massimo prima di dover ricontrollare gli eventi in attesa"""
+        if not self._pending:
+            return idle
+        now = time.monotonic()
+        return max(0.0, min(self._last_event + self.debounce, self._first_event + self.max_delay) - now)
+
+
+class PollingWatcher(BaseWatcher):
+    """Watcher portabile: confronta periodicamente mtime e dimensione dei file"""
+
+    def __init__(self, root: str, callback: ChangeCallback, interval: float = 1.0, **kwargs):
+        super().__init__(root, callback, **kwargs)
+        self.interval = interval
+        self._snapshot: Dict[str, tuple] = {}
+
+    def _setup(self) -> None:
+        self._snapshot = self._take_snapshot()
+
+    def _take_snapshot(self) -> Dict[str, tuple]:
+        snapshot = {}
+        for entry in walk_project(self.root, self.ignore_dirs, self.ignore_files, is_ignored=self.is_ignored):
+            if entry.is_dir:
+                snapshot[entry.rel_path] = (True, 0, 0)
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            snapshot[entry.rel_path] = (False, st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            current = self._take_snapshot()
+            old = self._snapshot
+            for rel_path, info in current.items():
+                if old.get(rel_path) != info:
+                    self._add_pending(rel_path)
+            for rel_path in old.keys() - current.keys():
+                self._add_pending(rel_path)
+            self._snapshot = current
+            if self._pending:
+                # Un giro di polling raggruppa già tutti i cambiamenti
+                changes, self._pending = self._pending, set()
+                self.callback(changes)
+
+
+class InotifyWatcher(BaseWatcher):
+    """Watcher basato su inotify (solo Linux): nessun costo quando nulla cambia"""
+
+    def __init__(self, root: str, callback: ChangeCallback, **kwargs):
+        super().__init__(root, callback, **kwargs)
+        self._libc = _load_libc()
+        self._fd = -1
+        self._watches: Dict[int, str] = {}
+
+    def _setup(self) -> None:
+        fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._fd = fd
+        try:
+            self._add_tree('')
+        except OSError:
+            self._teardown()
+            raise
+
+    def _teardown(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _add_watch(self, rel_dir: str) -> None:
+        path = os.path.join(self.root, rel_dir) if rel_dir else self.root
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if rel_dir == '':
+                raise OSError(err, os.strerror(err), path)
+            # Cartella sparita o limite di watch raggiunto: la si ignora
+            return
+        self._watches[wd] = rel_dir
+
+    def _add_tree(self, rel_dir: str) -> None:
+        """Aggiunge un watch alla cartella e a tutte le sottocartelle non ignorate"""
+        self._add_watch(rel_dir)
+        for entry in walk_project(self.root, self.ignore_dirs, self.ignore_files, start=rel_dir,
+                                  is_ignored=self.is_ignored):
+            if entry.is_dir and not entry.dirent.is_symlink():
+                self._add_watch(entry.rel_path)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                ready, _, _ = select.select([self._fd], [], [], self._wait_timeout(0.5))
+            except (OSError, ValueError):
+                return
+            if ready:
+                try:
+                    data = os.read(self._fd, 64 * 1024)
+                except BlockingIOError:
+                    data = b''
+                except OSError:
+                    return
+                self._handle(data)
+            self._flush_due()
+
+    def _handle(self, data: bytes) -> None:
+        """Decodifica un blocco di eventi inotify"""
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # Eventi persi: il modello va ricostruito da zero
+                self._add_pending('')
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+
+            rel_dir = self._watches.get(wd)
+            if rel_dir is None:
+                continue
+            if not name:
+                # Evento sulla cartella osservata stessa (eliminata o spostata)
+                if rel_dir and mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    self._add_pending(rel_dir)
+                continue
+
+            rel_path = f"{rel_dir}/{name}" if rel_dir else name
+            if self._is_ignored(rel_path, bool(mask & IN_ISDIR)):
+                continue
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self._add_tree(rel_path)
+            self._add_pending(rel_path)
+
+
+def _load_libc():
+    """Carica la libc e verifica che esponga le funzioni inotify"""
+    if not sys.platform.startswith('linux'):
+        raise OSError("inotify è disponibile solo su Linux")
+    libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+    if not hasattr(libc, 'inotify_init1'):
+        raise OSError("libc senza supporto inotify")
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+def create_watcher(root: str, callback: ChangeCallback, **kwargs) -> BaseWatcher:
+    """
+    Crea e avvia il watcher migliore disponibile
+
+    Prova inotify e, se non è disponibile o fallisce (es. su alcune
+    cartelle condivise di Android), ripiega sul polling.
+    """
+    polling_options = {'interval': kwargs.pop('interval', 1.0)}
+    try:
+        watcher = InotifyWatcher(root, callback, **kwargs)
+        watcher.start()
+        return watcher
+    except OSError:
+        watcher = PollingWatcher(root, callback, **polling_options, **kwargs)
+        watcher.start()
+        return watcher
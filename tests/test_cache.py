@@ -0,0 +1,65 @@
+"""Test per la cache persistente dei file"""
+
+import os
+import tempfile
+from pathlib import Path
+
+from fylia.cache import FileCache
+
+
+def _write(path: Path, content: str, mtime_ns: int) -> os.stat_result:
+    path.write_text(content)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+    return path.stat()
+
+
+def test_cache_hit_and_miss():
+    """Test riuso dei record per file invariati"""
+    calls = []
+
+    def compute(data):
+        calls.append(data)
+        return len(data)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        src = root / "a.py"
+        st = _write(src, "x = 1\n", 1_000_000_000)
+
+        cache = FileCache(root / "cache", "test", 1)
+        assert cache.get("a.py", src, st.st_mtime_ns, st.st_size, compute) == 6
+        assert cache.save()
+
+        cache = FileCache(root / "cache", "test", 1)
+        assert cache.get("a.py", src, st.st_mtime_ns, st.st_size, compute) == 6
+        assert len(calls) == 1
+        assert cache.hits == 1
+
+        # Cambia solo mtime: l'hash coincide, nessuna rianalisi
+        st = _write(src, "x = 1\n", 2_000_000_000)
+        assert cache.get("a.py", src, st.st_mtime_ns, st.st_size, compute) == 6
+        assert len(calls) == 1
+
+        st = _write(src, "x = 22\n", 3_000_000_000)
+        assert cache.get("a.py", src, st.st_mtime_ns, st.st_size, compute) == 7
+        assert len(calls) == 2
+
+
+def test_cache_version_and_eviction():
+    """Test invalidazione per versione ed eliminazione voci obsolete"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        cache = FileCache(root, "test", 1)
+        cache.put("a.py", 1, 1, "h1", "A")
+        cache.put("b.py", 1, 1, "h2", "B")
+        cache.save()
+
+        cache = FileCache(root, "test", 1)
+        assert cache.lookup("a.py", 1, 1) is not None
+        cache.save()
+
+        cache = FileCache(root, "test", 1)
+        assert set(cache.entries) == {"a.py"}
+
+        cache = FileCache(root, "test", 2)
+        assert cache.entries == {}
@@ -0,0 +1,67 @@
+"""Test per l'avvio dei comandi da riga di comando"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+SRC = str(Path(__file__).resolve().parents[1] / "src")
+
+# Esegue il comando come lo script installato e riporta i moduli caricati
+LAUNCHER = """
+import json, sys
+from fylia.__main__ import main
+sys.argv[0] = 'fylia'
+try:
+    main()
+except SystemExit:
+    pass
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+def run_fylia(args, cwd):
+    env = dict(os.environ, PYTHONPATH=SRC + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    result = subprocess.run([sys.executable, "-c", LAUNCHER] + args, cwd=cwd, env=env,
+                            capture_output=True, text=True, check=True)
+    output, _, modules = result.stdout.rstrip("\n").rpartition("\n")
+    return output, set(json.loads(modules))
+
+
+def test_version_without_click():
+    """Test fylia --version risponde senza importare click"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        output, modules = run_fylia(["--version"], tmpdir)
+        assert output == "fylia, version 0.1.0"
+        assert "click" not in modules
+
+
+def test_commands_skip_tui_and_providers():
+    """Test i comandi da riga di comando non caricano textual, provider e multiprocessing"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (Path(tmpdir) / "modulo.py").write_text("class Persona:\n    pass\n")
+        for args in (["map", "."], ["def", "Persona"], ["deps"], ["context", "Persona"]):
+            output, modules = run_fylia(args, tmpdir)
+            assert output
+            loaded = {name.partition(".")[0] for name in modules} | {
+                name for name in modules if name.startswith("fylia.")}
+            for heavy in ("textual", "rich", "multiprocessing", "fylia.tui", "fylia.providers"):
+                assert heavy not in loaded, (args, heavy)
+
+
+def test_apply_then_undo():
+    """Test una patch applicata con fylia apply si annulla con fylia undo"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "modulo.py").write_text("x = 1\n")
+        (root / "modifica.diff").write_text(
+            "--- a/modulo.py\n+++ b/modulo.py\n@@ -1 +1 @@\n-x = 1\n+x = 2\n")
+        output, _ = run_fylia(["apply", "modifica.diff", "-m", "prova"], tmpdir)
+        assert "modulo.py" in output
+        assert (root / "modulo.py").read_text() == "x = 2\n"
+
+        output, _ = run_fylia(["undo"], tmpdir)
+        assert "prova" in output
+        assert (root / "modulo.py").read_text() == "x = 1\n"
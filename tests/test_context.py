@@ -0,0 +1,122 @@
+"""Test per il contesto del progetto inviato con le richieste"""
+
+import tempfile
+from pathlib import Path
+
+from fylia.context import ContextBuilder, estimate_tokens, split_terms
+from fylia.deps import DependencyGraph
+from fylia.index import SymbolIndex
+from fylia.providers.base import split_prompt
+from fylia.providers.context import ContextProvider
+from fylia.providers.mock import MockProvider
+
+
+FILES = {
+    "app/__init__.py": "",
+    "app/storage.py": (
+        "class FileCache:\n"
+        "    def load(self):\n"
+        "        return {}\n"
+        "\n"
+        "\n"
+        "def default_cache_dir(root):\n"
+        "    return root\n"
+    ),
+    "app/service.py": "from app.storage import FileCache\n\n\ndef run():\n    return FileCache().load()\n",
+    "app/unrelated.py": "def parse_arguments():\n    return []\n",
+}
+
+
+def make_builder(root: Path) -> ContextBuilder:
+    for name, content in FILES.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    index = SymbolIndex(str(root), use_cache=False).update()
+    graph = DependencyGraph(str(root), use_cache=False, use_git=False).update()
+    return ContextBuilder(index, graph)
+
+
+def test_split_terms_and_estimate():
+    """Test parole delle richieste e stima dei token"""
+    assert split_terms("Aggiorna la FileCache e default_cache_dir") == [
+        "aggiorna", "filecache", "file", "cache", "default_cache_dir", "default", "dir"]
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcde") == 2
+
+
+def test_rank_pack_and_cache():
+    """Test ordine per nome e grafo, rispetto del budget e cache dei contesti"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        builder = make_builder(root)
+
+        packed = builder.build("perché FileCache non salva?")
+        # Il file che definisce il simbolo prima, poi chi lo importa
+        assert packed.files[:2] == ["app/storage.py", "app/service.py"]
+        assert "app/unrelated.py" not in packed.files
+        assert "class FileCache:\n    def load(self):" in packed.text
+        assert packed.tokens <= builder.budget and not packed.cached
+
+        # Stesse parole in altro ordine: servito dalla cache
+        assert builder.build("FileCache perché non salva").cached
+        assert builder.build("nessuna corrispondenza qui").text == ""
+
+        # Budget stretto: solo la prima riga della definizione
+        small = builder.build("FileCache", budget=40)
+        assert small.tokens <= 40
+        assert "riga 1: class FileCache" in small.text
+
+        # Un file cambiato invalida la cache e aggiorna i nomi
+        (root / "app/unrelated.py").write_text("def save_cache():\n    pass\n")
+        builder.index.update_files(["app/unrelated.py"])
+        packed = builder.build("FileCache perché non salva")
+        assert not packed.cached
+        assert builder.build("save_cache").files[0] == "app/unrelated.py"
+
+
+def test_method_and_class_not_repeated():
+    """Test un metodo più pertinente della sua classe non viene ripetuto nel codice della classe"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "tx.py").write_text(
+            "class Transaction:\n"
+            "    def __init__(self):\n"
+            "        self.staged = []\n"
+            "\n"
+            "    def rollback(self):\n"
+            "        self.staged.clear()\n"
+            "\n"
+            "    def commit(self):\n"
+            "        return self.staged\n"
+        )
+        # Altri nomi con 'transaction': 'rollback' pesa di più
+        (root / "errors.py").write_text(
+            "class TransactionError(Exception):\n    pass\n\n\n"
+            "def open_transaction():\n    pass\n\n\n"
+            "def close_transaction():\n    pass\n"
+        )
+        index = SymbolIndex(tmpdir, use_cache=False).update()
+        graph = DependencyGraph(tmpdir, use_cache=False, use_git=False).update()
+        text = ContextBuilder(index, graph).build("transaction rollback").text
+
+        assert text.index("method Transaction.rollback") < text.index("class Transaction\n")
+        assert text.count("self.staged.clear()") == 1
+        assert "    ... (righe 5-6, già sopra)\n" in text
+        assert "    def commit(self):" in text
+
+
+def test_context_provider_sends_context():
+    """Test prompt con contesto: il provider mock sceglie ancora dalla richiesta"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        builder = make_builder(Path(tmpdir))
+        provider = ContextProvider(MockProvider(), lambda text: builder.build(text).text)
+
+        context, request = split_prompt(provider.prompt("dove si usa default_cache_dir"))
+        assert request == "dove si usa default_cache_dir"
+        assert "File: app/storage.py" in context
+        assert split_prompt("ciao") == ("", "ciao")
+
+        # 'File' compare nel contesto ma non nella richiesta
+        response = provider.generate_response("dove si usa default_cache_dir")
+        assert f"Contesto ricevuto: circa {estimate_tokens(context)} token" in response
@@ -0,0 +1,65 @@
+"""Test per il daemon di progetto (fylia serve) e il suo client"""
+
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from fylia.daemon import connect, default_socket_path, query
+from fylia.mapgen import CodeMapGenerator
+from fylia.mapstream import iter_json, iter_text
+from fylia.server import FyliaServer
+
+
+def start_server(root: Path) -> tuple:
+    (root / "modulo.py").write_text("class Persona:\n    def saluta(self):\n        pass\n")
+    (root / "uso.py").write_text("from modulo import Persona\n\nPersona().saluta()\n")
+    server = FyliaServer(root, use_git=False, idle_timeout=0, memory_limit=0)
+    server.start()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, thread
+
+
+def test_map_and_symbols_match_local():
+    """Test il daemon risponde come il calcolo in locale e segue i cambiamenti"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        server, thread = start_server(root)
+        try:
+            generator = CodeMapGenerator(use_cache=False, use_git=False)
+            local_text = "".join(line + '\n' for line in iter_text(generator, tmpdir))
+            assert query(root, 'map', format='text', use_git=False) == local_text
+            assert query(root, 'map', format='json', use_git=False) == "".join(iter_json(generator, tmpdir))
+
+            assert query(root, 'def', symbol="Persona") == [["modulo.py", 1, 0, "class", "Persona"]]
+            assert {loc[0] for loc in query(root, 'refs', symbol="Persona")} == {"uso.py"}
+            assert query(root, 'deps', target="uso.py") == {'found': ["modulo.py"]}
+
+            # I file cambiati arrivano al daemon tramite il watcher
+            (root / "nuovo.py").write_text("def altra():\n    pass\n")
+            deadline = time.monotonic() + 5
+            while not query(root, 'def', symbol="altra") and time.monotonic() < deadline:
+                time.sleep(0.1)
+            assert query(root, 'def', symbol="altra") == [["nuovo.py", 1, 0, "function", "altra"]]
+        finally:
+            server.shutdown()
+            thread.join(5)
+        assert not default_socket_path(root).exists()
+
+
+def test_fallback_and_shutdown():
+    """Test senza daemon o con opzioni diverse il client torna None"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        assert query(root, 'def', symbol="Persona") is None
+
+        server, thread = start_server(root)
+        # Il daemon visita senza git: una richiesta con git va eseguita in locale
+        assert query(root, 'map', format='text', use_git=True) is None
+        with connect(root) as client:
+            assert client.request('ping')['root'] == str(root.resolve())
+            assert client.request('shutdown') is True
+        thread.join(5)
+        assert not thread.is_alive()
+        assert connect(root) is None
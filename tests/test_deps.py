@@ -0,0 +1,132 @@
+"""Test per il grafo delle dipendenze tra moduli"""
+
+import tempfile
+from pathlib import Path
+
+from fylia.deps import DependencyGraph, extract_imports, module_name
+
+
+def write(root: Path, files: dict) -> None:
+    for name, content in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+
+def test_extract_imports_and_module_names():
+    """Test estrazione degli import e nomi dei moduli dai pacchetti"""
+    source = b"import os, a.b\nfrom . import c\nfrom ..d import e as f\ndef g():\n    import h\n"
+    assert extract_imports(source) == [
+        ['os', 0, []], ['a.b', 0, []], ['', 1, ['c']], ['d', 2, ['e']], ['h', 0, []],
+    ]
+    assert extract_imports(b"def (\n") is None
+
+    packages = {'src/app', 'src/app/sub'}
+    assert module_name('src/app/sub/x.py', packages.__contains__) == ('app.sub.x', 'src')
+    assert module_name('src/app/__init__.py', packages.__contains__) == ('app', 'src')
+    assert module_name('script.py', packages.__contains__) == ('script', '')
+
+
+def test_graph_queries():
+    """Test risoluzione degli import, dipendenze inverse, chiusure e cicli"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        write(root, {
+            "src/app/__init__.py": "",
+            "src/app/core.py": "import os\nfrom app import util\n",
+            "src/app/util.py": "from .sub.leaf import x\n",
+            "src/app/sub/__init__.py": "",
+            "src/app/sub/leaf.py": "from .. import core\n",
+            "src/app/cli.py": "import app.core\nfrom app.missing import y\n",
+            "tests/test_core.py": "from app.core import run\n",
+        })
+        graph = DependencyGraph(tmpdir, use_cache=False, use_git=False).update()
+
+        assert graph.dependencies("src/app/core.py") == ["src/app/util.py"]
+        assert graph.dependencies("app.cli") == ["src/app/__init__.py", "src/app/core.py"]
+        assert graph.dependents("app.core") == ["src/app/cli.py", "src/app/sub/leaf.py", "tests/test_core.py"]
+        assert graph.dependencies("tests/test_core.py", transitive=True) == [
+            "src/app/core.py", "src/app/sub/leaf.py", "src/app/util.py",
+        ]
+        assert graph.dependents("src/app/util.py", transitive=True) == [
+            "src/app/cli.py", "src/app/core.py", "src/app/sub/leaf.py", "tests/test_core.py",
+        ]
+        assert graph.cycles() == [["src/app/core.py", "src/app/sub/leaf.py", "src/app/util.py"]]
+        assert graph.dependencies("non.esiste") == []
+
+
+def test_incremental_updates():
+    """Test aggiornamento dei soli archi toccati da modifiche, nuovi file e rimozioni"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        write(root, {
+            "pkg/__init__.py": "",
+            "pkg/a.py": "from pkg import b\n",
+            "pkg/b.py": "",
+            "pkg/c.py": "from pkg.nuovo import f\n",
+        })
+        graph = DependencyGraph(tmpdir, use_cache=False, use_git=False).update()
+        assert graph.dependents("pkg/b.py", transitive=True) == ["pkg/a.py"]
+        assert graph.dependencies("pkg/c.py") == ["pkg/__init__.py"]
+
+        # Il modulo prima mancante sostituisce il ripiego sul pacchetto
+        write(root, {"pkg/nuovo.py": "import pkg.b\n"})
+        touched = graph.update_files({"pkg/nuovo.py"})
+        assert touched == {"pkg/nuovo.py", "pkg/c.py", "pkg/__init__.py", "pkg/b.py"}
+        assert graph.dependencies("pkg/c.py") == ["pkg/nuovo.py"]
+        assert graph.dependents("pkg/b.py", transitive=True) == ["pkg/a.py", "pkg/c.py", "pkg/nuovo.py"]
+
+        write(root, {"pkg/a.py": "import pkg.c\n"})
+        graph.update_files({"pkg/a.py"})
+        assert graph.dependencies("pkg/a.py") == ["pkg/c.py"]
+        assert graph.dependents("pkg/b.py", transitive=True) == ["pkg/a.py", "pkg/c.py", "pkg/nuovo.py"]
+
+        (root / "pkg" / "nuovo.py").unlink()
+        graph.update_files({"pkg/nuovo.py"})
+        assert graph.dependencies("pkg/c.py") == ["pkg/__init__.py"]
+        assert graph.dependents("pkg/b.py", transitive=True) == []
+
+        # Senza __init__.py i moduli cambiano nome e gli import si risolvono di nuovo
+        (root / "pkg" / "__init__.py").unlink()
+        graph.update_files({"pkg/__init__.py"})
+        assert graph.module_of("pkg/a.py") == "a"
+        assert graph.dependencies("pkg/a.py") == []
+
+
+def test_new_file_without_imports():
+    """Test un file nuovo senza import interni è interrogabile subito"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        write(root, {"pkg/__init__.py": "", "pkg/a.py": "import pkg\n"})
+        graph = DependencyGraph(tmpdir, use_cache=False, use_git=False).update()
+        assert graph.dependents("pkg/__init__.py") == ["pkg/a.py"]
+
+        write(root, {"pkg/c.py": "x = 1\n"})
+        graph.update_files({"pkg/c.py"})
+        assert graph.dependents("pkg/c.py") == []
+        assert graph.dependencies("pkg/c.py", transitive=True) == []
+        assert graph.cycles() == []
+
+        (root / "pkg" / "c.py").unlink()
+        graph.update_files({"pkg/c.py"})
+        write(root, {"pkg/d.py": "", "pkg/e.py": ""})
+        graph.update_files({"pkg/d.py", "pkg/e.py"})
+        assert graph.dependents("pkg/e.py", transitive=True) == []
+        assert graph.cycles() == []
+
+
+def test_watcher_updates_skip_gitignored_paths():
+    """Test file e cartelle nuovi sotto una cartella di .gitignore restano fuori dal grafo"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        write(root, {".gitignore": "build/\n", "app.py": "import os\n"})
+        (root / ".git").mkdir()
+        graph = DependencyGraph(tmpdir, use_cache=False).update()
+        assert graph.stats()['files'] == 1
+
+        write(root, {"build/lib/gen.py": "import app\n"})
+        graph.update_files({"build/lib/gen.py"})
+        write(root, {"src/build/gen.py": "import app\n"})
+        graph.update_files({"build", "src/build"})
+        assert graph.stats()['files'] == 1
+        assert graph.dependents("app.py") == []
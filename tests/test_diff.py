@@ -0,0 +1,98 @@
+"""Test per il calcolo dei diff minimi"""
+
+import difflib
+import io
+import random
+
+import pytest
+
+from fylia.diff import intern_lines, matching_blocks, split_lines, unified_diff
+from fylia.unidiff import apply_hunks, parse_patch
+
+
+def _roundtrip(old: str, new: str, algorithm: str) -> str:
+    lines = unified_diff(split_lines(old), split_lines(new), context=3, algorithm=algorithm)
+    if not lines:
+        return old
+    out = io.BytesIO()
+    patch = "\n".join(lines) + "\n"
+    apply_hunks(io.BytesIO(old.encode()), out, parse_patch(patch)[0].hunks, fuzz=0, max_offset=0)
+    return out.getvalue().decode()
+
+
+def test_split_lines():
+    """Test divisione in righe con e senza newline finale"""
+    assert split_lines("") == []
+    assert split_lines("a\nb\n") == ["a\n", "b\n"]
+    assert split_lines("a\nb") == ["a\n", "b"]
+    assert split_lines("a\r\n\x0cb\n") == ["a\r\n", "\x0cb\n"]
+
+
+def test_unified_diff_format():
+    """Test intestazioni, hunk e marcatore di newline mancante"""
+    old = "uno\ndue\ntre\n"
+    new = "uno\nDUE\ntre"
+    
+    lines = unified_diff(split_lines(old), split_lines(new), "a/f.txt", "b/f.txt")
+    
+    assert lines == [
+        "--- a/f.txt",
+        "+++ b/f.txt",
+        "@@ -1,3 +1,3 @@",
+        " uno",
+        "-due",
+        "-tre",
+        "+DUE",
+        "+tre",
+        "\\ No newline at end of file",
+    ]
+    assert unified_diff(split_lines(old), split_lines(old)) == []
+
+
+@pytest.mark.parametrize("algorithm", ["histogram", "myers"])
+def test_minimal_like_difflib(algorithm):
+    """Test che il numero di righe uguali non sia inferiore a quello di difflib"""
+    rng = random.Random(7)
+    for _ in range(200):
+        a = [rng.choice("abcde") for _ in range(rng.randint(0, 30))]
+        b = list(a)
+        for _ in range(rng.randint(0, 6)):
+            pos = rng.randint(0, len(b))
+            if b and rng.random() < 0.5:
+                del b[min(pos, len(b) - 1)]
+            else:
+                b.insert(pos, rng.choice("abcdef"))
+        a_ids, b_ids = intern_lines(a, b)
+        ours = sum(n for _, _, n in matching_blocks(a_ids, b_ids, algorithm))
+        if algorithm == "myers":
+            # Myers è minimo: nessuna sottosequenza comune più lunga
+            theirs = sum(m.size for m in difflib.SequenceMatcher(None, a, b, autojunk=False).get_matching_blocks())
+            assert ours >= theirs
+        for i, j, n in matching_blocks(a_ids, b_ids, algorithm):
+            assert a[i:i + n] == b[j:j + n]
+
+
+@pytest.mark.parametrize("algorithm", ["histogram", "myers"])
+def test_roundtrip_with_apply(algorithm):
+    """Test che il diff generato riapplicato ricostruisca il nuovo testo"""
+    rng = random.Random(11)
+    words = ["def f():", "    pass", "", "x = 1", "return x", "}"]
+    for _ in range(150):
+        old_lines = [rng.choice(words) for _ in range(rng.randint(0, 40))]
+        new_lines = list(old_lines)
+        for _ in range(rng.randint(1, 5)):
+            pos = rng.randint(0, len(new_lines))
+            if new_lines and rng.random() < 0.5:
+                del new_lines[min(pos, len(new_lines) - 1)]
+            else:
+                new_lines.insert(pos, rng.choice(words + ["nuova"]))
+        old = "\n".join(old_lines) + ("\n" if rng.random() < 0.7 and old_lines else "")
+        new = "\n".join(new_lines) + ("\n" if rng.random() < 0.7 and new_lines else "")
+        
+        assert _roundtrip(old, new, algorithm) == new
+
+
+def test_unknown_algorithm():
+    """Test errore per algoritmo sconosciuto"""
+    with pytest.raises(ValueError):
+        matching_blocks([1], [2], "patience")
@@ -0,0 +1,67 @@
+"""Test per le modifiche puntuali in blocco"""
+
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from fylia.edits import Edit, EditError, apply_edits, locate_edits
+from fylia.patcher import Patcher
+
+
+SOURCE = """def uno():
+    return 1
+
+
+def due():
+    return 1
+"""
+
+
+def test_apply_edits_with_anchors():
+    """Test sostituzioni, ancore, inserimenti e replace_all sul contenuto originale"""
+    result = apply_edits(SOURCE, [
+        Edit("return 1", "return 2", anchor="def due"),
+        Edit("def uno", "def primo"),
+        Edit("", "    # inizio\n", anchor="def due():\n"),
+        Edit("()", "(x)", replace_all=True),
+    ])
+    assert result == (
+        "def primo(x):\n    return 1\n\n\n"
+        "def due(x):\n    # inizio\n    return 2\n"
+    )
+
+    # Le posizioni si riferiscono al testo originale, non a quello già modificato
+    assert locate_edits("ab", [Edit("b", "a"), Edit("a", "b")]) == [(0, 1, "b"), (1, 2, "a")]
+    assert apply_edits("x", []) == "x"
+
+
+def test_edits_rejected():
+    """Test testo ambiguo, assente, ancora ripetuta e modifiche sovrapposte"""
+    cases = [
+        ([Edit("return 1", "return 2")], "più volte"),
+        ([Edit("assente", "x")], "non trovato"),
+        ([Edit("return", "x", anchor="def")], "ancora presente più volte"),
+        ([Edit("def uno", "x"), Edit("uno()", "y")], "si sovrappongono"),
+        ([Edit("", "x")], "vuoto"),
+    ]
+    for edits, message in cases:
+        with pytest.raises(EditError, match=message):
+            apply_edits(SOURCE, edits)
+
+
+def test_patcher_edit_file_is_all_or_nothing():
+    """Test Patcher.edit_file: una scrittura, nessuna modifica se una fallisce"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "mod.py"
+        path.write_text(SOURCE)
+        patcher = Patcher(durable=False)
+
+        assert not patcher.edit_file(str(path), [Edit("def uno", "def primo"), Edit("return 1", "x")])
+        assert path.read_text() == SOURCE
+
+        assert patcher.edit_file(str(path), [Edit("def uno", "def primo"),
+                                             Edit("return 1", "return 0", anchor="def due")])
+        assert path.read_text() == SOURCE.replace("def uno", "def primo").replace(
+            "    return 1\n", "    return 0\n").replace("return 0", "return 1", 1)
+        assert [p.name for p in Path(tmpdir).iterdir()] == ["mod.py"]
@@ -0,0 +1,103 @@
+"""Test per gli estrattori di simboli"""
+
+import tempfile
+from pathlib import Path
+
+from fylia import extractors
+from fylia.extractors import (Extractor, extract_javascript, extract_markdown, extract_python_shallow,
+                              extract_python_symbols, extract_shell, extract_toml, extract_yaml,
+                              register_extractor)
+from fylia.mapgen import CodeMapGenerator
+
+
+def test_python_shallow_matches_ast():
+    """Test la modalità shallow trova gli stessi simboli dell'AST"""
+    sources = sorted(Path(extractors.__file__).parent.glob("*.py"))
+    assert sources
+    for path in sources:
+        data = path.read_bytes()
+        assert extract_python_shallow(data, str(path)) == extract_python_symbols(data, str(path)), path
+
+    tricky = (b'"""\ndef nella_docstring():\n    pass\n"""\n'
+              b'class A(\n    Base,\n):\n    x = "def finto(): \\\n    pass"\n'
+              b'    if True:\n        def condizionale(self): pass\n'
+              b'    def m(self):\n        def interna(): pass\n'
+              b'    async def asincrono(self): pass\n'
+              b'    @property\n    def p(self): pass\n'
+              b'# def commento(): pass\n'
+              b'if True:\n    def annidata(): pass\n'
+              b'def f(): pass\n')
+    assert extract_python_shallow(tricky) == extract_python_symbols(tricky) == {
+        'classes': [['A', ['m', 'p']]], 'functions': ['f'],
+    }
+
+
+def test_javascript_and_typescript():
+    """Test classi, metodi e funzioni JS/TS, ignorando stringhe e commenti"""
+    source = b"""
+// class Finta {
+export default class Persona extends Base {
+  static crea(nome: string): Persona { return new Persona(nome); }
+  constructor(nome) { super(); this.nome = `ciao ${nome}`; }
+  async saluta() {
+    if (this.nome) { stampa("}"); }
+  }
+}
+interface Forma {
+  area(): number;
+}
+function somma(a, b) { return a + b; }
+export const moltiplica = (a: number, b: number): number => a * b;
+const dati = { chiave: 1 };
+"""
+    assert extract_javascript(source) == {
+        'classes': [['Persona', ['crea', 'constructor', 'saluta']], ['Forma', ['area']]],
+        'functions': ['somma', 'moltiplica'],
+    }
+
+
+def test_shell_toml_yaml_markdown():
+    """Test funzioni shell, tabelle TOML, chiavi YAML e titoli Markdown"""
+    shell = b"#!/bin/sh\npulisci() {\n  rm -f x\n}\nfunction installa {\n  :\n}\npulisci \"$@\"\n"
+    assert extract_shell(shell) == {'functions': ['pulisci', 'installa']}
+
+    toml = b'nome = "x"\n[project]\nname = "y"\n[tool.pytest.ini_options]\n[[bin]]\n[[bin]]\n'
+    assert extract_toml(toml) == {
+        'sections': [[1, 'nome'], [1, 'project'], [3, 'tool.pytest.ini_options'], [1, 'bin']],
+    }
+
+    yaml = b"name: CI\non:\n  push:\n    branches: [main]\njobs:\n  build:\n    steps:\n      - run: a\n  test:\n"
+    assert extract_yaml(yaml) == {
+        'sections': [[1, 'name'], [1, 'on'], [2, 'push'], [1, 'jobs'], [2, 'build'], [2, 'test']],
+    }
+
+    markdown = (b"---\ntitle: x\n---\n# Titolo\n\nTesto\n\nSottotitolo\n-----------\n\n"
+                b"```\n# non un titolo\n```\n## Due ##\n\n---\n")
+    assert extract_markdown(markdown) == {'sections': [[1, 'Titolo'], [2, 'Sottotitolo'], [2, 'Due']]}
+
+    assert extract_markdown(b"\xff\xfe") is None
+
+
+def _extract_righe(source: bytes, filename: str = '<unknown>') -> dict:
+    return {'sections': [[1, line] for line in source.decode().splitlines() if line]}
+
+
+def test_registered_extractor_in_map(monkeypatch):
+    """Test un estrattore registrato entra nella mappa, con una cache separata"""
+    monkeypatch.setattr(extractors, '_REGISTRY', dict(extractors._REGISTRY))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "README.md").write_text("# Progetto\n\n## Uso\n")
+        (root / "note.txt").write_text("prima\nseconda\n")
+
+        default = CodeMapGenerator()
+        mappa = default.generate_map(tmpdir)
+        assert "§ Progetto" in mappa and "§ Uso" in mappa
+        assert "§ prima" not in mappa
+
+        register_extractor(['.txt'], Extractor('righe', _extract_righe))
+        generator = CodeMapGenerator()
+        assert generator.cache_name() != default.cache_name()
+        assert "§ prima" in generator.generate_map(tmpdir)
+        assert (root / ".fylia" / "cache" / f"{generator.cache_name()}.json").exists()
+        assert CodeMapGenerator(python_mode='shallow').cache_name() not in ('mapgen', generator.cache_name())
@@ -0,0 +1,110 @@
+"""Test per l'elenco dei file basato su .git/index e .gitignore"""
+
+import os
+import struct
+import tempfile
+import time
+from pathlib import Path
+
+from fylia.gitindex import GitEnumerator, GitIgnore, parse_ignore, read_index
+from fylia.mapgen import CodeMapGenerator
+
+
+def write_index(path: Path, names, gitlinks=()) -> None:
+    """Scrive un index minimo in formato 2 (solo i campi letti da read_index)"""
+    data = struct.pack('>4sII', b'DIRC', 2, len(names) + len(gitlinks))
+    for name in sorted(list(names) + list(gitlinks)):
+        mode = 0o160000 if name in gitlinks else 0o100644
+        encoded = name.encode('utf-8')
+        entry = struct.pack('>10I', 0, 0, 0, 0, 0, 0, mode, 0, 0, 0) + b'\0' * 20
+        entry += struct.pack('>H', len(encoded)) + encoded
+        entry += b'\0' * (8 - len(entry) % 8)
+        data += entry
+    path.write_bytes(data + b'\0' * 20)
+
+
+def age(root: Path) -> None:
+    """Porta indietro gli mtime, fuori dalla finestra in cui la cache non si fida"""
+    past = 1_600_000_000
+    for directory, _, _ in os.walk(root):
+        os.utime(directory, (past, past))
+    os.utime(root / ".git" / "index", (past, past))
+
+
+def test_read_index_v2():
+    """Test lettura dei percorsi tracciati, senza submodule"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        index = Path(tmpdir) / "index"
+        write_index(index, ["src/a.py", "README.md", "src/dati_àè.txt"], gitlinks=["vendor/lib"])
+        assert read_index(index) == ["README.md", "src/a.py", "src/dati_àè.txt"]
+
+
+def test_gitignore_semantics():
+    """Test ancore, negazioni, cartelle, ** e file tracciati"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / ".git" / "info").mkdir(parents=True)
+        (root / ".git" / "info" / "exclude").write_text("locale\n")
+        (root / "sub").mkdir()
+        (root / ".gitignore").write_text(
+            "# commento\n*.log\n!importante.log\nbuild/\n/dist\ndocs/**/tmp\n**/cache\n"
+        )
+        (root / "sub" / ".gitignore").write_text("*.secret\n!*.log\n")
+
+        ignore = GitIgnore(root, root / ".git", ["build/tenuto.txt"])
+        assert ignore.is_ignored("a.log", False)
+        assert not ignore.is_ignored("importante.log", False)
+        assert ignore.is_ignored("x/b.log", False)
+        assert not ignore.is_ignored("sub/c.log", False)       # negato più in profondità
+        assert ignore.is_ignored("sub/k.secret", False)
+        assert ignore.is_ignored("dist", True)
+        assert not ignore.is_ignored("src/dist", True)          # ancorato alla radice
+        assert ignore.is_ignored("docs/a/b/tmp", True)
+        assert ignore.is_ignored("a/b/cache", True)
+        assert ignore.is_ignored("locale", False)
+        assert not ignore.is_ignored("build", False)            # solo cartelle
+        # Cartella esclusa ma con file tracciati: visitata, il resto escluso
+        assert not ignore.is_ignored("build", True)
+        assert not ignore.is_ignored("build/tenuto.txt", False)
+        assert ignore.is_ignored("build/nuovo.txt", False)
+
+    assert parse_ignore(["\n", "# x\n", "   \n"]) == []
+
+
+def test_enumerator_uses_gitignore_and_cache():
+    """Test elenco filtrato, riuso della cache e cartelle cambiate"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / ".git").mkdir()
+        for name in ["src/a.py", "src/b.py", "build/out.py", "build/tenuto.py", "debug.log"]:
+            (root / name).parent.mkdir(parents=True, exist_ok=True)
+            (root / name).write_text("x = 1\n")
+        (root / ".gitignore").write_text("build/\n*.log\n")
+        write_index(root / ".git" / "index", [".gitignore", "src/a.py", "build/tenuto.py"])
+        age(root)
+        cache_dir = root / ".fylia" / "cache"
+
+        def walk():
+            enumerator = GitEnumerator.for_root(root, {'.git', '.fylia'}, cache_dir=cache_dir)
+            return enumerator, [e.rel_path for e in enumerator.walk()]
+
+        first, paths = walk()
+        assert paths == ["build", "build/tenuto.py", "src", "src/a.py", "src/b.py", ".gitignore"]
+        assert first.relisted == 3
+        age(root)   # la prima visita ha creato .fylia nella radice
+
+        # Nulla è cambiato: nessuna cartella rielencata e index non letto
+        second, again = walk()
+        assert again == paths
+        assert second.relisted == 0 and second._ignore is None
+
+        (root / "src" / "c.py").write_text("")
+        os.utime(root / "src", (time.time() - 30, time.time() - 30))
+        third, changed = walk()
+        assert third.relisted == 1
+        assert "src/c.py" in changed
+
+        # Il modello della mappa usa lo stesso elenco
+        mappa = CodeMapGenerator(use_cache=False).generate_map(tmpdir)
+        assert "tenuto.py" in mappa and "out.py" not in mappa and "debug.log" not in mappa
+        assert "out.py" in CodeMapGenerator(use_cache=False, use_git=False).generate_map(tmpdir)
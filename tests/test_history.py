@@ -0,0 +1,73 @@
+"""Test per la cronologia della chat su disco"""
+
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from fylia.history import ChatHistory, format_message
+
+
+def test_append_and_reopen():
+    """Test che i messaggi sopravvivano alla chiusura"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "chat.jsonl"
+        history = ChatHistory(path, capacity=5)
+        for i in range(12):
+            assert history.append("user", f"messaggio {i}") == i
+        history.close()
+        
+        reopened = ChatHistory(path, capacity=5)
+        assert len(reopened) == 12
+        assert reopened.first_in_memory == 7
+        assert [m["text"] for m in reopened.tail(3)] == ["messaggio 9", "messaggio 10", "messaggio 11"]
+        assert format_message(reopened[-1]) == "Tu: messaggio 11"
+
+
+def test_page_from_disk_and_memory():
+    """Test pagine lette dal log, dalla memoria o da entrambi"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        history = ChatHistory(Path(tmpdir) / "chat.jsonl", capacity=4)
+        for i in range(10):
+            history.append("assistant" if i % 2 else "user", f"m{i}")
+        
+        assert [m["text"] for m in history.page(0, 3)] == ["m0", "m1", "m2"]
+        assert [m["text"] for m in history.page(4, 8)] == ["m4", "m5", "m6", "m7"]
+        assert [m["text"] for m in history.page(8, 50)] == ["m8", "m9"]
+        assert [m["text"] for m in history] == [f"m{i}" for i in range(10)]
+        assert len(history._recent) == 4
+        with pytest.raises(IndexError):
+            history[10]
+
+
+def test_recover_interrupted_write():
+    """Test recupero di una riga incompleta e di un indice mancante"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "chat.jsonl"
+        history = ChatHistory(path)
+        history.append("user", "primo")
+        history.append("user", "secondo")
+        history.close()
+        
+        with open(path, "ab") as f:
+            f.write(b'{"role": "user", "te')
+        reopened = ChatHistory(path)
+        assert [m["text"] for m in reopened] == ["primo", "secondo"]
+        reopened.append("user", "terzo")
+        reopened.close()
+        
+        reopened.index_path.unlink()
+        rebuilt = ChatHistory(path)
+        assert [m["text"] for m in rebuilt] == ["primo", "secondo", "terzo"]
+
+
+def test_memory_only():
+    """Test cronologia senza file: restano solo gli ultimi messaggi"""
+    history = ChatHistory(capacity=3)
+    for i in range(5):
+        history.append("user", str(i))
+    
+    assert len(history) == 5
+    assert [m["text"] for m in history.tail(3)] == ["2", "3", "4"]
+    with pytest.raises(IndexError):
+        history.page(0, 1)
@@ -0,0 +1,126 @@
+"""Test per l'indice dei simboli e dei riferimenti"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from fylia.index import SymbolIndex, extract_references
+
+
+def test_extract_references():
+    """Test estrazione di definizioni, import, chiamate e attributi"""
+    source = b"""
+from pkg.persone import Persona
+import os.path
+
+LIMITE = 3
+
+class Gruppo(Persona):
+    def saluta(self):
+        return self.nome.upper()
+
+def crea():
+    return Persona("Mario").saluta()
+"""
+    record = extract_references(source)
+    defs = {(name, kind) for name, kind, _, _ in record['defs']}
+    refs = {(name, kind) for name, kind, _, _ in record['refs']}
+    
+    assert defs == {('LIMITE', 'variable'), ('Gruppo', 'class'),
+                    ('Gruppo.saluta', 'method'), ('crea', 'function')}
+    assert ('pkg.persone.Persona', 'import') in refs
+    assert ('os.path', 'module') in refs
+    assert ('Persona', 'name') in refs
+    assert ('Persona', 'call') in refs
+    assert ('saluta', 'call') in refs
+    assert ('nome', 'attribute') in refs
+    assert extract_references(b"def (") is None
+
+
+def test_index_queries_and_incremental_update():
+    """Test ricerche e aggiornamento incrementale per file"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "persone.py").write_text("class Persona:\n    def saluta(self):\n        pass\n")
+        (root / "app.py").write_text("from persone import Persona\n\np = Persona()\np.saluta()\n")
+        
+        index = SymbolIndex(tmpdir).update()
+        
+        assert [(l.path, l.line, l.kind) for l in index.definitions("Persona")] == [("persone.py", 1, "class")]
+        assert [l.name for l in index.definitions("Persona.saluta")] == ["Persona.saluta"]
+        assert index.definitions("Altro.saluta") == []
+        assert {(l.path, l.kind) for l in index.references("Persona")} == {
+            ("app.py", "import"), ("app.py", "call")}
+        assert [l.line for l in index.references("saluta", kinds=["call"])] == [4]
+        
+        # Modifica di un file e cartella nuova
+        (root / "app.py").write_text("print('nessun uso')\n")
+        (root / "sub").mkdir()
+        (root / "sub" / "altro.py").write_text("from persone import Persona\n")
+        index.update_files({"app.py", "sub"})
+        assert {l.path for l in index.references("Persona")} == {"sub/altro.py"}
+        
+        # Cartella eliminata
+        shutil.rmtree(root / "sub")
+        index.update_files({"sub"})
+        assert index.references("Persona") == []
+        
+        # Un nuovo indice riparte dalla cache su disco con gli stessi risultati
+        reopened = SymbolIndex(tmpdir).update()
+        assert reopened.definitions("Persona") == index.definitions("Persona")
+
+
+def test_index_skips_gitignored_files():
+    """Test indice e tabella salvata escludono i file di .gitignore, come mappa e grafo"""
+    from fylia.symstore import open_fresh_store, save_index_store
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / ".git").mkdir()
+        (root / ".gitignore").write_text("build/\n*_pb2.py\n")
+        (root / "app.py").write_text("def principale():\n    pass\n")
+        (root / "build" / "lib").mkdir(parents=True)
+        (root / "build" / "lib" / "app.py").write_text("def principale():\n    pass\n")
+        # mtime nel passato: la tabella salvata si fida dei metadati
+        os.utime(root / "app.py", (1_600_000_000, 1_600_000_000))
+
+        index = SymbolIndex(tmpdir).update()
+        assert [loc.path for loc in index.definitions("principale")] == ["app.py"]
+        save_index_store(index)
+        store = open_fresh_store(tmpdir)
+        assert store is not None
+        store.close()
+
+        # Anche le cartelle rielencate dopo un cambiamento seguono .gitignore
+        (root / "pkg").mkdir()
+        (root / "pkg" / "modulo.py").write_text("def secondaria():\n    pass\n")
+        (root / "pkg" / "dati_pb2.py").write_text("def principale():\n    pass\n")
+        index.update_files({"pkg"})
+        assert [loc.path for loc in index.definitions("secondaria")] == ["pkg/modulo.py"]
+        assert [loc.path for loc in index.definitions("principale")] == ["app.py"]
+
+        assert len(SymbolIndex(tmpdir, use_git=False).update().definitions("principale")) == 3
+
+
+def test_watcher_updates_skip_gitignored_paths():
+    """Test file e cartelle nuovi sotto una cartella di .gitignore restano fuori dall'indice"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / ".git").mkdir()
+        (root / ".gitignore").write_text("build/\n")
+        (root / "app.py").write_text("def buono():\n    pass\n")
+        index = SymbolIndex(tmpdir, use_cache=False).update()
+
+        # Un file nuovo in una cartella esclusa, segnalato da solo
+        (root / "build" / "lib").mkdir(parents=True)
+        (root / "build" / "lib" / "gen.py").write_text("def cattivo():\n    pass\n")
+        index.update_files({"build/lib/gen.py"})
+        assert index.definitions("cattivo") == []
+
+        # Una cartella esclusa nuova, segnalata come cartella
+        (root / "src" / "build").mkdir(parents=True)
+        (root / "src" / "build" / "gen.py").write_text("def cattivo():\n    pass\n")
+        index.update_files({"build", "build/lib", "src/build"})
+        assert index.definitions("cattivo") == []
+        assert [loc.path for loc in index.definitions("buono")] == ["app.py"]
@@ -38,3 +38,45 @@ def test_file_icon():
     assert generator._get_file_icon('test.py') == '🐍'
     assert generator._get_file_icon('README.md') == '📝'
     assert generator._get_file_icon('config.json') == '📋'
+
+
+def test_generate_map_uses_cache():
+    """Test riuso della cache dei simboli tra due generazioni"""
+    import tempfile
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "modulo.py").write_text("class Foo:\n    def bar(self):\n        pass\n")
+        
+        generator = CodeMapGenerator()
+        first = generator.generate_map(tmpdir)
+        assert (root / ".fylia" / "cache" / "mapgen.json").exists()
+        assert "class Foo" in first
+        assert ".fylia" not in first
+        
+        second = CodeMapGenerator().generate_map(tmpdir)
+        assert second == first
+        
+        uncached = CodeMapGenerator(use_cache=False).generate_map(tmpdir)
+        assert uncached == first
+
+
+def test_parallel_extraction_matches_serial(monkeypatch):
+    """Test estrazione parallela: stesso risultato e stesso ordine del seriale"""
+    import tempfile
+    from fylia import mapgen
+    
+    monkeypatch.setattr(mapgen, 'PARALLEL_MIN_FILES', 2)
+    monkeypatch.setattr(mapgen, 'PARALLEL_BATCH_SIZE', 3)
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        for i in range(10):
+            pkg = root / f"pkg{i % 3}"
+            pkg.mkdir(exist_ok=True)
+            (pkg / f"mod{i}.py").write_text(f"class C{i}:\n    def m(self):\n        pass\n\ndef f{i}():\n    pass\n")
+        
+        serial = CodeMapGenerator(use_cache=False, jobs=1).generate_map(tmpdir)
+        parallel = CodeMapGenerator(use_cache=False, jobs=2).generate_map(tmpdir)
+        assert parallel == serial
+        assert serial.index("pkg0/mod0.py") < serial.index("pkg0/mod3.py") < serial.index("pkg1/mod1.py")
@@ -0,0 +1,53 @@
+"""Test per i formati in streaming della mappa"""
+
+import json
+import tempfile
+from pathlib import Path
+
+from fylia.mapgen import CodeMapGenerator
+from fylia.mapstream import iter_json, iter_ndjson, iter_text
+
+
+def make_project(root: Path) -> None:
+    (root / "pkg" / "sub").mkdir(parents=True)
+    (root / "pkg" / "a.py").write_text("class A:\n    def f(self):\n        pass\n\ndef g():\n    pass\n")
+    (root / "pkg" / "sub" / "rotto.py").write_text("def (\n")
+    (root / "README.md").write_text("# Progetto\n")
+
+
+def test_text_matches_generate_map():
+    """Test testo in streaming identico alla mappa completa"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        make_project(Path(tmpdir))
+        generator = CodeMapGenerator(use_cache=False)
+        assert "\n".join(iter_text(generator, tmpdir)) == generator.generate_map(tmpdir)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        generator = CodeMapGenerator(use_cache=False)
+        assert "\n".join(iter_text(generator, tmpdir)) == generator.generate_map(tmpdir)
+
+
+def test_ndjson_and_json_records():
+    """Test record NDJSON in pre-ordine e documento JSON equivalente"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        make_project(Path(tmpdir))
+        generator = CodeMapGenerator(use_cache=False)
+
+        lines = list(iter_ndjson(generator, tmpdir))
+        assert all(line.endswith("\n") and line.count("\n") == 1 for line in lines)
+        records = [json.loads(line) for line in lines]
+
+        assert records[0] == {'type': 'map', 'version': 1, 'root': str(Path(tmpdir).resolve())}
+        assert [r['path'] for r in records[1:]] == ["pkg", "pkg/sub", "pkg/sub/rotto.py", "pkg/a.py", "README.md"]
+        by_path = {r['path']: r for r in records[1:]}
+        assert by_path["pkg/a.py"] == {
+            'type': 'file', 'path': "pkg/a.py", 'depth': 1,
+            'classes': [{'name': "A", 'methods': ["f"]}], 'functions': ["g"],
+        }
+        assert by_path["pkg/sub/rotto.py"]['error'] == 'parse'
+        assert by_path["README.md"] == {'type': 'file', 'path': "README.md", 'depth': 0,
+                                        'sections': [{'level': 1, 'name': "Progetto"}]}
+
+        document = json.loads("".join(iter_json(generator, tmpdir)))
+        assert document['entries'] == records[1:]
+        assert document['version'] == 1
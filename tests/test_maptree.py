@@ -0,0 +1,117 @@
+"""Test per il pannello della mappa ad albero"""
+
+import asyncio
+import tempfile
+from pathlib import Path
+
+from textual.app import App
+
+from fylia import maptree
+from fylia.deps import DependencyGraph
+from fylia.mapgen import CodeMapGenerator
+from fylia.maptree import MapTree
+
+
+class TreeApp(App):
+    def __init__(self, generator):
+        super().__init__()
+        self.generator = generator
+
+    def compose(self):
+        yield MapTree(self.generator)
+
+
+def labels(node):
+    return [str(child.label) for child in node.children]
+
+
+def test_map_tree_loads_lazily_and_keeps_expansion():
+    """Test caricamento su richiesta, lotti e aggiornamento dei soli nodi aperti"""
+    async def run(root: Path):
+        generator = CodeMapGenerator(use_cache=False)
+        model = generator.build_model(root)
+        app = TreeApp(generator)
+        async with app.run_test() as pilot:
+            tree = app.query_one(MapTree)
+            tree.show_model(model)
+            await pilot.pause()
+
+            # Solo la radice è caricata: le cartelle non hanno ancora figli
+            pkg = tree.root.children[0]
+            assert str(pkg.label) == "📁 pkg/"
+            assert not pkg.children
+            assert set(tree._dir_nodes) == {''}
+
+            pkg.expand()
+            await pilot.pause()
+            names = labels(pkg)
+            assert len(names) == 4
+            assert names[-1] == "… altri 3 elementi"
+
+            # Il nodo segnaposto carica il lotto successivo
+            pkg.children[-1].expand()
+            await pilot.pause()
+            assert len(pkg.children) == 6
+            assert not any("altri" in name for name in labels(pkg))
+
+            # I file Python si espandono in classi, metodi e funzioni
+            module = next(c for c in pkg.children if str(c.label).endswith("mod0.py"))
+            module.expand()
+            await pilot.pause()
+            assert labels(module) == ["🔷 class Servizio", "🔹 def helper()"]
+            assert labels(module.children[0]) == ["esegui()"]
+
+            # Un cambiamento ricarica la cartella aperta mantenendo le espansioni
+            (root / "pkg" / "mod0.py").write_text("def rinominata():\n    pass\n")
+            (root / "pkg" / "nuovo.py").write_text("")
+            model.apply_changes({"pkg/mod0.py", "pkg/nuovo.py"})
+            tree.refresh_paths({"pkg/mod0.py", "pkg/nuovo.py"})
+            await pilot.pause()
+            pkg = tree.root.children[0]
+            assert pkg.is_expanded
+            assert len(pkg.children) == 7
+            assert labels(pkg)[-1] == "… un altro elemento"
+            module = next(c for c in pkg.children if str(c.label).endswith("mod0.py"))
+            assert module.is_expanded
+            assert labels(module) == ["🔹 def rinominata()"]
+
+    original_batch = maptree.CHILDREN_BATCH
+    maptree.CHILDREN_BATCH = 3
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            (root / "pkg").mkdir()
+            for i in range(6):
+                (root / "pkg" / f"mod{i}.py").write_text(
+                    "class Servizio:\n    def esegui(self):\n        pass\n\n"
+                    "def helper():\n    pass\n"
+                )
+            asyncio.run(run(root))
+    finally:
+        maptree.CHILDREN_BATCH = original_batch
+
+
+def test_map_tree_shows_dependencies_and_cycles():
+    """Test gruppi "dipende da"/"usato da" e nodo dei cicli di import"""
+    async def run(root: Path):
+        generator = CodeMapGenerator(use_cache=False)
+        app = TreeApp(generator)
+        async with app.run_test() as pilot:
+            tree = app.query_one(MapTree)
+            tree.show_model(generator.build_model(root))
+            tree.set_graph(DependencyGraph(str(root), use_cache=False, use_git=False).update())
+            await pilot.pause()
+
+            assert labels(tree.root)[0] == "🔁 un ciclo di import"
+            module = next(c for c in tree.root.children if str(c.label).endswith("a.py"))
+            assert module.allow_expand
+            module.expand()
+            await pilot.pause()
+            assert labels(module) == ["⬇ dipende da 1", "⬆ usato da 1"]
+            assert labels(module.children[0]) == ["b.py"]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "a.py").write_text("import b\n")
+        (root / "b.py").write_text("import a\n")
+        asyncio.run(run(root))
@@ -0,0 +1,71 @@
+"""Test per il modello incrementale del progetto"""
+
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+from fylia.mapgen import CodeMapGenerator
+
+
+def test_apply_changes_matches_full_build():
+    """Test aggiornamenti incrementali equivalenti a una visita completa"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "pkg").mkdir()
+        (root / "pkg" / "a.py").write_text("def a():\n    pass\n")
+        (root / "old").mkdir()
+        (root / "old" / "x.py").write_text("class Vecchia:\n    pass\n")
+        
+        generator = CodeMapGenerator(use_cache=False)
+        model = generator.build_model(root)
+        
+        # Modifica, creazione di file e cartelle, eliminazione di una cartella
+        (root / "pkg" / "a.py").write_text("def a_modificata():\n    pass\n")
+        (root / "pkg" / "b.py").write_text("class Nuova:\n    pass\n")
+        (root / "nuova" / "sub").mkdir(parents=True)
+        (root / "nuova" / "sub" / "c.py").write_text("def c():\n    pass\n")
+        shutil.rmtree(root / "old")
+        
+        model.apply_changes({"pkg/a.py", "pkg/b.py", "nuova", "old"})
+        
+        incremental = generator.render_model(model)
+        assert incremental == generator.generate_map(tmpdir)
+        assert "a_modificata" in incremental
+        assert "class Nuova" in incremental
+        assert "nuova/sub/c.py" in incremental
+        assert "Vecchia" not in incremental
+
+
+def test_apply_changes_unknown_path_triggers_rebuild():
+    """Test che '' (eventi persi) ricostruisca tutto il modello"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        generator = CodeMapGenerator(use_cache=False)
+        model = generator.build_model(root)
+        
+        (root / "mod.py").write_text("def f():\n    pass\n")
+        model.apply_changes({""})
+        
+        assert "mod.py" in model.records
+
+
+def test_apply_changes_keeps_cache_open(monkeypatch):
+    """Test gli aggiornamenti riusano la cache aperta e la salvano solo con flush()"""
+    from fylia import cache as cache_module
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "a.py").write_text("def a():\n    pass\n")
+        model = CodeMapGenerator().build_model(root)
+        cache_path = model.cache.path
+        saved = cache_path.stat().st_mtime_ns
+
+        loads = []
+        monkeypatch.setattr(cache_module.FileCache, '_load', lambda self: loads.append(self.path))
+        (root / "b.py").write_text("def b():\n    pass\n")
+        model.apply_changes({"b.py"})
+        assert "b.py" in model.records and loads == []
+        assert cache_path.stat().st_mtime_ns == saved
+
+        model.flush()
+        assert "b.py" in json.loads(cache_path.read_text())['entries']
@@ -75,3 +75,21 @@ def test_generate_diff():
     assert "test.txt" in diff
     assert "-" in diff
     assert "+" in diff
+
+
+def test_generate_diff_roundtrip():
+    """Test che il diff generato sia applicabile con apply_patch"""
+    patcher = Patcher()
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        test_file = Path(tmpdir) / "test.txt"
+        old = "".join(f"riga {i}\n" for i in range(30))
+        new = old.replace("riga 5\n", "riga cinque\n").replace("riga 20\n", "") + "fine"
+        test_file.write_text(old)
+        
+        diff = patcher.generate_diff("test.txt", old, new)
+        
+        assert diff.count("@@ -") == 3
+        assert patcher.apply_patch(str(test_file), diff)
+        assert test_file.read_text() == new
+        assert patcher.generate_diff("test.txt", old, old) == ""
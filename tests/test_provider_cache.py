@@ -0,0 +1,111 @@
+"""Test per la cache delle risposte dei provider"""
+
+import asyncio
+import tempfile
+from pathlib import Path
+
+from fylia.providers.base import BaseProvider, compose_prompt
+from fylia.providers.cache import CachedProvider, normalize_prompt
+from fylia.providers.mock import MockProvider
+
+
+class CountingProvider(BaseProvider):
+    """Provider che conta le chiamate e risponde a chunk"""
+    
+    def __init__(self, size: int = 3):
+        self.calls = 0
+        self.size = size
+    
+    def stream_response(self, user_input):
+        self.calls += 1
+        for i in range(self.size):
+            yield f"{user_input}-{i} "
+
+
+def test_normalize_prompt():
+    """Test forma canonica dei prompt"""
+    assert normalize_prompt("  Crea   una\nClasse ") == "crea una classe"
+
+    # Il contesto del progetto non viene toccato, solo la richiesta
+    with_context = compose_prompt("class A:\n    X = 1\n", "  Spiega   A ")
+    assert normalize_prompt(with_context) == compose_prompt("class A:\n    X = 1\n", "spiega a")
+    assert normalize_prompt(compose_prompt("class a: x = 1", "spiega a")) != normalize_prompt(with_context)
+
+
+def test_memory_hit_replays_chunks():
+    """Test che un prompt ripetuto non interroghi il provider e riproduca i chunk"""
+    inner = CountingProvider()
+    provider = CachedProvider(inner)
+    
+    first = list(provider.stream_response("ciao"))
+    second = list(provider.stream_response("  CIAO "))
+    
+    assert first == second == ["ciao-0 ", "ciao-1 ", "ciao-2 "]
+    assert inner.calls == 1
+    stats = provider.stats()
+    assert (stats['hits_memory'], stats['misses']) == (1, 1)
+    assert stats['bytes_served'] == len("".join(first))
+
+
+def test_context_and_settings_in_key():
+    """Test che contesto e impostazioni diverse non condividano le risposte"""
+    inner = CountingProvider()
+    context = ["a"]
+    provider = CachedProvider(inner, context=lambda: context[0])
+    
+    provider.generate_response("ciao")
+    context[0] = "b"
+    provider.generate_response("ciao")
+    
+    assert inner.calls == 2
+    assert provider.cache_key("x") != CachedProvider(MockProvider(), context="b").cache_key("x")
+
+
+def test_disk_tier_and_ttl():
+    """Test persistenza su disco tra istanze e scadenza"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        inner = CountingProvider()
+        CachedProvider(inner, Path(tmpdir)).generate_response("ciao")
+        
+        reopened = CachedProvider(inner, Path(tmpdir))
+        assert reopened.generate_response("ciao") == "ciao-0 ciao-1 ciao-2 "
+        assert inner.calls == 1
+        assert reopened.stats()['hits_disk'] == 1
+        
+        expired = CachedProvider(inner, Path(tmpdir), ttl=0)
+        expired.generate_response("ciao")
+        assert inner.calls == 2
+
+
+def test_disk_size_eviction():
+    """Test che il livello su disco resti entro la dimensione massima"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        provider = CachedProvider(CountingProvider(size=50), Path(tmpdir),
+                                  memory_items=1, max_disk_bytes=4096)
+        for i in range(20):
+            provider.generate_response(f"prompt {i}")
+        
+        stats = provider.stats()
+        assert stats['disk_bytes'] <= 4096
+        assert stats['evictions'] > 0
+        on_disk = sum(p.stat().st_size for p in Path(tmpdir).rglob("*.json"))
+        assert on_disk == stats['disk_bytes']
+        # La risposta più recente è ancora su disco
+        assert CachedProvider(CountingProvider(), Path(tmpdir)).lookup("prompt 19") is not None
+
+
+def test_async_replay_and_incomplete_stream():
+    """Test streaming asincrono e mancato salvataggio di risposte interrotte"""
+    inner = CountingProvider()
+    provider = CachedProvider(inner)
+    
+    stream = provider.stream_response("interrotta")
+    next(stream)
+    stream.close()
+    assert provider.lookup("interrotta") is None
+    
+    async def collect():
+        return [chunk async for chunk in provider.astream_response("ciao")]
+    
+    assert asyncio.run(collect()) == asyncio.run(collect())
+    assert inner.calls == 2
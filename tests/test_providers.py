@@ -53,3 +53,51 @@ def test_default_response():
     
     assert isinstance(response, str)
     assert 'mock' in response.lower() or 'provider' in response.lower()
+
+
+def test_stream_response_chunks():
+    """Test che i chunk in streaming ricompongano la risposta completa"""
+    provider = MockProvider()
+    chunks = list(provider.stream_response("crea una funzione"))
+    
+    assert len(chunks) > 10
+    assert "".join(chunks) == provider.generate_response("crea una funzione")
+
+
+def test_astream_response():
+    """Test iteratore asincrono e latenza simulata"""
+    import asyncio
+    import time
+    
+    provider = MockProvider(latency=0.05, tokens_per_second=1000)
+    
+    async def collect():
+        start = time.monotonic()
+        first = None
+        chunks = []
+        async for chunk in provider.astream_response("crea una classe"):
+            if first is None:
+                first = time.monotonic() - start
+            chunks.append(chunk)
+        return first, chunks
+    
+    first, chunks = asyncio.run(collect())
+    
+    assert first >= 0.05
+    assert "".join(chunks) == MockProvider().generate_response("crea una classe")
+
+
+def test_base_provider_async_fallback():
+    """Test che un provider solo sincrono funzioni anche in modo asincrono"""
+    import asyncio
+    from fylia.providers import BaseProvider
+    
+    class EchoProvider(BaseProvider):
+        def stream_response(self, user_input):
+            yield from user_input.split()
+    
+    async def collect():
+        return [chunk async for chunk in EchoProvider().astream_response("a b c")]
+    
+    assert asyncio.run(collect()) == ["a", "b", "c"]
+    assert EchoProvider().generate_response("a b c") == "abc"
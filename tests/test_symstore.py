@@ -0,0 +1,94 @@
+"""Test per la tabella compatta dei simboli"""
+
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from fylia.index import SymbolIndex
+from fylia.symstore import (SymbolStore, SymbolTable, default_store_path, open_fresh_store,
+                            save_index_store)
+
+
+SOURCE = """
+LIMITE = 3
+
+class Persona:
+    nome = "x"
+
+    def saluta(self):
+        def interna():
+            pass
+        return interna
+
+
+def saluta():
+    pass
+"""
+
+
+def make_project(root: Path) -> None:
+    (root / "pkg").mkdir()
+    (root / "pkg" / "persone.py").write_text(SOURCE)
+    (root / "pkg" / "àccento.py").write_text("class Città:\n    pass\n")
+    (root / "rotto.py").write_text("def (\n")
+    # mtime vecchi: fuori dalla finestra in cui la cache non si fida
+    for path in root.rglob("*.py"):
+        os.utime(path, (1_600_000_000, 1_600_000_000))
+
+
+def test_store_roundtrip_and_queries():
+    """Test colonne, genitori, righe e ricerca per nome sul file aperto con mmap"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        make_project(root)
+        index = SymbolIndex(tmpdir).update()
+        assert save_index_store(index)
+
+        with SymbolStore(default_store_path(root)) as store:
+            assert len(store) == 7
+            assert set(store.files()) == {"pkg/persone.py", "pkg/àccento.py", "rotto.py"}
+
+            method = store.find("saluta")
+            assert [store.qualname(i) for i in method] == ["Persona.saluta", "saluta"]
+            assert store.lines(method[0]) == (7, 10)
+            assert store.kind(method[0]) == "method"
+            assert store.qualname(store.find("interna")[0]) == "Persona.saluta.interna"
+            assert store.parent(store.find("Persona")[0]) is None
+            assert store.find("nessuno") == []
+            assert store.definitions("Città")[0].path == "pkg/àccento.py"
+
+            # Stesse risposte dell'indice in memoria
+            for symbol in ("saluta", "Persona.saluta", "nome", "LIMITE"):
+                assert store.definitions(symbol) == index.definitions(symbol)
+            assert [store.name(i) for i in store.symbols_in("pkg/persone.py")] == [
+                "LIMITE", "Persona", "nome", "saluta", "interna", "saluta",
+            ]
+
+
+def test_fresh_store_and_invalid_files():
+    """Test tabella scartata quando i file cambiano e file non validi rifiutati"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        make_project(root)
+        assert open_fresh_store(tmpdir) is None
+        save_index_store(SymbolIndex(tmpdir).update())
+
+        store = open_fresh_store(tmpdir)
+        assert store is not None
+        store.close()
+
+        (root / "pkg" / "nuovo.py").write_text("x = 1\n")
+        assert open_fresh_store(tmpdir) is None
+        (root / "pkg" / "nuovo.py").unlink()
+        (root / "rotto.py").unlink()
+        assert open_fresh_store(tmpdir) is None
+
+        path = root / "vuota.fysym"
+        assert SymbolTable().write(path)
+        with SymbolStore(path) as store:
+            assert len(store) == 0 and store.find("x") == []
+        path.write_bytes(b"FYLIASYM" + b"\0" * 20)
+        with pytest.raises(ValueError):
+            SymbolStore(path)
@@ -0,0 +1,60 @@
+"""Test per il tracciamento dei tempi"""
+
+import json
+import tempfile
+from pathlib import Path
+
+from fylia import trace
+from fylia.mapgen import CodeMapGenerator
+
+
+def test_spans_only_when_enabled():
+    """Test senza tracciamento gli span non registrano niente"""
+    assert not trace.enabled()
+    with trace.span('prova.spenta', files=1) as span:
+        span.set(altro=2)
+    trace.count('prova.contatore')
+
+    @trace.traced('prova.funzione')
+    def doppio(x):
+        return x * 2
+
+    assert doppio(2) == 4
+    tracer = trace.enable()
+    try:
+        with trace.span('prova.accesa', files=1) as span:
+            span.set(altro=2)
+        assert doppio(3) == 6
+        assert doppio(4) == 8
+        trace.count('prova.contatore', 5)
+    finally:
+        assert trace.disable() is tracer
+
+    stats = {row[0]: row for row in tracer.summary()}
+    assert set(stats) == {'prova.accesa', 'prova.funzione'}
+    assert stats['prova.funzione'][1] == 2
+    assert tracer.counters == {'prova.contatore': 5}
+    assert "prova.funzione" in trace.format_summary(tracer.summary())
+
+
+def test_chrome_trace_of_map():
+    """Test la traccia della mappa è nel formato Chrome con le fasi principali"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (Path(tmpdir) / "modulo.py").write_text("class Persona:\n    pass\n")
+        tracer = trace.enable()
+        try:
+            CodeMapGenerator(use_cache=False, use_git=False).generate_map(tmpdir)
+        finally:
+            trace.disable()
+        path = Path(tmpdir) / "traccia.json"
+        tracer.write(path)
+        events = json.loads(path.read_text())['traceEvents']
+
+    spans = {e['name']: e for e in events if e['ph'] == 'X'}
+    assert {'map.generate_map', 'map.walk', 'map.parse', 'map.render'} <= set(spans)
+    assert spans['map.parse']['args']['files'] == 1
+    outer = spans['map.generate_map']
+    for name in ('map.walk', 'map.parse', 'map.render'):
+        assert outer['ts'] <= spans[name]['ts']
+        assert spans[name]['ts'] + spans[name]['dur'] <= outer['ts'] + outer['dur'] + 1
+    assert any(e['ph'] == 'C' and e['name'] == 'map.files_parsed' for e in events)
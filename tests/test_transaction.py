@@ -0,0 +1,150 @@
+"""Test per le transazioni su più file"""
+
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from fylia.patcher import Patcher
+from fylia.transaction import Transaction, TransactionError
+
+
+def _leftovers(root: Path) -> list:
+    return [p.name for p in root.rglob("*") if "fylia-" in p.name]
+
+
+def test_commit_multiple_files():
+    """Test scrittura, modifica, eliminazione e creazione di cartelle insieme"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "a.txt").write_text("uno\n")
+        (root / "b.txt").write_text("due\n")
+        os.chmod(root / "a.txt", 0o755)
+        
+        with Patcher().transaction(tmpdir) as tx:
+            tx.modify("a.txt", "uno", "UNO")
+            tx.modify("a.txt", "UNO", "uno!")     # vede la modifica precedente
+            tx.delete("b.txt")
+            tx.create("nuova/cartella/c.txt", "tre\n")
+            assert not tx.exists("b.txt")
+            # Niente è cambiato prima del commit
+            assert (root / "a.txt").read_text() == "uno\n"
+            assert not (root / "nuova/cartella/c.txt").exists()
+        
+        assert (root / "a.txt").read_text() == "uno!\n"
+        assert os.stat(root / "a.txt").st_mode & 0o777 == 0o755
+        assert not (root / "b.txt").exists()
+        assert (root / "nuova/cartella/c.txt").read_text() == "tre\n"
+        assert _leftovers(root) == []
+
+
+def test_exception_discards_changes():
+    """Test che un errore durante la preparazione annulli tutto"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "a.txt").write_text("uno\n")
+        
+        with pytest.raises(TransactionError):
+            with Transaction(tmpdir) as tx:
+                tx.write("a.txt", "cambiato\n")
+                tx.write("sub/b.txt", "nuovo\n")
+                tx.modify("a.txt", "inesistente", "x")
+        
+        assert (root / "a.txt").read_text() == "uno\n"
+        assert not (root / "sub").exists()
+        assert _leftovers(root) == []
+
+
+def test_failed_rename_rolls_back(monkeypatch):
+    """Test che un errore a metà del commit ripristini i file già sostituiti"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        for name in ("a.txt", "b.txt", "c.txt"):
+            (root / name).write_text(f"{name} originale\n")
+        
+        tx = Transaction(tmpdir, durable=False)
+        tx.write("a.txt", "nuovo a\n")
+        tx.delete("b.txt")
+        tx.write("c.txt", "nuovo c\n")
+        tx.write("d.txt", "nuovo d\n")
+        
+        real_replace = os.replace
+        calls = []
+        
+        def failing_replace(src, dst):
+            calls.append(dst)
+            if dst.endswith("c.txt") and "fylia-tmp" in src:
+                raise OSError("disco pieno")
+            return real_replace(src, dst)
+        
+        with monkeypatch.context() as m:
+            m.setattr(os, "replace", failing_replace)
+            with pytest.raises(TransactionError):
+                tx.commit()
+        
+        for name in ("a.txt", "b.txt", "c.txt"):
+            assert (root / name).read_text() == f"{name} originale\n"
+        assert not (root / "d.txt").exists()
+        assert _leftovers(root) == []
+
+
+def test_apply_patch_in_transaction():
+    """Test patch multi-file con rinomina preparata in una transazione"""
+    patch = """diff --git a/old.txt b/new.txt
+similarity index 80%
+rename from old.txt
+rename to new.txt
+--- a/old.txt
++++ b/new.txt
+@@ -1,2 +1,2 @@
+ a
+-b
++B
+--- a/other.txt
++++ b/other.txt
+@@ -1 +1 @@
+-x
++y
+"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "old.txt").write_text("a\nb\n")
+        (root / "other.txt").write_text("non combacia\n")
+        
+        # Il secondo file non si applica: nemmeno la rinomina avviene
+        with pytest.raises(TransactionError):
+            with Transaction(tmpdir) as tx:
+                tx.apply_patch(patch)
+        assert (root / "old.txt").exists() and not (root / "new.txt").exists()
+        
+        (root / "other.txt").write_text("x\n")
+        with Transaction(tmpdir) as tx:
+            assert tx.apply_patch(patch) == ["new.txt", "other.txt"]
+        assert (root / "new.txt").read_text() == "a\nB\n"
+        assert not (root / "old.txt").exists()
+        assert (root / "other.txt").read_text() == "y\n"
+        assert _leftovers(root) == []
+
+
+def test_paths_outside_root_rejected():
+    """Test percorsi di una patch fuori dalla radice (../, assoluti, link) rifiutati"""
+    with tempfile.TemporaryDirectory() as outside, tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "a.txt").write_text("a\n")
+        (root / "fuori").symlink_to(outside)
+        for path in ("../evaso.txt", os.path.join(outside, "evaso.txt"), "fuori/evaso.txt"):
+            patch = f"--- /dev/null\n+++ {path}\n@@ -0,0 +1 @@\n+evaso\n"
+            with pytest.raises(TransactionError, match="fuori dal progetto"):
+                with Transaction(tmpdir, durable=False) as tx:
+                    tx.apply_patch(patch)
+        with pytest.raises(TransactionError, match="fuori dal progetto"):
+            with Transaction(tmpdir, durable=False) as tx:
+                tx.write("sub/../../evaso.txt", "x")
+        assert os.listdir(outside) == []
+        assert not (root.parent / "evaso.txt").exists()
+
+        # Dentro la radice i percorsi con .. restano validi
+        with Transaction(tmpdir, durable=False) as tx:
+            tx.write("sub/../b.txt", "b\n")
+        assert (root / "b.txt").read_text() == "b\n"
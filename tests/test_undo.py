@@ -0,0 +1,121 @@
+"""Test per il registro delle modifiche con annulla e ripristina"""
+
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+
+from fylia.patcher import Patcher
+from fylia.undo import UndoError, UndoJournal
+
+
+def test_undo_redo_whole_changeset():
+    """Test annullamento e ripristino di scritture, creazioni ed eliminazioni insieme"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "a.py").write_text("a = 1\n")
+        (root / "b.py").write_text("b = 1\n")
+        patcher = Patcher(durable=False, journal=UndoJournal(tmpdir))
+
+        with patcher.transaction(tmpdir, label="refactoring") as tx:
+            tx.modify("a.py", "1", "2")
+            tx.delete("b.py")
+            tx.create("pkg/c.py", "c = 1\n")
+        assert patcher.modify_file(str(root / "a.py"), "2", "3")
+
+        # Un nuovo registro legge lo stato salvato su disco
+        journal = UndoJournal(tmpdir)
+        assert [c['label'] for _, c in journal.history()] == ["a.py", "refactoring"]
+        assert journal.undo(steps=2)[1]['label'] == "refactoring"
+        assert (root / "a.py").read_text() == "a = 1\n"
+        assert (root / "b.py").read_text() == "b = 1\n"
+        assert not (root / "pkg" / "c.py").exists()
+        with pytest.raises(UndoError, match="Nessuna modifica da annullare"):
+            journal.undo()
+
+        journal.redo()
+        assert (root / "a.py").read_text() == "a = 2\n"
+        assert not (root / "b.py").exists()
+        assert (root / "pkg" / "c.py").read_text() == "c = 1\n"
+
+        # Un file cambiato fuori dal registro blocca l'annullamento
+        (root / "pkg" / "c.py").write_text("modificato\n")
+        with pytest.raises(UndoError, match="pkg/c.py"):
+            journal.undo()
+        assert (root / "a.py").read_text() == "a = 2\n"
+        journal.undo(force=True)
+        assert not (root / "pkg" / "c.py").exists()
+
+
+def test_blobs_deduplicated_and_collected():
+    """Test contenuti condivisi salvati una volta e raccolta di quelli non più usati"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        journal = UndoJournal(tmpdir, max_changesets=3)
+        patcher = Patcher(durable=False, journal=journal)
+        (root / "x.txt").write_text("zero")
+
+        for i in range(3):
+            assert patcher.create_file(str(root / "x.txt"), "uno" if i % 2 == 0 else "zero")
+        # Tre contenuti diversi ma solo due distinti
+        assert len(journal.blobs.digests()) == 2
+
+        # Un nuovo changeset dopo un annullamento elimina quello ripristinabile
+        journal.undo()
+        assert patcher.create_file(str(root / "x.txt"), "due")
+        assert len(journal.changesets) == 3
+        with pytest.raises(UndoError, match="ripristinare"):
+            journal.redo()
+
+        # Oltre il limite il changeset più vecchio viene dimenticato con i suoi contenuti
+        assert patcher.create_file(str(root / "x.txt"), "tre")
+        assert len(journal.changesets) == 3
+        referenced = {d for c in journal.changesets for _, b, a in c['files'] for d in (b, a)}
+        assert journal.blobs.digests() == referenced
+        assert journal.collect() == (0, 0)
+
+
+def test_journals_share_changesets():
+    """Test due registri aperti sullo stesso progetto (TUI e CLI) non si sovrascrivono"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "a.py").write_text("a = 1\n")
+        (root / "b.py").write_text("b = 1\n")
+        tui = Patcher(durable=False, journal=UndoJournal(tmpdir, max_changesets=2))
+        cli = Patcher(durable=False, journal=UndoJournal(tmpdir, max_changesets=2))
+
+        assert tui.modify_file(str(root / "a.py"), "1", "2")
+        assert cli.modify_file(str(root / "b.py"), "1", "2")
+        assert [c['label'] for _, c in tui.journal.history()] == ["b.py", "a.py"]
+
+        # Oltre il limite si raccolgono solo i contenuti di changeset davvero dimenticati
+        assert tui.modify_file(str(root / "a.py"), "2", "3")
+        assert [c['label'] for _, c in cli.journal.history()] == ["a.py", "b.py"]
+        cli.journal.undo(steps=2, durable=False)
+        assert (root / "a.py").read_text() == "a = 2\n"
+        assert (root / "b.py").read_text() == "b = 1\n"
+        tui.journal.redo(durable=False)
+        assert (root / "b.py").read_text() == "b = 2\n"
+
+
+def test_collect_waits_for_pending_changeset():
+    """Test la raccolta di un altro registro non elimina contenuti salvati ma non ancora registrati"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "a.py").write_text("a = 1\n")
+        (root / "nuovo.py").write_text("a = 2\n")
+        writer = UndoJournal(tmpdir)
+        other = UndoJournal(tmpdir)
+
+        with writer.recording():
+            files = [writer.snapshot(str(root / "a.py"), str(root / "nuovo.py"))]
+            collector = threading.Thread(target=other.collect)
+            collector.start()
+            collector.join(timeout=0.2)
+            assert collector.is_alive()
+            writer.record(files, "modifica")
+        collector.join()
+
+        assert other.collect() == (0, 0)
+        assert len(other.blobs.digests()) == 2
@@ -0,0 +1,157 @@
+"""Test per il parser e l'applicatore di unified diff"""
+
+import io
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from fylia.patcher import Patcher
+from fylia.transaction import Transaction, TransactionError
+from fylia.unidiff import PatchError, apply_hunks, parse_patch
+
+
+def _apply(source: bytes, patch: str, **kwargs) -> bytes:
+    out = io.BytesIO()
+    apply_hunks(io.BytesIO(source), out, parse_patch(patch)[0].hunks, **kwargs)
+    return out.getvalue()
+
+
+SIMPLE_PATCH = """--- a/test.txt
++++ b/test.txt
+@@ -1,3 +1,3 @@
+ line 1
+-line 2
++modified line 2
+ line 3
+"""
+
+
+def test_parse_patch():
+    """Test lettura di intestazioni e hunk"""
+    [file_patch] = parse_patch(SIMPLE_PATCH)
+    
+    assert file_patch.old_path == "test.txt"
+    assert file_patch.new_path == "test.txt"
+    [hunk] = file_patch.hunks
+    assert (hunk.old_start, hunk.old_len, hunk.new_start, hunk.new_len) == (1, 3, 1, 3)
+    assert [tag for tag, _, _ in hunk.lines] == [b' ', b'-', b'+', b' ']
+    
+    with pytest.raises(PatchError):
+        parse_patch("non è una patch")
+
+
+def test_apply_patch_to_file():
+    """Test applicazione tramite Patcher.apply_patch"""
+    patcher = Patcher()
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        test_file = Path(tmpdir) / "test.txt"
+        test_file.write_text("line 1\nline 2\nline 3\n")
+        
+        assert patcher.apply_patch(str(test_file), SIMPLE_PATCH) is True
+        assert test_file.read_text() == "line 1\nmodified line 2\nline 3\n"
+        
+        # Il contesto non combacia più: il file resta invariato
+        assert patcher.apply_patch(str(test_file), SIMPLE_PATCH) is False
+        assert test_file.read_text() == "line 1\nmodified line 2\nline 3\n"
+
+
+def test_offset_and_fuzz():
+    """Test hunk spostati e contesto parzialmente diverso"""
+    source = b"".join(b"x%d\n" % i for i in range(5)) + b"line 1\nline 2\nline 3\n"
+    assert _apply(source, SIMPLE_PATCH).endswith(b"line 1\nmodified line 2\nline 3\n")
+    
+    fuzzy = b"LINE 1\nline 2\nline 3\n"
+    assert _apply(fuzzy, SIMPLE_PATCH) == b"LINE 1\nmodified line 2\nline 3\n"
+    with pytest.raises(PatchError):
+        _apply(fuzzy, SIMPLE_PATCH, fuzz=0)
+
+
+def test_no_newline_at_end_of_file():
+    """Test file senza newline finale"""
+    patch = """--- a/f
++++ b/f
+@@ -1,2 +1,2 @@
+ a
+-b
+\\ No newline at end of file
++c
+"""
+    assert _apply(b"a\nb", patch) == b"a\nc\n"
+    
+    patch = """--- a/f
++++ b/f
+@@ -1 +1 @@
+-a
++b
+\\ No newline at end of file
+"""
+    assert _apply(b"a\n", patch) == b"b"
+
+
+def test_multi_file_create_delete_rename():
+    """Test patch multi-file con creazione, cancellazione e rinomina"""
+    patch = """diff --git a/nuovo.txt b/nuovo.txt
+new file mode 100644
+--- /dev/null
++++ b/nuovo.txt
+@@ -0,0 +1,2 @@
++uno
++due
+diff --git a/vecchio.txt b/vecchio.txt
+deleted file mode 100644
+--- a/vecchio.txt
++++ /dev/null
+@@ -1 +0,0 @@
+-addio
+diff --git a/prima.txt b/dopo.txt
+similarity index 60%
+rename from prima.txt
+rename to dopo.txt
+--- a/prima.txt
++++ b/dopo.txt
+@@ -1,2 +1,2 @@
+ resta
+-cambia
++cambiato
+"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "vecchio.txt").write_text("addio\n")
+        (root / "prima.txt").write_text("resta\ncambia\n")
+        
+        with Transaction(tmpdir, durable=False) as tx:
+            touched = tx.apply_patch(patch)
+        
+        assert touched == ["nuovo.txt", "vecchio.txt", "dopo.txt"]
+        assert (root / "nuovo.txt").read_text() == "uno\ndue\n"
+        assert not (root / "vecchio.txt").exists()
+        assert not (root / "prima.txt").exists()
+        assert (root / "dopo.txt").read_text() == "resta\ncambiato\n"
+
+
+def test_failed_hunk_changes_nothing():
+    """Test che un hunk non applicabile lasci intatti tutti i file"""
+    patch = """--- a/uno.txt
++++ b/uno.txt
+@@ -1 +1 @@
+-a
++A
+--- a/due.txt
++++ b/due.txt
+@@ -1 +1 @@
+-manca
++B
+"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "uno.txt").write_text("a\n")
+        (root / "due.txt").write_text("b\n")
+        
+        with pytest.raises(TransactionError):
+            with Transaction(tmpdir, durable=False) as tx:
+                tx.apply_patch(patch)
+        
+        assert (root / "uno.txt").read_text() == "a\n"
+        assert sorted(p.name for p in root.iterdir()) == ["due.txt", "uno.txt"]
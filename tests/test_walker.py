@@ -0,0 +1,56 @@
+"""Test per la visita del filesystem"""
+
+import tempfile
+from pathlib import Path
+
+from fylia.walker import walk_project
+
+
+def _make_tree(root: Path):
+    (root / "src" / "pkg").mkdir(parents=True)
+    (root / "src" / "pkg" / "mod.py").write_text("x = 1\n")
+    (root / "src" / "main.py").write_text("")
+    (root / "node_modules" / "lib").mkdir(parents=True)
+    (root / "node_modules" / "lib" / "index.py").write_text("")
+    (root / "README.md").write_text("")
+    (root / ".DS_Store").write_text("")
+
+
+def test_walk_order_and_depth():
+    """Test ordine pre-ordine con cartelle prima dei file"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        _make_tree(root)
+        
+        entries = list(walk_project(tmpdir, {'node_modules'}, {'.DS_Store'}))
+        
+        assert [e.rel_path for e in entries] == [
+            "src", "src/pkg", "src/pkg/mod.py", "src/main.py", "README.md",
+        ]
+        assert [e.depth for e in entries] == [0, 1, 2, 1, 0]
+        assert [e.is_last for e in entries] == [False, False, True, True, True]
+        assert entries[0].is_dir and not entries[2].is_dir
+        assert entries[2].stat().st_size == 6
+
+
+def test_walk_prunes_ignored_dirs(monkeypatch):
+    """Test che le cartelle ignorate non vengano mai aperte"""
+    import os
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        _make_tree(root)
+        
+        opened = []
+        real_scandir = os.scandir
+        
+        def spy(path):
+            opened.append(os.path.basename(path))
+            return real_scandir(path)
+        
+        with monkeypatch.context() as m:
+            m.setattr(os, "scandir", spy)
+            list(walk_project(tmpdir, {'node_modules'}))
+        
+        assert "node_modules" not in opened
+        assert "lib" not in opened
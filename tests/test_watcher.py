@@ -0,0 +1,88 @@
+"""Test per l'osservazione dei cambiamenti nei file"""
+
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+
+from fylia.watcher import InotifyWatcher, PollingWatcher
+
+
+def _collect(watcher_cls, action, **kwargs):
+    """Avvia un watcher, esegue action e raccoglie i percorsi notificati"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "node_modules").mkdir()
+        (root / "src").mkdir()
+        
+        changes = set()
+        done = threading.Event()
+        
+        def callback(paths):
+            changes.update(paths)
+            done.set()
+        
+        watcher = watcher_cls(tmpdir, callback, ignore_dirs={'node_modules'}, **kwargs)
+        watcher.start()
+        try:
+            action(root)
+            done.wait(timeout=5)
+        finally:
+            watcher.stop()
+        return changes
+
+
+def _touch_files(root: Path):
+    (root / "node_modules" / "ignorato.js").write_text("x")
+    (root / "src" / "mod.py").write_text("x = 1\n")
+
+
+def test_polling_watcher():
+    """Test rilevamento cambiamenti con il polling"""
+    changes = _collect(PollingWatcher, _touch_files, interval=0.05)
+    assert changes == {"src/mod.py"}
+
+
+def test_inotify_watcher():
+    """Test rilevamento e raggruppamento eventi con inotify"""
+    try:
+        InotifyWatcher(".", lambda paths: None)
+    except OSError:
+        pytest.skip("inotify non disponibile")
+    
+    changes = _collect(InotifyWatcher, _touch_files, debounce=0.05)
+    assert changes == {"src/mod.py"}
+
+
+def test_ignored_trees_not_watched():
+    """Test le cartelle escluse dal predicato (es. .gitignore) non vengono osservate né visitate"""
+    def is_ignored(rel_path, is_dir):
+        return is_dir and rel_path == "build"
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "build" / "lib").mkdir(parents=True)
+        (root / "build" / "lib" / "gen.py").write_text("x = 1\n")
+        (root / "src").mkdir()
+
+        polling = PollingWatcher(tmpdir, lambda paths: None, is_ignored=is_ignored)
+        assert set(polling._take_snapshot()) == {"src"}
+
+        try:
+            watcher = InotifyWatcher(tmpdir, lambda paths: None, is_ignored=is_ignored)
+        except OSError:
+            pytest.skip("inotify non disponibile")
+        watcher._setup()
+        try:
+            assert sorted(watcher._watches.values()) == ["", "src"]
+        finally:
+            watcher._teardown()
+
+    def write_both(root: Path):
+        (root / "build").mkdir()
+        (root / "build" / "gen.py").write_text("x = 1\n")
+        (root / "src" / "mod.py").write_text("x = 1\n")
+
+    changes = _collect(InotifyWatcher, write_both, debounce=0.05, is_ignored=is_ignored)
+    assert changes == {"src/mod.py"}